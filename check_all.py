@@ -229,6 +229,16 @@ def main():
     
     print()
     
+    # 第七部分：检查离线 vis-network 库（缺失时导出的交互式图表只能在线加载，与原有行为一致，不阻止打包）
+    print("【第七部分】检查离线 vis-network 库")
+    print("-" * 50)
+    
+    if not check_file_exists("src/assets/visjs/vendor/vis-network.min.js", "离线vis-network库"):
+        print("⚠ 警告: 打包后的交互式图表将从在线CDN加载，离线环境下无法显示")
+        print("  请在可联网的机器上运行: python scripts/fetch_visjs_library.py 并提交下载的文件")
+    
+    print()
+    
     # 总结
     print("=" * 70)
     if all_good:
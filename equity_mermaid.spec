@@ -87,8 +87,23 @@ project_datas = [
     ('src/utils/excel_smart_importer.py', 'src/utils'),  # 添加Excel智能导入工具
     ('src/utils/translator_service.py', 'src/utils'),  # 添加翻译服务模块
     ('src/utils/translation_usage.py', 'src/utils'),  # 添加翻译用量缓存模块
+    ('src/utils/translation_cache_store.py', 'src/utils'),
+    ('src/utils/batch_translator.py', 'src/utils'),
+    ('src/utils/quota_ledger.py', 'src/utils'),
+    ('src/utils/segment_translator.py', 'src/utils'),
+    ('src/utils/translation_seeding.py', 'src/utils'),
+    ('src/utils/recognition_cache.py', 'src/utils'),
+    ('src/utils/image_preprocessor.py', 'src/utils'),
+    ('src/utils/tiled_recognition.py', 'src/utils'),
+    ('src/utils/llm_streaming.py', 'src/utils'),
+    ('src/utils/batch_recognition.py', 'src/utils'),
     ('src/utils/sidebar_helpers.py', 'src/utils'),  # 添加侧边栏辅助工具（百度搜索英文名校验）
     ('src/utils/display_formatters.py', 'src/utils'),  # 添加显示格式化工具
+    ('src/utils/equity_graph.py', 'src/utils'),  # 添加股权数据索引模型
+    ('src/utils/render_cache.py', 'src/utils'),  # 添加图表渲染缓存
+    ('src/utils/equity_levels.py', 'src/utils'),  # 添加层级计算模块
+    ('src/utils/equity_layout.py', 'src/utils'),  # 添加服务端分层布局
+    ('src/utils/visjs_library.py', 'src/utils'),  # 添加vis-network加载方式
     # 添加SVG图标资源
     ('src/assets/icons/ant-design_picture-outlined.svg', 'src/assets/icons'),
     ('src/assets/icons/ant-design_picture-twotone.svg', 'src/assets/icons'),
@@ -99,6 +114,11 @@ project_datas = [
     ('src/assets/icons/mynaui_edit-one-solid.svg', 'src/assets/icons'),
     ('src/assets/icons/streamline-sharp_edit-pdf-remix.svg', 'src/assets/icons'),
     ('src/assets/icons/streamline-sharp_edit-pdf-solid.svg', 'src/assets/icons'),
+    # 添加vis.js图表模板与静态运行时
+    ('src/assets/visjs/equity_chart.html', 'src/assets/visjs'),
+    ('src/assets/visjs/equity_chart.css', 'src/assets/visjs'),
+    ('src/assets/visjs/equity_chart.js', 'src/assets/visjs'),
+    ('src/assets/visjs/vendor', 'src/assets/visjs/vendor'),  # 离线vis-network库
     ('scripts/run_app.py', 'scripts'),
     ('scripts/start_all.bat', 'scripts'),
     ('scripts/generate_equity_data_with_controller.py', 'scripts'),  # 更新到scripts目录
@@ -235,6 +255,11 @@ allhiddenimports = [
     'src.utils.alicloud_translator',
     'src.utils.config_encryptor',
     'src.utils.display_formatters',
+    'src.utils.equity_graph',
+    'src.utils.render_cache',
+    'src.utils.equity_levels',
+    'src.utils.equity_layout',
+    'src.utils.visjs_library',
     'src.utils.equity_llm_analyzer',
     'src.utils.excel_smart_importer',
     'src.utils.icon_integration',
@@ -242,6 +267,16 @@ allhiddenimports = [
     'src.utils.sidebar_helpers',
     'src.utils.state_persistence',
     'src.utils.translation_usage',
+    'src.utils.translation_cache_store',
+    'src.utils.batch_translator',
+    'src.utils.quota_ledger',
+    'src.utils.segment_translator',
+    'src.utils.translation_seeding',
+    'src.utils.recognition_cache',
+    'src.utils.image_preprocessor',
+    'src.utils.tiled_recognition',
+    'src.utils.llm_streaming',
+    'src.utils.batch_recognition',
     'src.utils.translator_service',
     'src.utils.uvx_helper',
     'src.utils.visjs_equity_chart',
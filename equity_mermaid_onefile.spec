@@ -68,6 +68,11 @@ project_datas = [
     ('src/utils/alicloud_translator.py', 'src/utils'),
     ('src/utils/config_encryptor.py', 'src/utils'),
     ('src/utils/display_formatters.py', 'src/utils'),
+    ('src/utils/equity_graph.py', 'src/utils'),
+    ('src/utils/render_cache.py', 'src/utils'),
+    ('src/utils/equity_levels.py', 'src/utils'),
+    ('src/utils/equity_layout.py', 'src/utils'),
+    ('src/utils/visjs_library.py', 'src/utils'),
     ('src/utils/equity_llm_analyzer.py', 'src/utils'),
     ('src/utils/mermaid_function.py', 'src/utils'),
     ('src/utils/visjs_equity_chart.py', 'src/utils'),
@@ -77,6 +82,16 @@ project_datas = [
     ('src/utils/excel_smart_importer.py', 'src/utils'),
     ('src/utils/translator_service.py', 'src/utils'),
     ('src/utils/translation_usage.py', 'src/utils'),
+    ('src/utils/translation_cache_store.py', 'src/utils'),
+    ('src/utils/batch_translator.py', 'src/utils'),
+    ('src/utils/quota_ledger.py', 'src/utils'),
+    ('src/utils/segment_translator.py', 'src/utils'),
+    ('src/utils/translation_seeding.py', 'src/utils'),
+    ('src/utils/recognition_cache.py', 'src/utils'),
+    ('src/utils/image_preprocessor.py', 'src/utils'),
+    ('src/utils/tiled_recognition.py', 'src/utils'),
+    ('src/utils/llm_streaming.py', 'src/utils'),
+    ('src/utils/batch_recognition.py', 'src/utils'),
     ('src/utils/sidebar_helpers.py', 'src/utils'),
     # SVG图标
     ('src/assets/icons/ant-design_picture-outlined.svg', 'src/assets/icons'),
@@ -88,6 +103,11 @@ project_datas = [
     ('src/assets/icons/mynaui_edit-one-solid.svg', 'src/assets/icons'),
     ('src/assets/icons/streamline-sharp_edit-pdf-remix.svg', 'src/assets/icons'),
     ('src/assets/icons/streamline-sharp_edit-pdf-solid.svg', 'src/assets/icons'),
+    # 添加vis.js图表模板与静态运行时
+    ('src/assets/visjs/equity_chart.html', 'src/assets/visjs'),
+    ('src/assets/visjs/equity_chart.css', 'src/assets/visjs'),
+    ('src/assets/visjs/equity_chart.js', 'src/assets/visjs'),
+    ('src/assets/visjs/vendor', 'src/assets/visjs/vendor'),  # 离线vis-network库
     ('README.md', '.'),
     ('config.json', '.'),
     ('config.key', '.'),
@@ -197,6 +217,11 @@ allhiddenimports = [
     'src.utils.alicloud_translator',
     'src.utils.config_encryptor',
     'src.utils.display_formatters',
+    'src.utils.equity_graph',
+    'src.utils.render_cache',
+    'src.utils.equity_levels',
+    'src.utils.equity_layout',
+    'src.utils.visjs_library',
     'src.utils.equity_llm_analyzer',
     'src.utils.excel_smart_importer',
     'src.utils.icon_integration',
@@ -204,6 +229,16 @@ allhiddenimports = [
     'src.utils.sidebar_helpers',
     'src.utils.state_persistence',
     'src.utils.translation_usage',
+    'src.utils.translation_cache_store',
+    'src.utils.batch_translator',
+    'src.utils.quota_ledger',
+    'src.utils.segment_translator',
+    'src.utils.translation_seeding',
+    'src.utils.recognition_cache',
+    'src.utils.image_preprocessor',
+    'src.utils.tiled_recognition',
+    'src.utils.llm_streaming',
+    'src.utils.batch_recognition',
     'src.utils.translator_service',
     'src.utils.uvx_helper',
     'src.utils.visjs_equity_chart',
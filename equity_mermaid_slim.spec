@@ -149,6 +149,11 @@ base_hiddenimports = [
     "src.utils.alicloud_translator",
     "src.utils.config_encryptor",
     "src.utils.display_formatters",
+    "src.utils.equity_graph",
+    "src.utils.render_cache",
+    "src.utils.equity_levels",
+    "src.utils.equity_layout",
+    "src.utils.visjs_library",
     "src.utils.equity_llm_analyzer",
     "src.utils.excel_smart_importer",
     "src.utils.icon_integration",
@@ -156,6 +161,16 @@ base_hiddenimports = [
     "src.utils.sidebar_helpers",
     "src.utils.state_persistence",
     "src.utils.translation_usage",
+    "src.utils.translation_cache_store",
+    "src.utils.batch_translator",
+    "src.utils.quota_ledger",
+    "src.utils.segment_translator",
+    "src.utils.translation_seeding",
+    "src.utils.recognition_cache",
+    "src.utils.image_preprocessor",
+    "src.utils.tiled_recognition",
+    "src.utils.llm_streaming",
+    "src.utils.batch_recognition",
     "src.utils.translator_service",
     "src.utils.uvx_helper",
     "src.utils.visjs_equity_chart",
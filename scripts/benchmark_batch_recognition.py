@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量识别基准：模拟同一项目的一批股权结构截图（默认 30 张，各自覆盖同一股权树中相互重叠的一部分，
+其中一张重复上传、一张识别失败、一张有分块识别失败），用桩识别函数代替视觉模型，检查：
+- 合并结果还原全部实体和股权关系且没有重复；
+- 重复文件只识别一次，失败文件单独报告、不影响其他文件；部分分块失败的文件标记为部分失败，结果仍参与合并；
+- 同时进行的模型请求数不超过并发上限，耗时随并发数近似线性下降；
+- 核心公司不同的子图（各自的 shareholders / subsidiaries）按各自的核心公司还原为股权关系。
+不会调用真实接口。
+
+用法：
+    py scripts/benchmark_batch_recognition.py
+    py scripts/benchmark_batch_recognition.py --files 50 --latency 0.3 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.batch_recognition import (  # noqa: E402
+    STATUS_DUPLICATE,
+    STATUS_FAILED,
+    STATUS_OK,
+    STATUS_PARTIAL,
+    ApiSlots,
+    BatchItem,
+    batch_summary,
+    build_batch,
+    merge_batch,
+    run_batch,
+)
+
+_REGIONS = ["上海", "深圳", "山东", "杭州", "北京", "成都"]
+_WORDS = ["宏济堂", "美鹏", "华信", "远景", "鼎盛", "恒泰", "安康", "中联", "瑞丰", "博远"]
+
+
+def _equity_tree(count: int, seed: int = 11) -> Tuple[List[str], Dict[int, Tuple[int, float]]]:
+    """随机股权树：实体名称和 下级序号 -> (上级序号, 持股比例)"""
+    rng = random.Random(seed)
+    names = [f"{rng.choice(_REGIONS)}{rng.choice(_WORDS)}{i:03d}投资有限公司" for i in range(count)]
+    parents = {i: (rng.randrange(i), round(rng.uniform(5, 100), 2)) for i in range(1, count)}
+    return names, parents
+
+
+def _screenshots(names: List[str], parents: Dict[int, Tuple[int, float]],
+                 files: int) -> Tuple[List[Tuple[str, bytes]], Dict[bytes, List[int]]]:
+    """把股权树切成相互重叠的截图；返回 ([(文件名, 字节)], 字节 -> 截图中的下级实体序号)"""
+    children = sorted(parents)
+    per_file = max(1, -(-len(children) * 2 // files))  # 每条关系平均出现在两张截图中
+    uploads: List[Tuple[str, bytes]] = []
+    contents: Dict[bytes, List[int]] = {}
+    for f in range(files):
+        start = (f * len(children)) // files
+        visible = [children[(start + k) % len(children)] for k in range(per_file)]
+        data = f"screenshot-{f}".encode()
+        uploads.append((f"股权结构_{f + 1:02d}.png", data))
+        contents[data] = visible
+    # 重复上传第一张
+    uploads.append(("股权结构_01(1).png", uploads[0][1]))
+    return uploads, contents
+
+
+def _stub_recognizer(names: List[str], parents: Dict[int, Tuple[int, float]],
+                     contents: Dict[bytes, List[int]], latency: float, slots: ApiSlots, failing: bytes,
+                     partial: bytes):
+    """桩识别函数：记录同时进行的请求数；failing 对应的截图抛出异常，partial 对应的截图报告一个分块失败"""
+    state = {"active": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def recognize(item: BatchItem):
+        with slots:
+            with lock:
+                state["active"] += 1
+                state["calls"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            try:
+                time.sleep(latency)
+                if item.data == failing:
+                    raise RuntimeError("API Error: Throttling - 模拟限流")
+            finally:
+                with lock:
+                    state["active"] -= 1
+        relationships, entities = [], set()
+        for child in contents[item.data]:
+            parent, percentage = parents[child]
+            relationships.append({"parent": names[parent], "child": names[child], "percentage": percentage})
+            entities.update((parent, child))
+        return {
+            "core_company": names[len(names) - 1] if len(names) - 1 in entities else "",
+            "top_level_entities": [{"name": names[0], "percentage": 100}] if 0 in entities else [],
+            "entity_relationships": relationships,
+            "control_relationships": [],
+            "all_entities": [{"name": names[i], "type": "company"} for i in sorted(entities)],
+        }, False, ({1: "API Error: Throttling - 模拟分块限流"} if item.data == partial else {})
+
+    return recognize, state
+
+
+def _run(uploads, names, parents, contents, latency: float, workers: int, failing: bytes, partial: bytes):
+    slots = ApiSlots(workers)
+    recognize, state = _stub_recognizer(names, parents, contents, latency, slots, failing, partial)
+    items = build_batch(uploads)
+    start = time.perf_counter()
+    run_batch(items, recognize, max_workers=slots.limit)
+    return items, state, time.perf_counter() - start
+
+
+def _check_sub_charts() -> bool:
+    """两张子图：A 的核心为甲、子公司乙；B 的核心为乙、股东甲、子公司丙。丙不应被挂到甲下"""
+    results = {
+        b"sub-chart-a": {"core_company": "上海甲投资有限公司",
+                         "subsidiaries": [{"name": "深圳乙科技有限公司", "percentage": 80}]},
+        b"sub-chart-b": {"core_company": "深圳乙科技有限公司",
+                         "shareholders": [{"name": "上海甲投资有限公司", "percentage": 80}],
+                         "subsidiaries": [{"name": "杭州丙贸易有限公司", "percentage": 51}]},
+    }
+    items = build_batch([("子图A.png", b"sub-chart-a"), ("子图B.png", b"sub-chart-b")])
+    run_batch(items, lambda item: (results[item.data], False, {}), max_workers=2)
+    merged = merge_batch(items)
+    relationships = {(r["parent"], r["child"]): r["percentage"] for r in merged["entity_relationships"]}
+    expected = {
+        ("上海甲投资有限公司", "深圳乙科技有限公司"): 80,
+        ("深圳乙科技有限公司", "杭州丙贸易有限公司"): 51,
+    }
+    ok = True
+    if relationships != expected:
+        print(f"[FAIL] 子图合并：股权关系为 {relationships}")
+        ok = False
+    core = merged["core_company"]
+    listed = {e["name"] for e in merged["shareholders"] + merged["subsidiaries"]}
+    if core in listed or "杭州丙贸易有限公司" in listed:
+        print(f"[FAIL] 子图合并：核心公司 {core} 的股东/子公司为 {sorted(listed)}")
+        ok = False
+    print(f"子图合并 {len(items)} 个文件 → 股权关系 {len(relationships)}/{len(expected)}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="多图批量识别的合并与并发耗时基准（桩识别）")
+    parser.add_argument("--files", type=int, default=30, help="截图数量")
+    parser.add_argument("--entities", type=int, default=150, help="股权树中的实体数量")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次识别耗时（秒）")
+    parser.add_argument("--workers", type=int, default=4, help="并发上限")
+    args = parser.parse_args()
+
+    names, parents = _equity_tree(args.entities)
+    uploads, contents = _screenshots(names, parents, args.files)
+    # 最后一张截图模拟识别失败：只检查其余截图覆盖的关系
+    failing = uploads[args.files - 1][1]
+    partial = uploads[args.files - 2][1]
+    expected = {}
+    for data, children in contents.items():
+        if data != failing:
+            for child in children:
+                parent, percentage = parents[child]
+                expected[(names[parent], names[child])] = percentage
+
+    print("=" * 64)
+    print(f"批量识别基准：{len(uploads)} 个文件（含 1 个重复、1 个失败、1 个部分失败），{args.entities} 个实体，"
+          f"并发 {args.workers}")
+    print("=" * 64)
+    sequential_items, _, sequential_seconds = _run(uploads, names, parents, contents, args.latency, 1,
+                                                   failing, partial)
+    items, state, concurrent_seconds = _run(uploads, names, parents, contents, args.latency, args.workers,
+                                            failing, partial)
+    merged = merge_batch(items)
+    summary = batch_summary(items)
+
+    merged_relationships = {(r["parent"], r["child"]): r["percentage"] for r in merged["entity_relationships"]}
+    expected_entities = {name for pair in expected for name in pair}
+    merged_entities = [e["name"] for e in merged["all_entities"]]
+    speedup = sequential_seconds / max(concurrent_seconds, 1e-9)
+    print(f"逐个识别   {sequential_seconds:6.2f}s")
+    print(f"并发识别   {concurrent_seconds:6.2f}s（加速 {speedup:.1f}x，峰值并发 {state['peak']}）")
+    print(f"文件状态：成功 {summary[STATUS_OK]}，部分失败 {summary[STATUS_PARTIAL]}，失败 {summary[STATUS_FAILED]}，"
+          f"重复 {summary[STATUS_DUPLICATE]}；"
+          f"模型调用 {state['calls']} 次")
+    print(f"合并后 {len(merged_entities)} 个实体、{len(merged_relationships)} 条股权关系")
+
+    ok = True
+    if (summary[STATUS_OK] != args.files - 2 or summary[STATUS_PARTIAL] != 1
+            or summary[STATUS_FAILED] != 1 or summary[STATUS_DUPLICATE] != 1):
+        print("[FAIL] 文件状态统计不正确")
+        ok = False
+    if state["calls"] != args.files:
+        print("[FAIL] 重复文件被重复识别")
+        ok = False
+    if merged_relationships != expected:
+        print(f"[FAIL] 股权关系不一致：期望 {len(expected)} 条")
+        ok = False
+    if set(merged_entities) != expected_entities or len(merged_entities) != len(set(merged_entities)):
+        print("[FAIL] 合并后的实体缺失或重复")
+        ok = False
+    if state["peak"] > args.workers:
+        print(f"[FAIL] 同时进行的请求数 {state['peak']} 超过上限 {args.workers}")
+        ok = False
+    if [i.status for i in sequential_items] != [i.status for i in items]:
+        print("[FAIL] 并发与逐个识别的文件状态不一致")
+        ok = False
+    if args.workers > 1 and speedup < args.workers * 0.6:
+        print("[FAIL] 并发识别的加速比明显低于并发上限")
+        ok = False
+    if not _check_sub_charts():
+        ok = False
+    print("[OK] 基准通过" if ok else "[FAIL] 基准未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
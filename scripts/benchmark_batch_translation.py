@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量翻译基准：启动本地阿里云机器翻译桩服务（支持单条 TranslateGeneral 和批量
+GetBatchTranslate，模拟网络延迟、限流 429 和批量结果中的单条失败），
+在临时工作目录中用 translate_batch 翻译一批股东名称，检查耗时、请求数、QPS 与重试结果。
+不会访问真实接口，也不会写入项目的 user_data。
+
+用法：
+    py scripts/benchmark_batch_translation.py
+    py scripts/benchmark_batch_translation.py --count 800 --qps 40 --latency 0.2 --throttle-rate 0.05
+    py scripts/benchmark_batch_translation.py --pack-size 1   # 逐条翻译对照
+    TRANSLATION_SEGMENTS=0 py scripts/benchmark_batch_translation.py   # 关闭分段翻译对照
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+class StubTranslator:
+    """桩服务状态：请求时间戳、被限流次数、批量结果中的单条失败次数"""
+
+    def __init__(self, latency: float, throttle_rate: float, item_failure_rate: float = 0.0, seed: int = 7):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.item_failure_rate = item_failure_rate
+        self.item_failures = 0
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_times: List[float] = []
+        self.throttled = 0
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive，与真实接口一致，便于观察连接复用
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, query):
+                with stub.lock:
+                    stub.request_times.append(time.monotonic())
+                    throttled = stub.rng.random() < stub.throttle_rate
+                    if throttled:
+                        stub.throttled += 1
+                time.sleep(stub.latency)
+                action = query.get("Action", [""])[0]
+                if throttled:
+                    body = {"Code": "Throttling.User", "Message": "Request was denied due to user flow control."}
+                    status = 429
+                elif action == "GetBatchTranslate":
+                    source = json.loads(query.get("SourceText", ["{}"])[0])
+                    items = []
+                    for index, text in source.items():
+                        with stub.lock:
+                            item_failed = stub.rng.random() < stub.item_failure_rate
+                            if item_failed:
+                                stub.item_failures += 1
+                        if item_failed:
+                            items.append({"index": index, "code": "500", "errorMsg": "stub failure"})
+                        else:
+                            items.append({"index": index, "code": "200", "translated": f"stub {text}",
+                                          "wordCount": str(len(text))})
+                    body = {"RequestId": "stub", "Code": 200, "TranslatedList": items}
+                    status = 200
+                else:
+                    text = query.get("SourceText", [""])[0]
+                    body = {"RequestId": "stub", "Data": {"Translated": f"stub {text}", "WordCount": str(len(text))}}
+                    status = 200
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):  # noqa: N802
+                self._respond(urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query))
+
+            def do_POST(self):  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                self._respond(urllib.parse.parse_qs(self.rfile.read(length).decode("utf-8")))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def peak_qps(self) -> int:
+        """任意 1 秒窗口内的最大请求数"""
+        times = sorted(self.request_times)
+        peak, start = 0, 0
+        for end, value in enumerate(times):
+            while value - times[start] >= 1.0:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="translate_batch 并发批量翻译基准（本地桩服务）")
+    parser.add_argument("--count", type=int, default=800, help="待翻译名称数量")
+    parser.add_argument("--qps", type=float, default=40.0, help="令牌桶 QPS")
+    parser.add_argument("--workers", type=int, default=8, help="并发线程数")
+    parser.add_argument("--latency", type=float, default=0.15, help="桩服务单次响应延迟（秒）")
+    parser.add_argument("--throttle-rate", type=float, default=0.05, help="桩服务随机返回 429 的比例")
+    parser.add_argument("--item-failure-rate", type=float, default=0.01,
+                        help="批量结果中单条返回失败的比例（应自动改走单条翻译）")
+    parser.add_argument("--pack-size", type=int, default=50, help="每次请求打包的条数，1 为逐条翻译")
+    parser.add_argument("--budget", type=float, default=None, help="允许的总耗时（秒），默认按 QPS 估算")
+    args = parser.parse_args()
+
+    stub = StubTranslator(args.latency, args.throttle_rate, args.item_failure_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # 翻译模块在导入时读取接口地址和工作目录，需在导入前设置
+    os.environ["ALICLOUD_MT_ENDPOINT"] = f"http://127.0.0.1:{server.server_address[1]}/"
+    os.environ["ALICLOUD_ACCESS_KEY_ID"] = "stub-id"
+    os.environ["ALICLOUD_ACCESS_KEY_SECRET"] = "stub-secret"
+    workdir = tempfile.mkdtemp(prefix="batch_translate_bench_")
+    os.chdir(workdir)
+
+    from src.utils.batch_translator import summarize_batch, translate_batch  # noqa: E402
+    from src.utils.translation_usage import get_monthly_usage  # noqa: E402
+    from src.utils.alicloud_translator import get_translator_client  # noqa: E402
+
+    from src.utils.segment_translator import SEGMENT_TRANSLATION_ENABLED, segment_company_name  # noqa: E402
+
+    # 同一主体搭配不同地区和组织形式，分段翻译时主体只计费一次
+    regions = ["", "山东", "福建省"]
+    suffixes = ["投资合伙企业（有限合伙）", "有限公司"]
+    names = [f"{regions[i % 3]}测试股东{i // 3}{suffixes[i % 2]}" for i in range(args.count)]
+    last_report = [0.0]
+
+    def _progress(done: int, total: int, name: str, result: dict) -> None:
+        now = time.monotonic()
+        if done == total or now - last_report[0] >= 1.0:
+            last_report[0] = now
+            print(f"  进度 {done}/{total}")
+
+    print("=" * 60)
+    print("批量翻译基准（本地桩服务）")
+    print("=" * 60)
+    start = time.perf_counter()
+    results = translate_batch(names, "zh", "en", qps=args.qps, max_workers=args.workers,
+                              backoff=0.1, progress_callback=_progress, pack_size=args.pack_size)
+    elapsed = time.perf_counter() - start
+    summary = summarize_batch(results)
+
+    print(f"耗时: {elapsed:.2f}s  请求数: {len(stub.request_times)}  被限流: {stub.throttled}  "
+          f"单条失败: {stub.item_failures}")
+    print(f"峰值 QPS: {stub.peak_qps()} (上限 {args.qps:g})  结果: {summary}")
+
+    metrics = get_translator_client().metrics.snapshot()
+    print(f"连接复用: {metrics['connections']} 个连接 / {metrics['requests']} 次请求  "
+          f"建连平均 {metrics['connect_avg_ms']}ms  请求平均 {metrics['request_avg_ms']}ms")
+
+    # 令牌桶按 qps 匀速发放，不允许突发
+    budget = args.budget if args.budget is not None else len(stub.request_times) / args.qps + args.latency + 5
+    ok = True
+    if summary.get("translated", 0) != args.count:
+        print("[FAIL] 存在未翻译成功的名称", [r for r in results.values() if r["status"] != "translated"][:3])
+        ok = False
+    if stub.peak_qps() > args.qps + 1:
+        print("[FAIL] 请求速率超出令牌桶限制")
+        ok = False
+    if metrics['connections'] > args.workers + 1:
+        print("[FAIL] 连接未复用")
+        ok = False
+    if elapsed > budget:
+        print(f"[FAIL] 耗时超出预算 {budget:.1f}s")
+        ok = False
+
+    # 额度按条计费：失败重试和单条回退都不应重复扣减；分段翻译时只有主体计费
+    used = get_monthly_usage()["used"]
+    full_chars = sum(len(name) for name in names)
+    if SEGMENT_TRANSLATION_ENABLED:
+        billable = {}
+        for name in names:
+            segments = segment_company_name(name)
+            billable[segments[1] if segments else name] = True
+        expected_used = sum(len(text) for text in billable)
+    else:
+        expected_used = full_chars
+    print(f"额度扣减: {used} 字符 (应为 {expected_used}，整名翻译需 {full_chars})")
+    if used != expected_used:
+        print("[FAIL] 额度扣减与成功翻译的字符数不一致")
+        ok = False
+
+    # 第二次运行应全部命中缓存
+    start = time.perf_counter()
+    warm = summarize_batch(translate_batch(names, "zh", "en", qps=args.qps, max_workers=args.workers))
+    print(f"缓存命中复跑: {time.perf_counter() - start:.3f}s  结果: {warm}")
+    if warm.get("cached", 0) != args.count:
+        print("[FAIL] 复跑未全部命中缓存")
+        ok = False
+
+    server.shutdown()
+    print("[OK] 基准通过" if ok else "[FAIL] 基准未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+英文名称格式化基准：生成一批英文公司名/人名（含重复），分别测量
+- 不带缓存的逐条格式化（原始实现的开销）；
+- 带缓存的 format_english_company_name（冷启动和热缓存两轮）；
+并校验结果一致。
+
+用法：
+    py scripts/benchmark_english_name_format.py
+    py scripts/benchmark_english_name_format.py --count 100000 --unique 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.display_formatters import (  # noqa: E402
+    _format_english_company_name,
+    _format_english_company_name_cached,
+    format_english_company_name,
+)
+
+_WORDS = ["shandong", "FUJIAN", "hongjitang", "pharmaceutical", "power", "investment", "holding",
+          "international", "technology", "trading", "development", "energy", "capital", "logistics"]
+_SUFFIXES = ["co., ltd", "CO., LTD.", "Limited", "group co., ltd.", "Inc.", "LLC.",
+             "partnership (limited partnership)", "(shanghai) co., ltd"]
+_PEOPLE = ["mr.gao yuankun", "ms.shen yingming", "Mrs.smith", "Shen Yingming", "Lili", "Gao Yuanku N"]
+
+
+def _make_names(count: int, unique: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    pool = []
+    for i in range(max(1, unique)):
+        if i % 10 == 0:
+            pool.append(rng.choice(_PEOPLE) + ("" if i < len(_PEOPLE) * 10 else f" {i}"))
+        else:
+            words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 3)))
+            pool.append(f"{words} {i} {rng.choice(_SUFFIXES)}")
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def _timed(label: str, func) -> tuple:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="format_english_company_name 缓存基准")
+    parser.add_argument("--count", type=int, default=100000, help="名称总数")
+    parser.add_argument("--unique", type=int, default=20000, help="不同名称数量")
+    args = parser.parse_args()
+
+    names = _make_names(args.count, args.unique)
+
+    print("=" * 60)
+    print(f"英文名称格式化基准：{args.count} 个名称，{len(set(names))} 个不同名称")
+    print("=" * 60)
+    baseline, uncached_seconds = _timed("逐条（不带缓存）", lambda: [_format_english_company_name(n) for n in names])
+
+    _format_english_company_name_cached.cache_clear()
+    cold, _ = _timed("逐条（冷缓存）", lambda: [format_english_company_name(n) for n in names])
+    warm, warm_seconds = _timed("逐条（热缓存）", lambda: [format_english_company_name(n) for n in names])
+    print(f"缓存: {_format_english_company_name_cached.cache_info()}")
+
+    ok = True
+    if cold != baseline or warm != baseline:
+        print("[FAIL] 缓存结果与不带缓存的结果不一致")
+        ok = False
+    if warm_seconds >= uncached_seconds:
+        print("[FAIL] 热缓存没有比不带缓存的逐条格式化更快")
+        ok = False
+
+    print(f"加速: 热缓存 {uncached_seconds / max(warm_seconds, 1e-9):.1f}x")
+    print("[OK] 基准通过" if ok else "[FAIL] 基准未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片预处理基准：生成几类典型上传（高分辨率股权结构截图、带 EXIF 方向的手机照片、
+灰度扫描件、小尺寸图表），用 preprocess_image 处理并打印尺寸、字节数、MIME 与耗时，
+检查大图被缩小、旋转正确、小图表无损。
+
+用法：
+    py scripts/benchmark_image_preprocess.py
+    py scripts/benchmark_image_preprocess.py --max-edge 1600
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import sys
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from src.utils.image_preprocessor import MAX_LONG_EDGE, preprocess_image  # noqa: E402
+
+
+def _diagram(width: int, height: int) -> Image.Image:
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    step = max(1, width // 40)
+    for i in range(36):
+        x, y = i * step, (i % 12) * (height // 13)
+        draw.rectangle([x, y, x + step * 3, y + height // 20], outline=(30, 80, 160), width=3)
+        draw.text((x + 6, y + 6), f"Company {i} 有限公司", fill="black")
+        draw.line([x, y + height // 18, x + step * 2, y + height // 18], fill=(220, 30, 30), width=2)
+    return img
+
+
+def _encode(img: Image.Image, fmt: str, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def _cases() -> List[Tuple[str, Callable[[], bytes], Tuple[int, int]]]:
+    """(名称, 生成原图字节, 处理后期望的 (宽, 高)；0 表示按长边上限)"""
+    def photo() -> bytes:
+        noise = Image.effect_noise((4032, 3024), 60)
+        img = Image.merge("RGB", [noise, noise.point(lambda v: v // 2), noise.point(lambda v: 255 - v)])
+        exif = img.getexif()
+        exif[0x0112] = 6  # 需顺时针旋转 90°
+        return _encode(img, "JPEG", quality=95, exif=exif)
+
+    return [
+        ("8K 截图 (PNG)", lambda: _encode(_diagram(7680, 4320), "PNG"), (0, 0)),
+        ("手机照片 (JPEG, EXIF 旋转)", photo, (0, 0)),
+        ("灰度扫描件 (PNG)", lambda: _encode(_diagram(3000, 2000).convert("L").convert("RGB"), "PNG"), (0, 0)),
+        ("小图表 (PNG)", lambda: _encode(_diagram(1200, 800), "PNG"), (1200, 800)),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="视觉模型上传前的图片预处理基准")
+    parser.add_argument("--max-edge", type=int, default=MAX_LONG_EDGE, help="长边上限（像素）")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"图片预处理基准：长边上限 {args.max_edge}px")
+    print("=" * 72)
+    ok = True
+    total_before = total_after = 0
+    for name, make, expected in _cases():
+        original = make()
+        prepared = preprocess_image(original, max_long_edge=args.max_edge)
+        total_before += prepared.original_bytes
+        total_after += len(prepared.data)
+        print(f"{name:<28} {prepared.mime:<11} {prepared.summary()}")
+
+        if expected == (0, 0):
+            if max(prepared.width, prepared.height) != args.max_edge:
+                print(f"[FAIL] {name}: 长边应缩小到 {args.max_edge}px")
+                ok = False
+        elif (prepared.width, prepared.height) != expected:
+            print(f"[FAIL] {name}: 尺寸不应改变")
+            ok = False
+        if prepared.bytes_saved < 0:
+            print(f"[FAIL] {name}: 处理后比原图更大")
+            ok = False
+        decoded = Image.open(io.BytesIO(prepared.data))
+        if decoded.size != (prepared.width, prepared.height):
+            print(f"[FAIL] {name}: 编码结果尺寸与记录不一致")
+            ok = False
+        if "EXIF" in name and prepared.height <= prepared.width:
+            print(f"[FAIL] {name}: 未按 EXIF 方向旋转")
+            ok = False
+        if name.startswith("小图表"):
+            source = Image.open(io.BytesIO(original)).convert("RGB")
+            if decoded.convert("RGB").tobytes() != source.tobytes():
+                print(f"[FAIL] {name}: 调色板转换不是无损的")
+                ok = False
+
+    print(f"合计: {total_before / 1024:.0f}KB → {total_after / 1024:.0f}KB "
+          f"(节省 {(total_before - total_after) / 1024:.0f}KB)")
+    print("[OK] 基准通过" if ok else "[FAIL] 基准未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mermaid 生成性能基准：在合成的 1k/10k/50k 实体股权结构上运行
+generate_mermaid_from_data，检查耗时是否随规模线性增长。
+指定 --reference 时，另在随机小图（股权/控制关系混用 parent/child、from/to、controller/controlled
+三种写法）上与该 git 版本中的实现逐字节比较输出。
+
+用法：
+    py scripts/benchmark_mermaid.py
+    py scripts/benchmark_mermaid.py --sizes 1000 10000 --max-ratio 3 --budget 20
+    py scripts/benchmark_mermaid.py --reference <提交> --seeds 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import random
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.mermaid_function import generate_mermaid_from_data  # noqa: E402
+
+
+def build_synthetic_equity_data(entity_count: int, seed: int = 42) -> Dict[str, Any]:
+    """生成一个多层股权结构：每个实体随机挂到已有实体下，并穿插少量控制关系"""
+    rng = random.Random(seed)
+    names = [
+        f"张{i}" if i % 9 == 0 else f"测试{i}控股有限公司"
+        for i in range(entity_count)
+    ]
+    all_entities: List[Dict[str, Any]] = []
+    for i, name in enumerate(names):
+        entity: Dict[str, Any] = {"name": name, "type": "person" if i % 9 == 0 else "company"}
+        if i % 3 == 0:
+            entity["english_name"] = f"Test {i} Holding Co., Ltd."
+        if i % 5 == 0:
+            entity["registered_capital"] = f"{1000 + i}万元"
+        all_entities.append(entity)
+
+    core_company = names[1]
+    controller = names[0]
+    entity_relationships = []
+    control_relationships = [{"parent": controller, "child": core_company, "description": "实际控制"}]
+    for i in range(2, entity_count):
+        anchor = names[rng.randrange(1, i)]
+        if rng.random() < 0.5:
+            entity_relationships.append({"parent": names[i], "child": anchor, "percentage": rng.choice([5, 20, 51])})
+        else:
+            entity_relationships.append({"parent": anchor, "child": names[i], "percentage": rng.choice([30, 60, 100])})
+        if rng.random() < 0.02:
+            control_relationships.append({"parent": names[i], "child": anchor, "description": "一致行动"})
+
+    top_entities = [
+        {"name": names[i], "type": all_entities[i]["type"], "percentage": 10}
+        for i in range(2, min(entity_count, 50))
+    ]
+    subsidiaries = [{"name": names[i], "percentage": 60} for i in range(50, min(entity_count, 100))]
+
+    return {
+        "main_company": core_company,
+        "core_company": core_company,
+        "controller": controller,
+        "top_entities": top_entities,
+        "subsidiaries": subsidiaries,
+        "entity_relationships": entity_relationships,
+        "control_relationships": control_relationships,
+        "all_entities": all_entities,
+    }
+
+
+# 关系端点的几种写法
+_EQUITY_KEYS = [("parent", "child"), ("from", "to")]
+_CONTROL_KEYS = [("parent", "child"), ("from", "to"), ("controller", "controlled")]
+
+
+def build_mixed_key_equity_data(entity_count: int, seed: int) -> Dict[str, Any]:
+    """随机小图：关系端点混用多种写法，部分股权关系同时存在控制关系"""
+    rng = random.Random(seed)
+    names = [f"实体{i}有限公司" if i % 4 else f"李{i}" for i in range(entity_count)]
+    all_entities = [{"name": n, "type": "company" if i % 4 else "person"} for i, n in enumerate(names)]
+    entity_relationships, control_relationships = [], []
+    for i in range(2, entity_count):
+        parent, child = names[rng.randrange(0, i)], names[i]
+        parent_key, child_key = rng.choice(_EQUITY_KEYS)
+        entity_relationships.append({parent_key: parent, child_key: child, "percentage": rng.choice([0, 20, 51])})
+        if rng.random() < 0.3:
+            parent_key, child_key = rng.choice(_CONTROL_KEYS)
+            control_relationships.append({parent_key: parent, child_key: child, "description": "控制"})
+    return {
+        "main_company": names[1],
+        "core_company": names[1],
+        "controller": names[0],
+        "top_entities": [{"name": names[i], "percentage": 10} for i in range(0, min(entity_count, 6))],
+        "subsidiaries": [{"name": names[i], "percentage": 60} for i in range(6, min(entity_count, 9))],
+        "entity_relationships": entity_relationships,
+        "control_relationships": control_relationships,
+        "all_entities": all_entities,
+    }
+
+
+def _controller_key_case() -> Dict[str, Any]:
+    """控制关系使用 controller/controlled 写法时，同一对实体的股权连线不应被跳过"""
+    return {
+        "main_company": "乙公司",
+        "core_company": "乙公司",
+        "controller": "",
+        "top_entities": [],
+        "subsidiaries": [],
+        "entity_relationships": [{"parent": "甲公司", "child": "丙公司", "percentage": 51}],
+        "control_relationships": [{"controller": "甲公司", "controlled": "丙公司"}],
+        "all_entities": [{"name": n, "type": "company"} for n in ("甲公司", "乙公司", "丙公司")],
+    }
+
+
+def load_reference_generator(ref: str) -> Callable[[Dict[str, Any]], str]:
+    """从指定 git 版本中加载 generate_mermaid_from_data"""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:src/utils/mermaid_function.py"],
+        cwd=PROJECT_ROOT, check=True, capture_output=True,
+    ).stdout.decode("utf-8")
+    module = types.ModuleType(f"mermaid_function_{ref}")
+    exec(compile(source, f"{ref}:src/utils/mermaid_function.py", "exec"), module.__dict__)
+    return module.generate_mermaid_from_data
+
+
+def compare_with_reference(ref: str, seeds: int) -> bool:
+    """在随机小图和 controller/controlled 用例上逐字节比较当前实现与参考版本的输出"""
+    reference = load_reference_generator(ref)
+    cases = [("controller/controlled", _controller_key_case())]
+    cases += [(f"seed {seed}", build_mixed_key_equity_data(40, seed)) for seed in range(seeds)]
+    mismatches = []
+    for label, data in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if generate_mermaid_from_data(data) != reference(data):
+                mismatches.append(label)
+    print(f"与 {ref} 比较 {len(cases)} 个用例：{len(cases) - len(mismatches)} 个一致")
+    if mismatches:
+        print(f"[FAIL] 输出不一致：{', '.join(mismatches[:10])}")
+        return False
+    return True
+
+
+def time_generation(data: Dict[str, Any], repeat: int) -> float:
+    """返回多次运行中的最短耗时（秒），屏蔽生成过程中的调试输出"""
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            generate_mermaid_from_data(data)
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="generate_mermaid_from_data 性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="合成实体数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每个规模重复次数（取最短）")
+    parser.add_argument("--max-ratio", type=float, default=3.0,
+                        help="最大规模与最小规模的单实体耗时之比上限（线性算法应接近 1）")
+    parser.add_argument("--budget", type=float, default=None, help="最大规模允许的总耗时（秒），不设置则不检查")
+    parser.add_argument("--reference", default=None, help="与该 git 版本的实现比较输出（如基线提交）")
+    parser.add_argument("--seeds", type=int, default=30, help="比较输出时的随机小图数量")
+    args = parser.parse_args()
+
+    sizes = sorted(set(args.sizes))
+    results = []
+    print("=" * 60)
+    print("Mermaid 生成性能基准")
+    print("=" * 60)
+    for size in sizes:
+        data = build_synthetic_equity_data(size)
+        elapsed = time_generation(data, args.repeat)
+        per_entity_us = elapsed / size * 1e6
+        results.append((size, elapsed, per_entity_us))
+        print(f"{size:>8} 实体: {elapsed * 1000:10.1f} ms  ({per_entity_us:.1f} µs/实体)")
+
+    ok = True
+    if len(results) >= 2:
+        ratio = results[-1][2] / results[0][2]
+        print(f"单实体耗时比 ({sizes[-1]} / {sizes[0]}): {ratio:.2f} (上限 {args.max_ratio})")
+        if ratio > args.max_ratio:
+            print("[FAIL] 耗时增长明显超过线性")
+            ok = False
+    if args.budget is not None and results[-1][1] > args.budget:
+        print(f"[FAIL] {sizes[-1]} 实体耗时 {results[-1][1]:.2f}s 超出预算 {args.budget}s")
+        ok = False
+    if args.reference and not compare_with_reference(args.reference, args.seeds):
+        ok = False
+
+    print("[OK] 基准通过" if ok else "[FAIL] 基准未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块识别基准：在一张大画布上按层级摆放一批实体（默认 120 个），用桩识别函数代替视觉模型——
+每块只"看到"落在块内的实体（被块边缘截断的名称只输出可见的前半部分）和两端都可见的股权关系，
+并让个别块报告错误的持股比例；检查合并结果能否还原全部实体和关系（无重复、截断名称已归并、
+比例按多数取值），以及并发识别相对逐块识别的耗时；另用一组各自报告不同核心公司的块，检查
+shareholders / subsidiaries 按各块自己的核心公司还原为股权关系。不会调用真实接口。
+
+用法：
+    py scripts/benchmark_tiled_recognition.py
+    py scripts/benchmark_tiled_recognition.py --entities 200 --latency 0.3 --workers 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from PIL import Image  # noqa: E402
+
+from src.utils.tiled_recognition import (  # noqa: E402
+    ImageTile,
+    merge_recognitions,
+    recognize_tiles,
+    split_image,
+    tile_grid,
+)
+
+_REGIONS = ["上海", "深圳", "山东", "杭州", "北京", "成都"]
+_WORDS = ["宏济堂", "美鹏", "华信", "远景", "鼎盛", "恒泰", "安康", "中联", "瑞丰", "博远"]
+
+
+class Chart:
+    """按层级排布的实体：名称、中心坐标、上级和持股比例"""
+
+    def __init__(self, count: int, width: int, height: int, half_width: int = 180, seed: int = 7):
+        rng = random.Random(seed)
+        self.width, self.height = width, height
+        self.half_width = half_width
+        levels = 6
+        per_level = max(1, count // levels)
+        self.names: List[str] = []
+        self.positions: List[Tuple[int, int]] = []
+        self.parents: Dict[int, Tuple[int, float]] = {}
+        for i in range(count):
+            level = min(levels - 1, i // per_level)
+            slot = i - level * per_level
+            slots = per_level if level < levels - 1 else count - level * per_level
+            x = half_width + int((slot + 0.5) * (width - 2 * half_width) / max(1, slots))
+            y = int((level + 0.5) * height / levels)
+            self.names.append(f"{rng.choice(_REGIONS)}{rng.choice(_WORDS)}{i:03d}投资管理有限公司")
+            self.positions.append((x, y))
+            if level > 0:
+                # 上级取上一层中水平位置最近的实体，保证连线较短
+                candidates = [j for j in range(count) if min(levels - 1, j // per_level) == level - 1]
+                parent = min(candidates, key=lambda j: abs(self.positions[j][0] - x) if j < i else 1e9)
+                self.parents[i] = (parent, round(rng.uniform(5, 100), 2))
+
+    def visible(self, box: Tuple[int, int, int, int], index: int) -> str:
+        """块内可见的名称：完整、截断（只可见左半部分）或空"""
+        x, y = self.positions[index]
+        half_width = self.half_width
+        left, top, right, bottom = box
+        if not top <= y < bottom:
+            return ""
+        if left <= x - half_width and x + half_width <= right:
+            return self.names[index]
+        if x - half_width < right <= x + half_width and x - half_width >= left:
+            return self.names[index][:8]
+        return ""
+
+
+def _stub_recognizer(chart: Chart, tiles: List[ImageTile], latency: float):
+    """桩识别函数；第一块对"至少 3 块可见"的关系报告错误比例（多数表决应能纠正）"""
+    seen_by: Dict[int, int] = {}
+    for tile in tiles:
+        for child, (parent, _) in chart.parents.items():
+            if chart.visible(tile.box, child) and chart.visible(tile.box, parent):
+                seen_by[child] = seen_by.get(child, 0) + 1
+
+    def recognize(tile: ImageTile) -> Dict:
+        time.sleep(latency)
+        visible = {i: chart.visible(tile.box, i) for i in range(len(chart.names))}
+        visible = {i: name for i, name in visible.items() if name}
+        relationships = []
+        for child, (parent, percentage) in chart.parents.items():
+            if child in visible and parent in visible:
+                if tile.index == 0 and seen_by.get(child, 0) >= 3:
+                    percentage = round(percentage / 2, 2)
+                relationships.append({"parent": visible[parent], "child": visible[child], "percentage": percentage})
+        tops = [i for i in visible if i not in chart.parents]
+        return {
+            "core_company": chart.names[len(chart.names) - 1] if len(chart.names) - 1 in visible else "",
+            "top_level_entities": [{"name": visible[i], "percentage": 100} for i in tops],
+            "entity_relationships": relationships,
+            "control_relationships": [],
+            "all_entities": [{"name": name, "type": "company"} for name in visible.values()],
+        }
+    return recognize
+
+
+def _check_local_cores() -> bool:
+    """各块报告不同的核心公司时，shareholders / subsidiaries 应相对各自的核心公司还原"""
+    partials = [
+        {"core_company": "上海甲投资有限公司",
+         "shareholders": [{"name": "张三", "percentage": 70}],
+         "subsidiaries": [{"name": "深圳乙科技有限公司", "percentage": 60}]},
+        {"core_company": "深圳乙科技有限公司",
+         "shareholders": [{"name": "上海甲投资有限公司", "percentage": 60}],
+         "subsidiaries": [{"name": "杭州丙贸易有限公司", "ratio": 0.51}]},
+        {"core_company": "上海甲投资有限公司",
+         "subsidiaries": [{"name": "深圳乙科技有限公司", "percentage": 60}]},
+    ]
+    merged = merge_recognitions(partials)
+    expected = {
+        ("张三", "上海甲投资有限公司"): 70,
+        ("上海甲投资有限公司", "深圳乙科技有限公司"): 60,
+        ("深圳乙科技有限公司", "杭州丙贸易有限公司"): 51,
+    }
+    relationships = {(r["parent"], r["child"]): r["percentage"] for r in merged["entity_relationships"]}
+    ok = True
+    if merged["core_company"] != "上海甲投资有限公司":
+        print(f"[FAIL] 多核心公司：合并后的核心公司为 {merged['core_company']}")
+        ok = False
+    if relationships != expected:
+        print(f"[FAIL] 多核心公司：股权关系为 {relationships}")
+        ok = False
+    shareholders = {e["name"] for e in merged["shareholders"]}
+    subsidiaries = {e["name"] for e in merged["subsidiaries"]}
+    if shareholders != {"张三"} or subsidiaries != {"深圳乙科技有限公司"}:
+        print(f"[FAIL] 多核心公司：股东 {sorted(shareholders)}，子公司 {sorted(subsidiaries)}")
+        ok = False
+    print(f"多核心公司 {len(partials)} 块 → 股权关系 {len(relationships)}/{len(expected)}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="分块识别拼接与并发耗时基准（桩识别）")
+    parser.add_argument("--entities", type=int, default=120, help="实体数量")
+    parser.add_argument("--width", type=int, default=6400, help="画布宽度（像素）")
+    parser.add_argument("--height", type=int, default=4800, help="画布高度（像素）")
+    parser.add_argument("--latency", type=float, default=0.2, help="每块识别耗时（秒）")
+    parser.add_argument("--workers", type=int, default=4, help="并发数")
+    args = parser.parse_args()
+
+    chart = Chart(args.entities, args.width, args.height)
+    buffer = io.BytesIO()
+    Image.new("RGB", (args.width, args.height), "white").save(buffer, format="PNG")
+    grid = tile_grid(args.width, args.height)
+    tiles = split_image(buffer.getvalue(), grid)
+    recognize = _stub_recognizer(chart, tiles, args.latency)
+
+    print("=" * 64)
+    print(f"分块识别基准：{args.entities} 个实体，{args.width}×{args.height}，"
+          f"{grid[0]}×{grid[1]} 块，并发 {args.workers}")
+    print("=" * 64)
+    start = time.perf_counter()
+    sequential, _ = recognize_tiles(tiles, recognize, max_workers=1)
+    sequential_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    partials, errors = recognize_tiles(tiles, recognize, max_workers=args.workers)
+    concurrent_seconds = time.perf_counter() - start
+    merged = merge_recognitions(partials)
+
+    raw_entities = sum(len(p["all_entities"]) for p in partials)
+    names = {e["name"] for e in merged["all_entities"]}
+    expected_relationships = {(chart.names[p], chart.names[c]): pct for c, (p, pct) in chart.parents.items()}
+    merged_relationships = {(r["parent"], r["child"]): r["percentage"] for r in merged["entity_relationships"]}
+    print(f"逐块识别   {sequential_seconds:6.2f}s")
+    print(f"并发识别   {concurrent_seconds:6.2f}s（加速 {sequential_seconds / max(concurrent_seconds, 1e-9):.1f}x）")
+    print(f"各块实体合计 {raw_entities} → 合并后 {len(names)}；股权关系 {len(merged_relationships)}/"
+          f"{len(expected_relationships)}")
+
+    ok = not errors and sequential == partials
+    if names != set(chart.names):
+        missing, extra = set(chart.names) - names, names - set(chart.names)
+        print(f"[FAIL] 实体不一致：缺少 {len(missing)}，多出 {len(extra)}（如 {sorted(extra)[:3]}）")
+        ok = False
+    if merged_relationships != expected_relationships:
+        wrong = [k for k, v in expected_relationships.items() if merged_relationships.get(k) != v]
+        print(f"[FAIL] 股权关系不一致：{len(wrong)} 条缺失或比例错误")
+        ok = False
+    if len(merged["all_entities"]) != len(names):
+        print("[FAIL] 合并结果中存在重复实体")
+        ok = False
+    if concurrent_seconds >= sequential_seconds:
+        print("[FAIL] 并发识别没有比逐块识别更快")
+        ok = False
+    if not _check_local_cores():
+        ok = False
+    print("[OK] 基准通过" if ok else "[FAIL] 基准未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+vis.js 节点层级/同层排序基准：在合成的 5k 实体股权结构上运行
+convert_equity_data_to_visjs，检查耗时是否随规模线性增长，
+并校验每个节点都按实体名称（而非标签文本）取得层级和排序依据。
+
+用法：
+    py scripts/benchmark_visjs_layout.py
+    py scripts/benchmark_visjs_layout.py --sizes 1000 5000 --budget 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.benchmark_mermaid import build_synthetic_equity_data  # noqa: E402
+from src.utils.equity_levels import assign_entity_levels  # noqa: E402
+from src.utils.visjs_equity_chart import convert_equity_data_to_visjs  # noqa: E402
+
+
+def silence_streamlit_warnings() -> None:
+    """脱离 streamlit run 运行时，session_state 访问会产生大量警告，基准中屏蔽"""
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def build_visjs_equity_data(entity_count: int, seed: int = 42) -> Dict[str, Any]:
+    """复用 Mermaid 基准的合成数据，并补齐编辑器格式的字段"""
+    data = build_synthetic_equity_data(entity_count, seed)
+    data["top_level_entities"] = data["top_entities"]
+    data["actual_controller"] = data["controller"]
+    return data
+
+
+def check_nodes(data: Dict[str, Any], nodes: List[Dict], node_id_map: Dict[str, int]) -> List[str]:
+    """校验节点层级与统一层级计算结果一致、节点ID映射可双向还原"""
+    errors = []
+    entity_levels, _ = assign_entity_levels(data)
+    names_by_id = {node_id: name for name, node_id in node_id_map.items()}
+    if len(names_by_id) != len(nodes):
+        errors.append(f"node_id_map 与节点数量不一致: {len(names_by_id)} != {len(nodes)}")
+    for node in nodes:
+        name = names_by_id.get(node["id"])
+        if name is None:
+            errors.append(f"节点 {node['id']} 无法反查实体名称")
+        elif node["level"] != entity_levels.get(name, 1):
+            errors.append(f"节点 {name} 层级 {node['level']} != {entity_levels.get(name)}")
+        if len(errors) >= 5:
+            break
+    return errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="convert_equity_data_to_visjs 层级与排序性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000], help="合成实体数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每个规模重复次数（取最短）")
+    parser.add_argument("--max-ratio", type=float, default=3.0,
+                        help="最大规模与最小规模的单实体耗时之比上限（线性算法应接近 1）")
+    parser.add_argument("--budget", type=float, default=None, help="最大规模允许的总耗时（秒），不设置则不检查")
+    args = parser.parse_args()
+
+    silence_streamlit_warnings()
+    sizes = sorted(set(args.sizes))
+    results = []
+    ok = True
+    print("=" * 60)
+    print("vis.js 层级与同层排序性能基准")
+    print("=" * 60)
+    for size in sizes:
+        data = build_visjs_equity_data(size)
+        best = float("inf")
+        for _ in range(args.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                nodes, _, node_id_map = convert_equity_data_to_visjs(data)
+                best = min(best, time.perf_counter() - start)
+        per_entity_us = best / size * 1e6
+        results.append((size, best, per_entity_us))
+        print(f"{size:>8} 实体: {best * 1000:10.1f} ms  ({per_entity_us:.1f} µs/实体, {len(nodes)} 节点)")
+
+        errors = check_nodes(data, nodes, node_id_map)
+        for error in errors:
+            print(f"[FAIL] {error}")
+        ok = ok and not errors
+
+    if len(results) >= 2:
+        ratio = results[-1][2] / results[0][2]
+        print(f"单实体耗时比 ({sizes[-1]} / {sizes[0]}): {ratio:.2f} (上限 {args.max_ratio})")
+        if ratio > args.max_ratio:
+            print("[FAIL] 耗时增长明显超过线性")
+            ok = False
+    if args.budget is not None and results[-1][1] > args.budget:
+        print(f"[FAIL] {sizes[-1]} 实体耗时 {results[-1][1]:.2f}s 超出预算 {args.budget}s")
+        ok = False
+
+    print("[OK] 基准通过" if ok else "[FAIL] 基准未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
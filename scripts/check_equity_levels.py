@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+层级计算一致性检查：在随机生成的小型无环股权结构上，比较 assign_entity_levels 与
+旧版迭代算法（此前 visjs_equity_chart._calculate_unified_levels 的实现，下方原样保留）的结果。
+
+旧算法按关系顺序逐条推进，结果与关系顺序有关，部分顺序下连核心公司本身都会偏离第 0 层。
+因此只比较“确定”的情形：把关系顺序打乱若干次，保留核心公司仍在第 0 层的结果，
+这些结果完全一致时才作为期望值；比较范围为与核心公司相连的实体
+（不相连的结构旧算法一律放在 -10 层，新算法保留其内部层次，属预期差异）。
+
+用法：
+    py scripts/check_equity_levels.py
+    py scripts/check_equity_levels.py --graphs 1000 --shuffles 200 --seed 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.equity_graph import EquityGraph  # noqa: E402
+from src.utils.equity_levels import assign_entity_levels  # noqa: E402
+
+CORE = "N0"
+
+
+def legacy_levels(equity_data: Dict[str, Any]) -> Dict[str, int]:
+    """旧版迭代层级算法（最多 20 轮双向推进 + 无父股东贴近子实体 + 未定层级的默认值）"""
+    graph = EquityGraph(equity_data)
+    all_relationships = equity_data.get("entity_relationships", []) + equity_data.get("control_relationships", [])
+    core_company = equity_data.get("core_company", "")
+    entity_levels: Dict[str, int] = {}
+    if core_company:
+        entity_levels[core_company] = 0
+    for top_entity in equity_data.get("top_level_entities", []):
+        top_name = top_entity.get("name")
+        if top_name and top_name != core_company and top_name not in entity_levels:
+            entity_levels[top_name] = -1
+
+    for _ in range(20):
+        changed = False
+        for rel in all_relationships:
+            parent_entity = rel.get("parent", rel.get("from", ""))
+            child_entity = rel.get("child", rel.get("to", ""))
+            if not parent_entity or not child_entity:
+                continue
+            parent_known = parent_entity in entity_levels
+            child_known = child_entity in entity_levels
+            if parent_known:
+                parent_level = entity_levels[parent_entity]
+                if (not child_known) or (entity_levels[child_entity] <= parent_level):
+                    if (not child_known) or (entity_levels[child_entity] != parent_level + 1):
+                        entity_levels[child_entity] = parent_level + 1
+                        changed = True
+                        child_known = True
+            if child_known:
+                child_level = entity_levels[child_entity]
+                if (not parent_known) or (entity_levels[parent_entity] >= child_level):
+                    if (not parent_known) or (entity_levels[parent_entity] != child_level - 1):
+                        entity_levels[parent_entity] = child_level - 1
+                        changed = True
+        if not changed:
+            break
+
+    for entity_name, level in list(entity_levels.items()):
+        if graph.parents_of(entity_name, include_control=True):
+            continue
+        children = graph.children_of(entity_name, include_control=True)
+        child_levels = [entity_levels[ch] for ch in children if ch in entity_levels]
+        if child_levels and level < min(child_levels) - 1:
+            entity_levels[entity_name] = min(child_levels) - 1
+
+    for entity in equity_data.get("all_entities", []):
+        entity_name = entity.get("name", "")
+        if entity_name and entity_name not in entity_levels:
+            if entity_name == core_company:
+                entity_levels[entity_name] = 0
+            else:
+                entity_levels[entity_name] = -1 if entity_name in graph.top_level_names else -10
+    return entity_levels
+
+
+def random_acyclic_data(rng: random.Random, size: int, density: float = 0.25) -> Dict[str, Any]:
+    """随机无环股权结构：按随机排列只连“前 → 后”的边，核心公司为 N0"""
+    order = list(range(size))
+    rng.shuffle(order)
+    relationships = [
+        {"parent": f"N{order[i]}", "child": f"N{order[j]}", "percentage": 10}
+        for i in range(size) for j in range(i + 1, size) if rng.random() < density
+    ]
+    rng.shuffle(relationships)
+    return {
+        "core_company": CORE,
+        "entity_relationships": relationships,
+        "control_relationships": [],
+        "top_level_entities": [],
+        "all_entities": [{"name": f"N{k}"} for k in range(size)],
+    }
+
+
+def connected_to_core(equity_data: Dict[str, Any]) -> Set[str]:
+    neighbours: Dict[str, Set[str]] = {}
+    for rel in equity_data["entity_relationships"]:
+        neighbours.setdefault(rel["parent"], set()).add(rel["child"])
+        neighbours.setdefault(rel["child"], set()).add(rel["parent"])
+    seen, stack = {CORE}, [CORE]
+    while stack:
+        for other in neighbours.get(stack.pop(), ()):
+            if other not in seen:
+                seen.add(other)
+                stack.append(other)
+    return seen
+
+
+def expected_levels(equity_data: Dict[str, Any], names: Set[str], shuffles: int) -> Optional[Dict[str, int]]:
+    """旧算法在核心公司保持第 0 层的各种关系顺序下的一致结果；结果随顺序变化时返回 None"""
+    outcomes = set()
+    for k in range(shuffles):
+        relationships = list(equity_data["entity_relationships"])
+        random.Random(k).shuffle(relationships)
+        levels = legacy_levels(dict(equity_data, entity_relationships=relationships))
+        if levels.get(CORE) == 0:
+            outcomes.add(tuple(sorted((name, levels[name]) for name in names)))
+    if len(outcomes) != 1:
+        return None
+    return dict(next(iter(outcomes)))
+
+
+def _fixed_cases() -> List[Dict[str, Any]]:
+    """评审中给出的反例：核心公司的直接子公司应在第 1 层、直接股东应在第 -1 层"""
+    def data(pairs):
+        return {
+            "core_company": CORE,
+            "entity_relationships": [{"parent": p, "child": c, "percentage": 10} for p, c in pairs],
+            "all_entities": [{"name": f"N{k}"} for k in range(8)],
+        }
+    return [data([("N0", "N1"), ("N4", "N1"), ("N7", "N4")]), data([("N3", "N0"), ("N3", "N4")])]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="层级计算与旧版迭代算法的一致性检查")
+    parser.add_argument("--graphs", type=int, default=300, help="随机结构数量")
+    parser.add_argument("--shuffles", type=int, default=200, help="每个结构打乱关系顺序的次数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    print("=" * 64)
+    print(f"层级一致性检查：{args.graphs} 个随机无环结构，每个打乱 {args.shuffles} 次")
+    print("=" * 64)
+    ok = True
+    for data in _fixed_cases():
+        names = connected_to_core(data)
+        expected = {name: level for name, level in legacy_levels(data).items() if name in names}
+        actual = {name: level for name, level in assign_entity_levels(data)[0].items() if name in names}
+        if actual != expected:
+            print(f"[FAIL] 固定用例不一致：期望 {expected}，实际 {actual}")
+            ok = False
+
+    rng = random.Random(args.seed)
+    compared = ambiguous = mismatched = 0
+    for _ in range(args.graphs):
+        data = random_acyclic_data(rng, rng.randint(3, 9))
+        names = connected_to_core(data)
+        expected = expected_levels(data, names, args.shuffles)
+        if expected is None:
+            ambiguous += 1
+            continue
+        compared += 1
+        levels, _ = assign_entity_levels(data)
+        actual = {name: levels[name] for name in names}
+        if actual != expected:
+            mismatched += 1
+            if mismatched <= 3:
+                pairs = [(r["parent"], r["child"]) for r in data["entity_relationships"]]
+                print(f"[FAIL] {pairs}\n       期望 {expected}\n       实际 {actual}")
+    print(f"比较 {compared} 个，不一致 {mismatched} 个；旧算法结果随关系顺序变化、跳过 {ambiguous} 个")
+    ok = ok and mismatched == 0
+    print("[OK] 检查通过" if ok else "[FAIL] 检查未通过")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
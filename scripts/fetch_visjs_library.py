@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+下载固定版本的 vis-network 到 src/assets/visjs/vendor/，供导出的 HTML 离线使用。
+
+用法：
+    py scripts/fetch_visjs_library.py
+    py scripts/fetch_visjs_library.py --url https://内网镜像/vis-network.min.js
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.visjs_library import VISJS_CDN_URL, VISJS_VERSION, vendored_library_path  # noqa: E402
+
+# 正常的 vis-network.min.js 约 500KB，过小说明下载到了错误页面
+MIN_LIBRARY_BYTES = 100 * 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=f"下载 vis-network {VISJS_VERSION} 到随包资源目录")
+    parser.add_argument("--url", default=VISJS_CDN_URL, help="下载地址（可指向内网镜像）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="请求超时（秒）")
+    args = parser.parse_args()
+
+    target = vendored_library_path()
+    print(f"下载 {args.url}")
+    try:
+        response = requests.get(args.url, timeout=args.timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"[FAIL] 下载失败: {e}")
+        return 1
+
+    content = response.content
+    if len(content) < MIN_LIBRARY_BYTES or b"vis" not in content[:2048]:
+        print(f"[FAIL] 下载内容不像 vis-network 库（{len(content)} 字节）")
+        return 1
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(content)
+    print(f"[OK] 已保存到 {target}（{len(content) / 1024:.0f} KB）")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
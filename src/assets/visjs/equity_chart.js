@@ -0,0 +1,2746 @@
+/*
+ * 交互式股权结构图运行时（vis.js）
+ * 由 src/utils/visjs_equity_chart.py 在进程内加载一次并内联到导出的 HTML 中，
+ * 每张图表的数据和参数通过页面中的 CHART_CONFIG 注入。
+ */
+
+// 数据
+const nodes = new vis.DataSet(CHART_CONFIG.nodes);
+// 边只携带 from/to/label，控制关系等特殊类型按 kind 叠加共享样式
+const edgeKinds = CHART_CONFIG.edgeKinds || {};
+const edges = new vis.DataSet(CHART_CONFIG.edges.map(edge =>
+    (edge.kind && edgeKinds[edge.kind]) ? Object.assign({}, edgeKinds[edge.kind], edge) : edge
+));
+const subgraphs = CHART_CONFIG.subgraphs;
+// 节点坐标是否已由服务端分层布局计算
+const serverLayout = CHART_CONFIG.serverLayout;
+
+// 工具栏中随配置变化的显示值
+document.getElementById('levelSeparationSlider').value = CHART_CONFIG.levelSeparation;
+document.getElementById('levelSeparationValue').textContent = CHART_CONFIG.levelSeparation + 'px';
+document.getElementById('layoutToggleBtn').textContent = serverLayout ? '切换到层级布局' : '切换到自由布局';
+
+let subgraphBoxes = [];
+let animationFrameId = null;
+let groupVisibility = {};
+let toolbarExpanded = false;
+
+// 内边距设置
+let paddingX = 25;
+let paddingY = 20;
+
+// 🔥 新增：字体和边框调整变量
+let globalFontSize = 12;
+let globalBorderWidth = 1;
+
+// 节点大小调整相关变量
+let resizeHandles = [];
+let resizingNode = null;
+let resizeHandle = null;
+let startX = 0;
+let startY = 0;
+let originalWidth = 0;
+let originalHeight = 0;
+let isResizing = false;
+
+// localStorage 存储键
+const NODE_SIZE_STORAGE_KEY = 'visjs_nodeCustomSizes';
+const GLOBAL_NODE_SIZE_KEY = 'visjs_globalNodeSize';
+
+// 全局节点尺寸设置（带版本控制，便于刷新默认值）
+const DEFAULT_NODE_WIDTH = 181;
+const DEFAULT_NODE_HEIGHT = 56;
+const NODE_SIZE_VERSION = '2025-01';
+let globalNodeWidth = DEFAULT_NODE_WIDTH;
+let globalNodeHeight = DEFAULT_NODE_HEIGHT;
+
+// 🔥 布局模式切换
+let isHierarchicalLayout = !serverLayout;  // 默认使用层级布局；已有服务端坐标时直接使用坐标
+
+// 🔥 节点位置控制
+let selectedNodeId = null;  // 当前选中的节点ID
+const MOVE_STEP = 20;  // 每次移动的像素距离
+
+// 🔥 Ctrl+拖拽Y轴移动控制
+let isDraggingWithCtrl = false;  // 是否正在Ctrl+拖拽
+let draggedNodeId = null;  // 正在拖拽的节点ID
+let dragStartPos = null;  // 拖拽开始时的位置
+
+// 🔥 右键菜单控制
+let contextMenuNodeId = null;  // 右键菜单对应的节点ID
+let contextMenuEdgeId = null;  // 右键菜单对应的边ID
+let hiddenNodes = new Set();   // 隐藏的节点ID集合
+let hiddenEdges = new Set();   // 隐藏的边ID集合
+let deletedNodes = new Set();  // 删除的节点ID集合
+let deletedEdges = new Set();  // 删除的边ID集合
+let nodeHistory = [];          // 操作历史，用于撤销功能
+
+function normalizeNodeId(nodeId) {
+    if (typeof nodeId === 'string') {
+        const trimmed = nodeId.trim();
+        if (!trimmed) {
+            return nodeId;
+        }
+        const numericId = Number(trimmed);
+        if (!Number.isNaN(numericId)) {
+            return numericId;
+        }
+    }
+    return nodeId;
+}
+
+// 🔥 消息显示函数
+function showMessage(message, type = 'info') {
+    console.log(`[消息] ${message}`);
+
+    // 创建消息元素
+    const messageDiv = document.createElement('div');
+    messageDiv.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: ${type === 'error' ? '#dc3545' : type === 'success' ? '#28a745' : '#007bff'};
+        color: white;
+        padding: 12px 20px;
+        border-radius: 6px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        z-index: 10000;
+        font-size: 14px;
+        max-width: 300px;
+        word-wrap: break-word;
+        opacity: 0;
+        transform: translateX(100%);
+        transition: all 0.3s ease;
+    `;
+    messageDiv.textContent = message;
+
+    document.body.appendChild(messageDiv);
+
+    // 显示动画
+    setTimeout(() => {
+        messageDiv.style.opacity = '1';
+        messageDiv.style.transform = 'translateX(0)';
+    }, 100);
+
+    // 自动隐藏
+    setTimeout(() => {
+        messageDiv.style.opacity = '0';
+        messageDiv.style.transform = 'translateX(100%)';
+        setTimeout(() => {
+            if (messageDiv.parentNode) {
+                messageDiv.parentNode.removeChild(messageDiv);
+            }
+        }, 300);
+    }, 3000);
+}
+
+// 保存节点尺寸到localStorage
+function saveNodeSize(nodeId, width, height) {
+    const savedSizes = getSavedSizes();
+    const sanitizedWidth = Number.isFinite(width) ? Math.round(width) : DEFAULT_NODE_WIDTH;
+    const sanitizedHeight = Number.isFinite(height) ? Math.round(height) : DEFAULT_NODE_HEIGHT;
+    savedSizes[nodeId] = {
+        width: sanitizedWidth,
+        height: sanitizedHeight,
+        version: NODE_SIZE_VERSION
+    };
+    localStorage.setItem(NODE_SIZE_STORAGE_KEY, JSON.stringify(savedSizes));
+    console.log(`保存节点 ${nodeId} 尺寸: ${sanitizedWidth}x${sanitizedHeight} (版本: ${NODE_SIZE_VERSION})`);
+}
+
+// 从localStorage读取节点尺寸
+function getSavedSizes() {
+    const saved = localStorage.getItem(NODE_SIZE_STORAGE_KEY);
+    return saved ? JSON.parse(saved) : {};
+}
+
+// 加载已保存的节点尺寸
+function loadSavedSizes() {
+    const savedSizes = getSavedSizes();
+    const updates = [];
+    let hasInvalidEntries = false;
+
+    nodes.forEach(node => {
+        const saved = savedSizes[node.id];
+        if (!saved) {
+            return;
+        }
+
+        const savedVersion = saved.version;
+        const savedWidth = parseInt(saved.width, 10);
+        const savedHeight = parseInt(saved.height, 10);
+
+        if (
+            savedVersion !== NODE_SIZE_VERSION ||
+            !Number.isFinite(savedWidth) ||
+            !Number.isFinite(savedHeight) ||
+            savedWidth <= 0 ||
+            savedHeight <= 0
+        ) {
+            delete savedSizes[node.id];
+            hasInvalidEntries = true;
+            console.log(`跳过节点 ${node.id} 的旧版或无效尺寸缓存`);
+            return;
+        }
+
+        updates.push({
+            id: node.id,
+            widthConstraint: {
+                minimum: savedWidth,
+                maximum: savedWidth
+            },
+            heightConstraint: {
+                minimum: savedHeight,
+                maximum: savedHeight
+            }
+        });
+        console.log(`加载节点 ${node.id} 尺寸: ${savedWidth}x${savedHeight} (版本: ${savedVersion})`);
+    });
+
+    if (updates.length > 0) {
+        nodes.update(updates);
+    }
+
+    if (hasInvalidEntries) {
+        localStorage.setItem(NODE_SIZE_STORAGE_KEY, JSON.stringify(savedSizes));
+        console.log('已清理失效的节点尺寸缓存');
+    }
+}
+
+// 重置所有节点尺寸
+function resetAllNodeSizes() {
+    localStorage.removeItem(NODE_SIZE_STORAGE_KEY);
+    applyGlobalNodeSize();
+    removeResizeHandles();
+    console.log('已重置所有节点尺寸');
+}
+
+// 重置单个节点尺寸
+function resetSingleNodeSize(nodeId) {
+    const savedSizes = getSavedSizes();
+    delete savedSizes[nodeId];
+    localStorage.setItem(NODE_SIZE_STORAGE_KEY, JSON.stringify(savedSizes));
+
+    nodes.update([{
+        id: nodeId,
+        widthConstraint: { minimum: globalNodeWidth, maximum: globalNodeWidth },
+        heightConstraint: { minimum: globalNodeHeight, maximum: globalNodeHeight }
+    }]);
+
+    console.log(`已重置节点 ${nodeId} 的尺寸`);
+}
+
+// 应用全局节点尺寸
+function applyGlobalNodeSize() {
+    const updates = [];
+    nodes.forEach(node => {
+        updates.push({
+            id: node.id,
+            widthConstraint: { minimum: globalNodeWidth, maximum: globalNodeWidth },
+            heightConstraint: { minimum: globalNodeHeight, maximum: globalNodeHeight }
+        });
+    });
+    nodes.update(updates);
+
+    // 保存全局尺寸设置
+    localStorage.setItem(GLOBAL_NODE_SIZE_KEY, JSON.stringify({
+        width: globalNodeWidth,
+        height: globalNodeHeight,
+        version: NODE_SIZE_VERSION
+    }));
+
+    console.log(`已应用全局节点尺寸: ${globalNodeWidth}x${globalNodeHeight}`);
+}
+
+// 🔥 新增：应用字体和边框设置
+function applyFontAndBorder() {
+    try {
+        console.log(`🎨 应用字体和边框设置: 字体${globalFontSize}px, 边框${globalBorderWidth}px`);
+
+        // 更新所有节点的字体和边框设置
+        const updates = [];
+        nodes.forEach(node => {
+            // 字体颜色由节点分组提供，仅覆盖自带字体颜色的节点
+            const font = {size: globalFontSize, multi: true};
+            if (node.font && node.font.color) {
+                font.color = node.font.color;
+            }
+            updates.push({
+                id: node.id,
+                font: font,
+                borderWidth: globalBorderWidth
+            });
+        });
+        nodes.update(updates);
+
+        // 更新网络选项
+        network.setOptions({
+            nodes: {
+                font: {
+                    size: globalFontSize,
+                    color: '#212529',
+                    multi: true
+                },
+                borderWidth: globalBorderWidth
+            }
+        });
+
+        console.log('✅ 字体和边框设置已应用');
+    } catch (error) {
+        console.error('❌ 应用字体和边框设置失败:', error);
+    }
+}
+
+// 🔥 新增：重置字体和边框到默认值
+function resetFontAndBorder() {
+    try {
+        console.log('🔄 重置字体和边框到默认值...');
+
+        // 重置为默认值
+        globalFontSize = 12;
+        globalBorderWidth = 1;
+
+        // 更新滑块
+        document.getElementById('fontSizeSlider').value = globalFontSize;
+        document.getElementById('borderWidthSlider').value = globalBorderWidth;
+
+        // 更新显示值
+        document.getElementById('fontSizeValue').textContent = globalFontSize + 'px';
+        document.getElementById('borderWidthValue').textContent = globalBorderWidth + 'px';
+
+        // 应用重置后的设置
+        applyFontAndBorder();
+
+        console.log('✅ 字体和边框已重置到默认值');
+    } catch (error) {
+        console.error('❌ 重置字体和边框失败:', error);
+    }
+}
+
+// 加载全局节点尺寸设置
+function loadGlobalNodeSize() {
+    let shouldPersistDefaults = false;
+    try {
+        const saved = localStorage.getItem(GLOBAL_NODE_SIZE_KEY);
+        if (saved) {
+            const parsed = JSON.parse(saved);
+            const savedVersion = parsed?.version;
+            const savedWidth = parseInt(parsed?.width, 10);
+            const savedHeight = parseInt(parsed?.height, 10);
+
+            if (
+                savedVersion === NODE_SIZE_VERSION &&
+                Number.isFinite(savedWidth) &&
+                Number.isFinite(savedHeight) &&
+                savedWidth > 0 &&
+                savedHeight > 0
+            ) {
+                globalNodeWidth = savedWidth;
+                globalNodeHeight = savedHeight;
+                console.log(`加载全局节点尺寸: ${globalNodeWidth}x${globalNodeHeight} (来自版本: ${savedVersion})`);
+            } else {
+                console.log('检测到旧版或异常的全局节点尺寸缓存，将重置为默认值');
+                globalNodeWidth = DEFAULT_NODE_WIDTH;
+                globalNodeHeight = DEFAULT_NODE_HEIGHT;
+                shouldPersistDefaults = true;
+            }
+        } else {
+            shouldPersistDefaults = true;
+        }
+    } catch (error) {
+        console.warn('读取全局节点尺寸失败，使用默认值:', error);
+        globalNodeWidth = DEFAULT_NODE_WIDTH;
+        globalNodeHeight = DEFAULT_NODE_HEIGHT;
+        shouldPersistDefaults = true;
+    }
+
+    document.getElementById('globalWidthSlider').value = globalNodeWidth;
+    document.getElementById('globalHeightSlider').value = globalNodeHeight;
+    document.getElementById('globalWidthValue').textContent = globalNodeWidth + 'px';
+    document.getElementById('globalHeightValue').textContent = globalNodeHeight + 'px';
+
+    if (shouldPersistDefaults) {
+        localStorage.removeItem(NODE_SIZE_STORAGE_KEY);
+        console.log('已清除旧的自定义节点尺寸缓存');
+        localStorage.setItem(GLOBAL_NODE_SIZE_KEY, JSON.stringify({
+            width: globalNodeWidth,
+            height: globalNodeHeight,
+            version: NODE_SIZE_VERSION
+        }));
+        console.log(`已刷新全局节点尺寸缓存为默认值: ${globalNodeWidth}x${globalNodeHeight}`);
+    }
+}
+
+// 编辑分组标签
+function editSubgraphLabel(subgraphId, currentLabel, subgraphIndex) {
+    console.log(`开始编辑分组标签: ${subgraphId}, 当前标签: ${currentLabel}, 索引: ${subgraphIndex}`);
+    const newLabel = prompt('请输入新的分组名称:', currentLabel);
+    if (newLabel !== null && newLabel.trim() !== '') {
+        // 更新subgraphs数组中的标签
+        subgraphs[subgraphIndex].label = newLabel.trim();
+
+        // 更新页面上的标签显示
+        const labelElement = document.querySelector(`[data-subgraph-id="${subgraphId}"]`);
+        if (labelElement) {
+            labelElement.textContent = newLabel.trim();
+            console.log(`已更新页面标签显示: ${newLabel.trim()}`);
+        } else {
+            console.log(`未找到标签元素: [data-subgraph-id="${subgraphId}"]`);
+        }
+
+        // 更新工具栏中的复选框标签
+        const checkboxLabel = document.querySelector(`label[for="group-${subgraphId}"]`);
+        if (checkboxLabel) {
+            checkboxLabel.textContent = newLabel.trim();
+            console.log(`已更新工具栏复选框标签: ${newLabel.trim()}`);
+        } else {
+            console.log(`未找到复选框标签: label[for="group-${subgraphId}"]`);
+        }
+
+        console.log(`分组 ${subgraphId} 标签已更新为: ${newLabel.trim()}`);
+    }
+}
+
+// 创建调整手柄
+function createResizeHandles(nodeId) {
+    removeResizeHandles();
+
+    const nodePos = network.getPositions([nodeId])[nodeId];
+    if (!nodePos) return;
+
+    const node = nodes.get(nodeId);
+    const nodeWidth = node.widthConstraint
+        ? (typeof node.widthConstraint.maximum === 'number' ? node.widthConstraint.maximum : globalNodeWidth)
+        : globalNodeWidth;
+    const nodeHeight = node.heightConstraint
+        ? (typeof node.heightConstraint.minimum === 'number' ? node.heightConstraint.minimum : globalNodeHeight)
+        : globalNodeHeight;
+
+    const containerRect = container.getBoundingClientRect();
+    const scale = network.getScale();
+    const view = network.getViewPosition();
+
+    // 计算节点在屏幕上的位置
+    const screenX = nodePos.x * scale + view.x + containerRect.width / 2;
+    const screenY = nodePos.y * scale + view.y + containerRect.height / 2;
+
+    const halfWidth = (nodeWidth * scale) / 2;
+    const halfHeight = (nodeHeight * scale) / 2;
+
+    // 4个核心调整手柄的位置（只保留角落手柄，避免误操作）
+    const handlePositions = [
+        { class: 'top-left', x: screenX - halfWidth, y: screenY - halfHeight },
+        { class: 'top-right', x: screenX + halfWidth, y: screenY - halfHeight },
+        { class: 'bottom-right', x: screenX + halfWidth, y: screenY + halfHeight },
+        { class: 'bottom-left', x: screenX - halfWidth, y: screenY + halfHeight }
+    ];
+
+    handlePositions.forEach(pos => {
+        const handle = document.createElement('div');
+        handle.className = `resize-handle ${pos.class}`;
+        handle.style.left = (pos.x - 4) + 'px';
+        handle.style.top = (pos.y - 4) + 'px';
+        handle.dataset.direction = pos.class;
+        handle.dataset.nodeId = nodeId;
+
+        handle.addEventListener('mousedown', startResize);
+        container.appendChild(handle);
+        resizeHandles.push(handle);
+    });
+
+    console.log(`为节点 ${nodeId} 创建了 ${resizeHandles.length} 个调整手柄`);
+}
+
+// 移除调整手柄
+function removeResizeHandles() {
+    resizeHandles.forEach(handle => {
+        if (handle.parentNode) {
+            handle.parentNode.removeChild(handle);
+        }
+    });
+    resizeHandles = [];
+}
+
+// 更新调整手柄位置
+function updateResizeHandles() {
+    if (resizeHandles.length === 0) return;
+
+    const nodeId = parseInt(resizeHandles[0].dataset.nodeId);
+    const nodePos = network.getPositions([nodeId])[nodeId];
+    if (!nodePos) return;
+
+    const node = nodes.get(nodeId);
+    const nodeWidth = node.widthConstraint
+        ? (typeof node.widthConstraint.maximum === 'number' ? node.widthConstraint.maximum : globalNodeWidth)
+        : globalNodeWidth;
+    const nodeHeight = node.heightConstraint
+        ? (typeof node.heightConstraint.minimum === 'number' ? node.heightConstraint.minimum : globalNodeHeight)
+        : globalNodeHeight;
+
+    const containerRect = container.getBoundingClientRect();
+    const scale = network.getScale();
+    const view = network.getViewPosition();
+
+    const screenX = nodePos.x * scale + view.x + containerRect.width / 2;
+    const screenY = nodePos.y * scale + view.y + containerRect.height / 2;
+
+    const halfWidth = (nodeWidth * scale) / 2;
+    const halfHeight = (nodeHeight * scale) / 2;
+
+    const handlePositions = [
+        { class: 'top-left', x: screenX - halfWidth, y: screenY - halfHeight },
+        { class: 'top-right', x: screenX + halfWidth, y: screenY - halfHeight },
+        { class: 'bottom-right', x: screenX + halfWidth, y: screenY + halfHeight },
+        { class: 'bottom-left', x: screenX - halfWidth, y: screenY + halfHeight }
+    ];
+
+    resizeHandles.forEach((handle, index) => {
+        const pos = handlePositions[index];
+        handle.style.left = (pos.x - 4) + 'px';
+        handle.style.top = (pos.y - 4) + 'px';
+    });
+}
+
+// 开始调整大小
+function startResize(e) {
+    e.preventDefault();
+    e.stopPropagation();
+
+    isResizing = true;
+    resizingNode = parseInt(e.target.dataset.nodeId);
+    resizeHandle = e.target.dataset.direction;
+    startX = e.clientX;
+    startY = e.clientY;
+
+    const node = nodes.get(resizingNode);
+    originalWidth = node.widthConstraint
+        ? (typeof node.widthConstraint.maximum === 'number' ? node.widthConstraint.maximum : globalNodeWidth)
+        : globalNodeWidth;
+    originalHeight = node.heightConstraint
+        ? (typeof node.heightConstraint.minimum === 'number' ? node.heightConstraint.minimum : globalNodeHeight)
+        : globalNodeHeight;
+
+    document.body.classList.add('resizing');
+    console.log(`开始调整节点 ${resizingNode}，方向: ${resizeHandle}`);
+
+    document.addEventListener('mousemove', handleResize);
+    document.addEventListener('mouseup', stopResize);
+}
+
+// 处理调整大小
+function handleResize(e) {
+    if (!isResizing) return;
+
+    const deltaX = e.clientX - startX;
+    const deltaY = e.clientY - startY;
+    const scale = network.getScale();
+
+    let newWidth = originalWidth;
+    let newHeight = originalHeight;
+
+    // 根据调整手柄方向计算新尺寸（4个角落手柄）
+    switch (resizeHandle) {
+        case 'top-left':
+            newWidth = Math.max(80, originalWidth - deltaX / scale);
+            newHeight = Math.max(30, originalHeight - deltaY / scale);
+            break;
+        case 'top-right':
+            newWidth = Math.max(80, originalWidth + deltaX / scale);
+            newHeight = Math.max(30, originalHeight - deltaY / scale);
+            break;
+        case 'bottom-right':
+            newWidth = Math.max(80, originalWidth + deltaX / scale);
+            newHeight = Math.max(30, originalHeight + deltaY / scale);
+            break;
+        case 'bottom-left':
+            newWidth = Math.max(80, originalWidth - deltaX / scale);
+            newHeight = Math.max(30, originalHeight + deltaY / scale);
+            break;
+    }
+
+    // 更新节点尺寸
+    nodes.update([{
+        id: resizingNode,
+        widthConstraint: { 
+            minimum: Math.max(80, newWidth - 50), 
+            maximum: newWidth + 50 
+        },
+        heightConstraint: { 
+            minimum: Math.max(40, newHeight - 20) 
+        }
+    }]);
+
+    // 更新调整手柄位置
+    updateResizeHandles();
+
+    // 更新分组框位置（如果存在）
+    if (typeof updateSubgraphPositions === 'function') {
+        updateSubgraphPositions();
+    }
+}
+
+// 停止调整大小
+function stopResize() {
+    if (!isResizing) return;
+
+    isResizing = false;
+    document.body.classList.remove('resizing');
+
+    // 保存调整后的尺寸
+    const node = nodes.get(resizingNode);
+    const width = node.widthConstraint
+        ? (typeof node.widthConstraint.maximum === 'number' ? node.widthConstraint.maximum : globalNodeWidth)
+        : globalNodeWidth;
+    const height = node.heightConstraint
+        ? (typeof node.heightConstraint.minimum === 'number' ? node.heightConstraint.minimum : globalNodeHeight)
+        : globalNodeHeight;
+
+    saveNodeSize(resizingNode, width, height);
+
+    console.log(`完成调整节点 ${resizingNode}，最终尺寸: ${width}x${height}`);
+
+    resizingNode = null;
+    resizeHandle = null;
+
+    document.removeEventListener('mousemove', handleResize);
+    document.removeEventListener('mouseup', stopResize);
+}
+
+// 初始化分组可见性 - 默认不选中
+subgraphs.forEach((subgraph, index) => {
+    groupVisibility[subgraph.id] = false;
+});
+
+// 🔥 优化：智能层级布局，减少连线交叉，实现清晰的上-下、左-右结构
+const options = {
+    layout: {
+        hierarchical: {
+            enabled: isHierarchicalLayout,  // 🔥 动态控制层级布局
+            direction: 'UD',
+            sortMethod: 'directed',  // 🔥 改为directed，避免hubsize的堆叠问题
+            levelSeparation: CHART_CONFIG.levelSeparation,  // 🔥 使用原始层级间距值
+            nodeSpacing: Math.max(280, CHART_CONFIG.nodeSpacing),      // 🔥 优化节点间距
+            treeSpacing: Math.max(280, CHART_CONFIG.treeSpacing),      // 🔥 优化树间距
+            blockShifting: true,
+            edgeMinimization: true,
+            parentCentralization: false,  // 🔥 关闭父节点居中，让子节点自由分布
+            shakeTowards: 'leaves'  // 向叶子节点方向调整，减少交叉
+        }
+    },
+    physics: {
+        enabled: !serverLayout,  // 🔥 无服务端坐标时启用物理引擎用于初始布局优化
+        stabilization: {
+            enabled: true,  // 🔥 启用初始稳定化
+            iterations: isHierarchicalLayout ? 200 : 100,  // 🔥 根据布局模式调整迭代次数
+            updateInterval: 50,
+            onlyDynamicEdges: false,
+            fit: false  // 🔥 不自动调整视图，保持连线样式
+        },
+        solver: isHierarchicalLayout ? 'hierarchicalRepulsion' : 'forceAtlas2Based',  // 🔥 根据布局模式选择算法
+        hierarchicalRepulsion: {
+            centralGravity: 0,
+            springLength: 250,        // 🔥 增加弹簧长度
+            springConstant: 0.005,    // 🔥 减少弹簧常数，降低约束力
+            nodeDistance: 200,        // 🔥 增加节点距离
+            damping: 0.1              // 🔥 增加阻尼，提高稳定性
+        },
+        forceAtlas2Based: {
+            theta: 0.5,
+            gravitationalConstant: -26,
+            centralGravity: 0.01,
+            springConstant: 0.08,
+            springLength: 100,
+            damping: 0.4,
+            avoidOverlap: 0.5
+        }
+    },
+    // 节点颜色按角色分组（实际控制人/核心公司/个人/政府机构/公司）
+    groups: CHART_CONFIG.groups || {},
+    interaction: {
+        dragNodes: true,
+        dragView: true,
+        zoomView: true,
+        hover: true,
+        keyboard: {
+            enabled: false,  // 🔥 禁用vis.js键盘平移，避免与节点移动冲突
+            speed: {x: 10, y: 10, zoom: 0.02},
+            bindToWindow: true
+        }
+    },
+    nodes: {
+        font: {
+            size: 12,  // 🔥 减小字体大小，给文字更多空间
+            color: '#212529',
+            multi: true
+        },
+        borderWidth: 1,  // 🔥 减小边框宽度，给内容更多空间
+        margin: {  // 🔥 减小内边距，让文字离边框更近
+            top: 4,
+            right: 4,
+            bottom: 4,
+            left: 4
+        },
+        shape: 'box',
+        widthConstraint: {
+            minimum: 181,
+            maximum: 181
+        },
+        heightConstraint: {
+            minimum: 56,
+            maximum: 56
+        },
+        shadow: false
+    },
+    edges: {
+        font: {
+            size: 12,  // 🔥 减小全局字体大小
+            align: 'horizontal',  // 🔥 水平对齐，更容易阅读
+            background: 'rgba(255, 255, 255, 0.95)',  // 🔥 更不透明的背景
+            strokeWidth: 1,  // 🔥 减少描边宽度
+            strokeColor: 'rgba(0, 0, 0, 0.1)',  // 🔥 淡色描边
+            color: '#000000',
+            multi: 'html'  // 🔥 支持HTML格式
+        },
+        color: {
+            color: '#1976d2',  // 🔥 使用蓝色作为默认颜色
+            highlight: '#0d47a1'
+        },
+        width: 2,  // 🔥 适中的线条粗细
+        arrows: {
+            to: {
+                enabled: true,
+                scaleFactor: 0.6,  // 🔥 缩小全局箭头大小
+                type: 'arrow'
+            }
+        },
+        smooth: {
+            type: 'continuous',  // 🔥 使用连续线条，符合专业股权结构图标准
+            enabled: true
+        },
+        selectionWidth: 3,  // 🔥 适中的选中线条粗细
+        hoverWidth: 3  // 🔥 适中的悬停线条粗细
+    }
+};
+
+// 创建网络（全局变量，供其他函数使用）
+const container = document.getElementById('network-container');
+window.network = new vis.Network(container, {nodes, edges}, options);
+const network = window.network;
+
+// 🔥 添加节点选择事件监听
+network.on('selectNode', function(params) {
+    if (params.nodes.length > 0) {
+        selectedNodeId = params.nodes[0];
+
+        // 🔥 自动解除节点锁定（无条件，以确保核心公司也有明确反馈）
+        const nodeData = nodes.get(selectedNodeId);
+        if (nodeData) {
+            const updatedNode = {
+                ...nodeData,
+                fixed: {x: false, y: false}
+            };
+            nodes.update(updatedNode);
+            showMessage('节点已自动解除锁定');
+        }
+
+        updateNodeSelectionUI();
+    }
+});
+
+network.on('deselectNode', function(params) {
+    selectedNodeId = null;
+    updateNodeSelectionUI();
+});
+
+// 点击空白区域取消选择
+network.on('click', function(params) {
+    if (params.nodes.length === 0) {
+        selectedNodeId = null;
+        updateNodeSelectionUI();
+    }
+});
+
+// 🔥 右键菜单事件监听
+network.on('oncontext', function(params) {
+    console.log('右键事件触发:', params);
+    params.event.preventDefault();
+    if (params.nodes.length > 0) {
+        showContextMenu(params.event, params.nodes[0]);
+    } else if (params.edges.length > 0) {
+        showEdgeContextMenu(params.event, params.edges[0]);
+    }
+});
+
+// 备用方案：使用原生右键事件
+network.on('click', function(params) {
+    if (params.event && params.event.button === 2 && params.nodes.length > 0) {
+        console.log('原生右键事件触发:', params);
+        showContextMenu(params.event, params.nodes[0]);
+    }
+});
+
+// 点击其他地方隐藏右键菜单
+document.addEventListener('click', function(event) {
+    if (!event.target.closest('.context-menu')) {
+        hideContextMenu();
+        hideEdgeContextMenu();
+    }
+});
+
+// 右键菜单项点击事件 - 节点
+document.getElementById('hideNodeItem').addEventListener('click', function() {
+    hideNode();
+});
+
+document.getElementById('showHiddenNodesItem').addEventListener('click', function() {
+    showNode();
+});
+
+document.getElementById('deleteNodeItem').addEventListener('click', function() {
+    deleteNode();
+});
+
+// 右键菜单项点击事件 - 边
+document.getElementById('hideEdgeItem').addEventListener('click', function() {
+    hideEdge();
+});
+
+document.getElementById('deleteEdgeItem').addEventListener('click', function() {
+    deleteEdge();
+});
+
+document.getElementById('resetNodeSizeItem').addEventListener('click', function() {
+    if (contextMenuNodeId) {
+        resetSingleNodeSize(contextMenuNodeId);
+        hideContextMenu();
+        showMessage('节点尺寸已重置');
+    }
+});
+
+document.getElementById('centerNodeItem').addEventListener('click', function() {
+    centerNode();
+});
+
+document.getElementById('unlockNodeItem').addEventListener('click', function() {
+    if (contextMenuNodeId) {
+        unlockNode(contextMenuNodeId);
+        hideContextMenu();
+        showMessage('节点已解除锁定');
+    }
+});
+
+// 🔥 改进的键盘事件处理：确保节点移动优先于画布平移
+document.addEventListener('keydown', function(e) {
+    // 当焦点在输入框、文本域、下拉框或可编辑区域时不拦截
+    const tag = (e.target && e.target.tagName) ? e.target.tagName.toLowerCase() : '';
+    if (tag === 'input' || tag === 'textarea' || tag === 'select' || (e.target && e.target.isContentEditable)) {
+        return;
+    }
+
+    // 🔥 如果有选中的节点，优先处理节点移动
+    if (selectedNodeId !== null) {
+        if (e.key === 'ArrowUp' || e.key === 'ArrowDown' || e.key === 'ArrowLeft' || e.key === 'ArrowRight') {
+            e.preventDefault();
+            e.stopPropagation();
+            e.stopImmediatePropagation(); // 🔥 阻止其他事件监听器
+
+            console.log(`🎯 键盘移动节点: ${e.key}`);
+            if (e.key === 'ArrowUp') moveNode('up');
+            else if (e.key === 'ArrowDown') moveNode('down');
+            else if (e.key === 'ArrowLeft') moveNode('left');
+            else if (e.key === 'ArrowRight') moveNode('right');
+            return false; // 🔥 确保事件被完全阻止
+        } else if (e.key === 'Delete' || e.key === 'Backspace') {
+            // 🔥 删除键删除选中的节点
+            e.preventDefault();
+            e.stopPropagation();
+            e.stopImmediatePropagation();
+            deleteNode(selectedNodeId);
+            return false;
+        }
+    }
+}, true); // capture=true，确保优先处理
+
+// 🔥 额外的键盘事件监听器，确保完全阻止vis.js的键盘处理
+window.addEventListener('keydown', function(e) {
+    if (selectedNodeId !== null && (e.key === 'ArrowUp' || e.key === 'ArrowDown' || e.key === 'ArrowLeft' || e.key === 'ArrowRight')) {
+        e.preventDefault();
+        e.stopPropagation();
+        return false;
+    }
+}, true);
+
+// 切换工具栏
+function toggleToolbar() {
+    toolbarExpanded = !toolbarExpanded;
+    const panel = document.getElementById('toolbarPanel');
+    const toggle = document.getElementById('toolbarToggle');
+
+    if (toolbarExpanded) {
+        panel.classList.remove('collapsed');
+        panel.classList.add('expanded');
+        toggle.classList.remove('collapsed');
+        toggle.querySelector('.toggle-text').textContent = '收起';
+    } else {
+        panel.classList.remove('expanded');
+        panel.classList.add('collapsed');
+        toggle.classList.add('collapsed');
+        toggle.querySelector('.toggle-text').textContent = '工具栏';
+    }
+}
+
+// 创建分组选择复选框
+function createGroupCheckboxes() {
+    const container = document.getElementById('groupCheckboxes');
+    container.innerHTML = '';
+
+    subgraphs.forEach((subgraph, index) => {
+        const checkboxContainer = document.createElement('div');
+        checkboxContainer.className = 'checkbox-container';
+
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.id = `group-${subgraph.id}`;
+        checkbox.checked = groupVisibility[subgraph.id];
+        checkbox.addEventListener('change', function() {
+            groupVisibility[subgraph.id] = this.checked;
+            updateSubgraphPositions();
+        });
+
+        const label = document.createElement('label');
+        label.htmlFor = `group-${subgraph.id}`;
+        label.textContent = subgraph.label || `分组 ${index + 1}`;
+
+        const colorBox = document.createElement('div');
+        colorBox.className = 'subgraph-color';
+        colorBox.style.backgroundColor = subgraph.color || 'rgba(108, 117, 125, 0.1)';
+        colorBox.style.borderColor = subgraph.borderColor || '#6c757d';
+
+        checkboxContainer.appendChild(checkbox);
+        checkboxContainer.appendChild(label);
+        checkboxContainer.appendChild(colorBox);
+        container.appendChild(checkboxContainer);
+    });
+}
+
+// 全选分组
+function selectAllGroups() {
+    subgraphs.forEach(subgraph => {
+        groupVisibility[subgraph.id] = true;
+        document.getElementById(`group-${subgraph.id}`).checked = true;
+    });
+    updateSubgraphPositions();
+}
+
+// 更新分组框位置
+function updateSubgraphPositions() {
+    subgraphs.forEach((subgraph, index) => {
+        if (!groupVisibility[subgraph.id]) {
+            let box = subgraphBoxes[index];
+            if (box) {
+                box.style.display = 'none';
+            }
+            return;
+        }
+
+        if (subgraph.nodes && subgraph.nodes.length > 0) {
+            const positions = [];
+            subgraph.nodes.forEach(nodeId => {
+                const nodePos = network.getPositions([nodeId])[nodeId];
+                if (nodePos) {
+                    const node = nodes.get(nodeId);
+                    const nodeWidth = node.widthConstraint
+                        ? (typeof node.widthConstraint.maximum === 'number' ? node.widthConstraint.maximum : globalNodeWidth)
+                        : globalNodeWidth;
+                    const nodeHeight = node.heightConstraint
+                        ? (typeof node.heightConstraint.minimum === 'number' ? node.heightConstraint.minimum : globalNodeHeight)
+                        : globalNodeHeight;
+
+                    positions.push({
+                        x: nodePos.x,
+                        y: nodePos.y,
+                        width: nodeWidth,
+                        height: nodeHeight
+                    });
+                }
+            });
+
+            if (positions.length > 0) {
+                const minX = Math.min(...positions.map(p => p.x - p.width/2));
+                const maxX = Math.max(...positions.map(p => p.x + p.width/2));
+                const minY = Math.min(...positions.map(p => p.y - p.height/2));
+                const maxY = Math.max(...positions.map(p => p.y + p.height/2));
+
+                const finalMinX = minX - paddingX;
+                const finalMaxX = maxX + paddingX;
+                const finalMinY = minY - paddingY;
+                const finalMaxY = maxY + paddingY;
+
+                let box = subgraphBoxes[index];
+                if (!box) {
+                    box = document.createElement('div');
+                    box.className = 'subgraph-box';
+                    box.style.borderColor = subgraph.borderColor || '#6c757d';
+
+                    const label = document.createElement('div');
+                    label.className = 'subgraph-label';
+                    label.style.borderColor = subgraph.borderColor || '#6c757d';
+                    label.style.color = subgraph.borderColor || '#6c757d';
+                    label.dataset.subgraphId = subgraph.id;
+                    label.dataset.subgraphIndex = index;
+                    label.style.cursor = 'pointer';
+                    label.title = '双击编辑分组名称';
+
+                    // 添加双击编辑功能
+                    label.addEventListener('dblclick', function(e) {
+                        e.stopPropagation();
+                        console.log(`分组标签被双击: ${subgraph.id}, 标签: ${subgraph.label || '分组'}, 索引: ${index}`);
+                        editSubgraphLabel(subgraph.id, subgraph.label || '分组', index);
+                    });
+
+                    box.appendChild(label);
+
+                    container.appendChild(box);
+                    subgraphBoxes[index] = box;
+                }
+
+                // 更新标签文本（确保显示最新的标签内容）
+                const label = box.querySelector('.subgraph-label');
+                if (label) {
+                    label.textContent = subgraph.label || '分组';
+                }
+
+                const containerRect = container.getBoundingClientRect();
+                const scale = network.getScale();
+                const view = network.getViewPosition();
+
+                box.style.left = (finalMinX * scale + view.x + containerRect.width / 2) + 'px';
+                box.style.top = (finalMinY * scale + view.y + containerRect.height / 2) + 'px';
+                box.style.width = ((finalMaxX - finalMinX) * scale) + 'px';
+                box.style.height = ((finalMaxY - finalMinY) * scale) + 'px';
+                box.style.display = 'block';
+            }
+        }
+    });
+}
+
+// 启动动态更新
+function startDynamicUpdate() {
+    if (animationFrameId) {
+        cancelAnimationFrame(animationFrameId);
+    }
+
+    function update() {
+        updateSubgraphPositions();
+        animationFrameId = requestAnimationFrame(update);
+    }
+
+    update();
+}
+
+// 停止动态更新
+function stopDynamicUpdate() {
+    if (animationFrameId) {
+        cancelAnimationFrame(animationFrameId);
+        animationFrameId = null;
+    }
+}
+
+// 滑块事件处理
+function setupSliders() {
+    const defaultPaddingXSlider = document.getElementById('defaultPaddingX');
+    const defaultPaddingYSlider = document.getElementById('defaultPaddingY');
+    const defaultPaddingXValue = document.getElementById('defaultPaddingXValue');
+    const defaultPaddingYValue = document.getElementById('defaultPaddingYValue');
+
+    defaultPaddingXSlider.addEventListener('input', function() {
+        paddingX = parseInt(this.value);
+        defaultPaddingXValue.textContent = paddingX + 'px';
+        document.getElementById('paddingX').value = paddingX;
+        document.getElementById('paddingXValue').textContent = paddingX + 'px';
+        updateSubgraphPositions();
+    });
+
+    defaultPaddingYSlider.addEventListener('input', function() {
+        paddingY = parseInt(this.value);
+        defaultPaddingYValue.textContent = paddingY + 'px';
+        document.getElementById('paddingY').value = paddingY;
+        document.getElementById('paddingYValue').textContent = paddingY + 'px';
+        updateSubgraphPositions();
+    });
+
+    const paddingXSlider = document.getElementById('paddingX');
+    const paddingYSlider = document.getElementById('paddingY');
+    const paddingXValue = document.getElementById('paddingXValue');
+    const paddingYValue = document.getElementById('paddingYValue');
+
+    paddingXSlider.addEventListener('input', function() {
+        paddingX = parseInt(this.value);
+        paddingXValue.textContent = paddingX + 'px';
+        updateSubgraphPositions();
+    });
+
+    paddingYSlider.addEventListener('input', function() {
+        paddingY = parseInt(this.value);
+        paddingYValue.textContent = paddingY + 'px';
+        updateSubgraphPositions();
+    });
+
+    // 🔥 新增：字体和边框滑块事件处理
+    const fontSizeSlider = document.getElementById('fontSizeSlider');
+    const borderWidthSlider = document.getElementById('borderWidthSlider');
+    const fontSizeValue = document.getElementById('fontSizeValue');
+    const borderWidthValue = document.getElementById('borderWidthValue');
+
+    fontSizeSlider.addEventListener('input', function() {
+        globalFontSize = parseInt(this.value);
+        fontSizeValue.textContent = globalFontSize + 'px';
+    });
+
+    borderWidthSlider.addEventListener('input', function() {
+        globalBorderWidth = parseInt(this.value);
+        borderWidthValue.textContent = globalBorderWidth + 'px';
+    });
+}
+
+// 全局节点尺寸滑块事件处理
+function setupGlobalSizeSliders() {
+    const globalWidthSlider = document.getElementById('globalWidthSlider');
+    const globalHeightSlider = document.getElementById('globalHeightSlider');
+    const globalWidthValue = document.getElementById('globalWidthValue');
+    const globalHeightValue = document.getElementById('globalHeightValue');
+
+    globalWidthSlider.addEventListener('input', function() {
+        globalNodeWidth = parseInt(this.value);
+        globalWidthValue.textContent = globalNodeWidth + 'px';
+    });
+
+    globalHeightSlider.addEventListener('input', function() {
+        globalNodeHeight = parseInt(this.value);
+        globalHeightValue.textContent = globalNodeHeight + 'px';
+    });
+
+    // 🔥 层级间距滑块监听器
+    const levelSeparationSlider = document.getElementById('levelSeparationSlider');
+    const levelSeparationValue = document.getElementById('levelSeparationValue');
+
+    levelSeparationSlider.addEventListener('input', function() {
+        const value = parseInt(this.value);
+        levelSeparationValue.textContent = value + 'px';
+        currentLevelSeparation = value;
+    });
+}
+
+// 重置默认内边距
+function resetDefaultPadding() {
+    paddingX = 25;
+    paddingY = 20;
+
+    document.getElementById('defaultPaddingX').value = paddingX;
+    document.getElementById('defaultPaddingY').value = paddingY;
+    document.getElementById('defaultPaddingXValue').textContent = paddingX + 'px';
+    document.getElementById('defaultPaddingYValue').textContent = paddingY + 'px';
+
+    document.getElementById('paddingX').value = paddingX;
+    document.getElementById('paddingY').value = paddingY;
+    document.getElementById('paddingXValue').textContent = paddingX + 'px';
+    document.getElementById('paddingYValue').textContent = paddingY + 'px';
+
+    updateSubgraphPositions();
+}
+
+// 🔥 层级间距调整功能
+let currentLevelSeparation = CHART_CONFIG.levelSeparation;
+let appliedLevelSeparation = CHART_CONFIG.levelSeparation;
+
+// 服务端布局模式下按新旧层级间距比例缩放节点 y 坐标
+function rescaleServerLayout() {
+    const ids = nodes.getIds();
+    const positions = network.getPositions(ids);
+    const ratio = currentLevelSeparation / appliedLevelSeparation;
+    nodes.update(ids.filter(id => positions[id]).map(id => ({
+        id: id,
+        x: positions[id].x,
+        y: positions[id].y * ratio
+    })));
+    appliedLevelSeparation = currentLevelSeparation;
+    updateSubgraphPositions();
+}
+
+// 应用层级间距变化
+function applyLevelSpacing() {
+    try {
+        console.log('📏 应用层级间距变化...');
+
+        // 获取滑块值
+        currentLevelSeparation = parseInt(document.getElementById('levelSeparationSlider').value);
+
+        console.log('📏 新层级间距:', currentLevelSeparation);
+
+        // 更新层级布局选项，只调整层级间距，保持当前布局模式
+        if (isHierarchicalLayout) {
+            network.setOptions({
+                layout: {
+                    hierarchical: {
+                        enabled: true,
+                        direction: 'UD',
+                        sortMethod: 'directed',
+                        levelSeparation: currentLevelSeparation,  // 🔥 直接使用用户设置的值
+                        nodeSpacing: Math.max(280, CHART_CONFIG.nodeSpacing),
+                        treeSpacing: Math.max(280, CHART_CONFIG.treeSpacing),
+                        blockShifting: true,
+                        edgeMinimization: true,
+                        parentCentralization: false
+                    }
+                },
+                physics: {
+                    enabled: false  // 🔥 保持物理引擎关闭，避免重新排版
+                }
+            });
+
+            console.log('✅ 层级间距已更新，保持层级布局模式');
+        } else if (serverLayout) {
+            rescaleServerLayout();
+            console.log('✅ 层级间距已更新（服务端布局）');
+        } else {
+            console.log('ℹ️ 当前为自由布局，层级间距调整将在切换到层级布局时生效');
+        }
+
+        // 🔥 不调用distributeLevels()，避免触发重新排版
+        // 只更新布局参数，让vis.js自动调整间距
+
+    } catch (error) {
+        console.error('❌ 应用层级间距失败:', error);
+    }
+}
+
+// 重置层级间距到默认值
+function resetLevelSpacing() {
+    try {
+        console.log('🔄 重置层级间距到默认值...');
+
+        // 重置为默认值
+        currentLevelSeparation = 150;
+
+        // 更新滑块
+        document.getElementById('levelSeparationSlider').value = currentLevelSeparation;
+
+        // 更新显示值
+        document.getElementById('levelSeparationValue').textContent = currentLevelSeparation + 'px';
+
+        // 直接应用重置后的间距，不调用applyLevelSpacing避免重复
+        if (isHierarchicalLayout) {
+            network.setOptions({
+                layout: {
+                    hierarchical: {
+                        enabled: true,
+                        direction: 'UD',
+                        sortMethod: 'directed',
+                        levelSeparation: currentLevelSeparation,  // 🔥 直接使用用户设置的值
+                        nodeSpacing: Math.max(280, CHART_CONFIG.nodeSpacing),
+                        treeSpacing: Math.max(280, CHART_CONFIG.treeSpacing),
+                        blockShifting: true,
+                        edgeMinimization: true,
+                        parentCentralization: false
+                    }
+                },
+                physics: {
+                    enabled: false  // 🔥 保持物理引擎关闭
+                }
+            });
+        } else if (serverLayout) {
+            rescaleServerLayout();
+        }
+
+        console.log('✅ 层级间距已重置，保持层级布局模式');
+
+    } catch (error) {
+        console.error('❌ 重置层级间距失败:', error);
+    }
+}
+
+// 重置当前内边距
+function resetPadding() {
+    paddingX = 25;
+    paddingY = 20;
+
+    document.getElementById('paddingX').value = paddingX;
+    document.getElementById('paddingY').value = paddingY;
+    document.getElementById('paddingXValue').textContent = paddingX + 'px';
+    document.getElementById('paddingYValue').textContent = paddingY + 'px';
+
+    updateSubgraphPositions();
+}
+
+// 切换所有分组
+function toggleAllSubgraphs() {
+    const allVisible = Object.values(groupVisibility).every(v => v);
+    const newState = !allVisible;
+
+    subgraphs.forEach(subgraph => {
+        groupVisibility[subgraph.id] = newState;
+        document.getElementById(`group-${subgraph.id}`).checked = newState;
+    });
+
+    updateSubgraphPositions();
+}
+
+// 网络事件
+network.on('stabilizationIterationsDone', function() {
+    // 🔥 稳定化完成后禁用物理引擎，保持固定布局
+    network.setOptions({physics: {enabled: false}});
+    // 🔥 稳定化后执行按层均匀分布，多次执行确保效果
+    if (typeof distributeLevels === 'function') {
+        setTimeout(() => distributeLevels(), 100);   // 第一次执行
+        setTimeout(() => distributeLevels(), 300);   // 第二次执行确保效果
+        setTimeout(() => distributeLevels(), 600);   // 第三次执行最终调整
+    }
+    startDynamicUpdate();
+});
+
+// 服务端布局不经过稳定化过程，直接适配视图并启动分组框更新
+if (serverLayout) {
+    network.fit();
+    startDynamicUpdate();
+}
+
+network.on('afterDrawing', function() {
+    updateSubgraphPositions();
+});
+
+network.on('dragStart', function() {
+    startDynamicUpdate();
+});
+
+network.on('zoom', function() {
+    updateSubgraphPositions();
+});
+
+network.on('dragEnd', function() {
+    updateSubgraphPositions();
+});
+
+// 控制函数
+function fitNetwork() {
+    network.fit();
+    setTimeout(updateSubgraphPositions, 200);
+}
+
+function resetZoom() {
+    network.moveTo({scale: 1});
+    setTimeout(updateSubgraphPositions, 200);
+}
+
+function togglePhysics() {
+    // 🔥 修复：直接切换物理引擎状态，不依赖getOptions
+    network.setOptions({physics: {enabled: true}});
+    setTimeout(() => {
+        network.setOptions({physics: {enabled: false}});
+    }, 100);
+}
+
+// 🔥 布局切换函数
+function toggleLayout() {
+    isHierarchicalLayout = !isHierarchicalLayout;
+
+    // 更新按钮文本
+    const btn = document.getElementById('layoutToggleBtn');
+    btn.textContent = isHierarchicalLayout ? '切换到自由布局' : '切换到层级布局';
+
+    // 更新网络配置
+    const newOptions = {
+        layout: {
+            hierarchical: {
+                enabled: isHierarchicalLayout,
+                direction: 'UD',
+                sortMethod: 'hubsize',
+                levelSeparation: CHART_CONFIG.levelSeparation,
+                nodeSpacing: CHART_CONFIG.nodeSpacing,
+                treeSpacing: CHART_CONFIG.treeSpacing,
+                blockShifting: true,
+                edgeMinimization: true,
+                parentCentralization: true,
+                shakeTowards: 'leaves'
+            }
+        },
+        physics: {
+            enabled: true,
+                stabilization: {
+                    enabled: true,
+                    iterations: isHierarchicalLayout ? 200 : 100,
+                    updateInterval: 50,
+                    onlyDynamicEdges: false,
+                    fit: false  // 🔥 不自动调整视图，保持连线样式
+                },
+            solver: isHierarchicalLayout ? 'hierarchicalRepulsion' : 'forceAtlas2Based',
+            hierarchicalRepulsion: {
+                centralGravity: 0,
+                springLength: 200,
+                springConstant: 0.01,
+                nodeDistance: 180,
+                damping: 0.09
+            },
+            forceAtlas2Based: {
+                theta: 0.5,
+                gravitationalConstant: -26,
+                centralGravity: 0.01,
+                springConstant: 0.08,
+                springLength: 100,
+                damping: 0.4,
+                avoidOverlap: 0.5
+            }
+        }
+    };
+
+    network.setOptions(newOptions);
+
+    // 显示切换提示
+    const message = isHierarchicalLayout ? 
+        '已切换到层级布局：节点按层级排列，只能左右移动' : 
+        '已切换到自由布局：节点可任意拖动到任何位置';
+    console.log(message);
+
+    // 显示用户提示
+    showMessage(message);
+
+    // 触发布局稳定化后再做一次按层均匀分布
+    setTimeout(function() {
+        if (typeof distributeLevels === 'function') {
+            distributeLevels();
+        }
+    }, 150);
+}
+
+// 🔥 右键菜单功能
+function showContextMenu(event, nodeId) {
+    event.preventDefault();
+    contextMenuNodeId = nodeId;
+
+    const contextMenu = document.getElementById('contextMenu');
+    const hideItem = document.getElementById('hideNodeItem');
+    const showItem = document.getElementById('showHiddenNodesItem');
+
+    // 根据节点状态显示不同的菜单项
+    if (hiddenNodes.has(nodeId)) {
+        hideItem.style.display = 'none';
+        showItem.style.display = 'flex';
+    } else {
+        hideItem.style.display = 'flex';
+        showItem.style.display = 'none';
+    }
+
+    // 设置菜单位置
+    contextMenu.style.left = event.pageX + 'px';
+    contextMenu.style.top = event.pageY + 'px';
+    contextMenu.style.display = 'block';
+}
+
+function hideContextMenu() {
+    const contextMenu = document.getElementById('contextMenu');
+    contextMenu.style.display = 'none';
+    contextMenuNodeId = null;
+}
+
+// 🔥 边的右键菜单功能
+function showEdgeContextMenu(event, edgeId) {
+    event.preventDefault();
+    contextMenuEdgeId = edgeId;
+
+    const edgeContextMenu = document.getElementById('edgeContextMenu');
+
+    // 设置菜单位置
+    edgeContextMenu.style.left = event.pageX + 'px';
+    edgeContextMenu.style.top = event.pageY + 'px';
+    edgeContextMenu.style.display = 'block';
+}
+
+function hideEdgeContextMenu() {
+    const edgeContextMenu = document.getElementById('edgeContextMenu');
+    if (edgeContextMenu) {
+        edgeContextMenu.style.display = 'none';
+        contextMenuEdgeId = null;
+    }
+}
+
+function hideEdge(edgeId) {
+    if (!edgeId) edgeId = contextMenuEdgeId;
+    if (!edgeId) return;
+
+    // 隐藏边
+    hiddenEdges.add(edgeId);
+    const edge = edges.get(edgeId);
+    if (edge) {
+        edge.hidden = true;
+        edges.update(edge);
+
+        const fromNode = nodes.get(edge.from);
+        const toNode = nodes.get(edge.to);
+        const fromLabel = fromNode ? fromNode.label : edge.from;
+        const toLabel = toNode ? toNode.label : edge.to;
+        showMessage(`连线 "${fromLabel} → ${toLabel}" 已隐藏`);
+    }
+
+    hideEdgeContextMenu();
+    updateHiddenEdgesList();
+
+    // 🔥 不调用redraw()，保持当前布局不变
+    // 如果需要刷新布局，用户可以手动点击"适应"按钮
+}
+
+function showEdge(edgeId) {
+    if (!edgeId) return;
+
+    // 显示边
+    hiddenEdges.delete(edgeId);
+    const edge = edges.get(edgeId);
+    if (edge) {
+        edge.hidden = false;
+        edges.update(edge);
+    }
+
+    updateHiddenEdgesList();
+}
+
+function deleteEdge(edgeId) {
+    if (!edgeId) edgeId = contextMenuEdgeId;
+    if (!edgeId) return;
+
+    if (confirm('确定要删除这条连线吗？')) {
+        deletedEdges.add(edgeId);
+        edges.remove(edgeId);
+        hiddenEdges.delete(edgeId);
+
+        showMessage('连线已删除');
+        hideEdgeContextMenu();
+        updateHiddenEdgesList();
+    }
+}
+
+function showAllHiddenEdges() {
+    hiddenEdges.forEach(edgeId => {
+        showEdge(edgeId);
+    });
+    hiddenEdges.clear();
+    updateHiddenEdgesList();
+    showMessage('所有隐藏的连线已显示');
+}
+
+function clearHiddenEdgesList() {
+    if (confirm('确定要清空隐藏的连线列表吗？这将永久删除这些连线。')) {
+        hiddenEdges.forEach(edgeId => {
+            edges.remove(edgeId);
+            deletedEdges.add(edgeId);
+        });
+        hiddenEdges.clear();
+        updateHiddenEdgesList();
+        showMessage('隐藏的连线已清空');
+    }
+}
+
+function updateHiddenEdgesList() {
+    const hiddenEdgesList = document.getElementById('hiddenEdgesList');
+    if (!hiddenEdgesList) return;
+
+    if (hiddenEdges.size === 0) {
+        hiddenEdgesList.innerHTML = '<div class="hidden-edges-empty">暂无隐藏连线</div>';
+        return;
+    }
+
+    let html = '';
+    hiddenEdges.forEach(edgeId => {
+        const edge = edges.get(edgeId);
+        if (edge) {
+            const fromNode = nodes.get(edge.from);
+            const toNode = nodes.get(edge.to);
+            const fromLabel = fromNode ? fromNode.label.split('<br>')[0] : edge.from;
+            const toLabel = toNode ? toNode.label.split('<br>')[0] : edge.to;
+            const edgeLabel = edge.label || '';
+
+            html += `
+                <div class="hidden-node-item">
+                    <span class="hidden-node-name">${fromLabel} → ${toLabel} ${edgeLabel}</span>
+                    <button class="show-node-btn" onclick="showEdge('${edgeId}')">显示</button>
+                </div>
+            `;
+        }
+    });
+
+    hiddenEdgesList.innerHTML = html;
+}
+
+function hideNode(nodeId) {
+    if (!nodeId) nodeId = contextMenuNodeId;
+    if (!nodeId) {
+        console.log('hideNode: 没有提供nodeId');
+        return;
+    }
+
+    console.log('hideNode: 开始隐藏节点', nodeId);
+
+    // 保存操作历史
+    saveToHistory('hide', nodeId);
+
+    // 隐藏节点
+    hiddenNodes.add(nodeId);
+    console.log('hideNode: 已添加到hiddenNodes集合，当前数量:', hiddenNodes.size);
+
+    const node = nodes.get(nodeId);
+    if (node) {
+        node.hidden = true;
+        nodes.update(node);
+        console.log('hideNode: 节点已隐藏:', node.label);
+    }
+
+    // 隐藏相关的边
+    const connectedEdges = edges.get({
+        filter: function(edge) {
+            return edge.from === nodeId || edge.to === nodeId;
+        }
+    });
+
+    connectedEdges.forEach(edge => {
+        edge.hidden = true;
+        edges.update(edge);
+    });
+
+    hideContextMenu();
+    showMessage(`节点 "${node.label}" 已隐藏`);
+
+    console.log('hideNode: 准备更新隐藏节点列表');
+    updateHiddenNodesList();
+}
+
+function showNode(nodeId) {
+    if (nodeId === undefined || nodeId === null) nodeId = contextMenuNodeId;
+    if (nodeId === undefined || nodeId === null) return;
+
+    const originalId = nodeId;
+    nodeId = normalizeNodeId(nodeId);
+    const candidateIds = new Set([nodeId]);
+    if (originalId !== nodeId) {
+        candidateIds.add(originalId);
+    }
+
+    const node = nodes.get(nodeId) || nodes.get(originalId);
+    if (!node) {
+        console.warn('showNode: 找不到节点', nodeId);
+        candidateIds.forEach(id => hiddenNodes.delete(id));
+        updateHiddenNodesList();
+        return;
+    }
+
+    // 保存操作历史
+    saveToHistory('show', node.id);
+
+    // 显示节点
+    candidateIds.forEach(id => hiddenNodes.delete(id));
+    node.hidden = false;
+    nodes.update(node);
+
+    // 显示相关的边
+    const connectedEdges = edges.get({
+        filter: function(edge) {
+            return candidateIds.has(edge.from) || candidateIds.has(edge.to);
+        }
+    });
+
+    connectedEdges.forEach(edge => {
+        edge.hidden = false;
+        edges.update(edge);
+    });
+
+    hideContextMenu();
+    showMessage(`节点 "${node.label}" 已显示`);
+    updateHiddenNodesList();
+}
+
+function deleteNode(nodeId) {
+    if (nodeId === undefined || nodeId === null) nodeId = contextMenuNodeId;
+    if (nodeId === undefined || nodeId === null) return;
+
+    const originalId = nodeId;
+    nodeId = normalizeNodeId(nodeId);
+    const candidateIds = new Set([nodeId]);
+    if (originalId !== nodeId) {
+        candidateIds.add(originalId);
+    }
+
+    const node = nodes.get(nodeId) || nodes.get(originalId);
+    if (!node) return;
+
+    if (!confirm(`确定要删除节点 "${node.label}" 吗？此操作不可撤销。`)) {
+        hideContextMenu();
+        return;
+    }
+
+    // 保存操作历史
+    saveToHistory('delete', node.id, node, edges.get({
+        filter: function(edge) {
+            return candidateIds.has(edge.from) || candidateIds.has(edge.to);
+        }
+    }));
+
+    // 删除节点
+    candidateIds.forEach(id => deletedNodes.add(id));
+    nodes.remove(node.id);
+
+    // 删除相关的边
+    const connectedEdges = edges.get({
+        filter: function(edge) {
+            return candidateIds.has(edge.from) || candidateIds.has(edge.to);
+        }
+    });
+
+    connectedEdges.forEach(edge => {
+        edges.remove(edge.id);
+    });
+
+    hideContextMenu();
+    showMessage(`节点 "${node.label}" 已删除`);
+    updateHiddenNodesList();
+}
+
+// 🔥 解除节点锁定函数
+function unlockNode(nodeId) {
+    if (!nodeId) nodeId = contextMenuNodeId;
+    if (!nodeId) return;
+
+    const nodeData = nodes.get(nodeId);
+    if (!nodeData) return;
+
+    // 解除固定状态
+    const updatedNode = {
+        ...nodeData,
+        fixed: {x: false, y: false}
+    };
+    nodes.update(updatedNode);
+
+    console.log(`🔓 节点 ${nodeId} 已解除锁定`);
+}
+
+function centerNode(nodeId) {
+    if (!nodeId) nodeId = contextMenuNodeId;
+    if (!nodeId) return;
+
+    network.focus(nodeId, {
+        scale: 1.2,
+        animation: {
+            duration: 1000,
+            easingFunction: "easeInOutQuad"
+        }
+    });
+
+    hideContextMenu();
+    showMessage(`节点已居中显示`);
+}
+
+function saveToHistory(action, nodeId, nodeData = null, edgeData = null) {
+    const historyItem = {
+        action: action,
+        nodeId: nodeId,
+        nodeData: nodeData,
+        edgeData: edgeData,
+        timestamp: Date.now()
+    };
+
+    nodeHistory.push(historyItem);
+
+    // 限制历史记录数量
+    if (nodeHistory.length > 50) {
+        nodeHistory.shift();
+    }
+}
+
+// 🔥 隐藏节点管理功能
+function updateHiddenNodesList() {
+    console.log('更新隐藏节点列表，当前隐藏节点数量:', hiddenNodes.size);
+
+    const hiddenNodesSection = document.getElementById('hiddenNodesSection');
+    const hiddenNodesList = document.getElementById('hiddenNodesList');
+
+    if (!hiddenNodesSection || !hiddenNodesList) {
+        console.error('找不到隐藏节点管理元素');
+        return;
+    }
+
+    // 清空现有列表
+    hiddenNodesList.innerHTML = '';
+
+    if (hiddenNodes.size === 0) {
+        // 显示空状态提示
+        const emptyDiv = document.createElement('div');
+        emptyDiv.className = 'hidden-nodes-empty';
+        emptyDiv.textContent = '暂无隐藏节点';
+        hiddenNodesList.appendChild(emptyDiv);
+        console.log('显示空状态提示');
+        return;
+    }
+
+    console.log('开始创建隐藏节点列表项');
+
+    // 为每个隐藏的节点创建列表项
+    hiddenNodes.forEach(nodeId => {
+        const node = nodes.get(nodeId);
+        if (!node) {
+            console.log('节点不存在:', nodeId);
+            return;
+        }
+
+        console.log('创建列表项:', node.label);
+
+        const listItem = document.createElement('div');
+        listItem.className = 'hidden-node-item';
+        listItem.innerHTML = `
+            <span class="hidden-node-name" title="${node.label}">${node.label}</span>
+            <div class="hidden-node-actions">
+                <button class="hidden-node-btn" onclick="showNode('${nodeId}')" title="显示节点">👁️</button>
+                <button class="hidden-node-btn danger" onclick="deleteNode('${nodeId}')" title="删除节点">🗑️</button>
+            </div>
+        `;
+
+        hiddenNodesList.appendChild(listItem);
+    });
+
+    console.log('隐藏节点列表更新完成');
+}
+
+function showAllHiddenNodes() {
+    const nodeIds = Array.from(hiddenNodes);
+    nodeIds.forEach(nodeId => {
+        showNode(nodeId);
+    });
+
+    if (nodeIds.length > 0) {
+        showMessage(`已显示 ${nodeIds.length} 个隐藏节点`);
+    }
+}
+
+function clearHiddenNodesList() {
+    if (hiddenNodes.size === 0) {
+        showMessage('没有隐藏的节点');
+        return;
+    }
+
+    if (confirm(`确定要删除所有 ${hiddenNodes.size} 个隐藏节点吗？此操作不可撤销。`)) {
+        const nodeIds = Array.from(hiddenNodes);
+        nodeIds.forEach(nodeId => {
+            deleteNode(nodeId);
+        });
+        showMessage(`已删除 ${nodeIds.length} 个隐藏节点`);
+    }
+}
+
+// 🔥 测试函数
+function testHideNode() {
+    const allNodes = nodes.get();
+    if (allNodes.length === 0) {
+        showMessage('没有可隐藏的节点');
+        return;
+    }
+
+    const firstNode = allNodes[0];
+    console.log('测试隐藏节点:', firstNode.id, firstNode.label);
+    hideNode(firstNode.id);
+}
+
+// 🔥 更新节点选择UI状态
+function updateNodeSelectionUI() {
+    const hasSelection = selectedNodeId !== null;
+
+    // 启用/禁用移动按钮
+    document.getElementById('moveUpBtn').disabled = !hasSelection;
+    document.getElementById('moveDownBtn').disabled = !hasSelection;
+    document.getElementById('moveLeftBtn').disabled = !hasSelection;
+    document.getElementById('moveRightBtn').disabled = !hasSelection;
+    document.getElementById('resetPositionBtn').disabled = !hasSelection;
+
+    // 显示/隐藏选中节点信息
+    const infoDiv = document.getElementById('selectedNodeInfo');
+    const nameSpan = document.getElementById('selectedNodeName');
+
+    if (hasSelection) {
+        const node = nodes.get(selectedNodeId);
+        const nodeName = node ? node.label : '未知节点';
+        nameSpan.textContent = nodeName;
+        infoDiv.style.display = 'block';
+    } else {
+        infoDiv.style.display = 'none';
+    }
+}
+
+// 🔥 移动节点函数
+function moveNode(direction) {
+    if (!selectedNodeId) {
+        console.log('⚠️ 请先选择一个节点');
+        return;
+    }
+
+    console.log(`🎯 尝试移动节点 ${selectedNodeId} 向 ${direction}`);
+
+    const positions = network.getPositions([selectedNodeId]);
+    if (!positions[selectedNodeId]) {
+        console.log('❌ 无法获取节点位置');
+        return;
+    }
+
+    const currentPos = positions[selectedNodeId];
+    let newX = currentPos.x;
+    let newY = currentPos.y;
+
+    console.log(`📍 当前位置: (${newX}, ${newY})`);
+
+    switch (direction) {
+        case 'up':
+            newY -= MOVE_STEP;
+            break;
+        case 'down':
+            newY += MOVE_STEP;
+            break;
+        case 'left':
+            newX -= MOVE_STEP;
+            break;
+        case 'right':
+            newX += MOVE_STEP;
+            break;
+    }
+
+    console.log(`🎯 目标位置: (${newX}, ${newY})`);
+
+    // 🔥 检查节点是否被固定
+    const nodeData = nodes.get(selectedNodeId);
+    if (nodeData && nodeData.fixed) {
+        console.log('⚠️ 节点被固定，尝试解除固定状态');
+        // 解除固定状态
+        const updatedNode = {
+            ...nodeData,
+            fixed: {x: false, y: false}
+        };
+        nodes.update(updatedNode);
+    }
+
+    // 🔥 更新节点位置
+    try {
+        if (typeof network.moveNode === 'function') {
+            network.moveNode(selectedNodeId, newX, newY);
+            console.log(`✅ 节点已向 ${direction} 移动 ${MOVE_STEP} 像素`);
+        } else {
+            // 备选方案：直接更新节点数据
+            const updatedNode = {
+                ...nodeData,
+                x: newX,
+                y: newY,
+                fixed: {x: false, y: false}
+            };
+            nodes.update(updatedNode);
+            console.log(`✅ 节点已向 ${direction} 移动 ${MOVE_STEP} 像素 (备选方案)`);
+        }
+    } catch (e) {
+        console.error('❌ 移动节点失败:', e);
+    }
+}
+
+// 🔥 重置节点位置函数
+function resetNodePosition() {
+    if (!selectedNodeId) {
+        console.log('请先选择一个节点');
+        return;
+    }
+
+    // 重新应用布局算法来重置位置
+    if (isHierarchicalLayout) {
+        // 层级布局：重新稳定化
+        network.setOptions({
+            physics: {
+                enabled: true,
+                stabilization: {enabled: true, iterations: 50, fit: false}  // 🔥 不自动调整视图
+            }
+        });
+    } else {
+        // 自由布局：重新应用物理引擎
+        network.setOptions({
+            physics: {
+                enabled: true,
+                stabilization: {enabled: true, iterations: 100, fit: false}  // 🔥 不自动调整视图
+            }
+        });
+    }
+
+    console.log('节点位置已重置');
+}
+
+// 手动绘制分组框到canvas（用于导出）
+function drawSubgraphsToCanvas(ctx) {
+    console.log('开始绘制分组框到canvas...');
+
+    subgraphs.forEach((subgraph, index) => {
+        if (!groupVisibility[subgraph.id]) {
+            return;
+        }
+
+        if (subgraph.nodes && subgraph.nodes.length > 0) {
+            const positions = [];
+            subgraph.nodes.forEach(nodeId => {
+                const nodePos = network.getPositions([nodeId])[nodeId];
+                if (nodePos) {
+                    const node = nodes.get(nodeId);
+                    const nodeWidth = node.widthConstraint
+                        ? (typeof node.widthConstraint.maximum === 'number' ? node.widthConstraint.maximum : globalNodeWidth)
+                        : globalNodeWidth;
+                    const nodeHeight = node.heightConstraint
+                        ? (typeof node.heightConstraint.minimum === 'number' ? node.heightConstraint.minimum : globalNodeHeight)
+                        : globalNodeHeight;
+
+                    positions.push({
+                        x: nodePos.x,
+                        y: nodePos.y,
+                        width: nodeWidth,
+                        height: nodeHeight
+                    });
+                }
+            });
+
+            if (positions.length > 0) {
+                // 计算分组框的边界
+                const minX = Math.min(...positions.map(p => p.x - p.width / 2)) - paddingX;
+                const maxX = Math.max(...positions.map(p => p.x + p.width / 2)) + paddingX;
+                const minY = Math.min(...positions.map(p => p.y - p.height / 2)) - paddingY;
+                const maxY = Math.max(...positions.map(p => p.y + p.height / 2)) + paddingY;
+
+                // 绘制分组框
+                ctx.save();
+                ctx.strokeStyle = subgraph.borderColor || '#6c757d';
+                ctx.fillStyle = subgraph.color || 'rgba(108, 117, 125, 0.1)';
+                ctx.lineWidth = 2;
+                ctx.setLineDash([5, 5]); // 虚线边框
+
+                // 绘制矩形框
+                ctx.fillRect(minX, minY, maxX - minX, maxY - minY);
+                ctx.strokeRect(minX, minY, maxX - minX, maxY - minY);
+
+                // 绘制标签
+                if (subgraph.label) {
+                    ctx.fillStyle = subgraph.borderColor || '#6c757d';
+                    ctx.font = '12px Arial';
+                    ctx.textAlign = 'left';
+                    ctx.fillText(subgraph.label, minX + 5, minY + 15);
+                }
+
+                ctx.restore();
+
+                console.log(`分组框 ${subgraph.label} 已绘制到canvas`);
+            }
+        }
+    });
+
+    console.log('分组框绘制完成');
+}
+
+function exportImage() {
+    try {
+        console.log('开始导出图片...');
+
+        // 获取网络对象
+        const network = window.network;
+        if (!network) {
+            alert('网络未初始化，请刷新页面重试');
+            console.error('Network is not initialized');
+            return;
+        }
+
+        console.log('网络对象获取成功');
+
+        // 使用vis.js的正确导出方法
+        network.once("afterDrawing", function (ctx) {
+            try {
+                console.log('afterDrawing事件触发，开始生成图片...');
+
+                // 手动绘制分组框到canvas
+                drawSubgraphsToCanvas(ctx);
+
+                // 获取canvas数据
+                const canvas = ctx.canvas;
+                if (!canvas) {
+                    alert('无法获取画布，请稍后重试');
+                    console.error('Canvas is null');
+                    return;
+                }
+
+                console.log('Canvas获取成功:', canvas);
+
+                // 创建下载链接
+    const link = document.createElement('a');
+                const pageTitle = document.title.replace(' - 交互式HTML股权结构图', '').replace('交互式HTML股权结构图', '股权结构图');
+                const fileName = pageTitle + '_股权结构图.png';
+
+                console.log('文件名:', fileName);
+
+                // 转换为图片数据
+                const dataURL = canvas.toDataURL('image/png', 1.0);
+                if (!dataURL || dataURL === 'data:,') {
+                    alert('图片生成失败，请检查图表是否已完全加载');
+                    console.error('DataURL is empty');
+                    return;
+                }
+
+                console.log('图片数据生成成功，大小:', dataURL.length);
+
+                // 设置下载属性
+                link.download = fileName;
+                link.href = dataURL;
+
+                // 添加到DOM并触发点击
+                document.body.appendChild(link);
+    link.click();
+                document.body.removeChild(link);
+
+                console.log('图片导出完成');
+                alert('图片导出成功！文件名：' + fileName);
+
+            } catch (error) {
+                console.error('导出图片时发生错误:', error);
+                alert('导出图片失败：' + error.message);
+            }
+        });
+
+        // 触发重绘以激活afterDrawing事件
+        network.redraw();
+
+    } catch (error) {
+        console.error('导出图片时发生错误:', error);
+        alert('导出图片失败：' + error.message);
+    }
+}
+
+// 节点点击事件
+network.on('selectNode', function(params) {
+    if (params.nodes.length > 0) {
+        const nodeId = params.nodes[0];
+        const node = nodes.get(nodeId);
+        console.log('Selected node:', node.label);
+
+        // 创建调整手柄
+        createResizeHandles(nodeId);
+    }
+});
+
+// 节点双击事件（重置单个节点尺寸）
+network.on('doubleClick', function(params) {
+    if (params.nodes.length > 0) {
+        const nodeId = params.nodes[0];
+        const node = nodes.get(nodeId);
+        if (confirm(`确定要重置节点 "${node.label}" 的尺寸吗？`)) {
+            resetSingleNodeSize(nodeId);
+            // 重新创建手柄以反映新尺寸
+            setTimeout(() => {
+                createResizeHandles(nodeId);
+            }, 100);
+        }
+    }
+});
+
+// 节点取消选中事件
+network.on('deselectNode', function(params) {
+    removeResizeHandles();
+    console.log('取消选中节点');
+});
+
+// 点击空白区域时移除手柄
+network.on('click', function(params) {
+    if (params.nodes.length === 0) {
+        removeResizeHandles();
+    }
+});
+
+// 网络变化时更新手柄位置
+network.on('afterDrawing', function() {
+    if (resizeHandles.length > 0) {
+        updateResizeHandles();
+    }
+});
+
+// 页面卸载时清理
+window.addEventListener('beforeunload', function() {
+    stopDynamicUpdate();
+});
+
+// 初始化
+createGroupCheckboxes();
+setupSliders();
+setupGlobalSizeSliders();
+setTimeout(() => {
+    startDynamicUpdate();
+    // 先加载并应用全局节点尺寸，确保初始尺寸一致
+    loadGlobalNodeSize();
+    applyGlobalNodeSize();
+    // 再加载已保存的节点尺寸（如存在）
+    loadSavedSizes();
+    // 初始化隐藏节点管理列表
+    updateHiddenNodesList();
+    console.log('节点大小调整功能已加载');
+}, 1000);
+
+// 🔥 智能层级分布算法，减少连线交叉，优化视觉效果
+function distributeLevels() {
+    try {
+        console.log('🔄 智能层级分布开始执行...');
+
+        const GAP = Math.max(300, CHART_CONFIG.nodeSpacing || 0);  // 增加间距
+        const LEVEL_GAP = Math.max(250, CHART_CONFIG.levelSeparation || 0);  // 层级间距
+
+        console.log('📏 间距设置:', {GAP, LEVEL_GAP});
+
+        // 获取所有节点和边
+        const allNodes = nodes.get();
+        const allEdges = edges.get();
+
+        if (allNodes.length === 0) {
+            console.log('⚠️ 没有节点需要分布');
+            return;
+        }
+
+        // 构建层级映射和连接关系
+        const levelMap = new Map();
+        const connections = new Map(); // 存储连接关系
+
+        allNodes.forEach(node => {
+            const lvl = (typeof node.level === 'number') ? node.level : 0;
+            if (!levelMap.has(lvl)) levelMap.set(lvl, []);
+            levelMap.get(lvl).push(node);
+        });
+
+        // 分析连接关系
+        allEdges.forEach(edge => {
+            if (!connections.has(edge.from)) connections.set(edge.from, []);
+            if (!connections.has(edge.to)) connections.set(edge.to, []);
+            connections.get(edge.from).push(edge.to);
+            connections.get(edge.to).push(edge.from);
+        });
+
+        console.log('📊 节点统计:', {totalNodes: allNodes.length, levels: levelMap.size});
+
+        // 🔥 智能排序：考虑连接关系，减少交叉
+        const sortedLevels = Array.from(levelMap.keys()).sort((a, b) => a - b);
+        let movedNodes = 0;
+
+        sortedLevels.forEach(level => {
+            const levelNodes = levelMap.get(level);
+            if (levelNodes.length <= 1) {
+                console.log(`📌 层级 ${level}: 节点数量 ${levelNodes.length}，跳过`);
+                return;
+            }
+
+            console.log(`🎯 处理层级 ${level}，节点数量: ${levelNodes.length}`);
+
+            // 🔥 智能排序：优先考虑连接数，然后考虑连接关系
+            levelNodes.sort((a, b) => {
+                const aConnections = connections.get(a.id) || [];
+                const bConnections = connections.get(b.id) || [];
+
+                // 首先按连接数排序
+                if (aConnections.length !== bConnections.length) {
+                    return bConnections.length - aConnections.length;
+                }
+
+                // 连接数相同时，按ID排序保持稳定性
+                return a.id - b.id;
+            });
+
+            // 🔥 计算层级中心位置
+            const levelCenterX = 0;
+            const levelY = level * LEVEL_GAP; // 确保层级间距
+
+            // 🔥 从中心向两边分布，但考虑连接关系
+            const half = (levelNodes.length - 1) / 2;
+            levelNodes.forEach((node, index) => {
+                let targetX = levelCenterX + (index - half) * GAP;
+
+                // 🔥 微调位置以减少连线交叉
+                const nodeConnections = connections.get(node.id) || [];
+                if (nodeConnections.length > 0) {
+                    // 根据连接关系微调位置
+                    const avgConnectionX = nodeConnections.reduce((sum, connId) => {
+                        const connNode = allNodes.find(n => n.id === connId);
+                        return sum + (connNode ? connNode.x || 0 : 0);
+                    }, 0) / nodeConnections.length;
+
+                    // 轻微向连接中心偏移
+                    targetX = targetX * 0.8 + avgConnectionX * 0.2;
+                }
+
+                // 🔥 更新节点位置
+                if (typeof network.moveNode === 'function') {
+                    network.moveNode(node.id, targetX, levelY);
+                } else {
+                    const updatedNode = {
+                        ...node,
+                        x: targetX,
+                        y: levelY
+                    };
+                    nodes.update(updatedNode);
+                }
+
+                console.log(`🔄 节点 ${node.id}: 移动到 (${targetX}, ${levelY})`);
+                movedNodes++;
+            });
+        });
+
+        // 🔥 强制网络重新绘制
+        if (typeof network.redraw === 'function') {
+            network.redraw();
+        }
+
+        console.log(`✅ 智能层级分布完成，移动了 ${movedNodes} 个节点`);
+    } catch (e) {
+        console.error('❌ distributeLevels 失败:', e);
+    }
+}
+
+// 🔥 简单分布函数（保守方案）
+function simpleRedistribute() {
+    try {
+        console.log('🔄 简单分布开始执行...');
+
+        const GAP = Math.max(200, CHART_CONFIG.nodeSpacing || 0);
+
+        // 获取所有节点
+        const allNodes = nodes.get();
+        if (allNodes.length === 0) return;
+
+        // 按层级分组
+        const levelMap = new Map();
+        allNodes.forEach(node => {
+            const lvl = (typeof node.level === 'number') ? node.level : 0;
+            if (!levelMap.has(lvl)) levelMap.set(lvl, []);
+            levelMap.get(lvl).push(node);
+        });
+
+        let movedNodes = 0;
+        levelMap.forEach((levelNodes, level) => {
+            if (levelNodes.length <= 1) return;
+
+            // 简单按ID排序
+            levelNodes.sort((a, b) => a.id - b.id);
+
+            // 从中心向两边分布
+            const half = (levelNodes.length - 1) / 2;
+            levelNodes.forEach((node, index) => {
+                const targetX = (index - half) * GAP;
+
+                if (typeof network.moveNode === 'function') {
+                    network.moveNode(node.id, targetX, node.y || 0);
+                } else {
+                    const updatedNode = { ...node, x: targetX };
+                    nodes.update(updatedNode);
+                }
+                movedNodes++;
+            });
+        });
+
+        if (typeof network.redraw === 'function') {
+            network.redraw();
+        }
+
+        showMessage('简单分布完成');
+        console.log(`✅ 简单分布完成，移动了 ${movedNodes} 个节点`);
+    } catch (e) {
+        console.error('❌ 简单分布失败:', e);
+    }
+}
+
+// 🔥 智能股权布局算法：按最大比例原则，中心对称，每层3-4个节点
+function optimizeLayout() {
+    try {
+        console.log('🎯 开始智能股权布局...');
+
+        const GAP = Math.max(300, CHART_CONFIG.nodeSpacing || 0);  // 节点间距
+        const LEVEL_GAP = Math.max(250, CHART_CONFIG.levelSeparation || 0);  // 层级间距
+        const MAX_NODES_PER_LEVEL = 8;  // 每层最大节点数（原为4，提升以减少拥挤）
+
+        // 获取所有节点和边
+        const allNodes = nodes.get();
+        const allEdges = edges.get();
+
+        if (allNodes.length === 0) return;
+
+        // 🔥 构建层级映射和连接关系
+        const levelMap = new Map();
+        const nodeConnections = new Map(); // 存储每个节点的连接信息
+        const nodePercentages = new Map(); // 存储每个节点的最大比例
+
+        allNodes.forEach(node => {
+            const lvl = (typeof node.level === 'number') ? node.level : 0;
+            if (!levelMap.has(lvl)) levelMap.set(lvl, []);
+            levelMap.get(lvl).push(node);
+            nodeConnections.set(node.id, {incoming: [], outgoing: []});
+            nodePercentages.set(node.id, 0);
+        });
+
+        // 🔥 分析连接关系和比例
+        allEdges.forEach(edge => {
+            const fromConnections = nodeConnections.get(edge.from);
+            const toConnections = nodeConnections.get(edge.to);
+
+            if (fromConnections) {
+                fromConnections.outgoing.push({
+                    to: edge.to,
+                    percentage: parseFloat(edge.label) || 0
+                });
+            }
+
+            if (toConnections) {
+                toConnections.incoming.push({
+                    from: edge.from,
+                    percentage: parseFloat(edge.label) || 0
+                });
+            }
+
+            // 更新最大比例
+            const percentage = parseFloat(edge.label) || 0;
+            const currentMax = nodePercentages.get(edge.from) || 0;
+            nodePercentages.set(edge.from, Math.max(currentMax, percentage));
+        });
+
+        console.log('📊 节点连接分析完成');
+
+        // 🔥 按层级智能布局
+        const sortedLevels = Array.from(levelMap.keys()).sort((a, b) => a - b);
+        let movedNodes = 0;
+
+        sortedLevels.forEach(level => {
+            const levelNodes = levelMap.get(level);
+            if (levelNodes.length <= 1) return;
+
+            console.log(`🎯 处理层级 ${level}，节点数量: ${levelNodes.length}`);
+
+            // 🔥 按最大比例排序（从大到小）
+            levelNodes.sort((a, b) => {
+                const aPercentage = nodePercentages.get(a.id) || 0;
+                const bPercentage = nodePercentages.get(b.id) || 0;
+
+                // 首先按最大比例排序
+                if (aPercentage !== bPercentage) {
+                    return bPercentage - aPercentage;
+                }
+
+                // 比例相同时，按连接数排序
+                const aConnections = nodeConnections.get(a.id);
+                const bConnections = nodeConnections.get(b.id);
+                const aConnCount = (aConnections?.outgoing?.length || 0) + (aConnections?.incoming?.length || 0);
+                const bConnCount = (bConnections?.outgoing?.length || 0) + (bConnections?.incoming?.length || 0);
+
+                if (aConnCount !== bConnCount) {
+                    return bConnCount - aConnCount;
+                }
+
+                // 最后按ID排序保持稳定性
+                return a.id - b.id;
+            });
+
+            // 🔥 限制每层节点数量，优先保留比例大的节点
+            const limitedNodes = levelNodes.slice(0, MAX_NODES_PER_LEVEL);
+
+            // 🔥 中心对称布局
+            const levelCenterX = 0;
+            const levelY = level * LEVEL_GAP;
+
+            const half = (limitedNodes.length - 1) / 2;
+            limitedNodes.forEach((node, index) => {
+                const targetX = levelCenterX + (index - half) * GAP;
+
+                if (typeof network.moveNode === 'function') {
+                    network.moveNode(node.id, targetX, levelY);
+                } else {
+                    const updatedNode = {
+                        ...node,
+                        x: targetX,
+                        y: levelY
+                    };
+                    nodes.update(updatedNode);
+                }
+
+                const percentage = nodePercentages.get(node.id) || 0;
+                console.log(`🔄 节点 ${node.id} (比例: ${percentage}%): 移动到 (${targetX}, ${levelY})`);
+                movedNodes++;
+            });
+
+            // 🔥 处理超出限制的节点（隐藏或放在边缘）
+            if (levelNodes.length > MAX_NODES_PER_LEVEL) {
+                const extraNodes = levelNodes.slice(MAX_NODES_PER_LEVEL);
+                console.log(`⚠️ 层级 ${level} 有 ${extraNodes.length} 个节点超出限制，将被隐藏`);
+
+                extraNodes.forEach(node => {
+                    // 可以选择隐藏这些节点
+                    // hideNode(node.id);
+
+                    // 或者放在边缘位置
+                    const edgeX = levelCenterX + (MAX_NODES_PER_LEVEL / 2) * GAP + 200;
+                    if (typeof network.moveNode === 'function') {
+                        network.moveNode(node.id, edgeX, levelY);
+                    } else {
+                        const updatedNode = { ...node, x: edgeX, y: levelY };
+                        nodes.update(updatedNode);
+                    }
+                });
+            }
+        });
+
+        if (typeof network.redraw === 'function') {
+            network.redraw();
+        }
+
+        showMessage('智能股权布局完成');
+        console.log(`🎯 智能股权布局完成，调整了 ${movedNodes} 个节点`);
+    } catch (e) {
+        console.error('❌ 智能股权布局失败:', e);
+    }
+}
+
+// 🔥 解除所有节点固定状态函数
+function unfixAllNodes() {
+    try {
+        console.log('🔓 解除所有节点的固定状态...');
+
+        const allNodes = nodes.get();
+        let unfixedCount = 0;
+
+        allNodes.forEach(node => {
+            if (node.fixed) {
+                const updatedNode = {
+                    ...node,
+                    fixed: {x: false, y: false}
+                };
+                nodes.update(updatedNode);
+                unfixedCount++;
+                console.log(`🔓 解除节点 ${node.id} 的固定状态`);
+            }
+        });
+
+        if (typeof network.redraw === 'function') {
+            network.redraw();
+        }
+
+        showMessage(`已解除 ${unfixedCount} 个节点的固定状态`);
+        console.log(`✅ 解除固定状态完成，共处理 ${unfixedCount} 个节点`);
+    } catch (e) {
+        console.error('❌ 解除固定状态失败:', e);
+    }
+}
+
+// 🔥 连线样式控制函数
+function setEdgeStyle(style) {
+    try {
+        console.log(`🎨 设置连线样式: ${style}`);
+
+        const smoothConfig = getSmoothConfig(style);
+        const perEdgeSmooth = smoothConfig.enabled ? { ...smoothConfig } : { enabled: false };
+        const allEdges = edges.get();
+        const updatedEdges = allEdges.map(edge => ({
+            ...edge,
+            smooth: { ...perEdgeSmooth }
+        }));
+
+        edges.update(updatedEdges);
+        network.setOptions({
+            edges: {
+                smooth: perEdgeSmooth.enabled ? { ...perEdgeSmooth } : { enabled: false }
+            }
+        });
+
+        if (typeof network.redraw === 'function') {
+            network.redraw();
+        }
+
+        showMessage(`连线样式已设置为: ${getStyleName(style)}`);
+        console.log(`✅ 连线样式更新完成: ${style}`);
+    } catch (e) {
+        console.error('❌ 设置连线样式失败:', e);
+    }
+}
+
+// 🔥 获取平滑配置
+function getSmoothConfig(style) {
+    const configs = {
+        'straight': { enabled: false },  // 直线
+        'smooth': { enabled: true, type: 'continuous', forceDirection: 'none' },  // 平滑曲线
+        'dynamic': { enabled: true, type: 'dynamic' },  // 动态曲线
+        'continuous': { enabled: true, type: 'continuous' },  // 连续曲线
+        'discrete': { enabled: true, type: 'discrete' },  // 离散曲线
+        'diagonalCross': { enabled: true, type: 'diagonalCross' },  // 对角交叉
+        'straightCross': { enabled: true, type: 'straightCross' },  // 直线交叉
+        'horizontal': { enabled: true, type: 'cubicBezier', forceDirection: 'horizontal', roundness: 0.45 },  // 水平折线
+        'vertical': { enabled: true, type: 'cubicBezier', forceDirection: 'vertical', roundness: 0.45 }  // 垂直折线
+    };
+    const config = configs[style];
+    if (!config) {
+        return { enabled: false };
+    }
+    return { ...config };
+}
+
+// 🔥 获取样式名称
+function getStyleName(style) {
+    const names = {
+        'straight': '直线',
+        'smooth': '平滑',
+        'dynamic': '动态',
+        'continuous': '连续',
+        'discrete': '离散',
+        'diagonalCross': '对角交叉',
+        'straightCross': '直线交叉',
+        'horizontal': '水平',
+        'vertical': '垂直'
+    };
+    return names[style] || style;
+}
+
+// 🔥 连线颜色控制函数
+function setEdgeColor(colorTheme) {
+    try {
+        console.log(`🎨 设置连线颜色: ${colorTheme}`);
+
+        const allEdges = edges.get();
+        const updatedEdges = allEdges.map(edge => ({
+            ...edge,
+            color: getColorConfig(colorTheme, edge)
+        }));
+
+        edges.update(updatedEdges);
+
+        if (typeof network.redraw === 'function') {
+            network.redraw();
+        }
+
+        showMessage(`连线颜色已设置为: ${getColorName(colorTheme)}`);
+        console.log(`✅ 连线颜色更新完成: ${colorTheme}`);
+    } catch (e) {
+        console.error('❌ 设置连线颜色失败:', e);
+    }
+}
+
+// 🔥 获取颜色配置
+function getColorConfig(theme, edge) {
+    const percentage = parseFloat(edge.label) || 0;
+
+    const colorThemes = {
+        'blue': {
+            color: '#2B7CE9',
+            highlight: '#5A96F5',
+            hover: '#5A96F5'
+        },
+        'red': {
+            color: '#E74C3C',
+            highlight: '#EC7063',
+            hover: '#EC7063'
+        },
+        'green': {
+            color: '#27AE60',
+            highlight: '#58D68D',
+            hover: '#58D68D'
+        },
+        'purple': {
+            color: '#8E44AD',
+            highlight: '#BB8FCE',
+            hover: '#BB8FCE'
+        },
+        'orange': {
+            color: '#E67E22',
+            highlight: '#F39C12',
+            hover: '#F39C12'
+        },
+        'gray': {
+            color: '#7F8C8D',
+            highlight: '#A6ACAF',
+            hover: '#A6ACAF'
+        }
+    };
+
+    const baseColor = colorThemes[theme] || colorThemes['blue'];
+
+    // 🔥 根据比例调整颜色深度
+    if (percentage > 50) {
+        return {
+            ...baseColor,
+            color: adjustColorBrightness(baseColor.color, -20)
+        };
+    } else if (percentage > 20) {
+        return baseColor;
+    } else {
+        return {
+            ...baseColor,
+            color: adjustColorBrightness(baseColor.color, 20)
+        };
+    }
+}
+
+// 🔥 调整颜色亮度
+function adjustColorBrightness(hex, percent) {
+    const num = parseInt(hex.replace('#', ''), 16);
+    const amt = Math.round(2.55 * percent);
+    const R = (num >> 16) + amt;
+    const G = (num >> 8 & 0x00FF) + amt;
+    const B = (num & 0x0000FF) + amt;
+    return '#' + (0x1000000 + (R < 255 ? R < 1 ? 0 : R : 255) * 0x10000 +
+        (G < 255 ? G < 1 ? 0 : G : 255) * 0x100 +
+        (B < 255 ? B < 1 ? 0 : B : 255)).toString(16).slice(1);
+}
+
+// 🔥 获取颜色名称
+function getColorName(theme) {
+    const names = {
+        'blue': '蓝色',
+        'red': '红色',
+        'green': '绿色',
+        'purple': '紫色',
+        'orange': '橙色',
+        'gray': '灰色'
+    };
+    return names[theme] || theme;
+}
+
+// 🔥 用户手动重新分布节点
+function redistributeNodes() {
+    if (typeof distributeLevels === 'function') {
+        console.log('🔄 开始手动重新分布节点...');
+
+        // 🔥 临时启用物理引擎以允许节点移动
+        network.setOptions({
+            physics: {
+                enabled: true,
+                stabilization: {
+                    enabled: false  // 禁用稳定化，避免干扰
+                }
+            }
+        });
+
+        // 🔥 解除所有节点的固定状态
+        const allNodes = nodes.get();
+        allNodes.forEach(node => {
+            if (node.fixed) {
+                const updatedNode = {
+                    ...node,
+                    fixed: {x: false, y: false}
+                };
+                nodes.update(updatedNode);
+            }
+        });
+
+        // 🔥 执行重新分布
+        distributeLevels();
+
+        // 🔥 延迟后重新禁用物理引擎
+        setTimeout(() => {
+            network.setOptions({
+                physics: {
+                    enabled: false
+                }
+            });
+            console.log('✅ 物理引擎已重新禁用');
+        }, 1000);
+
+        showMessage('节点已重新分布');
+        console.log('✅ 用户手动触发节点重新分布完成');
+    } else {
+        showMessage('重新分布功能不可用');
+        console.error('❌ distributeLevels 函数不存在');
+    }
+}
@@ -2,9 +2,10 @@ import os
 import re
 import tempfile
 import webbrowser
-import base64
 import json
 import sys
+import time
+from contextlib import nullcontext
 import streamlit as st
 import requests
 from streamlit_mermaid import st_mermaid
@@ -12,7 +13,32 @@ from dotenv import load_dotenv
 from datetime import datetime
 from pathlib import Path
 # 导入翻译模块
-from src.utils.translator_service import translate_text as _ali_translate_text, QuotaExceededError
+from src.utils.batch_translator import translate_batch, STATUS_SKIPPED as BATCH_STATUS_SKIPPED
+from src.utils.batch_recognition import (
+    DEFAULT_MAX_CONCURRENCY as RECOGNITION_BATCH_CONCURRENCY,
+    MAX_BATCH_FILES,
+    STATUS_CACHED as BATCH_STATUS_CACHED,
+    STATUS_FAILED as BATCH_STATUS_FAILED,
+    STATUS_OK as BATCH_STATUS_OK,
+    STATUS_PARTIAL as BATCH_STATUS_PARTIAL,
+    STATUS_LABELS as BATCH_STATUS_LABELS,
+    ApiSlots,
+    batch_summary,
+    build_batch,
+    merge_batch,
+    run_batch,
+    status_rows,
+)
+from src.utils.image_preprocessor import preprocess_image, preprocess_signature
+from src.utils.recognition_cache import get_recognition_cache, image_digest, prompt_fingerprint
+from src.utils.tiled_recognition import (
+    merge_recognitions,
+    plan_tiles,
+    recognize_tiles,
+    split_image,
+    tile_prompt,
+    tiling_signature,
+)
 from src.utils.translation_usage import get_monthly_usage
 # 导入Mermaid生成功能
 from src.utils.mermaid_function import generate_mermaid_from_data as generate_mermaid_diagram
@@ -176,94 +202,110 @@ def extract_json_from_text(text: str):
     # 如果都失败，抛出错误并显示原始内容
     raise ValueError(f"无法从以下文本中提取 JSON:\n{text}")
 
+# 需要翻译的字段：顶层字符串字段，以及列表字段中每一项的名称键
+_TRANSLATABLE_LIST_FIELDS = {
+    "shareholders": ("name",),
+    "subsidiaries": ("name",),
+    "top_level_entities": ("name",),
+    "control_relationships": ("parent", "child"),
+    "entity_relationships": ("parent", "child"),
+    "all_entities": ("name",),
+}
+
+
+def _translatable_scalar_fields(data):
+    # 主公司名称兼容 core_company 字段
+    fields = ["main_company"] if "main_company" in data else (["core_company"] if "core_company" in data else [])
+    if data.get("controller"):
+        fields.append("controller")
+    return fields
+
+
+def _collect_translatable_names(data):
+    """收集股权数据中需要翻译的名称（去重、保持出现顺序）"""
+    names = {}
+    for field in _translatable_scalar_fields(data):
+        if isinstance(data[field], str) and data[field]:
+            names[data[field]] = True
+    for field, keys in _TRANSLATABLE_LIST_FIELDS.items():
+        for item in data.get(field) or []:
+            if not isinstance(item, dict):
+                continue
+            for key in keys:
+                value = item.get(key)
+                if isinstance(value, str) and value:
+                    names[value] = True
+    return list(names)
+
+
+def _rewrite_names(data, mapping):
+    """按名称映射一次性改写所有名称字段；只复制被改写的字典和列表，不修改原始数据"""
+    rewritten = dict(data)
+    for field in _translatable_scalar_fields(data):
+        rewritten[field] = mapping.get(data[field], data[field])
+    for field, keys in _TRANSLATABLE_LIST_FIELDS.items():
+        items = data.get(field)
+        if not isinstance(items, list):
+            continue
+        new_items = []
+        for item in items:
+            if isinstance(item, dict):
+                item = dict(item)
+                for key in keys:
+                    if key in item:
+                        item[key] = mapping.get(item[key], item[key])
+            new_items.append(item)
+        rewritten[field] = new_items
+    return rewritten
+
+
 # 翻译股权结构数据的函数
 def translate_equity_data(data, translate_names=False):
     """
     翻译股权结构数据
     data: 包含main_company、shareholders和subsidiaries的字典
     translate_names: 是否翻译公司名称和股东名称
+
+    先收集全部不重复的名称，再通过批量翻译引擎并发翻译（共享翻译缓存与额度），
+    最后一次性改写各字段；翻译失败或跳过的名称保留原文。
     """
     if not translate_names or not data:
         return data
-    
-    # 深拷贝数据以避免修改原始数据
-    translated_data = json.loads(json.dumps(data))
-    
-    # 创建缓存字典来存储已翻译的内容，避免重复翻译和保持一致性
-    translation_cache = {}
-    
-    # 辅助函数：翻译文本，如果已经翻译过则从缓存获取
-    def translate_text(text):
-        # 检查是否已经在缓存中
-        if text in translation_cache:
-            return translation_cache[text]
-        
-        # 如果不在缓存中，调用统一翻译服务（包含共享缓存与额度控制）
-        try:
-            translated_name = _ali_translate_text(text, 'zh', 'en')
-            translation_cache[text] = translated_name
-            return translated_name
-        except QuotaExceededError:
-            st.warning("当月翻译额度已用完，已跳过翻译。")
-            translation_cache[text] = text
-            return text
-        except Exception as e:
-            st.warning(f"⚠️ 翻译 '{text}' 时发生异常: {str(e)}")
-            translation_cache[text] = text
-            return text
-    
-    # 翻译主公司名称
-    if "main_company" in translated_data:
-        translated_data["main_company"] = translate_text(translated_data["main_company"])
-    # 兼容core_company字段
-    elif "core_company" in translated_data:
-        translated_data["core_company"] = translate_text(translated_data["core_company"])
-    
-    # 翻译股东名称
-    if "shareholders" in translated_data:
-        for shareholder in translated_data["shareholders"]:
-            if "name" in shareholder:
-                shareholder["name"] = translate_text(shareholder["name"])
-    
-    # 翻译子公司名称
-    if "subsidiaries" in translated_data:
-        for subsidiary in translated_data["subsidiaries"]:
-            if "name" in subsidiary:
-                subsidiary["name"] = translate_text(subsidiary["name"])
-    
-    # 翻译实际控制人
-    if "controller" in translated_data and translated_data["controller"]:
-        translated_data["controller"] = translate_text(translated_data["controller"])
-    
-    # 翻译顶层实体名称
-    if "top_level_entities" in translated_data:
-        for entity in translated_data["top_level_entities"]:
-            if "name" in entity:
-                entity["name"] = translate_text(entity["name"])
-    
-    # 翻译控制关系中的实体名称
-    if "control_relationships" in translated_data:
-        for rel in translated_data["control_relationships"]:
-            if "parent" in rel:
-                rel["parent"] = translate_text(rel["parent"])
-            if "child" in rel:
-                rel["child"] = translate_text(rel["child"])
-    
-    # 翻译实体关系中的实体名称
-    if "entity_relationships" in translated_data:
-        for rel in translated_data["entity_relationships"]:
-            if "parent" in rel:
-                rel["parent"] = translate_text(rel["parent"])
-            if "child" in rel:
-                rel["child"] = translate_text(rel["child"])
-    
-    # 翻译所有实体名称
-    if "all_entities" in translated_data:
-        for entity in translated_data["all_entities"]:
-            if "name" in entity:
-                entity["name"] = translate_text(entity["name"])
-    
-    return translated_data
+
+    names = _collect_translatable_names(data)
+    if not names:
+        return dict(data)
+
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+
+    def _on_progress(done, total, name, result):
+        progress_bar.progress(done / total if total else 1.0)
+        status_text.text(f"已翻译 {done}/{total}: {name}")
+
+    results = translate_batch(names, 'zh', 'en', progress_callback=_on_progress)
+    status_text.empty()
+    progress_bar.empty()
+
+    mapping = {}
+    failures = []
+    skipped = False
+    for name in names:
+        result = results.get(name) or {}
+        if result.get("translated"):
+            mapping[name] = result["translated"]
+        elif result.get("status") == BATCH_STATUS_SKIPPED:
+            skipped = True
+        elif result:
+            failures.append(f"{name} - {result.get('error')}")
+    if skipped:
+        st.warning("当月翻译额度已用完，已跳过翻译。")
+    for failure in failures[:10]:
+        st.warning(f"⚠️ 翻译 {failure}")
+    if len(failures) > 10:
+        st.warning(f"另有 {len(failures) - 10} 个名称翻译失败，保留原文")
+
+    return _rewrite_names(data, mapping)
 
 # 初始化会话状态
 if 'mermaid_code' not in st.session_state:
@@ -571,12 +613,24 @@ st.markdown("""
 支持全屏查看、缩放拖拽和文本编辑功能。
 """)
 
-# 文件上传区域
-uploaded_file = st.file_uploader("📁 上传股权结构图", type=["png", "jpg", "jpeg"])
+# 文件上传区域（可一次选择多张图片，多张时批量识别并合并结果）
+uploaded_files = st.file_uploader("📁 上传股权结构图（可多选）", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
+uploaded_file = uploaded_files[0] if len(uploaded_files or []) == 1 else None
 
 if uploaded_file:
     # 显示上传的图片预览
     st.image(uploaded_file, caption="上传的图片预览", use_container_width=True)
+elif uploaded_files:
+    # 多张图片时只显示缩略图
+    st.caption(f"已选择 {len(uploaded_files)} 张图片，点击“开始分析”将批量识别并合并为一张股权结构图")
+    st.image(uploaded_files[:12], caption=[f.name for f in uploaded_files[:12]], width=160)
+    if len(uploaded_files) > 12:
+        st.caption(f"……另有 {len(uploaded_files) - 12} 张未显示预览")
+
+# 上次批量识别的逐文件状态
+if st.session_state.get("batch_recognition_rows"):
+    with st.expander("📚 批量识别结果（逐文件状态）", expanded=False):
+        st.dataframe(st.session_state.batch_recognition_rows, use_container_width=True, hide_index=True)
 
 # 测试数据加载按钮 - 移除公司名称
 if st.button("🧪 加载测试数据", type="secondary"):
@@ -635,6 +689,27 @@ with st.expander("⚙️ API配置", expanded=True):
     if st.session_state.use_real_api:
         st.session_state.api_key = st.text_input("DashScope API密钥", value=st.session_state.api_key, type="password", placeholder="输入您的DashScope API密钥")
         
+        st.session_state.bypass_recognition_cache = st.checkbox(
+            "忽略识别缓存，重新调用模型",
+            value=st.session_state.get("bypass_recognition_cache", False),
+            help="默认情况下，同一张图片在模型和提示词未变化时直接复用上次的识别结果，不消耗 token",
+        )
+        tiled_modes = {"auto": "自动（超大图片分块）", "always": "始终分块", "off": "不分块"}
+        st.session_state.tiled_recognition_mode = st.selectbox(
+            "大图分块识别",
+            options=list(tiled_modes),
+            index=list(tiled_modes).index(st.session_state.get("tiled_recognition_mode", "auto")),
+            format_func=tiled_modes.get,
+            help="把超大股权结构图切成相互重叠的小块并发识别，再按名称合并结果，减少中间层级遗漏",
+        )
+        st.session_state.recognition_batch_concurrency = st.number_input(
+            "批量识别并发数",
+            min_value=1,
+            max_value=16,
+            value=min(16, max(1, int(st.session_state.get("recognition_batch_concurrency", RECOGNITION_BATCH_CONCURRENCY)))),
+            help="上传多张图片时同时进行的模型请求数（含分块请求），按账号的接口并发配额设置",
+        )
+
         # 显示API使用说明
         st.info("📝 提示: 使用阿里云通义千问视觉模型(qwen3-vl-plus)进行图片分析。如果API调用失败，系统将自动回退到模拟数据。")
     else:
@@ -676,6 +751,273 @@ with st.expander("⚙️ API配置", expanded=True):
 # 分析按钮 - 移除columns布局避免换行，直接设置按钮样式
 analyze_button = st.button("🔍 开始分析", type="primary", use_container_width=True)
 
+# 图片识别使用的模型和提示词；修改提示词会自动改变提示词版本，旧的识别缓存随之失效
+RECOGNITION_MODEL = 'qwen3-vl-plus'
+RECOGNITION_SYSTEM_PROMPT = "你是一个专业的股权结构图分析助手，擅长从图片中提取公司股权关系信息。请严格按照要求的JSON格式输出，不要添加任何额外的解释或文本。特别注意识别所有层级的公司，包括中间层级！"
+RECOGNITION_USER_PROMPT = (
+    "请仔细分析这张股权结构图，并严格按照以下要求提取信息：\n"
+    "\n"
+    "1. 请从左到右、从上到下的顺序扫描图片，确保不遗漏任何实体，特别是中间层级的公司。\n"
+    "2. 识别图中所有的实体（公司、股东、个人等），包括所有层级的结构。\n"
+    "3. 提取实体名称和持股比例或出资比例（如果有）。\n"
+    "   - ✅ 实体名称必须完整保留图中显示的所有文字，包括括号内的全部内容（如\"(HKEX listed: 01931)\"、\"(JP registered)\"、\"(A/R debtor 1)\"、\"(A/R seller)\"等），不得省略、截断或简化。\n"
+    "   - 例如：\"IVD Medical Holding Limited (HKEX listed: 01931)\" 必须完整作为实体名称，不能只写 \"IVD Medical Holding Limited\"。\n"
+    "4. 重要要求：即使图片中信息不完整，也必须尝试提取所有可识别的信息。不要返回空数据！对于持股比例，若未标明但有股权关系，请标注为0.1。\n"
+    "5. 特别注意：请识别并保留图片中的所有换行信息，包括每行描述的公司关系。\n"
+    "6. 请特别关注括号内的内容，这些内容通常包含重要的股权关系或注释信息。\n"
+    "   - 括号内内容是实体身份/属性的关键标识，必须作为实体名称的一部分提取，不可剥离。\n"
+    "7. 请特别注意图中的虚线连接。虚线通常表示\"控制关系\"、\"关联关系\"或\"非直接持股但具有影响力\"。\n"
+    "   - 对于每条虚线，请在 control_relationships 字段中单独记录。\n"
+    "   - 必须标注 relationship_type（如 \"ultimate_control\"、\"collective_control\"、\"indirect_ownership\"、\"related_party\" 等），并尽可能保留图中标注的文字（如 \"ultimate control\"、\"Collective control\"）作为 description。\n"
+    "   - 虚线关系不涉及具体持股比例时，percentage 字段可留空或设为标准的文字。\n"
+    "   - 不要将虚线关系混入 entity_relationships，必须分开存储！\n"
+    "8. 必须确保返回格式严格为JSON，不要包含任何其他文本！\n"
+    "\n请将提取的信息严格按照以下JSON格式输出，只输出JSON，不要输出任何其他内容：\n"
+    "{\n"
+    "  \"core_company\": \"核心公司名称\",\n"
+    "  \"shareholders\": [\n"
+    "    {\n"
+    "      \"name\": \"股东名称\",\n"
+    "      \"percentage\": 持股比例数字\n"
+    "    },\n"
+    "    ...\n"
+    "  ],\n"
+    "  \"subsidiaries\": [\n"
+    "    {\n"
+    "      \"name\": \"子公司名称\",\n"
+    "      \"percentage\": 持股比例数字\n"
+    "    },\n"
+    "    ...\n"
+    "  ],\n"
+    "  \"controller\": \"实际控制人名称\",\n"
+    "  \"top_level_entities\": [\n"
+    "    {\n"
+    "      \"name\": \"最高层级实体1\",\n"
+    "      \"percentage\": 持股比例数字\n"
+    "    },\n"
+    "    ...\n"
+    "  ],\n"
+    "  \"entity_relationships\": [\n"
+    "    {\n"
+    "      \"parent\": \"上级公司名称\",\n"
+    "      \"child\": \"下级公司名称\",\n"
+    "      \"percentage\": 持股比例数字\n"
+    "    },\n"
+    "    ...\n"
+    "  ],\n"
+    "  \"control_relationships\": [\n"
+    "    {\n"
+    "      \"parent\": \"上级实体名称\",\n"
+    "      \"child\": \"下级实体名称\",\n"
+    "      \"relationship_type\": \"关系类型\",\n"
+    "      \"description\": \"关系描述\"\n"
+    "    },\n"
+    "    ...\n"
+    "  ],\n"
+    "  \"all_entities\": [\n"
+    "    {\n"
+    "      \"name\": \"实体名称\",\n"
+    "      \"type\": \"company或person\"\n"
+    "    },\n"
+    "    ...\n"
+    "  ]\n"
+    "}\n"
+    "\n特别注意：\n"
+    "- entity_relationships字段必须包含所有层级之间的股权关系，不能遗漏任何中间层级！\n"
+    "- control_relationships字段必须包含所有虚线连接的控制关系，不能混入entity_relationships！\n"
+    "- all_entities字段必须列出图中所有实体，包括最高层、中间层和底层！\n"
+    "- 对于股权结构图，必须识别并提取至少3-5个层级的公司关系，而不仅仅是顶层和底层！\n"
+    "- 当存在多层持股关系时，如'A持有B 100%, B持有C 95%'，请确保在entity_relationships中分别记录'A-B'和'B-C'的关系，而不是错误地记录为'A-C'。\n"
+    "\n⚠️ 强制规则：所有实体名称必须完整复制图中显示的原始文本，包括括号、空格、换行符、注册地、上市代码、标签等，禁止任何形式的简化或省略。\n"
+    "\n请确保你的回答只包含上述格式的JSON，不要有任何额外的开头、结尾或解释性文字。"
+)
+RECOGNITION_PROMPT_VERSION = prompt_fingerprint(RECOGNITION_SYSTEM_PROMPT, RECOGNITION_USER_PROMPT, "temperature=0.01", "seed=12345",
+                                                preprocess_signature())
+
+
+def _call_recognition_model(prepared_image, api_key, user_prompt=RECOGNITION_USER_PROMPT):
+    """调用通义千问视觉模型识别预处理后的图片（PreparedImage），返回模型输出的文本"""
+    # 延迟导入，仅在使用真实API时导入dashscope，避免冷启动加载
+    import dashscope
+    from dashscope import MultiModalConversation
+    # 设置DashScope API密钥
+    dashscope.api_key = api_key
+
+    # 将图片字节转换为base64编码，并添加实际编码格式对应的MIME类型前缀
+    image_base64 = prepared_image.data_url()
+
+    # 构建请求消息
+    messages = [
+        {
+            "role": "system",
+            "content": RECOGNITION_SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": user_prompt
+                },
+                {
+                    "type": "image",
+                    "image": image_base64
+                }
+            ]
+        }
+    ]
+
+    # 调用阿里云通义千问视觉模型
+    response = MultiModalConversation.call(
+        model=RECOGNITION_MODEL,
+        messages=messages,
+        temperature=0.01,  # 更低温度，减少自由发挥
+        seed=12345         # 提高可重复性
+    )
+
+    # 检查响应状态
+    if response.status_code != 200:
+        raise Exception(f"API Error: {response.code} - {response.message}")
+
+    # 获取模型返回的文本
+    text_output = ""
+    try:
+        contents = response.output.choices[0].message.content
+        for item in contents:
+            if item.get("text"):
+                text_output = item["text"].strip()
+                break
+    except Exception as e:
+        raise Exception(f"解析模型输出失败: {e}")
+    return text_output
+
+def _recognition_prompt_version(grid):
+    """识别缓存使用的提示词版本；分块方式参与其中，与整图识别的结果互不混用"""
+    if grid is None:
+        return RECOGNITION_PROMPT_VERSION
+    return prompt_fingerprint(RECOGNITION_PROMPT_VERSION, tiling_signature(grid))
+
+def _recognize_tiled(image_bytes, api_key, grid, on_progress=None, slots=None):
+    """
+    分块并发识别超大图片并合并结果（不调用 st.*，可在工作线程中执行）
+    slots: 可选的 ApiSlots，限制同时进行的模型请求数
+    返回: (合并后的数据, 各块原始输出的 JSON 文本, 块序号 -> 错误信息)
+    """
+    tiles = split_image(image_bytes, grid)
+
+    def _recognize_tile(tile):
+        prepared = preprocess_image(tile.data)
+        with slots or nullcontext():
+            text = _call_recognition_model(prepared, api_key,
+                                           user_prompt=tile_prompt(RECOGNITION_USER_PROMPT, tile))
+        return extract_json_from_text(text), text
+
+    results, errors = recognize_tiles(tiles, _recognize_tile, on_progress=on_progress)
+    if len(errors) == len(tiles):
+        raise Exception(f"所有分块识别均失败: {next(iter(errors.values()))}")
+    merged = merge_recognitions([result[0] for result in results if result is not None])
+    raw_response = json.dumps([result[1] if result is not None else None for result in results], ensure_ascii=False)
+    return merged, raw_response, errors
+
+def _finalize_recognition(extracted_data):
+    """把识别得到的 JSON 转换为应用所需的格式，并按需翻译（单张和批量识别共用）"""
+    # 检查返回数据是否为空
+    if not extracted_data or all(not v for v in extracted_data.values()):
+        st.warning("⚠️ API返回的数据为空，请检查图片质量或内容是否清晰可见")
+        # 返回一个基本的数据结构，但使用与API一致的键名
+        # 这样后续处理逻辑可以保持统一
+        extracted_data = {
+            "core_company": "未识别到公司",
+            "shareholders": [],
+            "subsidiaries": [],
+            "controller": "",
+            "top_level_entities": []
+        }
+    
+    # 转换数据格式为应用所需的格式
+    # 更健壮的格式转换，支持两种可能的返回格式
+    transformed_data = {
+        "main_company": extracted_data.get("core_company", "") or extracted_data.get("main_company", "未知公司"),
+        "shareholders": [],
+        "subsidiaries": [],
+        "controller": extracted_data.get("controller", ""),
+        "top_level_entities": extracted_data.get("top_level_entities", []),
+        "entity_relationships": extracted_data.get("entity_relationships", []),
+        "control_relationships": extracted_data.get("control_relationships", []),
+        "all_entities": extracted_data.get("all_entities", [])
+    }
+    
+    # 转换股东数据 - 支持两种可能的字段名
+    shareholders_source = extracted_data.get("shareholders", [])
+    if shareholders_source:
+        for sh in shareholders_source:
+            try:
+                shareholder_data = {}
+                # 提取名称
+                if "name" in sh:
+                    shareholder_data["name"] = sh["name"]
+                else:
+                    st.warning(f"⚠️ 股东数据缺少name字段: {sh}")
+                    continue
+                
+                # 处理百分比 - 支持ratio和percentage两种可能
+                if "ratio" in sh:
+                    shareholder_data["percentage"] = float(sh["ratio"]) * 100  # 转换为百分比
+                elif "percentage" in sh:
+                    shareholder_data["percentage"] = float(sh["percentage"])
+                else:
+                    st.warning(f"⚠️ 股东{sh.get('name', '未知')}缺少持股比例信息")
+                    shareholder_data["percentage"] = 0
+                
+                # 添加连接线类型信息（如果有）
+                if "connection_type" in sh:
+                    shareholder_data["connection_type"] = sh["connection_type"]
+                
+                transformed_data["shareholders"].append(shareholder_data)
+            except Exception as e:
+                st.error(f"⚠️ 处理股东数据时出错: {e}")
+    
+    # 转换子公司数据 - 支持两种可能的字段名
+    subsidiaries_source = extracted_data.get("subsidiaries", [])
+    if subsidiaries_source:
+        for sub in subsidiaries_source:
+            try:
+                subsidiary_data = {}
+                # 提取名称
+                if "name" in sub:
+                    subsidiary_data["name"] = sub["name"]
+                else:
+                    st.warning(f"⚠️ 子公司数据缺少name字段: {sub}")
+                    continue
+                
+                # 处理百分比 - 支持ratio和percentage两种可能
+                if "ratio" in sub:
+                    subsidiary_data["percentage"] = float(sub["ratio"]) * 100  # 转换为百分比
+                elif "percentage" in sub:
+                    subsidiary_data["percentage"] = float(sub["percentage"])
+                else:
+                    st.warning(f"⚠️ 子公司{sub.get('name', '未知')}缺少持股比例信息")
+                    subsidiary_data["percentage"] = 0
+                
+                # 添加连接线类型信息（如果有）
+                if "connection_type" in sub:
+                    subsidiary_data["connection_type"] = sub["connection_type"]
+                
+                transformed_data["subsidiaries"].append(subsidiary_data)
+            except Exception as e:
+                st.error(f"⚠️ 处理子公司数据时出错: {e}")
+    
+    # 统一的返回逻辑，无论子公司数据是否存在
+    # 检查是否需要翻译
+    if st.session_state.translate_to_english:
+        st.info("🌐 正在翻译股权结构信息...")
+        try:
+            transformed_data = translate_equity_data(transformed_data, translate_names=True)
+        except Exception as e:
+            st.warning(f"⚠️ 翻译过程中出现错误，但将继续使用原始数据: {str(e)}")
+    
+    return transformed_data
+
 # 使用阿里云通义千问视觉模型分析图片的函数
 def analyze_image_with_llm(image_bytes, file_name=None):
     """
@@ -698,240 +1040,67 @@ def analyze_image_with_llm(image_bytes, file_name=None):
                 st.info("🔍 使用阿里云通义千问视觉模型分析图片...")
         
         if use_real_api:
-            # 延迟导入，仅在使用真实API时导入dashscope，避免冷启动加载
-            import dashscope
-            from dashscope import MultiModalConversation
-            # 设置DashScope API密钥
-            dashscope.api_key = api_key
-            
-            # 将图片字节转换为base64编码，并添加适当的MIME类型前缀
-            import base64
-            image_base64 = f"data:image/png;base64,{base64.b64encode(image_bytes).decode('utf-8')}"
-            
-            # 构建请求消息
-            messages = [
-                {
-                    "role": "system",
-                    "content": "你是一个专业的股权结构图分析助手，擅长从图片中提取公司股权关系信息。请严格按照要求的JSON格式输出，不要添加任何额外的解释或文本。特别注意识别所有层级的公司，包括中间层级！"
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": (
-                                "请仔细分析这张股权结构图，并严格按照以下要求提取信息：\n"
-                                "\n"
-                                "1. 请从左到右、从上到下的顺序扫描图片，确保不遗漏任何实体，特别是中间层级的公司。\n"
-                                "2. 识别图中所有的实体（公司、股东、个人等），包括所有层级的结构。\n"
-                                "3. 提取实体名称和持股比例或出资比例（如果有）。\n"
-                                "   - ✅ 实体名称必须完整保留图中显示的所有文字，包括括号内的全部内容（如\"(HKEX listed: 01931)\"、\"(JP registered)\"、\"(A/R debtor 1)\"、\"(A/R seller)\"等），不得省略、截断或简化。\n"
-                                "   - 例如：\"IVD Medical Holding Limited (HKEX listed: 01931)\" 必须完整作为实体名称，不能只写 \"IVD Medical Holding Limited\"。\n"
-                                "4. 重要要求：即使图片中信息不完整，也必须尝试提取所有可识别的信息。不要返回空数据！对于持股比例，若未标明但有股权关系，请标注为0.1。\n"
-                                "5. 特别注意：请识别并保留图片中的所有换行信息，包括每行描述的公司关系。\n"
-                                "6. 请特别关注括号内的内容，这些内容通常包含重要的股权关系或注释信息。\n"
-                                "   - 括号内内容是实体身份/属性的关键标识，必须作为实体名称的一部分提取，不可剥离。\n"
-                                "7. 请特别注意图中的虚线连接。虚线通常表示\"控制关系\"、\"关联关系\"或\"非直接持股但具有影响力\"。\n"
-                                "   - 对于每条虚线，请在 control_relationships 字段中单独记录。\n"
-                                "   - 必须标注 relationship_type（如 \"ultimate_control\"、\"collective_control\"、\"indirect_ownership\"、\"related_party\" 等），并尽可能保留图中标注的文字（如 \"ultimate control\"、\"Collective control\"）作为 description。\n"
-                                "   - 虚线关系不涉及具体持股比例时，percentage 字段可留空或设为标准的文字。\n"
-                                "   - 不要将虚线关系混入 entity_relationships，必须分开存储！\n"
-                                "8. 必须确保返回格式严格为JSON，不要包含任何其他文本！\n"
-                                "\n请将提取的信息严格按照以下JSON格式输出，只输出JSON，不要输出任何其他内容：\n"
-                                "{\n"
-                                "  \"core_company\": \"核心公司名称\",\n"
-                                "  \"shareholders\": [\n"
-                                "    {\n"
-                                "      \"name\": \"股东名称\",\n"
-                                "      \"percentage\": 持股比例数字\n"
-                                "    },\n"
-                                "    ...\n"
-                                "  ],\n"
-                                "  \"subsidiaries\": [\n"
-                                "    {\n"
-                                "      \"name\": \"子公司名称\",\n"
-                                "      \"percentage\": 持股比例数字\n"
-                                "    },\n"
-                                "    ...\n"
-                                "  ],\n"
-                                "  \"controller\": \"实际控制人名称\",\n"
-                                "  \"top_level_entities\": [\n"
-                                "    {\n"
-                                "      \"name\": \"最高层级实体1\",\n"
-                                "      \"percentage\": 持股比例数字\n"
-                                "    },\n"
-                                "    ...\n"
-                                "  ],\n"
-                                "  \"entity_relationships\": [\n"
-                                "    {\n"
-                                "      \"parent\": \"上级公司名称\",\n"
-                                "      \"child\": \"下级公司名称\",\n"
-                                "      \"percentage\": 持股比例数字\n"
-                                "    },\n"
-                                "    ...\n"
-                                "  ],\n"
-                                "  \"control_relationships\": [\n"
-                                "    {\n"
-                                "      \"parent\": \"上级实体名称\",\n"
-                                "      \"child\": \"下级实体名称\",\n"
-                                "      \"relationship_type\": \"关系类型\",\n"
-                                "      \"description\": \"关系描述\"\n"
-                                "    },\n"
-                                "    ...\n"
-                                "  ],\n"
-                                "  \"all_entities\": [\n"
-                                "    {\n"
-                                "      \"name\": \"实体名称\",\n"
-                                "      \"type\": \"company或person\"\n"
-                                "    },\n"
-                                "    ...\n"
-                                "  ]\n"
-                                "}\n"
-                                "\n特别注意：\n"
-                                "- entity_relationships字段必须包含所有层级之间的股权关系，不能遗漏任何中间层级！\n"
-                                "- control_relationships字段必须包含所有虚线连接的控制关系，不能混入entity_relationships！\n"
-                                "- all_entities字段必须列出图中所有实体，包括最高层、中间层和底层！\n"
-                                "- 对于股权结构图，必须识别并提取至少3-5个层级的公司关系，而不仅仅是顶层和底层！\n"
-                                "- 当存在多层持股关系时，如'A持有B 100%, B持有C 95%'，请确保在entity_relationships中分别记录'A-B'和'B-C'的关系，而不是错误地记录为'A-C'。\n"
-                                "\n⚠️ 强制规则：所有实体名称必须完整复制图中显示的原始文本，包括括号、空格、换行符、注册地、上市代码、标签等，禁止任何形式的简化或省略。\n"
-                                "\n请确保你的回答只包含上述格式的JSON，不要有任何额外的开头、结尾或解释性文字。"
-                            )
-                        },
-                        {
-                            "type": "image",
-                            "image": image_base64
-                        }
-                    ]
-                }
-            ]
-            
-            # 调用阿里云通义千问视觉模型
-            response = MultiModalConversation.call(
-                model='qwen3-vl-plus',
-                messages=messages,
-                temperature=0.01,  # 更低温度，减少自由发挥
-                seed=12345         # 提高可重复性
-            )
-            
-            # 检查响应状态
-            if response.status_code != 200:
-                raise Exception(f"API Error: {response.code} - {response.message}")
-            
-            # 获取模型返回的文本
-            text_output = ""
-            try:
-                contents = response.output.choices[0].message.content
-                for item in contents:
-                    if item.get("text"):
-                        text_output = item["text"].strip()
-                        break
-            except Exception as e:
-                raise Exception(f"解析模型输出失败: {e}")
-            
-            # 安全提取 JSON
-            extracted_data = extract_json_from_text(text_output)
-            st.success("✅ 成功使用阿里云通义千问视觉模型分析图片")
-            
-            # 添加调试信息
-            st.write("📊 原始API返回数据:")
-            st.json(extracted_data)
-            
-            # 检查返回数据是否为空
-            if not extracted_data or all(not v for v in extracted_data.values()):
-                st.warning("⚠️ API返回的数据为空，请检查图片质量或内容是否清晰可见")
-                # 返回一个基本的数据结构，但使用与API一致的键名
-                # 这样后续处理逻辑可以保持统一
-                extracted_data = {
-                    "core_company": "未识别到公司",
-                    "shareholders": [],
-                    "subsidiaries": [],
-                    "controller": "",
-                    "top_level_entities": []
-                }
-            
-            # 转换数据格式为应用所需的格式
-            # 更健壮的格式转换，支持两种可能的返回格式
-            transformed_data = {
-                "main_company": extracted_data.get("core_company", "") or extracted_data.get("main_company", "未知公司"),
-                "shareholders": [],
-                "subsidiaries": [],
-                "controller": extracted_data.get("controller", ""),
-                "top_level_entities": extracted_data.get("top_level_entities", []),
-                "entity_relationships": extracted_data.get("entity_relationships", []),
-                "control_relationships": extracted_data.get("control_relationships", []),
-                "all_entities": extracted_data.get("all_entities", [])
-            }
-            
-            # 转换股东数据 - 支持两种可能的字段名
-            shareholders_source = extracted_data.get("shareholders", [])
-            if shareholders_source:
-                for sh in shareholders_source:
+            # 同一张图片（内容哈希）、模型和提示词版本的识别结果直接复用，不再调用模型
+            image_hash = image_digest(image_bytes)
+            recognition_cache = get_recognition_cache()
+            # 超大图片分块识别
+            grid = plan_tiles(image_bytes, st.session_state.get("tiled_recognition_mode", "auto"))
+            prompt_version = _recognition_prompt_version(grid)
+            cached = None
+            if not st.session_state.get("bypass_recognition_cache", False):
+                cached = recognition_cache.get(image_hash, RECOGNITION_MODEL, prompt_version)
+            if cached is not None:
+                extracted_data = cached["parsed"]
+                st.success("⚡ 命中识别缓存，未调用模型（不消耗 token）")
+            else:
+                tile_errors = {}
+                if grid is not None:
+                    tile_count = grid[0] * grid[1]
+                    progress = st.progress(0.0, text=f"🧩 分块识别 0/{tile_count}")
+                    started = time.perf_counter()
                     try:
-                        shareholder_data = {}
-                        # 提取名称
-                        if "name" in sh:
-                            shareholder_data["name"] = sh["name"]
-                        else:
-                            st.warning(f"⚠️ 股东数据缺少name字段: {sh}")
-                            continue
-                        
-                        # 处理百分比 - 支持ratio和percentage两种可能
-                        if "ratio" in sh:
-                            shareholder_data["percentage"] = float(sh["ratio"]) * 100  # 转换为百分比
-                        elif "percentage" in sh:
-                            shareholder_data["percentage"] = float(sh["percentage"])
-                        else:
-                            st.warning(f"⚠️ 股东{sh.get('name', '未知')}缺少持股比例信息")
-                            shareholder_data["percentage"] = 0
-                        
-                        # 添加连接线类型信息（如果有）
-                        if "connection_type" in sh:
-                            shareholder_data["connection_type"] = sh["connection_type"]
-                        
-                        transformed_data["shareholders"].append(shareholder_data)
-                    except Exception as e:
-                        st.error(f"⚠️ 处理股东数据时出错: {e}")
-            
-            # 转换子公司数据 - 支持两种可能的字段名
-            subsidiaries_source = extracted_data.get("subsidiaries", [])
-            if subsidiaries_source:
-                for sub in subsidiaries_source:
+                        extracted_data, text_output, tile_errors = _recognize_tiled(
+                            image_bytes, api_key, grid,
+                            on_progress=lambda done, total: progress.progress(done / total, text=f"🧩 分块识别 {done}/{total}"),
+                        )
+                    finally:
+                        progress.empty()
+                    if tile_errors:
+                        failed = "、".join(str(index + 1) for index in sorted(tile_errors))
+                        st.warning(f"⚠️ 第 {failed} 块识别失败，结果可能不完整（未写入识别缓存，下次重新识别）")
+                    st.caption(
+                        f"🧩 分块识别 {grid[0]}×{grid[1]} 块，耗时 {time.perf_counter() - started:.1f}s，"
+                        f"合并后 {len(extracted_data['all_entities'])} 个实体、"
+                        f"{len(extracted_data['entity_relationships'])} 条股权关系"
+                    )
+                else:
+                    # 上传前预处理（EXIF旋转、缩放、颜色模式、重新编码），减小请求体
+                    started = time.perf_counter()
+                    prepared_image = preprocess_image(image_bytes)
+                    st.caption(f"🖼️ 图片预处理：{prepared_image.summary()}")
+                    text_output = _call_recognition_model(prepared_image, api_key)
+                    model_seconds = time.perf_counter() - started - prepared_image.elapsed
+                    st.caption(
+                        f"⏱️ 识别总耗时 {time.perf_counter() - started:.1f}s"
+                        f"（预处理 {prepared_image.elapsed * 1000:.0f}ms，模型 {model_seconds:.1f}s），"
+                        f"上传数据减少 {prepared_image.bytes_saved / 1024:.0f}KB"
+                    )
+                    # 安全提取 JSON
+                    extracted_data = extract_json_from_text(text_output)
+                # 部分分块失败的结果不完整，不写入缓存（与批量识别相同）
+                if not tile_errors:
                     try:
-                        subsidiary_data = {}
-                        # 提取名称
-                        if "name" in sub:
-                            subsidiary_data["name"] = sub["name"]
-                        else:
-                            st.warning(f"⚠️ 子公司数据缺少name字段: {sub}")
-                            continue
-                        
-                        # 处理百分比 - 支持ratio和percentage两种可能
-                        if "ratio" in sub:
-                            subsidiary_data["percentage"] = float(sub["ratio"]) * 100  # 转换为百分比
-                        elif "percentage" in sub:
-                            subsidiary_data["percentage"] = float(sub["percentage"])
-                        else:
-                            st.warning(f"⚠️ 子公司{sub.get('name', '未知')}缺少持股比例信息")
-                            subsidiary_data["percentage"] = 0
-                        
-                        # 添加连接线类型信息（如果有）
-                        if "connection_type" in sub:
-                            subsidiary_data["connection_type"] = sub["connection_type"]
-                        
-                        transformed_data["subsidiaries"].append(subsidiary_data)
+                        recognition_cache.put(image_hash, RECOGNITION_MODEL, prompt_version,
+                                              extracted_data, text_output)
                     except Exception as e:
-                        st.error(f"⚠️ 处理子公司数据时出错: {e}")
+                        st.warning(f"⚠️ 写入识别缓存失败: {e}")
+                st.success("✅ 成功使用阿里云通义千问视觉模型分析图片")
             
-            # 统一的返回逻辑，无论子公司数据是否存在
-            # 检查是否需要翻译
-            if st.session_state.translate_to_english:
-                st.info("🌐 正在翻译股权结构信息...")
-                try:
-                    transformed_data = translate_equity_data(transformed_data, translate_names=True)
-                except Exception as e:
-                    st.warning(f"⚠️ 翻译过程中出现错误，但将继续使用原始数据: {str(e)}")
+            # 添加调试信息
+            st.write("📊 原始API返回数据:")
+            st.json(extracted_data)
             
-            return transformed_data
+            return _finalize_recognition(extracted_data)
         else:
             # 使用模拟数据
             st.info("⚠️ 使用模拟数据分析")
@@ -1129,7 +1298,113 @@ def analyze_image_with_llm(image_bytes, file_name=None):
         
         return extracted_data
 
+
+def _recognize_batch_item(item, api_key, tiled_mode, bypass_cache, slots):
+    """
+    批量识别中的单个文件（在工作线程中执行，不调用 st.*）
+    会话状态中的配置由调用方在主线程读取后传入
+    返回: (识别结果 JSON, 是否命中缓存, 失败的分块 {序号: 错误信息})
+    """
+    recognition_cache = get_recognition_cache()
+    grid = plan_tiles(item.data, tiled_mode)
+    prompt_version = _recognition_prompt_version(grid)
+    if not bypass_cache:
+        cached = recognition_cache.get(item.digest, RECOGNITION_MODEL, prompt_version)
+        if cached is not None:
+            return cached["parsed"], True, {}
+    if grid is not None:
+        extracted_data, text_output, tile_errors = _recognize_tiled(item.data, api_key, grid, slots=slots)
+        if tile_errors:
+            # 部分分块失败的结果不完整，不写入缓存，下次重新识别
+            return extracted_data, False, tile_errors
+    else:
+        prepared_image = preprocess_image(item.data)
+        with slots:
+            text_output = _call_recognition_model(prepared_image, api_key)
+        extracted_data = extract_json_from_text(text_output)
+    try:
+        recognition_cache.put(item.digest, RECOGNITION_MODEL, prompt_version, extracted_data, text_output)
+    except Exception:
+        # 缓存写入失败不影响本次识别结果
+        pass
+    return extracted_data, False, {}
+
+def analyze_images_batch(files):
+    """
+    批量识别多张股权结构图并合并为一份股权数据
+    files: [(文件名, 图片字节)]
+    返回: (合并后的股权数据（应用格式），每个文件一行的状态表)；没有文件识别成功时数据为 None
+    """
+    api_key = st.session_state.api_key
+    tiled_mode = st.session_state.get("tiled_recognition_mode", "auto")
+    bypass_cache = st.session_state.get("bypass_recognition_cache", False)
+    concurrency = st.session_state.get("recognition_batch_concurrency", RECOGNITION_BATCH_CONCURRENCY)
+    slots = ApiSlots(concurrency)
+
+    items = build_batch(files)
+    if len(files) > len(items):
+        st.warning(f"⚠️ 单批最多识别 {MAX_BATCH_FILES} 个文件，其余 {len(files) - len(items)} 个已忽略")
+    progress = st.progress(0.0, text=f"📚 批量识别 0/{len(items)}")
+    table = st.empty()
+    table.dataframe(status_rows(items), use_container_width=True, hide_index=True)
+
+    def _on_progress(done, total, item):
+        progress.progress(done / total, text=f"📚 批量识别 {done}/{total}：{item.name} {BATCH_STATUS_LABELS[item.status]}")
+        table.dataframe(status_rows(items), use_container_width=True, hide_index=True)
+
+    started = time.perf_counter()
+    try:
+        run_batch(
+            items,
+            lambda item: _recognize_batch_item(item, api_key, tiled_mode, bypass_cache, slots),
+            max_workers=slots.limit,
+            on_progress=_on_progress,
+        )
+    finally:
+        progress.empty()
+    rows = status_rows(items)
+    table.dataframe(rows, use_container_width=True, hide_index=True)
+
+    summary = batch_summary(items)
+    st.caption(
+        f"📚 批量识别 {len(items)} 个文件，耗时 {time.perf_counter() - started:.1f}s（并发 {slots.limit}）："
+        + "，".join(f"{BATCH_STATUS_LABELS[status]} {count}" for status, count in summary.items() if count)
+    )
+    if summary[BATCH_STATUS_FAILED]:
+        st.warning(f"⚠️ {summary[BATCH_STATUS_FAILED]} 个文件识别失败，合并结果不包含这些文件")
+    if summary[BATCH_STATUS_PARTIAL]:
+        st.warning(f"⚠️ {summary[BATCH_STATUS_PARTIAL]} 个文件有分块识别失败，结果可能不完整（未写入识别缓存）")
+
+    merged = merge_batch(items)
+    if merged is None:
+        return None, rows
+    st.success(
+        f"✅ 已合并 {summary[BATCH_STATUS_OK] + summary[BATCH_STATUS_CACHED] + summary[BATCH_STATUS_PARTIAL]} "
+        f"个文件的识别结果："
+        f"{len(merged['all_entities'])} 个实体、{len(merged['entity_relationships'])} 条股权关系"
+    )
+    return _finalize_recognition(merged), rows
+
 # 分析逻辑
+if analyze_button and len(uploaded_files or []) > 1:
+    if not (st.session_state.use_real_api and st.session_state.api_key):
+        st.warning("⚠️ 批量识别需要启用阿里云通义千问API并设置API密钥；模拟数据模式下请逐张上传")
+    else:
+        try:
+            extracted_data, batch_rows = analyze_images_batch([(f.name, f.getvalue()) for f in uploaded_files])
+            st.session_state.batch_recognition_rows = batch_rows
+            if extracted_data is None:
+                st.error("❌ 所有文件均识别失败，请检查API连接和图片质量")
+            else:
+                st.session_state.mermaid_code = generate_mermaid_diagram(extracted_data)
+                st.session_state.extracted_data = extracted_data
+                st.session_state.json_data = json.dumps(extracted_data, ensure_ascii=False, indent=2)
+                st.success("✅ 分析完成！")
+                st.markdown("### 📈 股权结构图表")
+                st_mermaid(st.session_state.mermaid_code)
+        except Exception as e:
+            st.error(f"❌ 批量识别过程中出现错误: {str(e)}")
+
 if analyze_button and uploaded_file:
     with st.spinner("正在分析图片..."):
         try:
@@ -54,10 +54,31 @@ from src.utils.state_persistence import (
     snapshot_fingerprint,
     sanitize_workspace_name,
 )
-from src.utils.alicloud_translator import get_access_key
-from src.utils.translator_service import translate_text, QuotaExceededError
+from src.utils.alicloud_translator import get_translator_client
+from src.utils.batch_translator import translate_batch, STATUS_SKIPPED as BATCH_STATUS_SKIPPED
 from src.utils.translation_usage import get_monthly_usage, set_month_limit, get_admin_password
 from src.utils.sidebar_helpers import render_baidu_name_checker
+from src.utils.equity_graph import ENTITY_LIST_KEYS, EquityGraph, relationship_endpoints
+from src.utils.equity_levels import find_ownership_cycles
+from src.utils.render_cache import render_cache, render_fingerprint
+from src.utils.visjs_library import (
+    LIBRARY_MODE_CDN,
+    LIBRARY_MODE_INLINE,
+    LIBRARY_MODE_SIBLING,
+    LIBRARY_MODE_STATIC,
+    VISJS_FILE_NAME,
+    ensure_streamlit_static_library,
+    has_vendored_library,
+    load_vendored_library,
+    resolve_library_mode,
+    write_sibling_library,
+)
+from src.utils.translation_seeding import (
+    seed_autosaves_in_background,
+    seed_from_import,
+    seed_from_snapshot,
+    seed_manual_edit,
+)
 from src.utils.display_formatters import (
     format_english_company_name,
     _separate_chinese_name,
@@ -344,11 +365,52 @@ def _infer_parent_from_filename(filename: str) -> str:
     """
     return _extract_company_name_from_filename(filename)
 
+def _run_batch_translation(names):
+    """并发翻译名称列表（令牌桶限流、失败重试），实时更新进度条"""
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+
+    def _on_progress(done, total, name, result):
+        progress_bar.progress(done / total if total else 1.0)
+        status_text.text(f"已完成 {done}/{total}: {name}")
+
+    results = translate_batch(names, 'zh', 'en', progress_callback=_on_progress)
+    status_text.text("翻译完成")
+    return results
+
+
+def _apply_batch_translation(targets, results):
+    """将批量翻译结果写回实体，返回 (成功数, 失败数, 跳过数)"""
+    success_count = failed_count = skipped_count = 0
+    failures = []
+    for entity, entity_name in targets:
+        result = results.get(entity_name)
+        if not result:
+            continue
+        if result["translated"]:
+            entity["english_name"] = result["translated"]
+            success_count += 1
+        elif result["status"] == BATCH_STATUS_SKIPPED:
+            skipped_count += 1
+        else:
+            failed_count += 1
+            failures.append(f"{entity_name} - {result['error']}")
+    if skipped_count:
+        st.warning("当月翻译额度已用完，已跳过剩余翻译。")
+    for failure in failures[:20]:
+        st.warning(f"翻译异常: {failure}")
+    if len(failures) > 20:
+        st.warning(f"另有 {len(failures) - 20} 个实体翻译失败")
+    return success_count, failed_count, skipped_count
+
+
 def _batch_translate_entities(entity_list_key: str):
     """批量翻译指定实体列表中的中文名称为英文"""
     try:
-        # 先检查阿里云翻译凭证，避免逐条报错
-        access_key_id, access_key_secret = get_access_key()
+        # 先检查阿里云翻译凭证，避免逐条报错；配置可能刚修改过，重新读取后由翻译客户端沿用
+        translator_client = get_translator_client()
+        translator_client.invalidate_credentials()
+        access_key_id, access_key_secret = translator_client.credentials()
         if not access_key_id or not access_key_secret:
             st.error("未找到阿里云翻译配置，请在环境变量或config.json中配置 AccessKey")
             return
@@ -370,36 +432,10 @@ def _batch_translate_entities(entity_list_key: str):
         
         st.info(f"开始翻译 {len(need_translate)} 个实体的名称...")
         
-        success_count = 0
-        failed_count = 0
-        skipped_count = 0
-        
-        # 创建进度条
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i, entity in enumerate(need_translate):
-            entity_name = entity.get("name", "")
-            status_text.text(f"正在翻译: {entity_name}")
-            
-            try:
-                translated_text = translate_text(entity_name, 'zh', 'en')
-                if translated_text:
-                    entity["english_name"] = translated_text
-                    success_count += 1
-            except QuotaExceededError:
-                st.warning("当月翻译额度已用完，已跳过剩余翻译。")
-                break
-            except Exception as e:
-                failed_count += 1
-                st.warning(f"翻译异常: {entity_name} - {str(e)}")
-            
-            # 更新进度
-            progress_bar.progress((i + 1) / len(need_translate))
-            time.sleep(0.1)  # 避免API调用过快
-        
-        # 显示结果
-        status_text.text("翻译完成")
+        results = _run_batch_translation([entity.get("name", "") for entity in need_translate])
+        success_count, failed_count, skipped_count = _apply_batch_translation(
+            [(entity, entity.get("name", "")) for entity in need_translate], results
+        )
         st.success(f"翻译完成！成功: {success_count}, 失败: {failed_count}, 跳过: {skipped_count}")
         
         # 将已翻译的英文名同步到所有相关实体列表，确保渲染可用
@@ -414,121 +450,49 @@ def _batch_translate_entities(entity_list_key: str):
 def _batch_translate_all_entities():
     """批量翻译所有实体（包括top_level_entities、subsidiaries、all_entities等）"""
     try:
-        # 先检查阿里云翻译凭证，避免逐条报错
-        access_key_id, access_key_secret = get_access_key()
+        # 先检查阿里云翻译凭证，避免逐条报错；配置可能刚修改过，重新读取后由翻译客户端沿用
+        translator_client = get_translator_client()
+        translator_client.invalidate_credentials()
+        access_key_id, access_key_secret = translator_client.credentials()
         if not access_key_id or not access_key_secret:
             st.error("未找到阿里云翻译配置，请在环境变量或config.json中配置 AccessKey")
             return
         
         # 收集所有需要翻译的实体
         all_entities_to_translate = []
+        queued_names = set()  # 避免重复翻译同一个实体
+        graph = EquityGraph(st.session_state.equity_data)
+        
+        def _queue(entity, list_key, entity_name):
+            queued_names.add(entity_name)
+            all_entities_to_translate.append({
+                "entity": entity,
+                "list_key": list_key,
+                "name": entity_name
+            })
         
         # 从各个实体列表中收集
         for entity_list_key in ["top_level_entities", "subsidiaries", "all_entities"]:
             entities = st.session_state.equity_data.get(entity_list_key, [])
             for entity in entities:
                 if not entity.get("english_name") and entity.get("name"):
-                    # 避免重复翻译同一个实体
                     entity_name = entity.get("name")
-                    if not any(e["name"] == entity_name for e in all_entities_to_translate):
-                        all_entities_to_translate.append({
-                            "entity": entity,
-                            "list_key": entity_list_key,
-                            "name": entity_name
-                        })
-        
-        # 核心公司
-        core_company = st.session_state.equity_data.get("core_company", "")
-        if core_company and not any(e["name"] == core_company for e in all_entities_to_translate):
-            # 在all_entities中查找核心公司
-            core_entity = None
-            for entity in st.session_state.equity_data.get("all_entities", []):
-                if entity.get("name") == core_company:
-                    core_entity = entity
-                    break
-            
-            if core_entity and not core_entity.get("english_name"):
-                all_entities_to_translate.append({
-                    "entity": core_entity,
-                    "list_key": "all_entities",
-                    "name": core_company
-                })
-        
-        # 🔥 关键修复：从entity_relationships中收集需要翻译的实体名称
-        entity_relationships = st.session_state.equity_data.get("entity_relationships", [])
-        for rel in entity_relationships:
-            parent_name = rel.get("parent", rel.get("from", ""))
-            child_name = rel.get("child", rel.get("to", ""))
-            
-            # 检查parent实体是否需要翻译
-            if parent_name and not any(e["name"] == parent_name for e in all_entities_to_translate):
-                # 在all_entities中查找parent实体
-                parent_entity = None
-                for entity in st.session_state.equity_data.get("all_entities", []):
-                    if entity.get("name") == parent_name:
-                        parent_entity = entity
-                        break
-                
-                if parent_entity and not parent_entity.get("english_name"):
-                    all_entities_to_translate.append({
-                        "entity": parent_entity,
-                        "list_key": "all_entities",
-                        "name": parent_name
-                    })
-            
-            # 检查child实体是否需要翻译
-            if child_name and not any(e["name"] == child_name for e in all_entities_to_translate):
-                # 在all_entities中查找child实体
-                child_entity = None
-                for entity in st.session_state.equity_data.get("all_entities", []):
-                    if entity.get("name") == child_name:
-                        child_entity = entity
-                        break
-                
-                if child_entity and not child_entity.get("english_name"):
-                    all_entities_to_translate.append({
-                        "entity": child_entity,
-                        "list_key": "all_entities",
-                        "name": child_name
-                    })
-        
-        # 🔥 关键修复：从control_relationships中收集需要翻译的实体名称
-        control_relationships = st.session_state.equity_data.get("control_relationships", [])
-        for rel in control_relationships:
-            controller_name = rel.get("parent", rel.get("from", rel.get("controller", "")))
-            controlled_name = rel.get("child", rel.get("to", rel.get("controlled", "")))
-            
-            # 检查controller实体是否需要翻译
-            if controller_name and not any(e["name"] == controller_name for e in all_entities_to_translate):
-                # 在all_entities中查找controller实体
-                controller_entity = None
-                for entity in st.session_state.equity_data.get("all_entities", []):
-                    if entity.get("name") == controller_name:
-                        controller_entity = entity
-                        break
-                
-                if controller_entity and not controller_entity.get("english_name"):
-                    all_entities_to_translate.append({
-                        "entity": controller_entity,
-                        "list_key": "all_entities",
-                        "name": controller_name
-                    })
-            
-            # 检查controlled实体是否需要翻译
-            if controlled_name and not any(e["name"] == controlled_name for e in all_entities_to_translate):
-                # 在all_entities中查找controlled实体
-                controlled_entity = None
-                for entity in st.session_state.equity_data.get("all_entities", []):
-                    if entity.get("name") == controlled_name:
-                        controlled_entity = entity
-                        break
-                
-                if controlled_entity and not controlled_entity.get("english_name"):
-                    all_entities_to_translate.append({
-                        "entity": controlled_entity,
-                        "list_key": "all_entities",
-                        "name": controlled_name
-                    })
+                    if entity_name not in queued_names:
+                        _queue(entity, entity_list_key, entity_name)
+        
+        # 核心公司、股权关系和控制关系两端的实体（在all_entities中查找）
+        referenced_names = [st.session_state.equity_data.get("core_company", "")]
+        for rel in st.session_state.equity_data.get("entity_relationships", []):
+            referenced_names.extend(relationship_endpoints(rel))
+        for rel in st.session_state.equity_data.get("control_relationships", []):
+            referenced_names.extend(relationship_endpoints(rel, control_keys=True))
+        
+        for entity_name in referenced_names:
+            if not entity_name or entity_name in queued_names:
+                continue
+            entity = graph.entity(entity_name)
+            if entity and not entity.get("english_name"):
+                _queue(entity, "all_entities", entity_name)
         
         if not all_entities_to_translate:
             st.info("所有实体都已有英文名称，无需翻译")
@@ -536,37 +500,11 @@ def _batch_translate_all_entities():
         
         st.info(f"开始翻译 {len(all_entities_to_translate)} 个实体的名称...")
         
-        success_count = 0
-        failed_count = 0
-        
-        # 创建进度条
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i, item in enumerate(all_entities_to_translate):
-            entity = item["entity"]
-            entity_name = item["name"]
-            status_text.text(f"正在翻译: {entity_name}")
-            
-            try:
-                translated_text = translate_text(entity_name, 'zh', 'en')
-                if translated_text:
-                    entity["english_name"] = translated_text
-                    success_count += 1
-            except QuotaExceededError:
-                st.warning("当月翻译额度已用完，已跳过剩余翻译。")
-                break
-            except Exception as e:
-                failed_count += 1
-                st.warning(f"翻译异常: {entity_name} - {str(e)}")
-            
-            # 更新进度
-            progress_bar.progress((i + 1) / len(all_entities_to_translate))
-            time.sleep(0.1)  # 避免API调用过快
-        
-        # 显示结果
-        status_text.text("翻译完成")
-        st.success(f"翻译完成！成功: {success_count}, 失败: {failed_count}")
+        results = _run_batch_translation([item["name"] for item in all_entities_to_translate])
+        success_count, failed_count, skipped_count = _apply_batch_translation(
+            [(item["entity"], item["name"]) for item in all_entities_to_translate], results
+        )
+        st.success(f"翻译完成！成功: {success_count}, 失败: {failed_count}, 跳过: {skipped_count}")
         
         # 将已翻译的英文名同步到所有相关实体列表，确保渲染可用
         _sync_english_names_across_lists()
@@ -604,6 +542,29 @@ def _sync_english_names_across_lists():
         # 同步失败不应影响主流程
         pass
 
+def _seed_snapshot_translations(snapshot):
+    """把快照中实体的英文名预置到翻译缓存（失败时忽略）"""
+    try:
+        seed_from_snapshot(snapshot)
+    except Exception:
+        pass
+
+
+def _seed_imported_english_names(names, english_names):
+    """
+    把导入文件中的 (中文名, 英文名) 预置到翻译缓存，其它文件或工作区再遇到时不再调用接口
+    english_names 应为导入文件中的原始列：导入来源优先于接口结果，格式化后的写法会扩散到所有工作区
+    """
+    try:
+        counts = seed_from_import(zip(names.tolist(), english_names.tolist()))
+    except Exception:
+        # 预置失败不影响导入
+        return
+    seeded = counts.get("inserted", 0) + counts.get("updated", 0)
+    if seeded:
+        st.caption(f"已将 {seeded} 个导入的英文名写入翻译缓存")
+
+
 def _batch_format_english_names():
     """批量格式化所有现有的英文名称为标准格式"""
     try:
@@ -642,19 +603,99 @@ def _batch_format_english_names():
     except Exception as e:
         st.error(f"批量格式化过程中发生错误: {str(e)}")
 
+
+# 流式输出时界面刷新的最小间隔（秒）
+_STREAM_RENDER_INTERVAL = 0.15
+
+
+def _request_stream_stop(stream_key: str):
+    """停止按钮回调。点击会触发重跑并中断正在进行的生成，重跑时据此显示已接收的部分结果"""
+    st.session_state[f"{stream_key}_stopped"] = True
+
+
+def _render_stream_stop_button(stream_key: str):
+    st.session_state.pop(f"{stream_key}_stopped", None)
+    st.session_state.pop(f"{stream_key}_partial", None)
+    st.button("⏹ 停止生成", key=f"{stream_key}_stop_button",
+              on_click=_request_stream_stop, args=(stream_key,))
+
+
+def _pop_stopped_stream(stream_key: str):
+    """若上一次生成被停止，返回并清除其部分结果，否则返回 None"""
+    if not st.session_state.pop(f"{stream_key}_stopped", False):
+        return None
+    return st.session_state.pop(f"{stream_key}_partial", None)
+
+
+def _render_partial_equity(data):
+    """以表格显示流式解析出的核心公司、股东、子公司和关系"""
+    import pandas as pd
+
+    data = data or {}
+    st.caption(
+        f"核心公司：{data.get('core_company') or '—'}　实际控制人：{data.get('actual_controller') or '—'}　"
+        f"股东 {len(data.get('top_level_entities') or [])}　子公司 {len(data.get('subsidiaries') or [])}　"
+        f"关系 {len(data.get('entity_relationships') or [])}"
+    )
+    for field, label in (("top_level_entities", "股东"), ("subsidiaries", "子公司"),
+                         ("entity_relationships", "实体关系")):
+        rows = [row for row in data.get(field) or [] if isinstance(row, dict)]
+        if rows:
+            st.markdown(f"**{label}**")
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+
+def _equity_stream_renderer(stream_key: str):
+    """返回 analyze_equity_with_ai 的 on_partial 回调：逐步渲染部分结果并保存在会话状态中"""
+    placeholder = st.empty()
+    last_render = [0.0]
+
+    def _on_partial(data, events):
+        st.session_state[f"{stream_key}_partial"] = data
+        now = time.monotonic()
+        if now - last_render[0] < _STREAM_RENDER_INTERVAL:
+            return
+        last_render[0] = now
+        with placeholder.container():
+            st.markdown("⏳ **正在接收模型输出…**")
+            _render_partial_equity(data)
+
+    return _on_partial, placeholder
+
+
+def _report_stream_renderer(stream_key: str):
+    """返回 analyze_equity_with_llm 的 on_delta 回调：报告边生成边显示并保存在会话状态中"""
+    placeholder = st.empty()
+    last_render = [0.0]
+
+    def _on_delta(report):
+        st.session_state[f"{stream_key}_partial"] = report
+        now = time.monotonic()
+        if now - last_render[0] < _STREAM_RENDER_INTERVAL:
+            return
+        last_render[0] = now
+        placeholder.markdown(report + " ▌")
+
+    return _on_delta, placeholder
+
+def _current_equity_graph() -> EquityGraph:
+    """返回当前equity_data的索引，实体名称和英文名都未变化时在多次查询间复用。"""
+    data = st.session_state.get("equity_data", {})
+    # 编辑器多处原地改名/替换实体记录，仅凭列表id和长度无法察觉，签名需包含名称和英文名
+    signature = (id(data),) + tuple(
+        (id(data.get(key)), tuple((e.get("name"), e.get("english_name")) for e in (data.get(key) or [])))
+        for key in ENTITY_LIST_KEYS
+    )
+    cached = st.session_state.get("_equity_graph_cache")
+    if cached and cached[0] == signature:
+        return cached[1]
+    graph = EquityGraph(data)
+    st.session_state["_equity_graph_cache"] = (signature, graph)
+    return graph
+
 def _get_english_name_for(entity_name: str) -> str:
     """根据名称在各实体列表中查找并返回英文名（若存在）。"""
-    data = st.session_state.get("equity_data", {})
-    for e in data.get("all_entities", []):
-        if e.get("name") == entity_name and e.get("english_name"):
-            return e.get("english_name")
-    for e in data.get("top_level_entities", []):
-        if e.get("name") == entity_name and e.get("english_name"):
-            return e.get("english_name")
-    for e in data.get("subsidiaries", []):
-        if e.get("name") == entity_name and e.get("english_name"):
-            return e.get("english_name")
-    return ""
+    return _current_equity_graph().english_name_for(entity_name)
 
 def _format_cn_en(entity_name: str) -> str:
     """组合中文名与英文名用于UI显示。"""
@@ -837,6 +878,12 @@ def render_page():
         initial_sidebar_state="collapsed"  # 默认折叠侧边栏
     )
 
+    # 后台扫描各工作区的自动保存快照，把其中的英文名预置到翻译缓存（每个进程一次）
+    try:
+        seed_autosaves_in_background()
+    except Exception:
+        pass
+
     # 添加CSS样式来隐藏默认的导航内容，但保留自定义侧边栏
     st.markdown("""
     <style>
@@ -1182,27 +1229,12 @@ def render_page():
             # 检查每个top_entity是否在entity_relationships中有对应的关系
             filtered_top_entities = []
             filtered_entities_info = []  # 收集过滤信息
+            chart_graph = EquityGraph(data_for_chart)
         
             for entity in data_for_chart["top_level_entities"]:
                 entity_name = entity.get("name", "")
-                has_relationship = False
-            
-                # 检查是否有股权关系
-                for rel in data_for_chart["entity_relationships"]:
-                    from_entity = rel.get('from', rel.get('parent', ''))
-                    to_entity = rel.get('to', rel.get('child', ''))
-                    if from_entity == entity_name:
-                        has_relationship = True
-                        break
-            
-                # 检查是否有控制关系
-                if not has_relationship:
-                    for rel in data_for_chart["control_relationships"]:
-                        from_entity = rel.get('from', rel.get('parent', ''))
-                        to_entity = rel.get('to', rel.get('child', ''))
-                        if from_entity == entity_name:
-                            has_relationship = True
-                            break
+                # 检查是否有股权关系或控制关系
+                has_relationship = bool(chart_graph.children_of(entity_name, include_control=True))
             
                 # 🔥 修复：对于正常股东，即使没有显式关系也保留（会自动生成关系）
                 # 只有明确不需要的实体才过滤掉
@@ -1598,57 +1630,101 @@ def render_page():
                         for i, ent in enumerate(data_for_chart['all_entities'][:20]):
                             st.text(f"{i+1}. {ent.get('name')} ({ent.get('type')})")
             
-                nodes, edges, node_id_map = convert_equity_data_to_visjs(data_for_chart)
+                # 以图表数据指纹为键复用节点/边和HTML，数据未变化时不再重复生成
+                chart_key = render_fingerprint("visjs_data", data_for_chart)
+                if chart_key:
+                    nodes, edges, node_id_map = render_cache.lookup(
+                        chart_key, lambda: convert_equity_data_to_visjs(data_for_chart), copy_result=True
+                    )
+                else:
+                    nodes, edges, node_id_map = convert_equity_data_to_visjs(data_for_chart)
                 st.write(f"✅ 生成了 {len(nodes)} 个节点，{len(edges)} 条边")
+
+                # 循环持股（交叉持股）的实体会被放在同一层，提示用户核对
+                ownership_cycles = find_ownership_cycles(data_for_chart)
+                if ownership_cycles:
+                    st.warning(f"⚠️ 检测到 {len(ownership_cycles)} 组循环持股，相关实体已放置在同一层级：")
+                    for members in ownership_cycles:
+                        st.text("  " + " → ".join(members))
                 
                 # 🔥 保存node_id_map到session state，供编辑功能使用
                 st.session_state.node_id_map = node_id_map
         
+            def _render_chart_html(subgraphs, page_title, library_mode=LIBRARY_MODE_INLINE):
+                """生成全屏HTML（预览、下载和全屏查看共用同一缓存结果）"""
+                library_mode = resolve_library_mode(library_mode)
+                def _produce():
+                    return generate_fullscreen_visjs_html(nodes, edges,
+                                                          subgraphs=subgraphs,
+                                                          page_title=page_title,
+                                                          library_mode=library_mode)
+                if not chart_key:
+                    return _produce()
+                return render_cache.get_or_render(
+                    "visjs_html",
+                    {"chart": chart_key, "subgraphs": subgraphs, "page_title": page_title,
+                     "library_mode": library_mode},
+                    _produce,
+                )
+        
+            def _group_nodes_by_level():
+                """按层级分组节点ID（全屏查看、下载和实时预览共用）"""
+                level_groups = {}
+                for node in nodes:
+                    level_groups.setdefault(node.get('level', 0), []).append(node['id'])
+                return level_groups
+
+            def _build_level_subgraphs(level_groups=None):
+                """根据层级分组和自定义分组名称生成 subgraphs 配置"""
+                if 'custom_group_names' not in st.session_state:
+                    st.session_state.custom_group_names = {}
+                if level_groups is None:
+                    level_groups = _group_nodes_by_level()
+                subgraphs = []
+                for level, node_ids in level_groups.items():
+                    group_key = f"group_name_level_{level}"
+                    custom_name = st.session_state.custom_group_names.get(group_key, f"🏢 第{level}层实体")
+                    subgraphs.append({
+                        "id": f"level_{level}",
+                        "label": custom_name,
+                        "nodes": node_ids,
+                        "color": f"rgba({(level * 50) % 255}, {(level * 100) % 255}, {(level * 150) % 255}, 0.1)",
+                        "borderColor": f"hsl({(level * 60) % 360}, 70%, 50%)"
+                    })
+                return subgraphs
+
+            def _chart_page_title():
+                core_company_name = st.session_state.equity_data.get("core_company", "股权结构图")
+                return f"{core_company_name} - 交互式HTML股权结构图"
+
+            # 随包 vis-network 缺失时内联/共享/静态加载都只能回退到在线CDN，明确提示而不是静默降级
+            visjs_library_bundled = has_vendored_library()
+            if not visjs_library_bundled:
+                st.warning(
+                    f"⚠️ 未找到随包分发的 vis-network（src/assets/visjs/vendor/{VISJS_FILE_NAME}），"
+                    "全屏查看、实时预览和下载的HTML图表都将从在线CDN加载，离线环境下无法显示。"
+                    "请在可联网的机器上运行 `py scripts/fetch_visjs_library.py` 下载后重新打包。"
+                )
+
             # 图表操作按钮
             col_op1, col_op2, col_op3 = st.columns(3)
         
             with col_op1:
                 # 全屏查看按钮
                 if st.button("🔍 全屏查看图表", type="primary", use_container_width=True, key="fullscreen_visjs"):
-                    # 生成分组配置（与实时预览相同的逻辑）
-                    subgraphs = []
-                
-                    # 初始化分组名称存储
-                    if 'custom_group_names' not in st.session_state:
-                        st.session_state.custom_group_names = {}
-                
-                    # 根据层级创建分组
-                    level_groups = {}
-                    for node in nodes:
-                        level = node.get('level', 0)
-                        if level not in level_groups:
-                            level_groups[level] = []
-                        level_groups[level].append(node['id'])
-                
-                    # 为每个层级创建分组
-                    for level, node_ids in level_groups.items():
-                        # 获取自定义名称
-                        group_key = f"group_name_level_{level}"
-                        custom_name = st.session_state.custom_group_names.get(group_key, f"🏢 第{level}层实体")
-                    
-                        subgraph = {
-                            "id": f"level_{level}",
-                            "label": custom_name,
-                            "nodes": node_ids,
-                            "color": f"rgba({(level * 50) % 255}, {(level * 100) % 255}, {(level * 150) % 255}, 0.1)",
-                            "borderColor": f"hsl({(level * 60) % 360}, 70%, 50%)"
-                        }
-                        subgraphs.append(subgraph)
-                
-                    # 生成全屏HTML，传递间距参数和分组配置
-                    core_company_name = st.session_state.equity_data.get("core_company", "股权结构图")
-                    page_title = f"{core_company_name} - 交互式HTML股权结构图"
-                    html_content = generate_fullscreen_visjs_html(nodes, edges,
-                                                                subgraphs=subgraphs,
-                                                                page_title=page_title)
-                
-                    # 保存到临时文件
+                    # 生成分组配置（与实时预览、下载共用）
+                    subgraphs = _build_level_subgraphs()
+                    page_title = _chart_page_title()
+                    # 保存到临时文件；vis-network 作为同目录共享文件写入一次，多个图表共用
                     temp_dir = tempfile.gettempdir()
+                    if not visjs_library_bundled:
+                        library_mode = LIBRARY_MODE_CDN
+                    elif write_sibling_library(temp_dir):
+                        library_mode = LIBRARY_MODE_SIBLING
+                    else:
+                        library_mode = LIBRARY_MODE_INLINE
+                    html_content = _render_chart_html(subgraphs, page_title, library_mode)
+                
                     temp_file_path = os.path.join(temp_dir, 'equity_visjs_chart.html')
                     with open(temp_file_path, 'w', encoding='utf-8') as f:
                         f.write(html_content)
@@ -1670,53 +1746,73 @@ def render_page():
                     st.success("JSON文件已下载")
         
             with col_op3:
-                # 下载HTML图表
-                # 生成分组配置（与实时预览相同的逻辑）
-                subgraphs = []
-            
-                # 初始化分组名称存储
-                if 'custom_group_names' not in st.session_state:
-                    st.session_state.custom_group_names = {}
-            
-                # 根据层级创建分组
-                level_groups = {}
-                for node in nodes:
-                    level = node.get('level', 0)
-                    if level not in level_groups:
-                        level_groups[level] = []
-                    level_groups[level].append(node['id'])
-            
-                # 为每个层级创建分组
-                for level, node_ids in level_groups.items():
-                    # 获取自定义名称
-                    group_key = f"group_name_level_{level}"
-                    custom_name = st.session_state.custom_group_names.get(group_key, f"🏢 第{level}层实体")
-                
-                    subgraph = {
-                        "id": f"level_{level}",
-                        "label": custom_name,
-                        "nodes": node_ids,
-                        "color": f"rgba({(level * 50) % 255}, {(level * 100) % 255}, {(level * 150) % 255}, 0.1)",
-                        "borderColor": f"hsl({(level * 60) % 360}, 70%, 50%)"
-                    }
-                    subgraphs.append(subgraph)
-            
+                # 下载HTML图表：仅在用户点击"生成"后导出，结果按图表指纹保存，
+                # 数据、分组名称和加载方式都未变化时直接复用，不再每次重绘都生成
                 core_company_name = st.session_state.equity_data.get("core_company", "股权结构图")
-                page_title = f"{core_company_name} - 交互式HTML股权结构图"
-                html_content = generate_fullscreen_visjs_html(nodes, edges,
-                                                            subgraphs=subgraphs,
-                                                            page_title=page_title)
                 # 使用核心公司名称作为下载文件名
                 safe_filename = core_company_name.replace(" ", "_").replace("/", "_")
-                if st.download_button(
-                    label="📥 下载HTML图表",
-                    data=html_content.encode('utf-8'),
-                    file_name=f"{safe_filename}_股权结构图.html",
-                    mime="text/html; charset=utf-8",
-                    use_container_width=True,
-                    key="download_html_visjs"
-                ):
-                    st.success("HTML文件已下载")
+
+                library_labels = {
+                    LIBRARY_MODE_INLINE: "内联vis.js（单文件，离线可用）",
+                    LIBRARY_MODE_SIBLING: "共享vis.js文件（ZIP，多个图表共用）",
+                    LIBRARY_MODE_CDN: "在线CDN加载（文件最小）",
+                }
+                # 没有随包库文件时只提供在线CDN（其它方式实际也会回退到CDN）
+                library_options = list(library_labels) if visjs_library_bundled else [LIBRARY_MODE_CDN]
+                if st.session_state.get("visjs_download_library_mode") not in library_options:
+                    st.session_state.pop("visjs_download_library_mode", None)
+                download_mode = st.selectbox(
+                    "vis.js 加载方式",
+                    options=library_options,
+                    format_func=lambda mode: library_labels[mode],
+                    key="visjs_download_library_mode",
+                )
+                download_mode = resolve_library_mode(download_mode)
+
+                subgraphs = _build_level_subgraphs()
+                page_title = _chart_page_title()
+                export_token = render_fingerprint(
+                    "visjs_export",
+                    {"chart": chart_key, "subgraphs": subgraphs, "page_title": page_title,
+                     "library_mode": download_mode, "file_name": safe_filename},
+                ) if chart_key else None
+                prepared = st.session_state.get("visjs_html_export")
+                if not (export_token and prepared and prepared.get("token") == export_token):
+                    prepared = None
+                    if st.button("🧩 生成HTML图表", use_container_width=True, key="prepare_html_visjs"):
+                        html_content = _render_chart_html(subgraphs, page_title, download_mode)
+                        if download_mode == LIBRARY_MODE_SIBLING:
+                            # HTML 与 vis-network.min.js 一起打包，解压后同目录引用
+                            import io
+                            import zipfile
+                            zip_buffer = io.BytesIO()
+                            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+                                zf.writestr(f"{safe_filename}_股权结构图.html", html_content.encode('utf-8'))
+                                zf.writestr(VISJS_FILE_NAME, load_vendored_library().encode('utf-8'))
+                            prepared = {
+                                "data": zip_buffer.getvalue(),
+                                "file_name": f"{safe_filename}_股权结构图.zip",
+                                "mime": "application/zip",
+                            }
+                        else:
+                            prepared = {
+                                "data": html_content.encode('utf-8'),
+                                "file_name": f"{safe_filename}_股权结构图.html",
+                                "mime": "text/html; charset=utf-8",
+                            }
+                        prepared["token"] = export_token
+                        st.session_state.visjs_html_export = prepared
+
+                if prepared:
+                    if st.download_button(
+                        label="📥 下载HTML图表",
+                        data=prepared["data"],
+                        file_name=prepared["file_name"],
+                        mime=prepared["mime"],
+                        use_container_width=True,
+                        key="download_html_visjs"
+                    ):
+                        st.success("HTML文件已下载")
         
             # 显示图表
             st.markdown("#### 🎯 交互式股权结构图")
@@ -1736,16 +1832,8 @@ def render_page():
             # 显示实时vis.js预览
             if show_visjs_preview:
                 try:
-                    # 生成分组配置
-                    subgraphs = []
-                
                     # 根据层级创建分组
-                    level_groups = {}
-                    for node in nodes:
-                        level = node.get('level', 0)
-                        if level not in level_groups:
-                            level_groups[level] = []
-                        level_groups[level].append(node['id'])
+                    level_groups = _group_nodes_by_level()
                 
                     # 调试信息：显示层级分组情况（收起）
                     with st.expander("🔍 层级分组调试信息", expanded=False):
@@ -1796,19 +1884,7 @@ def render_page():
                             st.session_state.custom_group_names[group_key] = custom_name
                 
                     # 为每个层级创建分组
-                    for level, node_ids in level_groups.items():
-                        # 获取自定义名称
-                        group_key = f"group_name_level_{level}"
-                        custom_name = st.session_state.custom_group_names.get(group_key, f"🏢 第{level}层实体")
-                    
-                        subgraph = {
-                            "id": f"level_{level}",
-                            "label": custom_name,
-                            "nodes": node_ids,
-                            "color": f"rgba({(level * 50) % 255}, {(level * 100) % 255}, {(level * 150) % 255}, 0.1)",
-                            "borderColor": f"hsl({(level * 60) % 360}, 70%, 50%)"
-                        }
-                        subgraphs.append(subgraph)
+                    subgraphs = _build_level_subgraphs(level_groups)
                 
                     # 调试信息：显示生成的分组（收起）
                     with st.expander("🔍 分组生成调试信息", expanded=False):
@@ -1817,11 +1893,15 @@ def render_page():
                             st.info(f"分组 {i+1}: {subgraph['label']} (节点: {subgraph['nodes']})")
                 
                     # 生成HTML内容
-                    core_company_name = st.session_state.equity_data.get("core_company", "股权结构图")
-                    page_title = f"{core_company_name} - 交互式HTML股权结构图"
-                    html_content = generate_fullscreen_visjs_html(nodes, edges,
-                                                                subgraphs=subgraphs,
-                                                                page_title=page_title)
+                    page_title = _chart_page_title()
+                    # 优先从 Streamlit 静态路径加载 vis-network，避免每次重绘都传输整个库
+                    if not visjs_library_bundled:
+                        preview_mode = LIBRARY_MODE_CDN
+                    elif ensure_streamlit_static_library():
+                        preview_mode = LIBRARY_MODE_STATIC
+                    else:
+                        preview_mode = LIBRARY_MODE_INLINE
+                    html_content = _render_chart_html(subgraphs, page_title, preview_mode)
                 
                     # 在Streamlit中显示
                     components.html(html_content, height=600, scrolling=True)
@@ -1941,9 +2021,8 @@ def render_page():
                                 # 🔥 新增：更新翻译缓存，确保手动编辑的内容优先于缓存
                                 if new_english.strip() and entity_name:
                                     try:
-                                        from src.utils.translation_usage import set_cached
-                                        # 更新翻译缓存，将手动编辑的英文名称作为翻译结果
-                                        set_cached(entity_name, 'zh', 'en', new_english.strip())
+                                        # 更新翻译缓存，将手动编辑的英文名称作为翻译结果（来源标记为手动，优先于其它来源）
+                                        seed_manual_edit(entity_name, new_english.strip())
                                         st.success(f"已更新翻译缓存：{entity_name} -> {new_english.strip()}")
                                     except Exception as e:
                                         st.warning(f"更新翻译缓存失败：{str(e)}")
@@ -2056,9 +2135,8 @@ def render_page():
                             # 🔥 新增：更新翻译缓存，确保手动编辑的内容优先于缓存
                             if new_english.strip() and entity_name:
                                 try:
-                                    from src.utils.translation_usage import set_cached
-                                    # 更新翻译缓存，将手动编辑的英文名称作为翻译结果
-                                    set_cached(entity_name, 'zh', 'en', new_english.strip())
+                                    # 更新翻译缓存，将手动编辑的英文名称作为翻译结果（来源标记为手动，优先于其它来源）
+                                    seed_manual_edit(entity_name, new_english.strip())
                                     st.success(f"已更新翻译缓存：{entity_name} -> {new_english.strip()}")
                                 except Exception as e:
                                     st.warning(f"更新翻译缓存失败：{str(e)}")
@@ -2154,16 +2232,11 @@ def render_page():
                 st.metric("关系数量", len(edges))
             with col_stat3:
                 entity_types = {}
+                group_names = {"controller": "实际控制人", "core": "核心公司", "person": "个人"}
                 for node in nodes:
-                    # 从颜色推断类型
-                    if node["color"]["background"] == "#0d47a1":
-                        entity_types["实际控制人"] = entity_types.get("实际控制人", 0) + 1
-                    elif node["color"]["background"] == "#fff8e1":
-                        entity_types["核心公司"] = entity_types.get("核心公司", 0) + 1
-                    elif node["color"]["background"] == "#e8f5e9":
-                        entity_types["个人"] = entity_types.get("个人", 0) + 1
-                    else:
-                        entity_types["公司"] = entity_types.get("公司", 0) + 1
+                    # 从节点分组推断类型
+                    type_name = group_names.get(node.get("group"), "公司")
+                    entity_types[type_name] = entity_types.get(type_name, 0) + 1
             
                 type_str = ", ".join([f"{k}:{v}" for k, v in entity_types.items()])
                 st.metric("实体类型", type_str if type_str else "无")
@@ -2937,6 +3010,7 @@ def render_page():
                             snap = json.loads(up.read().decode("utf-8"))
                             ok, msg = apply_snapshot(snap)
                             if ok:
+                                _seed_snapshot_translations(snap)
                                 fingerprint = snapshot_fingerprint(snap)
                                 if fingerprint:
                                     st.session_state["_last_autosave_sig"] = fingerprint
@@ -2985,6 +3059,7 @@ def render_page():
                             if should_save:
                                 sanitized_ws = sanitize_workspace_name(current_ws)
                                 path, _ = autosave(snapshot_to_save, sanitized_ws)
+                                _seed_snapshot_translations(snapshot_to_save)
                                 st.session_state["_last_autosave_path"] = str(path)
                                 st.session_state["_last_autosave_ts"] = time.time()
                                 st.session_state["_last_autosave_saved_at"] = snapshot_to_save.get("saved_at")
@@ -3045,6 +3120,7 @@ def render_page():
                                             snap = json.loads(raw_content)
                                             ok, msg = apply_snapshot(snap)
                                             if ok:
+                                                _seed_snapshot_translations(snap)
                                                 fingerprint = snapshot_fingerprint(snap)
                                                 if fingerprint:
                                                     st.session_state["_last_autosave_sig"] = fingerprint
@@ -3770,11 +3846,19 @@ def render_page():
                 help="提供更具体的要求可以获得更准确的分析结果"
             )
         
+            # 上一次分析被停止时显示已接收的部分结果
+            stopped_partial = _pop_stopped_stream("ai_analysis_stream")
+            if stopped_partial is not None:
+                st.warning("⏹ 已停止生成。以下为停止前接收到的部分结果（未写入股权数据），可调整分析要求后重新分析。")
+                _render_partial_equity(stopped_partial)
+
             # 分析按钮
             if st.button("🔍 使用AI分析股权结构", type="primary", key="ai_analysis_core_company"):
                 if "uploaded_files" not in st.session_state or not st.session_state.uploaded_files and not prompt.strip():
                     st.error("请上传文件或提供分析要求")
                 else:
+                    # 流式输出：实体和关系边接收边显示，可随时停止
+                    _render_stream_stop_button("ai_analysis_stream")
                     with st.spinner("正在分析股权结构信息..."):
                         try:
                             # 初始化分析结果计数
@@ -3794,12 +3878,15 @@ def render_page():
                                     st.info(f"正在分析文件 {idx}/{total_files}: {file_name}")
                                 
                                     # 调用AI分析函数
+                                    on_partial, stream_placeholder = _equity_stream_renderer("ai_analysis_stream")
                                     result_data, file_error_logs = analyze_equity_with_ai(
                                         prompt=prompt,
                                         file_content=file_content,
                                         file_name=file_name,
-                                        api_key=api_key
+                                        api_key=api_key,
+                                        on_partial=on_partial
                                     )
+                                    stream_placeholder.empty()
                                 
                                     # 合并错误日志
                                     if file_error_logs:
@@ -3934,12 +4021,15 @@ def render_page():
                                 # 仅使用文本提示进行分析
                                 st.info("仅使用文本提示进行分析...")
                             
+                                on_partial, stream_placeholder = _equity_stream_renderer("ai_analysis_stream")
                                 result_data, error_logs = analyze_equity_with_ai(
                                     prompt=prompt,
                                     file_content=None,
                                     file_name=None,
-                                    api_key=api_key
+                                    api_key=api_key,
+                                    on_partial=on_partial
                                 )
+                                stream_placeholder.empty()
                             
                                 if result_data:
                                     # 更新会话状态中的股权数据
@@ -4469,6 +4559,8 @@ def render_page():
                         imported_count, skipped_count = 0, 0
                         errors = []
                         created_relationships = []  # 记录创建的关系
+                        # 建立名称/关系索引，导入过程中通过索引增量维护，避免逐行线性扫描
+                        import_graph = EquityGraph(st.session_state.equity_data)
                         for idx, row in df_proc.iterrows():
                             try:
                                 entity_name = str(row[actual_name_col_top]).strip()
@@ -4554,36 +4646,34 @@ def render_page():
                                     entity_type = default_entity_type_top
 
                                 exists = False
-                                for i, entity in enumerate(st.session_state.equity_data["top_level_entities"]):
-                                    if entity["name"] == entity_name:
-                                        st.session_state.equity_data["top_level_entities"][i]["percentage"] = percentage
-                                        # 智能合并可选字段（只在字段为空时才更新）
-                                        if subscribed_capital_amount is not None and not st.session_state.equity_data["top_level_entities"][i].get("subscribed_capital_amount"):
-                                            st.session_state.equity_data["top_level_entities"][i]["subscribed_capital_amount"] = subscribed_capital_amount
-                                            st.session_state.equity_data["top_level_entities"][i]["capital_unit"] = capital_unit
-                                        if registration_capital is not None and not st.session_state.equity_data["top_level_entities"][i].get("registration_capital"):
-                                            st.session_state.equity_data["top_level_entities"][i]["registration_capital"] = registration_capital
-                                            st.session_state.equity_data["top_level_entities"][i]["capital_unit"] = capital_unit
-                                        if establishment_date and not st.session_state.equity_data["top_level_entities"][i].get("establishment_date"):
-                                            st.session_state.equity_data["top_level_entities"][i]["establishment_date"] = establishment_date
-                                        
-                                        # 同步到all_entities（智能合并）
-                                        for j, ae in enumerate(st.session_state.equity_data.get("all_entities", [])):
-                                            if ae.get("name") == entity_name:
-                                                # 只在字段为空时才更新，避免覆盖用户已编辑的数据
-                                                if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
-                                                    st.session_state.equity_data["all_entities"][j]["subscribed_capital_amount"] = subscribed_capital_amount
-                                                    st.session_state.equity_data["all_entities"][j]["capital_unit"] = capital_unit
-                                                if registration_capital is not None and not ae.get("registration_capital"):
-                                                    st.session_state.equity_data["all_entities"][j]["registration_capital"] = registration_capital
-                                                    st.session_state.equity_data["all_entities"][j]["capital_unit"] = capital_unit
-                                                if establishment_date and not ae.get("establishment_date"):
-                                                    st.session_state.equity_data["all_entities"][j]["establishment_date"] = establishment_date
-                                                break
-                                        
-                                        exists = True
-                                        imported_count += 1
-                                        break
+                                entity = import_graph.find(entity_name, "top_level_entities")
+                                if entity is not None:
+                                    entity["percentage"] = percentage
+                                    # 智能合并可选字段（只在字段为空时才更新）
+                                    if subscribed_capital_amount is not None and not entity.get("subscribed_capital_amount"):
+                                        entity["subscribed_capital_amount"] = subscribed_capital_amount
+                                        entity["capital_unit"] = capital_unit
+                                    if registration_capital is not None and not entity.get("registration_capital"):
+                                        entity["registration_capital"] = registration_capital
+                                        entity["capital_unit"] = capital_unit
+                                    if establishment_date and not entity.get("establishment_date"):
+                                        entity["establishment_date"] = establishment_date
+                                    
+                                    # 同步到all_entities（智能合并）
+                                    ae = import_graph.find(entity_name)
+                                    if ae is not None:
+                                        # 只在字段为空时才更新，避免覆盖用户已编辑的数据
+                                        if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
+                                            ae["subscribed_capital_amount"] = subscribed_capital_amount
+                                            ae["capital_unit"] = capital_unit
+                                        if registration_capital is not None and not ae.get("registration_capital"):
+                                            ae["registration_capital"] = registration_capital
+                                            ae["capital_unit"] = capital_unit
+                                        if establishment_date and not ae.get("establishment_date"):
+                                            ae["establishment_date"] = establishment_date
+                                    
+                                    exists = True
+                                    imported_count += 1
                             
                                 # 如果实体不存在，创建新实体
                                 if not exists:
@@ -4604,10 +4694,10 @@ def render_page():
                                     if establishment_date:
                                         entity_data["establishment_date"] = establishment_date
                                 
-                                    st.session_state.equity_data["top_level_entities"].append(entity_data)
+                                    import_graph.add_entity(entity_data, "top_level_entities")
                                 
                                     # 添加到all_entities
-                                    if not any(e.get("name")==entity_name for e in st.session_state.equity_data.get("all_entities", [])):
+                                    if not import_graph.has_entity(entity_name):
                                         all_entity_data = {
                                             "name": entity_name,
                                             "type": entity_type
@@ -4622,21 +4712,19 @@ def render_page():
                                             all_entity_data["capital_unit"] = capital_unit
                                         if establishment_date:
                                             all_entity_data["establishment_date"] = establishment_date
-                                        st.session_state.equity_data["all_entities"].append(all_entity_data)
+                                        import_graph.add_entity(all_entity_data)
                                     else:
                                         # 如果实体已存在，智能合并可选字段（只在字段为空时才更新）
-                                        for i, ae in enumerate(st.session_state.equity_data.get("all_entities", [])):
-                                            if ae.get("name") == entity_name:
-                                                # 只在字段为空时才更新，避免覆盖用户已编辑的数据
-                                                if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
-                                                    st.session_state.equity_data["all_entities"][i]["subscribed_capital_amount"] = subscribed_capital_amount
-                                                    st.session_state.equity_data["all_entities"][i]["capital_unit"] = capital_unit
-                                                if registration_capital is not None and not ae.get("registration_capital"):
-                                                    st.session_state.equity_data["all_entities"][i]["registration_capital"] = registration_capital
-                                                    st.session_state.equity_data["all_entities"][i]["capital_unit"] = capital_unit
-                                                if establishment_date and not ae.get("establishment_date"):
-                                                    st.session_state.equity_data["all_entities"][i]["establishment_date"] = establishment_date
-                                                break
+                                        ae = import_graph.find(entity_name)
+                                        # 只在字段为空时才更新，避免覆盖用户已编辑的数据
+                                        if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
+                                            ae["subscribed_capital_amount"] = subscribed_capital_amount
+                                            ae["capital_unit"] = capital_unit
+                                        if registration_capital is not None and not ae.get("registration_capital"):
+                                            ae["registration_capital"] = registration_capital
+                                            ae["capital_unit"] = capital_unit
+                                        if establishment_date and not ae.get("establishment_date"):
+                                            ae["establishment_date"] = establishment_date
                             
                                 # 🔥 关键修复：无论实体是否存在，都需要处理关系创建
                                 # 优先使用从文件名提取的公司，其次使用核心公司
@@ -4659,8 +4747,8 @@ def render_page():
 
                                     # 确保两个实体都在all_entities中
                                     for company_name in [target_company, entity_name]:
-                                        if not any(e.get("name") == company_name for e in st.session_state.equity_data.get("all_entities", [])):
-                                            st.session_state.equity_data["all_entities"].append({
+                                        if not import_graph.has_entity(company_name):
+                                            import_graph.add_entity({
                                                 "name": company_name,
                                                 "type": "company"
                                             })
@@ -4680,11 +4768,7 @@ def render_page():
                                         relationship_desc = f"持股{percentage}%"
 
                                     # 检查关系是否已存在
-                                    relationship_exists = any(
-                                        r.get("parent", r.get("from", "")) == parent_entity and 
-                                        r.get("child", r.get("to", "")) == child_entity
-                                        for r in st.session_state.equity_data.get("entity_relationships", [])
-                                    )
+                                    relationship_exists = import_graph.has_equity(parent_entity, child_entity)
 
                                     if relationship_exists:
                                         if st.session_state.get('debug_mode', False):
@@ -4698,7 +4782,7 @@ def render_page():
                                             "relationship_type": "持股" if not filename_contains_investment else "控股",
                                             "description": relationship_desc
                                         }
-                                        st.session_state.equity_data["entity_relationships"].append(relationship_data)
+                                        import_graph.add_relationship(relationship_data)
                                         # 记录创建的关系
                                         created_relationships.append({
                                             "from": parent_entity,
@@ -4718,6 +4802,10 @@ def render_page():
                                 skipped_count += 1
                                 errors.append(f"第{idx+1}行: 处理失败 - {str(e)}")
 
+                        if actual_english_name_col_top:
+                            # 以导入文件中的原始英文名预置缓存（不做格式化）
+                            _seed_imported_english_names(df_proc[actual_name_col_top], df_proc[actual_english_name_col_top])
+
                         st.markdown("### 📊 导入结果")
                         cc1, cc2, cc3 = st.columns(3)
                         with cc1:
@@ -4985,6 +5073,8 @@ def render_page():
                                         break
                             
                                 # 7. 处理每一行数据
+                                # 建立名称/关系索引，导入过程中通过索引增量维护，避免逐行线性扫描
+                                import_graph = EquityGraph(st.session_state.equity_data)
                                 for index, row in df.iterrows():
                                     try:
                                         # 获取名称和比例列
@@ -5091,12 +5181,12 @@ def render_page():
                                             entity_data["establishment_date"] = establishment_date
                                     
                                         # 检查是否已存在
-                                        if not any(e.get("name") == entity_name for e in st.session_state.equity_data.get("top_level_entities", [])):
-                                            st.session_state.equity_data["top_level_entities"].append(entity_data)
+                                        if not import_graph.has_entity(entity_name, "top_level_entities"):
+                                            import_graph.add_entity(entity_data, "top_level_entities")
                                             file_imported_count += 1
                                     
                                         # 添加到all_entities
-                                        if not any(e.get("name") == entity_name for e in st.session_state.equity_data.get("all_entities", [])):
+                                        if not import_graph.has_entity(entity_name):
                                             all_entity_data = {
                                                 "name": entity_name,
                                                 "type": entity_type
@@ -5112,23 +5202,21 @@ def render_page():
                                                 all_entity_data["capital_unit"] = capital_unit
                                             if establishment_date:
                                                 all_entity_data["establishment_date"] = establishment_date
-                                            st.session_state.equity_data["all_entities"].append(all_entity_data)
+                                            import_graph.add_entity(all_entity_data)
                                         else:
                                             # 如果实体已存在，智能合并字段（只在字段为空时才更新）
-                                            for j, ae in enumerate(st.session_state.equity_data.get("all_entities", [])):
-                                                if ae.get("name") == entity_name:
-                                                    # 只在字段为空时才更新，避免覆盖用户已编辑的数据
-                                                    if english_name and not ae.get("english_name"):
-                                                        st.session_state.equity_data["all_entities"][j]["english_name"] = english_name
-                                                    if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
-                                                        st.session_state.equity_data["all_entities"][j]["subscribed_capital_amount"] = subscribed_capital_amount
-                                                        st.session_state.equity_data["all_entities"][j]["capital_unit"] = capital_unit
-                                                    if registration_capital is not None and not ae.get("registration_capital"):
-                                                        st.session_state.equity_data["all_entities"][j]["registration_capital"] = registration_capital
-                                                        st.session_state.equity_data["all_entities"][j]["capital_unit"] = capital_unit
-                                                    if establishment_date and not ae.get("establishment_date"):
-                                                        st.session_state.equity_data["all_entities"][j]["establishment_date"] = establishment_date
-                                                    break
+                                            ae = import_graph.find(entity_name)
+                                            # 只在字段为空时才更新，避免覆盖用户已编辑的数据
+                                            if english_name and not ae.get("english_name"):
+                                                ae["english_name"] = english_name
+                                            if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
+                                                ae["subscribed_capital_amount"] = subscribed_capital_amount
+                                                ae["capital_unit"] = capital_unit
+                                            if registration_capital is not None and not ae.get("registration_capital"):
+                                                ae["registration_capital"] = registration_capital
+                                                ae["capital_unit"] = capital_unit
+                                            if establishment_date and not ae.get("establishment_date"):
+                                                ae["establishment_date"] = establishment_date
                                     
                                         # 9. 关系创建 - 修复逻辑
                                         # 根据文件类型和提取的公司名决定关系方向
@@ -5155,21 +5243,17 @@ def render_page():
                                     
                                         # 确保两个实体都在all_entities中
                                         for company_name in [parent_entity, child_entity]:
-                                            if not any(e.get("name") == company_name for e in st.session_state.equity_data.get("all_entities", [])):
-                                                st.session_state.equity_data["all_entities"].append({
+                                            if not import_graph.has_entity(company_name):
+                                                import_graph.add_entity({
                                                     "name": company_name,
                                                     "type": "company"
                                                 })
                                         
                                             # 检查关系是否已存在
-                                            relationship_exists = any(
-                                                r.get("parent", r.get("from", "")) == parent_entity and 
-                                                r.get("child", r.get("to", "")) == child_entity
-                                                for r in st.session_state.equity_data.get("entity_relationships", [])
-                                            )
+                                            relationship_exists = import_graph.has_equity(parent_entity, child_entity)
                                         
                                             if not relationship_exists:
-                                                st.session_state.equity_data["entity_relationships"].append({
+                                                import_graph.add_relationship({
                                                     "parent": parent_entity,
                                                     "child": child_entity,
                                                     "percentage": percentage,
@@ -5193,6 +5277,12 @@ def render_page():
                                     # 对外投资文件：记录投资方公司
                                     st.session_state.imported_file_entities.add(parent_company)
                             
+                                # 以导入文件中的原始英文名预置缓存（不做格式化）
+                                name_col = import_summary.get('entity_name_column')
+                                english_name_col = import_summary.get('english_name_column')
+                                if english_name_col and english_name_col in df.columns and name_col in df.columns:
+                                    _seed_imported_english_names(df[name_col], df[english_name_col])
+
                                 # 记录成功结果
                                 success_list.append({
                                     "filename": file.name,
@@ -5298,8 +5388,7 @@ def render_page():
                                 entity_data["english_name"] = english_name.strip()
                                 # 🔥 新增：更新翻译缓存，确保手动添加的英文名称优先于缓存
                                 try:
-                                    from src.utils.translation_usage import set_cached
-                                    set_cached(name, 'zh', 'en', english_name.strip())
+                                    seed_manual_edit(name, english_name.strip())
                                 except Exception:
                                     pass  # 静默处理翻译缓存更新失败
                             if registration_capital.strip():
@@ -5907,6 +5996,8 @@ def render_page():
                     establish_date_col_sub = st.session_state.get("establish_date_col_selected_sub")
                 
                     # 处理每一行数据
+                    # 建立名称/关系索引，导入过程中通过索引增量维护，避免逐行线性扫描
+                    import_graph = EquityGraph(st.session_state.equity_data)
                     for index, row in df_processing.iterrows():
                         try:
                             # 获取名称和比例 - 安全转换为字符串
@@ -6049,10 +6140,10 @@ def render_page():
                                 if establishment_date:
                                     subsidiary_data["establishment_date"] = establishment_date
                                 
-                                st.session_state.equity_data["subsidiaries"].append(subsidiary_data)
+                                import_graph.add_entity(subsidiary_data, "subsidiaries")
 
                                 # 加入 all_entities
-                                if not any(e.get("name") == subsidiary_name for e in st.session_state.equity_data.get("all_entities", [])):
+                                if not import_graph.has_entity(subsidiary_name):
                                     all_entity_data = {
                                         "name": subsidiary_name,
                                         "type": entity_type_sub
@@ -6065,33 +6156,31 @@ def render_page():
                                         all_entity_data["capital_unit"] = capital_unit
                                     if establishment_date:
                                         all_entity_data["establishment_date"] = establishment_date
-                                    st.session_state.equity_data["all_entities"].append(all_entity_data)
+                                    import_graph.add_entity(all_entity_data)
                                 else:
                                     # 如果实体已存在，智能合并字段（只在字段为空时才更新）
-                                    for j, ae in enumerate(st.session_state.equity_data.get("all_entities", [])):
-                                        if ae.get("name") == subsidiary_name:
-                                            # 只在字段为空时才更新，避免覆盖用户已编辑的数据
-                                            if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
-                                                st.session_state.equity_data["all_entities"][j]["subscribed_capital_amount"] = subscribed_capital_amount
-                                                st.session_state.equity_data["all_entities"][j]["capital_unit"] = capital_unit
-                                            if registration_capital is not None and not ae.get("registration_capital"):
-                                                st.session_state.equity_data["all_entities"][j]["registration_capital"] = registration_capital
-                                                st.session_state.equity_data["all_entities"][j]["capital_unit"] = capital_unit
-                                            if establishment_date and not ae.get("establishment_date"):
-                                                st.session_state.equity_data["all_entities"][j]["establishment_date"] = establishment_date
-                                            break
+                                    ae = import_graph.find(subsidiary_name)
+                                    # 只在字段为空时才更新，避免覆盖用户已编辑的数据
+                                    if subscribed_capital_amount is not None and not ae.get("subscribed_capital_amount"):
+                                        ae["subscribed_capital_amount"] = subscribed_capital_amount
+                                        ae["capital_unit"] = capital_unit
+                                    if registration_capital is not None and not ae.get("registration_capital"):
+                                        ae["registration_capital"] = registration_capital
+                                        ae["capital_unit"] = capital_unit
+                                    if establishment_date and not ae.get("establishment_date"):
+                                        ae["establishment_date"] = establishment_date
 
                                 # 🔥 使用文件名自动创建股权关系（autolink功能）
                                 if parent_company:
                                     # 确保父公司在all_entities中
-                                    if not any(e.get("name") == parent_company for e in st.session_state.equity_data.get("all_entities", [])):
-                                        st.session_state.equity_data["all_entities"].append({
+                                    if not import_graph.has_entity(parent_company):
+                                        import_graph.add_entity({
                                             "name": parent_company,
                                             "type": "company"
                                         })
                                 
                                     # 创建股权关系：投资方公司(parent) -> 子公司(child)
-                                    st.session_state.equity_data["entity_relationships"].append({
+                                    import_graph.add_relationship({
                                         "parent": parent_company,
                                         "child": subsidiary_name,
                                         "percentage": percentage,
@@ -7487,7 +7576,10 @@ def render_page():
                                 st.write(f"实际控制人 '{controller_name}' 在top_entities中: {controller_in_top}")
                                 st.write(f"实际控制人 '{controller_name}' 在all_entities中: {controller_in_all}")
                     
-                        preview_mermaid_code = generate_mermaid_diagram(data_for_mermaid)
+                        preview_mermaid_code = render_cache.get_or_render(
+                            "mermaid", data_for_mermaid,
+                            lambda: generate_mermaid_diagram(data_for_mermaid)
+                        )
                 
                     # 显示预览图表
                     st.markdown("### 📊 关系预览")
@@ -7729,6 +7821,12 @@ def render_page():
                         - 分析基于当前已定义的股权关系数据
                         - 如有未显示的子公司关系，可能需要在股权关系设置中添加更多关系""")
                     
+                        # 上一次报告生成被停止时显示已生成的部分
+                        stopped_report = _pop_stopped_stream("llm_report_stream")
+                        if stopped_report is not None:
+                            st.warning("⏹ 已停止生成，以下为停止前已生成的部分报告")
+                            st.markdown(stopped_report)
+                    
                         # 分析按钮
                         if st.button("📈 执行股权结构分析"):
                             # 检查多种可能的数据存储位置
@@ -7815,8 +7913,11 @@ def render_page():
                                     elif analysis_depth == "详细分析":
                                         # 使用LLM生成详细报告
                                         st.subheader("📊 LLM详细分析报告")
+                                        _render_stream_stop_button("llm_report_stream")
                                         with st.spinner("正在使用AI分析股权结构..."):
-                                            llm_report, errors = analyze_equity_with_llm(analysis_data, api_key)
+                                            on_delta, stream_placeholder = _report_stream_renderer("llm_report_stream")
+                                            llm_report, errors = analyze_equity_with_llm(analysis_data, api_key, on_delta=on_delta)
+                                            stream_placeholder.empty()
                                             st.session_state.llm_report = llm_report
                                         
                                             # 显示报告
@@ -7830,8 +7931,11 @@ def render_page():
                                     else:  # 完整分析
                                         # 使用LLM生成完整报告
                                         st.subheader("📑 LLM完整分析报告")
+                                        _render_stream_stop_button("llm_report_stream")
                                         with st.spinner("正在使用AI分析股权结构..."):
-                                            llm_report, errors = analyze_equity_with_llm(analysis_data, api_key)
+                                            on_delta, stream_placeholder = _report_stream_renderer("llm_report_stream")
+                                            llm_report, errors = analyze_equity_with_llm(analysis_data, api_key, on_delta=on_delta)
+                                            stream_placeholder.empty()
                                             st.session_state.llm_report = llm_report
                                         
                                             # 显示完整报告
@@ -8745,7 +8849,10 @@ def render_page():
                                 st.write(f"实际控制人 '{controller_name}' 在top_entities中: {controller_in_top}")
                                 st.write(f"实际控制人 '{controller_name}' 在all_entities中: {controller_in_all}")
                     
-                        st.session_state.mermaid_code = generate_mermaid_diagram(data_for_mermaid)
+                        st.session_state.mermaid_code = render_cache.get_or_render(
+                            "mermaid", data_for_mermaid,
+                            lambda: generate_mermaid_diagram(data_for_mermaid)
+                        )
                     
                     st.success("图表生成成功！")
             except Exception as e:
@@ -16,7 +16,13 @@ import base64
 import logging
 import pandas as pd
 import uuid
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from src.utils.llm_streaming import (
+    STREAMING_ENABLED,
+    IncrementalJsonParser,
+    stream_generation,
+)
 
 # 设置日志配置
 logging.basicConfig(
@@ -117,11 +123,30 @@ def read_excel_file(file_content: bytes) -> Optional[pd.DataFrame]:
         logger.error(f"读取Excel文件失败: {str(e)}")
         return None
 
+def _stream_equity_json(
+    model: str,
+    messages: List[Dict[str, Any]],
+    on_partial: Callable[[Dict[str, Any], List[Tuple[str, Any]]], None]
+) -> str:
+    """
+    流式调用模型，边接收边解析实体和关系
+    
+    Returns:
+        str: 接收到的完整文本
+    """
+    parser = IncrementalJsonParser()
+    for delta in stream_generation(model, messages, temperature=0.01, seed=12345):
+        events = parser.feed(delta)
+        if events:
+            on_partial(parser.data, events)
+    return parser.text
+
 def analyze_equity_with_ai(
     prompt: str,
     file_content: Optional[bytes] = None,
     file_name: Optional[str] = None,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    on_partial: Optional[Callable[[Dict[str, Any], List[Tuple[str, Any]]], None]] = None
 ) -> Tuple[Dict[str, Any], List[str]]:
     """
     使用大模型分析股权结构信息
@@ -131,6 +156,7 @@ def analyze_equity_with_ai(
         file_content: 上传文件的字节内容
         file_name: 文件名
         api_key: DashScope API密钥
+        on_partial: 传入时使用流式输出，每解析出新的实体/关系/字段就以 (已解析的部分数据, [(字段名, 新元素)]) 回调
     
     Returns:
         Tuple[股权结构数据字典, 错误日志列表]
@@ -340,23 +366,36 @@ def analyze_equity_with_ai(
                 logger.info("尝试使用基本消息格式调用模型")
                 logger.info(f"模型: {model_to_use}, 消息数量: {len(basic_messages)}")
                 
+                streamed = None
                 try:
-                    # 使用Generation.call - 纯文本接口
-                    # 注意：不传递任何URL相关参数，让库使用默认配置
-                    response = Generation.call(
-                        model=model_to_use,
-                        messages=basic_messages,
-                        temperature=0.01,  # 低温度以确保确定性输出
-                        seed=12345
-                    )
+                    if on_partial is not None and STREAMING_ENABLED:
+                        # 流式输出：边接收边解析，调用方可逐步渲染
+                        streamed = _stream_equity_json(model_to_use, basic_messages, on_partial)
+                    else:
+                        # 使用Generation.call - 纯文本接口
+                        # 注意：不传递任何URL相关参数，让库使用默认配置
+                        response = Generation.call(
+                            model=model_to_use,
+                            messages=basic_messages,
+                            temperature=0.01,  # 低温度以确保确定性输出
+                            seed=12345
+                        )
                 except Exception as call_error:
                     logger.error(f"第一次调用失败: {str(call_error)}")
                     # 如果主要调用失败，记录错误并使用模拟数据
                     logger.error(f"模型调用失败: {str(call_error)}")
                     raise call_error  # 重新抛出原始错误
                 
+                if streamed is not None:
+                    try:
+                        extracted_data = extract_json_from_text(streamed)
+                        equity_data = validate_and_convert_equity_data(extracted_data, error_logs)
+                    except Exception as e:
+                        error_logs.append(f"解析模型输出失败: {str(e)}")
+                        logger.error(f"解析响应失败: {str(e)}")
+                        use_real_api = False
                 # 检查响应状态
-                if response.status_code != 200:
+                elif response.status_code != 200:
                     error_logs.append(f"API调用失败: {response.code} - {response.message}")
                     logger.error(f"模型调用失败: {response.code} - {response.message}")
                     # 回退到模拟数据
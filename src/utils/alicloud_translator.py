@@ -8,7 +8,9 @@ import hashlib
 import urllib.parse
 import requests
 import base64
+import threading
 from cryptography.fernet import Fernet
+from requests.adapters import HTTPAdapter
 
 # 检查是否在Streamlit Cloud环境中
 IS_STREAMLIT_CLOUD = os.environ.get('STREAMLIT_RUNTIME_ENV') == 'cloud'
@@ -16,6 +18,9 @@ IS_STREAMLIT_CLOUD = os.environ.get('STREAMLIT_RUNTIME_ENV') == 'cloud'
 # 检查是否在PyInstaller打包环境中
 IS_PYINSTALLER = getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS')
 
+# 机器翻译接口地址（可通过环境变量指向本地桩服务做压测）
+MT_ENDPOINT = os.environ.get('ALICLOUD_MT_ENDPOINT', 'https://mt.cn-hangzhou.aliyuncs.com/')
+
 # 尝试将标准输出/错误设置为utf-8，避免Windows控制台编码问题
 try:
     if hasattr(sys.stdout, 'reconfigure'):
@@ -151,6 +156,318 @@ def get_access_key():
         _safe_log(f"Unexpected error while resolving AccessKey: {exc}")
 
     return None, None
+
+
+def _signed_query(params, access_key_id, access_key_secret, method='GET'):
+    """补充公共参数并按阿里云 RPC 签名规则返回带签名的查询字符串"""
+    # 构建请求参数
+    timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    nonce = str(uuid.uuid4()).replace('-', '')
+    params = dict(params)
+    params.update({
+        'Format': 'JSON',
+        'AccessKeyId': access_key_id,
+        'Timestamp': timestamp,
+        'SignatureVersion': '1.0',
+        'SignatureMethod': 'HMAC-SHA1',
+        'SignatureNonce': nonce,
+        'Version': '2018-10-12'
+    })
+    
+    # 按参数名排序
+    sorted_params = sorted(params.items(), key=lambda x: x[0])
+    
+    # 构建签名字符串 - 确保参数值已正确编码（阿里云API要求的精确编码方式）
+    canonicalized_query_string = '&'.join([
+        f"{urllib.parse.quote(k, safe='')}={urllib.parse.quote(v, safe='')}"
+        for k, v in sorted_params
+    ])
+    
+    # 构建用于签名的字符串 - 严格按照阿里云文档要求
+    string_to_sign = f"{method}&{urllib.parse.quote('/', safe='')}&{urllib.parse.quote(canonicalized_query_string, safe='')}"
+    
+    # 生成签名 - 确保正确处理密钥和编码
+    access_key_secret_with_amp = f"{access_key_secret}&"
+    signature_bytes = hmac.new(
+        access_key_secret_with_amp.encode('utf-8'),
+        string_to_sign.encode('utf-8'),
+        hashlib.sha1
+    ).digest()
+    signature = base64.b64encode(signature_bytes).decode('utf-8')
+    return f"{canonicalized_query_string}&Signature={urllib.parse.quote_plus(signature)}"
+
+
+# 连接池大小（与批量翻译的并发线程数相当）
+DEFAULT_POOL_SIZE = 16
+# 单条 / 批量翻译请求超时（秒）：(连接超时, 读取超时)
+SINGLE_REQUEST_TIMEOUT = (3.05, 10)
+BATCH_REQUEST_TIMEOUT = (3.05, 15)
+# 未找到 AccessKey 时，间隔该秒数后才重新读取配置
+CREDENTIAL_RETRY_INTERVAL = 30.0
+# 表示 AccessKey 无效或已更换的错误码（前缀匹配），收到后丢弃缓存的 AccessKey
+AUTH_ERROR_CODES = ('InvalidAccessKeyId', 'InvalidAccessKeySecret', 'SignatureDoesNotMatch')
+
+# 批量翻译（GetBatchTranslate）单次请求的条数和总字符数上限
+MAX_PACK_ITEMS = 50
+MAX_PACK_CHARS = 6000
+# 单条超过该长度的文本不参与打包，走单条翻译
+MAX_PACK_ITEM_CHARS = 1000
+
+
+class TranslatorMetrics:
+    """翻译请求的连接与耗时统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.connections = 0
+            self.connect_seconds = 0.0
+            self.connect_max = 0.0
+            self.request_seconds = 0.0
+            self.request_max = 0.0
+
+    def record_connect(self, seconds):
+        with self._lock:
+            self.connections += 1
+            self.connect_seconds += seconds
+            self.connect_max = max(self.connect_max, seconds)
+
+    def record_request(self, seconds, ok):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.request_seconds += seconds
+            self.request_max = max(self.request_max, seconds)
+
+    def snapshot(self):
+        """返回统计快照（耗时单位：毫秒）"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'connections': self.connections,
+                'connect_avg_ms': round(self.connect_seconds / self.connections * 1000, 2) if self.connections else 0.0,
+                'connect_max_ms': round(self.connect_max * 1000, 2),
+                'request_avg_ms': round(self.request_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+                'request_max_ms': round(self.request_max * 1000, 2),
+            }
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """记录新建连接（TCP/TLS 握手）耗时的连接池适配器"""
+
+    def __init__(self, metrics, **kwargs):
+        self._metrics = metrics
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        metrics = self._metrics
+        pool_classes = {}
+        for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items():
+            base_connection = pool_cls.ConnectionCls
+
+            class TimedConnection(base_connection):
+                def connect(self):
+                    start = time.perf_counter()
+                    try:
+                        super().connect()
+                    finally:
+                        metrics.record_connect(time.perf_counter() - start)
+
+            pool_classes[scheme] = type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': TimedConnection})
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+
+class AlicloudTranslatorClient:
+    """
+    阿里云机器翻译客户端
+    - AccessKey 只解析一次（读取 config.key、解密 config.json 的开销不再出现在每次请求中）；
+    - 复用 keep-alive 的 requests.Session 和连接池；
+    - 统计连接与请求耗时。
+    """
+
+    def __init__(self, endpoint=None, pool_size=DEFAULT_POOL_SIZE):
+        self.endpoint = endpoint or MT_ENDPOINT
+        self.pool_size = pool_size
+        self.metrics = TranslatorMetrics()
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._credentials_checked_at = None
+        self._session = None
+
+    def credentials(self):
+        """返回缓存的 (access_key_id, access_key_secret)；未配置时定期重试读取"""
+        with self._lock:
+            if self._credentials:
+                return self._credentials
+            now = time.monotonic()
+            if (self._credentials_checked_at is not None
+                    and now - self._credentials_checked_at < CREDENTIAL_RETRY_INTERVAL):
+                return None, None
+            self._credentials_checked_at = now
+            access_key_id, access_key_secret = get_access_key()
+            if access_key_id and access_key_secret:
+                self._credentials = (access_key_id, access_key_secret)
+                return self._credentials
+            return None, None
+
+    def invalidate_credentials(self):
+        """配置变更后调用，下次请求重新解析 AccessKey"""
+        with self._lock:
+            self._credentials = None
+            self._credentials_checked_at = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = _TimedHTTPAdapter(self.metrics, pool_connections=2,
+                                            pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def _request(self, params, method, timeout):
+        """签名并发送请求，返回 (response, error_message)"""
+        access_key_id, access_key_secret = self.credentials()
+        if not access_key_id or not access_key_secret:
+            return None, "未找到有效的阿里云AccessKey"
+        query = _signed_query(params, access_key_id, access_key_secret, method=method)
+        start = time.perf_counter()
+        ok = False
+        try:
+            if method == 'POST':
+                # 文本较多时参数放在请求体中，避免 URL 过长
+                response = self.session.post(
+                    self.endpoint,
+                    data=query.encode('utf-8'),
+                    headers={'Content-Type': 'application/x-www-form-urlencoded; charset=utf-8'},
+                    timeout=timeout,
+                )
+            else:
+                response = self.session.get(f"{self.endpoint}?{query}", timeout=timeout)
+            ok = response.status_code == 200
+            if not ok and _is_auth_error(response):
+                # AccessKey 已失效或被更换：下次请求重新读取配置
+                self.invalidate_credentials()
+            return response, None
+        finally:
+            self.metrics.record_request(time.perf_counter() - start, ok)
+
+    def translate(self, source_text, source_language, target_language):
+        """单条翻译，返回 (success, translated_text, error_message)"""
+        try:
+            # 添加FormatType参数，这是必需的
+            params = {
+                'Action': 'TranslateGeneral',
+                'FormatType': 'text',  # 添加必需的FormatType参数
+                'SourceLanguage': source_language,
+                'TargetLanguage': target_language,
+                'SourceText': source_text,
+                'Scene': 'general',
+            }
+            response, error = self._request(params, 'GET', SINGLE_REQUEST_TIMEOUT)
+            if response is None:
+                return False, None, error
+            
+            # 检查响应状态
+            if response.status_code == 200:
+                result = response.json()
+                if 'Data' in result and 'Translated' in result['Data']:
+                    return True, result['Data']['Translated'], None
+                else:
+                    return False, None, f"翻译结果解析失败: {result}"
+            else:
+                return False, None, f"翻译失败: HTTP状态码 {response.status_code}, 响应: {response.text}"
+        
+        except Exception as e:
+            return False, None, f"翻译过程中发生错误: {str(e)}"
+
+    def translate_batch(self, source_texts, source_language, target_language):
+        """批量翻译（GetBatchTranslate），返回 (success, translations, error_message)"""
+        texts = list(source_texts)
+        if not texts:
+            return True, [], None
+        if len(texts) > MAX_PACK_ITEMS or sum(len(t) for t in texts) > MAX_PACK_CHARS:
+            return False, None, f"批量翻译超出单次请求上限（{MAX_PACK_ITEMS} 条 / {MAX_PACK_CHARS} 字符）"
+        try:
+            # SourceText 为 {序号: 文本} 的 JSON，译文按序号返回，不依赖分隔符拆分
+            params = {
+                'Action': 'GetBatchTranslate',
+                'FormatType': 'text',
+                'SourceLanguage': source_language,
+                'TargetLanguage': target_language,
+                'SourceText': json.dumps({str(i): text for i, text in enumerate(texts)}, ensure_ascii=False),
+                'Scene': 'general',
+                'ApiType': 'translate_standard',
+            }
+            response, error = self._request(params, 'POST', BATCH_REQUEST_TIMEOUT)
+            if response is None:
+                return False, None, error
+            
+            if response.status_code != 200:
+                return False, None, f"批量翻译失败: HTTP状态码 {response.status_code}, 响应: {response.text}"
+            result = response.json()
+            items = result.get('TranslatedList')
+            if not isinstance(items, list):
+                return False, None, f"批量翻译结果解析失败: {result}"
+            
+            translations = [None] * len(texts)
+            for item in items:
+                try:
+                    index = int(item.get('index'))
+                except (TypeError, ValueError):
+                    continue
+                if not 0 <= index < len(texts):
+                    continue
+                if str(item.get('code', '200')) != '200':
+                    continue
+                translated = item.get('translated')
+                if isinstance(translated, str) and translated.strip():
+                    translations[index] = translated
+            return True, translations, None
+        
+        except Exception as e:
+            return False, None, f"批量翻译过程中发生错误: {str(e)}"
+
+
+def _is_auth_error(response):
+    """响应是否为 AccessKey 无效 / 签名不匹配"""
+    try:
+        code = str(response.json().get('Code') or '')
+    except Exception:
+        return False
+    return code.startswith(AUTH_ERROR_CODES)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_translator_client():
+    """返回进程级共享的翻译客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AlicloudTranslatorClient()
+        return _client
+
+
 def translate_with_alicloud(source_text, source_language, target_language):
     """
     使用阿里云翻译服务进行文本翻译
@@ -163,70 +480,20 @@ def translate_with_alicloud(source_text, source_language, target_language):
     返回:
     - (success, translated_text, error_message): 三元组，包含是否成功、翻译结果或错误信息
     """
-    try:
-        access_key_id, access_key_secret = get_access_key()
-        
-        if not access_key_id or not access_key_secret:
-            return False, None, "未找到有效的阿里云AccessKey"
-        
-        # 构建请求参数
-        timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
-        nonce = str(uuid.uuid4()).replace('-', '')
-        
-        # 添加FormatType参数，这是必需的
-        params = {
-            'Action': 'TranslateGeneral',
-            'Format': 'JSON',
-            'FormatType': 'text',  # 添加必需的FormatType参数
-            'SourceLanguage': source_language,
-            'TargetLanguage': target_language,
-            'SourceText': source_text,
-            'Scene': 'general',
-            'AccessKeyId': access_key_id,
-            'Timestamp': timestamp,
-            'SignatureVersion': '1.0',
-            'SignatureMethod': 'HMAC-SHA1',
-            'SignatureNonce': nonce,
-            'Version': '2018-10-12'
-        }
-        
-        # 按参数名排序
-        sorted_params = sorted(params.items(), key=lambda x: x[0])
-        
-        # 构建签名字符串 - 确保参数值已正确编码（阿里云API要求的精确编码方式）
-        canonicalized_query_string = '&'.join([
-            f"{urllib.parse.quote(k, safe='')}={urllib.parse.quote(v, safe='')}"
-            for k, v in sorted_params
-        ])
-        
-        # 构建用于签名的字符串 - 严格按照阿里云文档要求
-        string_to_sign = f"GET&{urllib.parse.quote('/', safe='')}&{urllib.parse.quote(canonicalized_query_string, safe='')}"
-        
-        # 生成签名 - 确保正确处理密钥和编码
-        access_key_secret_with_amp = f"{access_key_secret}&"
-        signature_bytes = hmac.new(
-            access_key_secret_with_amp.encode('utf-8'),
-            string_to_sign.encode('utf-8'),
-            hashlib.sha1
-        ).digest()
-        signature = base64.b64encode(signature_bytes).decode('utf-8')
-        
-        # 构建最终URL
-        url = f"https://mt.cn-hangzhou.aliyuncs.com/?{canonicalized_query_string}&Signature={urllib.parse.quote_plus(signature)}"
-        
-        # 发送请求
-        response = requests.get(url, timeout=10)
-        
-        # 检查响应状态
-        if response.status_code == 200:
-            result = response.json()
-            if 'Data' in result and 'Translated' in result['Data']:
-                return True, result['Data']['Translated'], None
-            else:
-                return False, None, f"翻译结果解析失败: {result}"
-        else:
-            return False, None, f"翻译失败: HTTP状态码 {response.status_code}, 响应: {response.text}"
-    
-    except Exception as e:
-        return False, None, f"翻译过程中发生错误: {str(e)}"
+    return get_translator_client().translate(source_text, source_language, target_language)
 
+
+def translate_batch_with_alicloud(source_texts, source_language, target_language):
+    """
+    使用阿里云批量翻译接口（GetBatchTranslate）一次翻译多条文本
+    
+    参数:
+    - source_texts: 待翻译文本列表（不超过 MAX_PACK_ITEMS 条、总长不超过 MAX_PACK_CHARS）
+    - source_language: 源语言代码
+    - target_language: 目标语言代码
+    
+    返回:
+    - (success, translations, error_message): translations 与 source_texts 一一对应，
+      单条翻译失败或结果缺失时对应位置为 None
+    """
+    return get_translator_client().translate_batch(source_texts, source_language, target_language)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多张股权结构图的批量识别队列
+同一项目常有 20–50 张截图，逐张上传识别耗时过长。批量模式：
+- 按内容哈希去重，重复上传的图片只识别一次；
+- 在有界线程池中并发识别各文件，同时进行的模型请求数由 ApiSlots 限制
+  （文件内分块识别的请求也共用同一组名额，总并发不会超过接口允许的上限）；
+- 记录每个文件的状态（命中缓存 / 识别成功 / 部分分块失败 / 失败 / 重复）、耗时和实体数；
+- 成功的结果按名称合并为一份股权数据（复用分块识别的 merge_recognitions 去重规则）；
+  各截图可能是同一项目的不同子图，shareholders / subsidiaries 按各自的核心公司还原为股权关系。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.recognition_cache import image_digest
+from src.utils.tiled_recognition import merge_recognitions
+
+# 同时进行的模型请求数上限（按 DashScope 账号的并发配额调整）
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("RECOGNITION_BATCH_WORKERS", "4") or 4)
+# 单批最多文件数
+MAX_BATCH_FILES = 100
+
+STATUS_PENDING = "pending"
+STATUS_CACHED = "cached"
+STATUS_OK = "ok"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED = "failed"
+STATUS_DUPLICATE = "duplicate"
+
+STATUS_LABELS = {
+    STATUS_PENDING: "⏳ 等待中",
+    STATUS_CACHED: "⚡ 命中缓存",
+    STATUS_OK: "✅ 识别成功",
+    STATUS_PARTIAL: "⚠️ 部分分块失败",
+    STATUS_FAILED: "❌ 失败",
+    STATUS_DUPLICATE: "🔁 重复文件",
+}
+
+
+class ApiSlots:
+    """限制同时进行的模型请求数；用作上下文管理器包裹每次模型调用"""
+
+    def __init__(self, limit: int = DEFAULT_MAX_CONCURRENCY):
+        self.limit = max(1, int(limit))
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+
+class BatchItem:
+    """批量识别中的一个文件及其识别状态"""
+
+    def __init__(self, index: int, name: str, data: bytes):
+        self.index = index
+        self.name = name
+        self.data = data
+        self.digest = image_digest(data)
+        self.status = STATUS_PENDING
+        self.result: Optional[Dict[str, Any]] = None
+        self.error = ""
+        # 分块识别中失败的分块：分块序号 -> 错误信息（结果仍可用，但可能不完整）
+        self.tile_errors: Dict[int, str] = {}
+        self.elapsed = 0.0
+        # 重复文件指向首次出现的文件序号
+        self.duplicate_of: Optional[int] = None
+
+    def entity_count(self) -> int:
+        if not isinstance(self.result, dict):
+            return 0
+        return len(self.result.get("all_entities") or [])
+
+    def relationship_count(self) -> int:
+        if not isinstance(self.result, dict):
+            return 0
+        return len(self.result.get("entity_relationships") or [])
+
+
+def build_batch(files: List[Tuple[str, bytes]]) -> List[BatchItem]:
+    """由 (文件名, 字节) 列表创建批次，内容相同的文件标记为重复"""
+    items: List[BatchItem] = []
+    first_by_digest: Dict[str, int] = {}
+    for name, data in files[:MAX_BATCH_FILES]:
+        item = BatchItem(len(items), name, data)
+        if item.digest in first_by_digest:
+            item.status = STATUS_DUPLICATE
+            item.duplicate_of = first_by_digest[item.digest]
+        else:
+            first_by_digest[item.digest] = item.index
+        items.append(item)
+    return items
+
+
+def run_batch(items: List[BatchItem],
+              recognize: Callable[[BatchItem], Tuple[Dict[str, Any], bool, Dict[int, str]]],
+              max_workers: int = DEFAULT_MAX_CONCURRENCY,
+              on_progress: Optional[Callable[[int, int, BatchItem], None]] = None) -> List[BatchItem]:
+    """
+    并发识别批次中的文件（重复文件跳过）
+
+    recognize(item) 在工作线程中执行，返回 (识别结果 JSON, 是否命中缓存, 失败的分块 {序号: 错误信息})，
+    不得调用 st.*；有分块失败的文件标记为部分失败，结果仍参与合并；
+    on_progress(已完成数, 待识别总数, 刚完成的文件) 在调用方线程中执行（可直接更新 Streamlit 组件）
+    """
+    pending = [item for item in items if item.status == STATUS_PENDING]
+    if not pending:
+        return items
+
+    def _run(item: BatchItem) -> Tuple[Dict[str, Any], bool, Dict[int, str], float]:
+        started = time.perf_counter()
+        result, cached, tile_errors = recognize(item)
+        return result, cached, tile_errors, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(pending))),
+                            thread_name_prefix="batch-recognition") as executor:
+        futures = {executor.submit(_run, item): item for item in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            item = futures[future]
+            try:
+                item.result, cached, tile_errors, item.elapsed = future.result()
+                item.tile_errors = dict(tile_errors or {})
+                if cached:
+                    item.status = STATUS_CACHED
+                elif item.tile_errors:
+                    item.status = STATUS_PARTIAL
+                    failed = "、".join(str(index + 1) for index in sorted(item.tile_errors))
+                    item.error = f"第 {failed} 块识别失败，结果可能不完整：{next(iter(item.tile_errors.values()))}"
+                else:
+                    item.status = STATUS_OK
+            except Exception as exc:
+                item.status = STATUS_FAILED
+                item.error = str(exc)
+            if on_progress is not None:
+                on_progress(done, len(pending), item)
+    return items
+
+
+def merge_batch(items: List[BatchItem]) -> Optional[Dict[str, Any]]:
+    """
+    合并所有成功（含部分分块失败）文件的识别结果；没有可用结果时返回 None
+
+    各文件的 shareholders / subsidiaries 相对于该文件自己的核心公司，
+    由 merge_recognitions 转换为显式股权关系后再合并
+    """
+    results = [item.result for item in items
+               if item.status in (STATUS_OK, STATUS_CACHED, STATUS_PARTIAL) and isinstance(item.result, dict)]
+    if not results:
+        return None
+    return merge_recognitions(results)
+
+
+def status_rows(items: List[BatchItem]) -> List[Dict[str, Any]]:
+    """每个文件一行的状态表（可直接交给 st.dataframe）"""
+    rows = []
+    for item in items:
+        if item.status == STATUS_DUPLICATE:
+            note = f"与第 {item.duplicate_of + 1} 个文件内容相同"
+        else:
+            note = item.error
+        rows.append({
+            "文件": item.name,
+            "状态": STATUS_LABELS.get(item.status, item.status),
+            "实体数": item.entity_count(),
+            "股权关系数": item.relationship_count(),
+            "耗时(秒)": round(item.elapsed, 1),
+            "说明": note,
+        })
+    return rows
+
+
+def batch_summary(items: List[BatchItem]) -> Dict[str, int]:
+    """各状态的文件数"""
+    summary = {status: 0 for status in STATUS_LABELS}
+    for item in items:
+        summary[item.status] = summary.get(item.status, 0) + 1
+    return summary
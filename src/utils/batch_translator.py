@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量翻译引擎
+有界线程池并发翻译，并用令牌桶限制整体 QPS（与阿里云机器翻译的限流对齐）：
+- 已缓存的名称直接返回，不占用令牌和线程；
+- 未缓存的名称按条数/字符数打包，一次请求翻译一组（translate_texts），逐条校验和缓存；
+- 主体相同的公司名称（仅地区/组织形式不同）分在同一组，主体只翻译和计费一次；
+- 开始前为整批预留额度（不足时预留全部剩余），批次内本地记账，结束时退还未用部分；
+- 请求失败按指数退避重试，额度用尽时停止提交剩余请求；
+- 进度回调在调用线程中执行，可直接更新 Streamlit 进度条。
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.utils.translation_usage import get_cached, reserve_quota
+from src.utils.alicloud_translator import MAX_PACK_CHARS, MAX_PACK_ITEMS
+from src.utils.translator_service import (
+    QuotaExceededError,
+    billable_text,
+    target_formatter,
+    translate_text,
+    translate_texts,
+)
+
+# 阿里云机器翻译通用版默认限流 50 QPS（主账号共享），留出余量给其它调用
+DEFAULT_QPS = float(os.environ.get("ALICLOUD_MT_QPS", "40") or 40)
+DEFAULT_MAX_WORKERS = int(os.environ.get("ALICLOUD_MT_WORKERS", "8") or 8)
+DEFAULT_MAX_RETRIES = 5
+# 首次重试等待时间（秒），之后每次翻倍并加入随机抖动
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 8.0
+
+STATUS_TRANSLATED = "translated"
+STATUS_CACHED = "cached"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"  # 额度用尽后未执行
+
+# 进度回调：(已完成数, 总数, 文本, 结果)
+ProgressCallback = Callable[[int, int, str, Dict], None]
+
+
+class TokenBucket:
+    """线程安全的令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = max(0.001, float(rate))
+        self.capacity = max(1.0, float(capacity if capacity is not None else rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0, stop_event: Optional[threading.Event] = None) -> bool:
+        """阻塞直到取得令牌；stop_event 被设置时放弃并返回 False"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_seconds = (tokens - self._tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait_seconds):
+                    return False
+            else:
+                time.sleep(wait_seconds)
+
+
+def _backoff_delay(attempt: int, base: float) -> float:
+    return min(MAX_BACKOFF, base * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+
+def translate_batch(texts: Iterable[str], src: str = 'zh', tgt: str = 'en',
+                    qps: float = DEFAULT_QPS,
+                    max_workers: int = DEFAULT_MAX_WORKERS,
+                    max_retries: int = DEFAULT_MAX_RETRIES,
+                    backoff: float = DEFAULT_BACKOFF,
+                    progress_callback: Optional[ProgressCallback] = None,
+                    pack_size: int = MAX_PACK_ITEMS,
+                    translate_func: Optional[Callable[[str, str, str], str]] = None,
+                    pack_func: Optional[Callable[[List[str], str, str], Dict[str, str]]] = None
+                    ) -> Dict[str, Dict]:
+    """
+    并发批量翻译
+
+    Args:
+        texts: 待翻译文本（自动去重，空文本忽略）
+        src: 源语言
+        tgt: 目标语言
+        qps: 每秒最多发起的翻译请求数（含重试，一组打包请求计一次）
+        max_workers: 并发线程数
+        max_retries: 请求失败后的最大重试次数（额度用尽不重试）
+        backoff: 首次重试等待秒数
+        progress_callback: 每完成一条调用一次，在调用线程中执行
+        pack_size: 每次请求打包的条数，1 表示逐条翻译
+        translate_func: 逐条翻译函数，默认 translate_text（使用整批预留的额度）
+        pack_func: 打包翻译函数，默认 translate_texts（组内失败条目由本函数限流重试）
+
+    Returns:
+        Dict[str, Dict]: 文本 -> {"status", "translated", "error", "attempts"}
+    """
+    unique: List[str] = list(dict.fromkeys(t for t in texts if t))
+    total = len(unique)
+    results: Dict[str, Dict] = {}
+    done = 0
+
+    def _report(text: str, result: Dict) -> None:
+        nonlocal done
+        results[text] = result
+        done += 1
+        if progress_callback is not None:
+            progress_callback(done, total, text, result)
+
+    # 1. 已缓存的名称直接返回（与逐条翻译相同的规范化，未规范化的旧译文在此格式化）
+    formatter = target_formatter(tgt)
+    pending: List[str] = []
+    for text in unique:
+        cached = get_cached(text, src, tgt, normalize=formatter)
+        if cached:
+            _report(text, {"status": STATUS_CACHED, "translated": cached, "error": None, "attempts": 0})
+        else:
+            pending.append(text)
+    if not pending:
+        return results
+
+    # 按实际计费文本分组：同一主体的名称放在同一单元，避免并发单元重复翻译同一主体
+    groups: Dict[str, List[str]] = {}
+    for text in pending:
+        groups.setdefault(billable_text(text, src, tgt), []).append(text)
+    units = _pack_groups(groups, pack_size)
+
+    # 桶容量为 1：不允许突发，任意 1 秒内的请求数不超过 qps + 1
+    bucket = TokenBucket(qps, capacity=1)
+    quota_exhausted = threading.Event()
+    # 整批预留额度；自定义翻译函数自行计费
+    reservation = None
+    if (pack_func if pack_size > 1 else translate_func) is None:
+        reservation = reserve_quota(sum(len(key) for key in groups), allow_partial=True)
+        if reservation is None:
+            for text in pending:
+                _report(text, {"status": STATUS_SKIPPED, "translated": None, "error": "额度已用完", "attempts": 0})
+            return results
+
+    def _call(unit: List[str]) -> Dict[str, str]:
+        if pack_size > 1:
+            if pack_func is not None:
+                return pack_func(unit, src, tgt)
+            return translate_texts(unit, src, tgt, retry_single=False, reservation=reservation)
+        # 单元内的名称共用一个主体：第一条调用接口，其余命中主体缓存后直接组合
+        translated: Dict[str, str] = {}
+        for text in unit:
+            if translate_func is not None:
+                value = translate_func(text, src, tgt)
+            else:
+                value = translate_text(text, src, tgt, reservation=reservation)
+            if value:
+                translated[text] = value
+        return translated
+
+    def _unit_result(unit: List[str], status: str, error: Optional[str], attempts: int) -> Dict[str, Dict]:
+        return {text: {"status": status, "translated": None, "error": error, "attempts": attempts}
+                for text in unit}
+
+    def _worker(unit: List[str]) -> Dict[str, Dict]:
+        attempts = 0
+        last_error = None
+        unit_results: Dict[str, Dict] = {}
+        remaining = list(unit)
+        while attempts <= max_retries:
+            if quota_exhausted.is_set() or not bucket.acquire(stop_event=quota_exhausted):
+                unit_results.update(_unit_result(remaining, STATUS_SKIPPED, "额度已用完", attempts))
+                return unit_results
+            attempts += 1
+            try:
+                translated = _call(remaining)
+            except QuotaExceededError as exc:
+                quota_exhausted.set()
+                unit_results.update(_unit_result(remaining, STATUS_SKIPPED, str(exc), attempts))
+                return unit_results
+            except Exception as exc:
+                last_error = str(exc)
+            else:
+                for text in remaining:
+                    if translated.get(text):
+                        unit_results[text] = {"status": STATUS_TRANSLATED, "translated": translated[text],
+                                              "error": None, "attempts": attempts}
+                # 未返回译文的条目单独重试
+                remaining = [text for text in remaining if text not in unit_results]
+                if not remaining:
+                    return unit_results
+                last_error = "未返回译文"
+            if attempts <= max_retries:
+                # 等待期间额度用尽会提前醒来，回到循环开头返回跳过
+                quota_exhausted.wait(_backoff_delay(attempts - 1, backoff))
+        unit_results.update(_unit_result(remaining, STATUS_FAILED, last_error, attempts))
+        return unit_results
+
+    # 2. 线程池并发翻译；在调用线程中收集结果并回调进度
+    try:
+        _run_units(units, _worker, max_workers, _report)
+    finally:
+        if reservation is not None:
+            reservation.release()
+    return results
+
+
+def _pack_groups(groups: Dict[str, List[str]], pack_size: int) -> List[List[str]]:
+    """把 {计费文本: 名称列表} 打包为翻译单元：每个单元不超过 pack_size 个计费文本和 MAX_PACK_CHARS 字符，
+    同组名称不拆分"""
+    units: List[List[str]] = []
+    current: List[str] = []
+    keys = 0
+    chars = 0
+    for key, members in groups.items():
+        if current and (keys >= max(1, pack_size) or chars + len(key) > MAX_PACK_CHARS):
+            units.append(current)
+            current, keys, chars = [], 0, 0
+        current.extend(members)
+        keys += 1
+        chars += len(key)
+    if current:
+        units.append(current)
+    return units
+
+
+def _run_units(units: List[List[str]], worker: Callable[[List[str]], Dict[str, Dict]],
+               max_workers: int, report: Callable[[str, Dict], None]) -> None:
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers)),
+                            thread_name_prefix="batch-translate") as executor:
+        futures = {executor.submit(worker, unit): unit for unit in units}
+        remaining = set(futures)
+        while remaining:
+            finished, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+            for future in finished:
+                unit = futures[future]
+                try:
+                    unit_results = future.result()
+                except Exception as exc:
+                    unit_results = {text: {"status": STATUS_FAILED, "translated": None, "error": str(exc),
+                                           "attempts": 0} for text in unit}
+                for text in unit:
+                    report(text, unit_results[text])
+
+
+def summarize_batch(results: Dict[str, Dict]) -> Dict[str, int]:
+    """按状态统计批量翻译结果"""
+    summary = {STATUS_TRANSLATED: 0, STATUS_CACHED: 0, STATUS_FAILED: 0, STATUS_SKIPPED: 0}
+    for result in results.values():
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return summary
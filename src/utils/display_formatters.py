@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 
@@ -320,6 +321,53 @@ def _intelligent_pinyin_separation(name: str) -> str:
     return name
 
 
+# 英文称谓：Mr., Mrs., Ms., Dr., Prof. 等
+_ENGLISH_TITLES = ['mr.', 'mrs.', 'ms.', 'dr.', 'prof.', 'sir.', 'madam.', 'miss.']
+# 称谓后直接跟字母的情况（如 "Ms.shen"），按称谓顺序依次替换
+_TITLE_FOLLOWED_BY_LETTER = [re.compile(rf'({title})([a-zA-Z])', re.IGNORECASE) for title in _ENGLISH_TITLES]
+
+# 特殊处理：保持某些常见缩写的大写格式
+_SPECIAL_ABBREVIATIONS = {
+    'co., ltd.': 'Co., Ltd.',
+    'co., ltd': 'Co., Ltd.',
+    'ltd.': 'Ltd.',
+    'inc.': 'Inc.',
+    'corp.': 'Corp.',
+    'llc.': 'LLC.',
+    'llp.': 'LLP.',
+    'lp.': 'LP.'
+}
+# 按长度排序，先处理长的
+_SPECIAL_ABBREVIATION_ITEMS = sorted(_SPECIAL_ABBREVIATIONS.items(), key=lambda item: len(item[0]), reverse=True)
+_SPECIAL_ABBREVIATION_VALUES = frozenset(_SPECIAL_ABBREVIATIONS.values())
+
+_PARENTHETICAL = re.compile(r"\(([^)]+)\)")
+_WHITESPACE_SPLIT = re.compile(r'(\s+)')
+_HAS_LATIN = re.compile(r"[A-Za-z]")
+
+# 格式化结果缓存条数（同一名称在缓存命中、批量格式化和导入时会被反复格式化）
+ENGLISH_NAME_CACHE_SIZE = 65536
+
+
+def _title_case_token(token: str) -> str:
+    if not token or token.isspace():
+        return token
+    # Leave fully upper-case tokens (e.g. abbreviations) untouched
+    if token.isupper():
+        return token
+    # Only adjust alphabetic content
+    if _HAS_LATIN.search(token):
+        return token[0].upper() + token[1:].lower()
+    return token
+
+
+def _restore_parenthetical_case(match: re.Match) -> str:
+    """Ensure parenthetical words follow title casing where appropriate."""
+    content = match.group(1)
+    parts = _WHITESPACE_SPLIT.split(content)
+    return "(" + "".join(_title_case_token(p) for p in parts) + ")"
+
+
 def format_english_company_name(name: str) -> str:
     """
     格式化英文公司名称为标准格式：首字母大写，其余字母小写（专有名词除外）
@@ -341,19 +389,21 @@ def format_english_company_name(name: str) -> str:
     """
     if not name or not isinstance(name, str):
         return name
+    return _format_english_company_name_cached(name)
+
+
+def _format_english_company_name(name: str) -> str:
+    """format_english_company_name 的实际实现（不带缓存）"""
     
     # 首先检查是否是中文人名格式（如 "Shen Yingming"）
     # 如果包含称谓，先处理称谓
     formatted_name = name
     
-    # 英文称谓处理：Mr., Mrs., Ms., Dr., Prof. 等
-    titles = ['mr.', 'mrs.', 'ms.', 'dr.', 'prof.', 'sir.', 'madam.', 'miss.']
+    titles = _ENGLISH_TITLES
     
     # 处理称谓后直接跟姓氏的情况（如 "Ms.shen" -> "Ms. shen"）
-    for title in titles:
-        # 匹配称谓后直接跟字母的情况（不区分大小写）
-        pattern = rf'({title})([a-zA-Z])'
-        formatted_name = re.sub(pattern, r'\1 \2', formatted_name, flags=re.IGNORECASE)
+    for pattern in _TITLE_FOLLOWED_BY_LETTER:
+        formatted_name = pattern.sub(r'\1 \2', formatted_name)
     
     # 检查是否包含称谓
     has_title = any(title in formatted_name.lower() for title in titles)
@@ -428,31 +478,11 @@ def format_english_company_name(name: str) -> str:
             if separated_name != combined_name:
                 return f"{surname} {separated_name}"
     
-    # 公司名称中常见的专有名词和缩写，需要保持特定格式
-    company_abbreviations = {
-        'co.', 'ltd.', 'inc.', 'corp.', 'llc.', 'llp.', 'lp.',
-        'group', 'holdings', 'investment', 'international', 'global',
-        'limited', 'corporation', 'incorporated', 'company'
-    }
-    
-    # 特殊处理：保持某些常见缩写的大写格式
-    special_abbreviations = {
-        'co., ltd.': 'Co., Ltd.',
-        'co., ltd': 'Co., Ltd.',
-        'ltd.': 'Ltd.',
-        'inc.': 'Inc.',
-        'corp.': 'Corp.',
-        'llc.': 'LLC.',
-        'llp.': 'LLP.',
-        'lp.': 'LP.'
-    }
-    
     # 转换为小写进行后续处理
     formatted_name = formatted_name.lower()
     
     # 然后处理特殊缩写（按长度排序，先处理长的）
-    for abbrev in sorted(special_abbreviations.keys(), key=len, reverse=True):
-        replacement = special_abbreviations[abbrev]
+    for abbrev, replacement in _SPECIAL_ABBREVIATION_ITEMS:
         formatted_name = formatted_name.replace(abbrev, replacement)
     
     # 按空格分割单词
@@ -461,7 +491,7 @@ def format_english_company_name(name: str) -> str:
     
     for i, word in enumerate(words):
         # 跳过已经处理过的特殊缩写
-        if word in special_abbreviations.values():
+        if word in _SPECIAL_ABBREVIATION_VALUES:
             formatted_words.append(word)
             continue
         
@@ -474,7 +504,7 @@ def format_english_company_name(name: str) -> str:
             # 如果下一个词存在，且不是特殊缩写，则保持大写（姓氏）
             if i + 1 < len(words):
                 next_word = words[i + 1]
-                if next_word not in special_abbreviations.values():
+                if next_word not in _SPECIAL_ABBREVIATION_VALUES:
                     # 姓氏首字母大写，其余小写
                     formatted_surname = next_word[0].upper() + next_word[1:].lower()
                     formatted_words.append(formatted_surname)
@@ -494,26 +524,9 @@ def format_english_company_name(name: str) -> str:
     
     result = ' '.join(formatted_words)
 
-    def _restore_parenthetical_case(match: re.Match) -> str:
-        """Ensure parenthetical words follow title casing where appropriate."""
-        content = match.group(1)
-        parts = re.split(r'(\s+)', content)
-
-        def _title_case_token(token: str) -> str:
-            if not token or token.isspace():
-                return token
-            # Leave fully upper-case tokens (e.g. abbreviations) untouched
-            if token.isupper():
-                return token
-            # Only adjust alphabetic content
-            if re.search(r"[A-Za-z]", token):
-                return token[0].upper() + token[1:].lower()
-            return token
-
-        return "(" + "".join(_title_case_token(p) for p in parts) + ")"
-
     # Post-process parentheses so cities like "Shanghai" keep title casing.
-    result = re.sub(r"\(([^)]+)\)", _restore_parenthetical_case, result)
+    return _PARENTHETICAL.sub(_restore_parenthetical_case, result)
+
 
-    return result
+_format_english_company_name_cached = lru_cache(maxsize=ENGLISH_NAME_CACHE_SIZE)(_format_english_company_name)
 
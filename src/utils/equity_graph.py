@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股权数据索引模型
+在 equity_data（由多个普通列表组成的字典）之上一次性建立名称/父子/关系索引，
+供 Mermaid、vis.js 渲染器和手动编辑器共享，避免各处重复的线性扫描。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# 实体列表的查找顺序（与编辑器原有的逐表查找顺序一致）
+ENTITY_LIST_KEYS = ("all_entities", "top_level_entities", "subsidiaries")
+
+
+def relationship_endpoints(rel: Dict[str, Any], control_keys: bool = False) -> Tuple[str, str]:
+    """
+    返回关系的 (父实体, 子实体)，兼容 parent/child、from/to 两种写法
+
+    索引只使用这两种写法，与渲染器绘制连线时读取的键一致；
+    control_keys 为 True 时再回退到 controller/controlled（仅用于收集名称，不参与索引）
+    """
+    if control_keys:
+        parent = rel.get("parent", rel.get("from", rel.get("controller", "")))
+        child = rel.get("child", rel.get("to", rel.get("controlled", "")))
+    else:
+        parent = rel.get("parent", rel.get("from", ""))
+        child = rel.get("child", rel.get("to", ""))
+    return parent or "", child or ""
+
+
+class EquityGraph:
+    """equity_data 的索引视图
+
+    索引直接引用原始实体/关系字典，因此对 english_name 等字段的原地修改
+    会立即反映到查询结果中；通过 ``add_entity``/``add_relationship`` 追加的数据会同步入索引，
+    其他方式增删实体或关系后需调用 ``rebuild()``（或重新构建）。
+    """
+
+    def __init__(self, equity_data: Optional[Dict[str, Any]] = None):
+        self.data: Dict[str, Any] = equity_data if equity_data is not None else {}
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """重新建立全部索引"""
+        data = self.data
+
+        # 列表名 -> {名称 -> 该列表中首个同名实体}（与原线性查找“取第一个”的语义一致）
+        self._first_by_list: Dict[str, Dict[str, Dict[str, Any]]] = {key: {} for key in ENTITY_LIST_KEYS}
+        self._entity_by_name = self._first_by_list["all_entities"]
+        # 名称 -> 各实体列表中所有同名记录（按 ENTITY_LIST_KEYS 顺序）
+        self._records_by_name: Dict[str, List[Dict[str, Any]]] = {}
+        # all_entities 中类型为 person 的名称
+        self._person_names = set()
+
+        for list_key in ENTITY_LIST_KEYS:
+            for entity in data.get(list_key, []) or []:
+                self._index_entity(entity, list_key)
+
+        # 顶级实体：编辑器使用 top_level_entities，Mermaid 数据使用 top_entities
+        self.top_level_names = {
+            e.get("name", "")
+            for key in ("top_level_entities", "top_entities")
+            for e in (data.get(key, []) or [])
+        }
+        self.subsidiary_names = {s.get("name", "") for s in (data.get("subsidiaries", []) or [])}
+
+        self._equity_children: Dict[str, List[str]] = {}
+        self._equity_parents: Dict[str, List[str]] = {}
+        self._equity_by_pair: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for rel in data.get("entity_relationships", []) or []:
+            self._index_relationship(rel, self._equity_children, self._equity_parents, self._equity_by_pair)
+
+        self._control_children: Dict[str, List[str]] = {}
+        self._control_parents: Dict[str, List[str]] = {}
+        self._control_by_pair: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for rel in data.get("control_relationships", []) or []:
+            self._index_relationship(rel, self._control_children, self._control_parents, self._control_by_pair)
+
+    def _index_entity(self, entity: Dict[str, Any], list_key: str) -> None:
+        name = entity.get("name")
+        if not name:
+            return
+        self._records_by_name.setdefault(name, []).append(entity)
+        self._first_by_list.setdefault(list_key, {}).setdefault(name, entity)
+        if list_key == "all_entities":
+            if entity.get("type") == "person":
+                self._person_names.add(name)
+
+    @staticmethod
+    def _index_relationship(rel: Dict[str, Any], children: Dict[str, List[str]],
+                            parents: Dict[str, List[str]],
+                            by_pair: Dict[Tuple[str, str], Dict[str, Any]]) -> None:
+        parent, child = relationship_endpoints(rel)
+        if not parent or not child:
+            return
+        pair = (parent, child)
+        if pair not in by_pair:
+            by_pair[pair] = rel
+            children.setdefault(parent, []).append(child)
+            parents.setdefault(child, []).append(parent)
+
+    # ------------------------------------------------------------------
+    # 实体查询
+    # ------------------------------------------------------------------
+    def entity(self, name: str) -> Optional[Dict[str, Any]]:
+        """返回 all_entities 中首个同名实体"""
+        return self._entity_by_name.get(name)
+
+    def has_entity(self, name: str, list_key: str = "all_entities") -> bool:
+        """名称是否存在于指定实体列表中"""
+        return name in self._first_by_list.get(list_key, {})
+
+    def find(self, name: str, list_key: str = "all_entities") -> Optional[Dict[str, Any]]:
+        """返回指定实体列表中首个同名实体"""
+        return self._first_by_list.get(list_key, {}).get(name)
+
+    def entity_type(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """返回 all_entities 中首个同名实体的类型"""
+        entity = self._entity_by_name.get(name)
+        if entity is None:
+            return default
+        return entity.get("type", default)
+
+    def is_person(self, name: str) -> bool:
+        """all_entities 中是否有同名且类型为 person 的实体"""
+        return name in self._person_names
+
+    def english_name_for(self, name: str) -> str:
+        """按 all_entities → top_level_entities → subsidiaries 顺序查找英文名"""
+        for record in self._records_by_name.get(name, ()):
+            english_name = record.get("english_name")
+            # 记录可能已被原地改名，需再次核对名称
+            if english_name and record.get("name") == name:
+                return english_name
+        return ""
+
+    def add_entity(self, entity: Dict[str, Any], list_key: str = "all_entities") -> None:
+        """向 equity_data 追加实体并同步更新索引"""
+        self.data.setdefault(list_key, []).append(entity)
+        self._index_entity(entity, list_key)
+        if list_key == "top_level_entities":
+            self.top_level_names.add(entity.get("name", ""))
+        elif list_key == "subsidiaries":
+            self.subsidiary_names.add(entity.get("name", ""))
+
+    # ------------------------------------------------------------------
+    # 关系查询
+    # ------------------------------------------------------------------
+    def children_of(self, name: str, include_control: bool = False) -> List[str]:
+        """返回股权关系（可选含控制关系）中的直接子实体，按关系出现顺序"""
+        children = list(self._equity_children.get(name, ()))
+        if include_control:
+            children.extend(c for c in self._control_children.get(name, ()) if c not in children)
+        return children
+
+    def parents_of(self, name: str, include_control: bool = False) -> List[str]:
+        """返回股权关系（可选含控制关系）中的直接父实体，按关系出现顺序"""
+        parents = list(self._equity_parents.get(name, ()))
+        if include_control:
+            parents.extend(p for p in self._control_parents.get(name, ()) if p not in parents)
+        return parents
+
+    def add_relationship(self, rel: Dict[str, Any], kind: str = "equity") -> None:
+        """向 equity_data 追加股权（equity）或控制（control）关系并同步更新索引"""
+        if kind == "control":
+            self.data.setdefault("control_relationships", []).append(rel)
+            self._index_relationship(rel, self._control_children, self._control_parents, self._control_by_pair)
+        else:
+            self.data.setdefault("entity_relationships", []).append(rel)
+            self._index_relationship(rel, self._equity_children, self._equity_parents, self._equity_by_pair)
+
+    def equity_relationship(self, parent: str, child: str) -> Optional[Dict[str, Any]]:
+        """返回 (父, 子) 对应的首条股权关系"""
+        return self._equity_by_pair.get((parent, child))
+
+    def control_relationship(self, parent: str, child: str) -> Optional[Dict[str, Any]]:
+        """返回 (父, 子) 对应的首条控制关系"""
+        return self._control_by_pair.get((parent, child))
+
+    def has_equity(self, parent: str, child: str) -> bool:
+        return (parent, child) in self._equity_by_pair
+
+    def has_control(self, parent: str, child: str) -> bool:
+        return (parent, child) in self._control_by_pair
+
+    def equity_pairs(self) -> Iterable[Tuple[str, str]]:
+        return self._equity_by_pair.keys()
+
+    def control_pairs(self) -> Iterable[Tuple[str, str]]:
+        return self._control_by_pair.keys()
+
+    def referenced_names(self) -> set:
+        """出现在任一股权关系两端的实体名称"""
+        names = set(self._equity_children)
+        names.update(self._equity_parents)
+        return names
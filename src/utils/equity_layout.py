@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务端分层布局（Sugiyama）
+在 Python 端为 vis.js 节点计算最终 x/y 坐标：
+1. 分层：沿用节点的 level（由 equity_levels 计算），跨多层的边拆分为虚拟节点；
+2. 交叉最小化：上下交替扫描，按相邻层邻居位置的中位数/重心排序，保留交叉数最少的排列；
+3. 坐标分配：在保持同层顺序和最小间距的前提下，使节点尽量对齐其相邻层邻居。
+导出的 HTML 直接使用这些坐标并关闭物理引擎，浏览器无需再做布局计算。
+"""
+
+from typing import Dict, List, Optional
+
+# 层间距（y 方向）
+DEFAULT_LEVEL_SEPARATION = 150
+# 同层相邻实体节点的中心距（节点固定宽度 181px）
+DEFAULT_NODE_SPACING = 240
+# 虚拟节点（长边拐点）占用的宽度
+DUMMY_NODE_WIDTH = 40
+# 交叉最小化的上下扫描轮数
+DEFAULT_SWEEPS = 6
+# 坐标分配的迭代轮数
+DEFAULT_COORD_ITERATIONS = 4
+
+
+def _count_crossings(upper_order: List[int], lower_pos: Dict[int, int],
+                     down_adj: Dict[int, List[int]]) -> int:
+    """统计相邻两层之间的边交叉数（树状数组，O(E log V)）"""
+    targets = []
+    for node in upper_order:
+        neighbours = down_adj.get(node)
+        if neighbours:
+            targets.extend(sorted(lower_pos[n] for n in neighbours))
+    if not targets:
+        return 0
+
+    size = len(lower_pos) + 1
+    tree = [0] * (size + 1)
+    crossings = 0
+    inserted = 0
+    for pos in targets:
+        # 已插入且位置大于 pos 的边与当前边交叉
+        index = pos + 1
+        not_greater = 0
+        while index > 0:
+            not_greater += tree[index]
+            index -= index & -index
+        crossings += inserted - not_greater
+        index = pos + 1
+        while index <= size:
+            tree[index] += 1
+            index += index & -index
+        inserted += 1
+    return crossings
+
+
+def _order_key(neighbours: List[int], positions: Dict[int, int]) -> Optional[float]:
+    """邻居位置的中位数；偶数个邻居时取中间两个的平均（即局部重心）"""
+    if not neighbours:
+        return None
+    values = sorted(positions[n] for n in neighbours)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return float(values[middle])
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def _place_in_order(desired: List[float], gaps: List[float]) -> List[float]:
+    """在保持顺序和最小间距的约束下，求与期望坐标平方误差最小的位置（保序回归）"""
+    offsets = [0.0]
+    for gap in gaps:
+        offsets.append(offsets[-1] + gap)
+
+    blocks: List[List[float]] = []  # [总和, 数量]
+    for value, offset in zip(desired, offsets):
+        blocks.append([value - offset, 1])
+        while len(blocks) > 1 and blocks[-2][0] * blocks[-1][1] > blocks[-1][0] * blocks[-2][1]:
+            total, count = blocks.pop()
+            blocks[-1][0] += total
+            blocks[-1][1] += count
+
+    positions: List[float] = []
+    for total, count in blocks:
+        positions.extend([total / count] * int(count))
+    return [position + offset for position, offset in zip(positions, offsets)]
+
+
+def apply_layered_layout(nodes: List[Dict], edges: List[Dict],
+                         level_separation: int = DEFAULT_LEVEL_SEPARATION,
+                         node_spacing: int = DEFAULT_NODE_SPACING,
+                         sweeps: int = DEFAULT_SWEEPS,
+                         coord_iterations: int = DEFAULT_COORD_ITERATIONS) -> int:
+    """
+    计算分层布局并把坐标写入节点的 x/y
+
+    Args:
+        nodes: vis.js 节点列表（需已设置 level；已有的 x 作为初始排序依据）
+        edges: vis.js 边列表（from/to 为节点ID）
+        level_separation: 层间距
+        node_spacing: 同层节点中心距
+        sweeps: 交叉最小化扫描轮数
+        coord_iterations: 坐标分配迭代轮数
+
+    Returns:
+        int: 布局后相邻层之间的边交叉总数
+    """
+    if not nodes:
+        return 0
+
+    # 1. 分层：按 level 排序后压缩为连续的层号
+    level_of = {node["id"]: (node.get("level") if node.get("level") is not None else 1) for node in nodes}
+    rank_of_level = {level: rank for rank, level in enumerate(sorted(set(level_of.values())))}
+    rank: Dict[int, int] = {node_id: rank_of_level[level] for node_id, level in level_of.items()}
+    initial_x: Dict[int, float] = {node["id"]: float(node.get("x") or 0) for node in nodes}
+    width: Dict[int, float] = {node["id"]: float(node_spacing) for node in nodes}
+
+    # 仅保留跨层的边并统一为自上而下方向；跨多层的边拆分为虚拟节点链
+    down_adj: Dict[int, List[int]] = {}
+    up_adj: Dict[int, List[int]] = {}
+    seen_pairs = set()
+    next_dummy = -1
+    for edge in edges:
+        source, target = edge.get("from"), edge.get("to")
+        if source not in rank or target not in rank or rank[source] == rank[target]:
+            continue
+        if rank[source] > rank[target]:
+            source, target = target, source
+        if (source, target) in seen_pairs:
+            continue
+        seen_pairs.add((source, target))
+
+        previous = source
+        span = rank[target] - rank[source]
+        for step in range(1, span):
+            dummy = next_dummy
+            next_dummy -= 1
+            rank[dummy] = rank[source] + step
+            width[dummy] = float(DUMMY_NODE_WIDTH)
+            initial_x[dummy] = initial_x[source] + (initial_x[target] - initial_x[source]) * step / span
+            down_adj.setdefault(previous, []).append(dummy)
+            up_adj.setdefault(dummy, []).append(previous)
+            previous = dummy
+        down_adj.setdefault(previous, []).append(target)
+        up_adj.setdefault(target, []).append(previous)
+
+    rank_count = len(rank_of_level)
+    layers: List[List[int]] = [[] for _ in range(rank_count)]
+    for node_id in sorted(rank, key=lambda n: (initial_x[n], n < 0, abs(n))):
+        layers[rank[node_id]].append(node_id)
+
+    # 2. 交叉最小化
+    def _positions(layer: List[int]) -> Dict[int, int]:
+        return {node_id: index for index, node_id in enumerate(layer)}
+
+    def _total_crossings(current: List[List[int]]) -> int:
+        return sum(
+            _count_crossings(current[r], _positions(current[r + 1]), down_adj)
+            for r in range(rank_count - 1)
+        )
+
+    def _reorder(layer: List[int], fixed_positions: Dict[int, int], adjacency: Dict[int, List[int]]) -> List[int]:
+        keys = []
+        for index, node_id in enumerate(layer):
+            key = _order_key(adjacency.get(node_id, []), fixed_positions)
+            # 没有相邻层邻居的节点保持原位置
+            keys.append((index if key is None else key, index, node_id))
+        keys.sort()
+        return [node_id for _, _, node_id in keys]
+
+    best_layers = [list(layer) for layer in layers]
+    best_crossings = _total_crossings(layers)
+    for sweep in range(sweeps):
+        if best_crossings == 0:
+            break
+        if sweep % 2 == 0:
+            for r in range(1, rank_count):
+                layers[r] = _reorder(layers[r], _positions(layers[r - 1]), up_adj)
+        else:
+            for r in range(rank_count - 2, -1, -1):
+                layers[r] = _reorder(layers[r], _positions(layers[r + 1]), down_adj)
+        crossings = _total_crossings(layers)
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best_layers = [list(layer) for layer in layers]
+    layers = best_layers
+
+    # 3. 坐标分配：从紧凑排列出发，上下交替地向邻居对齐
+    x: Dict[int, float] = {}
+    for layer in layers:
+        cursor = 0.0
+        for index, node_id in enumerate(layer):
+            if index:
+                cursor += (width[layer[index - 1]] + width[node_id]) / 2.0
+            x[node_id] = cursor
+        shift = cursor / 2.0
+        for node_id in layer:
+            x[node_id] -= shift
+
+    def _align(layer: List[int], adjacency: Dict[int, List[int]]) -> None:
+        if not layer:
+            return
+        desired = []
+        for node_id in layer:
+            neighbours = adjacency.get(node_id)
+            if neighbours:
+                values = sorted(x[n] for n in neighbours)
+                middle = len(values) // 2
+                desired.append(values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0)
+            else:
+                desired.append(x[node_id])
+        gaps = [(width[layer[i]] + width[layer[i + 1]]) / 2.0 for i in range(len(layer) - 1)]
+        for node_id, position in zip(layer, _place_in_order(desired, gaps)):
+            x[node_id] = position
+
+    for _ in range(coord_iterations):
+        for r in range(1, rank_count):
+            _align(layers[r], up_adj)
+        for r in range(rank_count - 2, -1, -1):
+            _align(layers[r], down_adj)
+
+    # 整体水平居中
+    real_x = [x[node["id"]] for node in nodes]
+    center = (min(real_x) + max(real_x)) / 2.0
+    for node in nodes:
+        node_id = node["id"]
+        node["x"] = round(x[node_id] - center, 1)
+        node["y"] = rank[node_id] * level_separation
+
+    return best_crossings
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股权结构层级计算
+先将强连通分量（交叉持股/循环持股）收缩为一个节点，再在收缩后的有向无环图上
+以核心公司为基准（第 0 层）按拓扑序分配层级，同时显式返回检测到的循环。
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.utils.equity_graph import EquityGraph
+
+# 核心公司所在层级
+CORE_LEVEL = 0
+# 未与核心公司相连的顶级实体（股东）层级
+TOP_LEVEL = -1
+# 既不连接核心公司、也不包含顶级实体的孤立结构的起始层级
+UNANCHORED_LEVEL = -10
+
+
+def _collect_nodes_and_edges(equity_data: Dict[str, Any], graph: EquityGraph
+                             ) -> Tuple[List[str], Dict[str, List[str]], Set[str]]:
+    """收集全部节点（按首次出现顺序）、去重后的邻接表以及自持股节点"""
+    nodes: Dict[str, None] = {}
+    adjacency: Dict[str, List[str]] = {}
+    self_loops: Set[str] = set()
+    seen_pairs: Set[Tuple[str, str]] = set()
+
+    core_company = equity_data.get("core_company", "")
+    if core_company:
+        nodes[core_company] = None
+
+    for parent, child in list(graph.equity_pairs()) + list(graph.control_pairs()):
+        nodes.setdefault(parent, None)
+        nodes.setdefault(child, None)
+        if parent == child:
+            self_loops.add(parent)
+            continue
+        if (parent, child) not in seen_pairs:
+            seen_pairs.add((parent, child))
+            adjacency.setdefault(parent, []).append(child)
+
+    for name in graph.top_level_names:
+        if name:
+            nodes.setdefault(name, None)
+    for entity in equity_data.get("all_entities", []) or []:
+        name = entity.get("name", "")
+        if name:
+            nodes.setdefault(name, None)
+
+    return list(nodes), adjacency, self_loops
+
+
+def _strongly_connected_components(nodes: List[str], adjacency: Dict[str, List[str]]) -> List[List[str]]:
+    """迭代版 Tarjan 算法，按逆拓扑序（汇点在前）返回强连通分量"""
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+    counter = 0
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adjacency.get(root, ())))]
+
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(adjacency.get(child, ()))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+
+def _assign_core_relative_levels(core_cid: int, dag_children: List[Set[int]],
+                                 dag_parents: List[Set[int]], level: List[Optional[int]]) -> None:
+    """核心公司为 0；下游分量为到核心公司的最长向下路径，上游分量为最长向上路径的相反数"""
+    level[core_cid] = CORE_LEVEL
+    # 分量编号即拓扑序：下游分量编号大于核心公司，上游分量编号小于核心公司
+    descendants = {core_cid}
+    for cid in range(core_cid + 1, len(level)):
+        known = [level[p] for p in dag_parents[cid] if p in descendants]
+        if known:
+            descendants.add(cid)
+            level[cid] = max(known) + 1
+    ancestors = {core_cid}
+    for cid in range(core_cid - 1, -1, -1):
+        known = [level[c] for c in dag_children[cid] if c in ancestors]
+        if known:
+            ancestors.add(cid)
+            level[cid] = min(known) - 1
+
+
+def _weak_blocks(component_count: int, dag_children: List[Set[int]]) -> List[List[int]]:
+    """收缩图的弱连通块（块内分量按拓扑序排列）"""
+    union = list(range(component_count))
+
+    def _find(x: int) -> int:
+        while union[x] != x:
+            union[x] = union[union[x]]
+            x = union[x]
+        return x
+
+    for cid in range(component_count):
+        for child in dag_children[cid]:
+            root_a, root_b = _find(cid), _find(child)
+            if root_a != root_b:
+                union[root_b] = root_a
+
+    blocks: Dict[int, List[int]] = {}
+    for cid in range(component_count):
+        blocks.setdefault(_find(cid), []).append(cid)
+    return list(blocks.values())
+
+
+def _place_from_neighbours(members: List[int], dag_children: List[Set[int]],
+                           dag_parents: List[Set[int]], level: List[Optional[int]]) -> None:
+    """
+    与核心公司相连、但既不是其上游也不是其下游的分量：
+    先按逆拓扑序放置能到达已定层级分量的（如子公司的其他股东，取子分量最小层级 - 1；
+    已有定层级的上级且其下一层仍高于子分量时，紧贴上级），
+    再按拓扑序放置位于其下游的（取父分量最大层级 + 1）；交替进行直到块内全部放置
+    """
+    pending = [cid for cid in members if level[cid] is None]
+    while pending:
+        for cid in reversed(pending):
+            known = [level[c] for c in dag_children[cid] if level[c] is not None]
+            if known:
+                level[cid] = min(known) - 1
+                parent_levels = [level[p] for p in dag_parents[cid] if level[p] is not None]
+                if parent_levels and max(parent_levels) + 1 < level[cid]:
+                    level[cid] = max(parent_levels) + 1
+        for cid in pending:
+            if level[cid] is None:
+                known = [level[p] for p in dag_parents[cid] if level[p] is not None]
+                if known:
+                    level[cid] = max(known) + 1
+        pending = [cid for cid in pending if level[cid] is None]
+
+
+def _place_unanchored_block(members: List[int], top_cids: Set[int], dag_children: List[Set[int]],
+                            dag_parents: List[Set[int]], level: List[Optional[int]]) -> None:
+    """与核心公司不相连的块：最长路径分层并向子分量压缩，再以顶级实体（-1）或 -10 为基准平移"""
+    for cid in members:
+        level[cid] = max((level[p] + 1 for p in dag_parents[cid]), default=0)
+    for cid in reversed(members):
+        if dag_children[cid]:
+            level[cid] = max(level[cid], min(level[c] for c in dag_children[cid]) - 1)
+    anchored_tops = [level[cid] for cid in members if cid in top_cids]
+    if anchored_tops:
+        shift = TOP_LEVEL - min(anchored_tops)
+    else:
+        shift = UNANCHORED_LEVEL - min(level[cid] for cid in members)
+    for cid in members:
+        level[cid] += shift
+
+
+def assign_entity_levels(equity_data: Dict[str, Any],
+                         graph: Optional[EquityGraph] = None) -> Tuple[Dict[str, int], List[List[str]]]:
+    """
+    计算每个实体的层级（父实体位于子实体上一层），复杂度通常为 O(V+E)
+
+    规则：
+    - 核心公司固定为第 0 层，上游股东按到核心公司的最长路径为负层级，下游子公司按最长路径为正层级；
+    - 与核心公司相连的其他实体（如子公司的其他股东）从相邻的已定层级实体推出；
+    - 没有上游的实体尽量贴近其子实体（子实体最小层级 - 1）；
+    - 与核心公司不相连的结构：含顶级实体时以顶级实体为第 -1 层，否则以 -10 层为起点；
+    - 交叉持股/循环持股的实体收缩为同一层。
+
+    Args:
+        equity_data: 完整的股权数据
+        graph: 预先构建的索引（可选）
+
+    Returns:
+        Tuple[Dict[str, int], List[List[str]]]: (实体名称 -> 层级, 检测到的循环列表)
+    """
+    graph = graph or EquityGraph(equity_data)
+    core_company = equity_data.get("core_company", "")
+    nodes, adjacency, self_loops = _collect_nodes_and_edges(equity_data, graph)
+
+    # 1. 强连通分量收缩；Tarjan 输出为逆拓扑序，反转后即为拓扑序
+    components = _strongly_connected_components(nodes, adjacency)
+    components.reverse()
+    component_of: Dict[str, int] = {}
+    for cid, members in enumerate(components):
+        for member in members:
+            component_of[member] = cid
+
+    component_count = len(components)
+    dag_children: List[Set[int]] = [set() for _ in range(component_count)]
+    dag_parents: List[Set[int]] = [set() for _ in range(component_count)]
+    for parent, children in adjacency.items():
+        parent_cid = component_of[parent]
+        for child in children:
+            child_cid = component_of[child]
+            if parent_cid != child_cid:
+                dag_children[parent_cid].add(child_cid)
+                dag_parents[child_cid].add(parent_cid)
+
+    core_cid = component_of.get(core_company) if core_company else None
+    top_cids = {component_of[name] for name in graph.top_level_names if name in component_of}
+    level: List[Optional[int]] = [None] * component_count
+
+    # 2. 以核心公司为基准：下游按到核心公司的最长路径为正层级，上游按最长路径为负层级
+    if core_cid is not None:
+        _assign_core_relative_levels(core_cid, dag_children, dag_parents, level)
+
+    # 3. 其余分量按弱连通块放置：与核心公司相连的块从已定层级的分量推出，
+    #    不相连的块以顶级实体（-1）或 -10 为基准
+    for members in _weak_blocks(component_count, dag_children):
+        placed = [cid for cid in members if level[cid] is not None]
+        if placed and len(placed) == len(members):
+            continue
+        if placed:
+            _place_from_neighbours(members, dag_children, dag_parents, level)
+        else:
+            _place_unanchored_block(members, top_cids, dag_children, dag_parents, level)
+
+    # 4. 按拓扑序保证子分量位于所有父分量的下一层或更下层
+    for cid in range(component_count):
+        if dag_parents[cid]:
+            level[cid] = max(level[cid], max(level[p] for p in dag_parents[cid]) + 1)
+
+    # 5. 没有上游的分量尽量贴近其子分量（子分量最小层级 - 1）
+    for cid in range(component_count):
+        if cid != core_cid and not dag_parents[cid] and dag_children[cid]:
+            level[cid] = max(level[cid], min(level[c] for c in dag_children[cid]) - 1)
+
+    entity_levels = {name: level[component_of[name]] for name in nodes}
+
+    cycles = [sorted(members) for members in components if len(members) > 1]
+    cycles.extend([name] for name in sorted(self_loops) if len(components[component_of[name]]) == 1)
+    return entity_levels, cycles
+
+
+def find_ownership_cycles(equity_data: Dict[str, Any],
+                          graph: Optional[EquityGraph] = None) -> List[List[str]]:
+    """返回股权/控制关系中的循环（交叉持股）实体组，供界面提示"""
+    graph = graph or EquityGraph(equity_data)
+    nodes, adjacency, self_loops = _collect_nodes_and_edges(equity_data, graph)
+    components = _strongly_connected_components(nodes, adjacency)
+    cycles = [sorted(members) for members in components if len(members) > 1]
+    in_cycle = {name for members in cycles for name in members}
+    cycles.extend([name] for name in sorted(self_loops) if name not in in_cycle)
+    return cycles
@@ -14,7 +14,9 @@ import json
 import re
 import logging
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from src.utils.llm_streaming import STREAMING_ENABLED, stream_generation
 
 # 设置日志配置
 logging.basicConfig(
@@ -100,6 +102,12 @@ def create_equity_analysis_prompt(equity_data: Dict[str, Any]) -> str:
         if rel.get('relationship_type') not in ['持股', '控股']:
             related_relationships.append(f"{rel.get('from', '未知')} → {rel.get('to', '未知')}: {rel.get('description', '')}")
     
+    # 各部分先拼接好（f-string 表达式中不能包含反斜杠，Python 3.12 之前会报语法错误）
+    shareholders_text = "\n".join(shareholders_info) if shareholders_info else "无明确股东信息"
+    subsidiaries_text = "\n".join(subsidiaries_info) if subsidiaries_info else "无子公司信息"
+    control_text = "\n".join(control_info) if control_info else "无明确控制关系"
+    related_text = "\n".join(related_relationships) if related_relationships else "无明确关联关系"
+    
     # 创建完整的提示词
     prompt = f"""
 我需要你作为一名专业的股权结构分析专家，对以下公司的股权结构进行详细分析。
@@ -107,16 +115,16 @@ def create_equity_analysis_prompt(equity_data: Dict[str, Any]) -> str:
 核心公司：{core_company}
 
 股东信息：
-{"\n".join(shareholders_info) if shareholders_info else "无明确股东信息"}
+{shareholders_text}
 
 子公司信息：
-{"\n".join(subsidiaries_info) if subsidiaries_info else "无子公司信息"}
+{subsidiaries_text}
 
 控制关系：
-{"\n".join(control_info) if control_info else "无明确控制关系"}
+{control_text}
 
 关联关系：
-{"\n".join(related_relationships) if related_relationships else "无明确关联关系"}
+{related_text}
 
 请按照以下维度进行详细分析，格式必须严格遵循示例：
 
@@ -144,13 +152,35 @@ def create_equity_analysis_prompt(equity_data: Dict[str, Any]) -> str:
     
     return prompt
 
-def analyze_equity_with_llm(equity_data: Dict[str, Any], api_key: Optional[str] = None) -> Tuple[str, List[str]]:
+def _stream_report(
+    model: str,
+    messages: List[Dict[str, Any]],
+    on_delta: Callable[[str], None]
+) -> str:
+    """
+    流式调用模型生成报告
+    
+    Returns:
+        str: 生成的报告文本
+    """
+    report = ""
+    for delta in stream_generation(model, messages, temperature=0.01, seed=12345):
+        report += delta
+        on_delta(report)
+    return report
+
+def analyze_equity_with_llm(
+    equity_data: Dict[str, Any],
+    api_key: Optional[str] = None,
+    on_delta: Optional[Callable[[str], None]] = None
+) -> Tuple[str, List[str]]:
     """
     使用大语言模型分析股权结构数据
     
     Args:
         equity_data: 股权关系数据
         api_key: DashScope API密钥
+        on_delta: 传入时使用流式输出，每收到新内容就以当前已生成的报告全文回调
     
     Returns:
         Tuple[分析报告文本, 错误日志列表]
@@ -219,16 +249,26 @@ def analyze_equity_with_llm(equity_data: Dict[str, Any], api_key: Optional[str]
                     })
             
             try:
-                # 使用Generation.call - 纯文本接口
-                response = Generation.call(
-                    model=model_to_use,
-                    messages=basic_messages,
-                    temperature=0.01,  # 低温度以确保确定性输出
-                    seed=12345
-                )
+                streamed = None
+                if on_delta is not None and STREAMING_ENABLED:
+                    # 流式输出：报告边生成边显示
+                    streamed = _stream_report(model_to_use, basic_messages, on_delta)
+                else:
+                    # 使用Generation.call - 纯文本接口
+                    response = Generation.call(
+                        model=model_to_use,
+                        messages=basic_messages,
+                        temperature=0.01,  # 低温度以确保确定性输出
+                        seed=12345
+                    )
                 
+                if streamed is not None:
+                    analysis_report = streamed
+                    if not analysis_report.strip():
+                        error_logs.append("解析模型输出失败: 模型返回为空或格式异常")
+                        use_real_api = False
                 # 检查响应状态
-                if response.status_code != 200:
+                elif response.status_code != 200:
                     error_logs.append(f"API调用失败: {response.code} - {response.message}")
                     logger.error(f"模型调用失败: {response.code} - {response.message}")
                     # 回退到模拟分析
@@ -412,12 +452,15 @@ def generate_mock_analysis_report(equity_data: Dict[str, Any], error_logs: List[
         summary = f"{core_company}股权结构信息不足，无法提供有效分析。"
     
     # 构建完整报告
+    shareholders_text = '\n'.join(major_shareholders) if major_shareholders else '未获取到股东信息'
+    subsidiaries_text = '\n'.join(subsidiary_info) if subsidiary_info else '未获取到子公司信息'
+    related_text = '\n'.join(related_info) if related_info else '未发现明确的关联关系'
     report_sections = [
         f"一、核心公司\n{core_company}。\n",
         f"二、实际控制人\n实际控制人为{actual_controller}。\n理由：{controller_reason}\n",
-        f"三、主要股东及其持股比例（合并小于1%的股东）\n{'\n'.join(major_shareholders) if major_shareholders else '未获取到股东信息'}\n",
-        f"四、子公司关系\n{'\n'.join(subsidiary_info) if subsidiary_info else '未获取到子公司信息'}\n",
-        f"五、关联关系说明\n{'\n'.join(related_info) if related_info else '未发现明确的关联关系'}\n",
+        f"三、主要股东及其持股比例（合并小于1%的股东）\n{shareholders_text}\n",
+        f"四、子公司关系\n{subsidiaries_text}\n",
+        f"五、关联关系说明\n{related_text}\n",
         f"总结：\n{summary}"
     ]
     
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视觉模型调用前的图片预处理（Pillow）
+手机照片和高分辨率截图原样上传时请求体很大，而模型会在服务端再缩放，多传的像素只增加上传和排队耗时。
+处理步骤：
+- 按 EXIF 方向旋转（手机照片）；
+- 长边超过 MAX_LONG_EDGE 时等比缩小；
+- 无损可行时转换颜色模式：近似灰度的图转为灰度，颜色数不超过 256 的图（图表、截图）转为调色板；
+- 按内容重新编码（调色板图和原为 PNG 的用 PNG，照片用 JPEG），并给出正确的 MIME 类型；
+- 处理后反而更大且无需旋转/缩放时保留原图。
+"""
+
+import base64
+import io
+import os
+import time
+from typing import List, Optional
+
+from PIL import Image, ImageChops, ImageOps
+
+# 长边上限（像素）：股权结构图的小字在 2048 以内仍清晰，超过部分模型也会缩放
+MAX_LONG_EDGE = int(os.environ.get("IMAGE_MAX_LONG_EDGE", "2048") or 2048)
+JPEG_QUALITY = 90
+RESIZE_REDUCING_GAP = 1.5
+# 各通道差值不超过该值时视为灰度图
+GRAYSCALE_TOLERANCE = 8
+PALETTE_MAX_COLORS = 256
+_EXIF_ORIENTATION = 0x0112
+
+_MIME_BY_FORMAT = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "BMP": "image/bmp",
+    "GIF": "image/gif",
+}
+
+
+class PreparedImage:
+    """预处理结果及统计"""
+
+    def __init__(self, data: bytes, mime: str, width: int, height: int,
+                 original_bytes: int, original_size: tuple, steps: List[str], elapsed: float):
+        self.data = data
+        self.mime = mime
+        self.width = width
+        self.height = height
+        self.original_bytes = original_bytes
+        self.original_size = original_size
+        self.steps = steps
+        self.elapsed = elapsed
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    def data_url(self) -> str:
+        return f"data:{self.mime};base64,{base64.b64encode(self.data).decode('utf-8')}"
+
+    def summary(self) -> str:
+        ratio = (len(self.data) / self.original_bytes * 100) if self.original_bytes else 100.0
+        steps = "、".join(self.steps) if self.steps else "保留原图"
+        return (f"{self.original_size[0]}×{self.original_size[1]} {self.original_bytes / 1024:.0f}KB → "
+                f"{self.width}×{self.height} {len(self.data) / 1024:.0f}KB ({ratio:.0f}%)，"
+                f"{steps}，耗时 {self.elapsed * 1000:.0f}ms")
+
+
+def preprocess_signature() -> str:
+    """影响模型输入的预处理参数（参与识别缓存的提示词版本）"""
+    return f"max_long_edge={MAX_LONG_EDGE};jpeg_quality={JPEG_QUALITY}"
+
+
+def _flatten_alpha(img: Image.Image) -> Image.Image:
+    """透明背景铺白（模型不需要透明通道，JPEG 也不支持）"""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    if img.mode not in ("RGB", "L"):
+        return img.convert("RGB")
+    return img
+
+
+def _is_grayscale(img: Image.Image) -> bool:
+    if img.mode == "L":
+        return True
+    # 在（已缩放的）整图上比较通道差值：细的彩色连线（如虚线控制关系）也要保留颜色
+    r, g, b = img.split()
+    spread = max(
+        ImageChops.difference(r, g).getextrema()[1],
+        ImageChops.difference(g, b).getextrema()[1],
+    )
+    return spread <= GRAYSCALE_TOLERANCE
+
+
+def _encode(img: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "JPEG":
+        img.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    else:
+        img.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def preprocess_image(image_bytes: bytes, max_long_edge: Optional[int] = None) -> PreparedImage:
+    """
+    预处理上传的图片
+
+    无法识别的图片原样返回（MIME 按 image/png 处理，与旧行为一致）
+    """
+    start = time.perf_counter()
+    max_long_edge = max_long_edge or MAX_LONG_EDGE
+    original_bytes = len(image_bytes)
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        original_size = img.size
+        if img.format == "JPEG" and max(img.size) > max_long_edge:
+            # JPEG 直接按 1/2、1/4… 比例解码，结果不小于目标尺寸
+            scale = max_long_edge / max(img.size)
+            img.draft("RGB", (int(img.size[0] * scale), int(img.size[1] * scale)))
+        img.load()
+    except Exception:
+        return PreparedImage(image_bytes, "image/png", 0, 0, original_bytes, (0, 0), [],
+                             time.perf_counter() - start)
+
+    source_format = (img.format or "PNG").upper()
+    steps: List[str] = []
+
+    if img.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+        img = ImageOps.exif_transpose(img)
+        steps.append("EXIF旋转")
+    geometry_changed = bool(steps)
+
+    img = _flatten_alpha(img)
+    if img.mode == "RGB" and _is_grayscale(img):
+        img = img.convert("L")
+        steps.append("灰度")
+    # 颜色数在缩放前统计：缩放的抗锯齿会产生大量过渡色
+    colors = img.getcolors(PALETTE_MAX_COLORS) if img.mode == "RGB" else None
+
+    if max(img.size) > max_long_edge:
+        scale = max_long_edge / max(img.size)
+        target = (max(1, round(img.size[0] * scale)), max(1, round(img.size[1] * scale)))
+        # reducing_gap：先按整数倍快速缩小，再做 LANCZOS 重采样（大图约快一倍，文字边缘无明显差别）
+        img = img.resize(target, Image.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
+        steps.append("缩放")
+        geometry_changed = True
+
+    if colors is not None:
+        if geometry_changed:
+            # 图表类：缩放后在原有颜色之外为边缘过渡色留少量调色板位置
+            budget = min(PALETTE_MAX_COLORS, max(16, 2 * len(colors)))
+            img = img.convert("P", palette=Image.Palette.ADAPTIVE, colors=budget)
+        else:
+            # 颜色数不超过 256 时调色板转换是无损的
+            img = img.convert("P", palette=Image.Palette.ADAPTIVE, colors=len(colors))
+        steps.append("调色板")
+
+    # 调色板或原本为 PNG 的图用 PNG（文字边缘无损），照片类用 JPEG
+    fmt = "PNG" if img.mode == "P" or source_format == "PNG" else "JPEG"
+    data = _encode(img, fmt)
+
+    if len(data) >= original_bytes and not geometry_changed and source_format in _MIME_BY_FORMAT:
+        # 重新编码没有收益时保留原图
+        return PreparedImage(image_bytes, _MIME_BY_FORMAT[source_format], original_size[0], original_size[1],
+                             original_bytes, original_size, [], time.perf_counter() - start)
+
+    steps.append(f"{fmt}编码")
+    return PreparedImage(data, _MIME_BY_FORMAT[fmt], img.size[0], img.size[1],
+                         original_bytes, original_size, steps, time.perf_counter() - start)
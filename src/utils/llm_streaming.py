@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大模型流式输出
+- stream_generation：以 DashScope 增量输出（stream + incremental_output）调用文本模型，逐段返回新增文本，
+  调用方中断迭代（如 Streamlit 停止按钮触发的重跑）时关闭连接；
+- IncrementalJsonParser：边接收边解析模型输出的 JSON，顶层数组中的元素（实体、关系）一完整就返回，
+  顶层的字符串字段（核心公司、实际控制人）一闭合就返回，供界面逐步渲染部分结果。
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 是否启用流式输出（设置 LLM_STREAMING=0 关闭，回退为一次性返回）
+STREAMING_ENABLED = os.environ.get("LLM_STREAMING", "1") not in ("0", "false", "False")
+
+
+def response_text(response: Any) -> str:
+    """从 DashScope Generation 响应中取出文本（content 可能是字符串或 [{"text": ...}] 列表）"""
+    output = getattr(response, "output", None)
+    if output is None:
+        return ""
+    choices = getattr(output, "choices", None)
+    if choices:
+        message = getattr(choices[0], "message", None)
+        contents = getattr(message, "content", None) if message is not None else None
+        if isinstance(contents, str):
+            return contents
+        if isinstance(contents, list):
+            return "".join(item.get("text", "") for item in contents if isinstance(item, dict))
+        return str(contents) if contents is not None else ""
+    return getattr(output, "text", None) or ""
+
+
+def stream_generation(model: str, messages: List[Dict[str, Any]], **params: Any) -> Iterator[str]:
+    """
+    流式调用 Generation，逐段返回新增文本
+
+    Raises:
+        RuntimeError: 接口返回错误状态
+    """
+    from dashscope import Generation
+
+    responses = Generation.call(
+        model=model,
+        messages=messages,
+        result_format="message",
+        stream=True,
+        incremental_output=True,
+        **params,
+    )
+    try:
+        for response in responses:
+            if getattr(response, "status_code", 200) != 200:
+                raise RuntimeError(f"{response.code} - {response.message}")
+            delta = response_text(response)
+            if delta:
+                yield delta
+    finally:
+        # 调用方中断迭代或出错时关闭底层生成器，释放 HTTP 连接
+        close = getattr(responses, "close", None)
+        if close is not None:
+            close()
+
+
+class IncrementalJsonParser:
+    """
+    增量解析 JSON 对象
+
+    只关心顶层对象：数组字段中的对象/字符串元素闭合时解析并返回，字符串和数字字段闭合时返回。
+    输出前的说明文字和 ```json 代码块标记会被跳过。完整文本仍应在结束后用 extract_json_from_text 解析。
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.data: Dict[str, Any] = {}
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._expect_value = False
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        追加一段文本
+
+        Returns:
+            [(字段名, 新解析出的数组元素或字段值)]
+        """
+        self.text += chunk
+        events: List[Tuple[str, Any]] = []
+        text = self.text
+        while self._pos < len(text):
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._on_string_end(i, events)
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    self._expect_value = False
+                    if ch == "{":
+                        self._value_start = i
+                    elif self._key:
+                        self.data[self._key] = []
+                elif self._depth == 3 and ch == "{" and self._in_array():
+                    self._item_start = i
+            elif ch in "}]":
+                if self._depth == 1:
+                    self._flush_number(i, events)
+                if self._depth == 3 and ch == "}" and self._item_start is not None:
+                    self._emit_item(text[self._item_start:i + 1], events)
+                    self._item_start = None
+                elif self._depth == 2 and ch == "}" and self._value_start is not None and self._key:
+                    self._emit_value(text[self._value_start:i + 1], events)
+                    self._value_start = None
+                self._depth -= 1
+                if self._depth == 0:
+                    # 顶层对象结束，后面的文字忽略
+                    self._pos = len(text)
+                    break
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect_value = True
+                    self._value_start = None
+                elif ch == ",":
+                    self._flush_number(i, events)
+                    self._expect_value = False
+                elif self._expect_value and not ch.isspace() and self._value_start is None:
+                    # 数字、true/false/null
+                    self._value_start = i
+        return events
+
+    def _in_array(self) -> bool:
+        return self._key is not None and isinstance(self.data.get(self._key), list)
+
+    def _on_string_end(self, end: int, events: List[Tuple[str, Any]]) -> None:
+        raw = self.text[self._string_start:end + 1]
+        if self._depth == 1:
+            if self._expect_value:
+                self._emit_value(raw, events)
+                self._expect_value = False
+            else:
+                try:
+                    self._key = json.loads(raw)
+                except ValueError:
+                    self._key = None
+        elif self._depth == 2 and self._in_array() and self._item_start is None:
+            self._emit_item(raw, events)
+
+    def _flush_number(self, end: int, events: List[Tuple[str, Any]]) -> None:
+        if self._expect_value and self._value_start is not None and self._key:
+            self._emit_value(self.text[self._value_start:end].strip(), events)
+        self._value_start = None
+
+    def _emit_value(self, raw: str, events: List[Tuple[str, Any]]) -> None:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        if self._key:
+            self.data[self._key] = value
+            events.append((self._key, value))
+
+    def _emit_item(self, raw: str, events: List[Tuple[str, Any]]) -> None:
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return
+        self.data[self._key].append(item)
+        events.append((self._key, item))
@@ -3,6 +3,8 @@ import sys
 import json
 from typing import Dict
 
+from src.utils.equity_graph import EquityGraph
+
 # 延迟导入streamlit，只在需要缓存时导入
 try:
     import streamlit as st
@@ -343,7 +345,9 @@ def generate_mermaid_from_data(data):
     top_entities = data.get("top_entities", [])
     entity_relationships = data.get("entity_relationships", [])
     control_relationships = data.get("control_relationships", [])
-    all_entities = data.get("all_entities", [])
+    
+    # 一次性建立名称/关系索引，避免逐节点线性扫描
+    graph = EquityGraph(data)
     
     # 调试信息
     _safe_print(f"Mermaid函数接收到的controller: '{controller}'")
@@ -353,73 +357,32 @@ def generate_mermaid_from_data(data):
     entity_map = {}
     entity_id_counter = 1
     
-        # 初始化Mermaid代码
-    mermaid_code = "flowchart TD\n"
+    # 初始化Mermaid代码（逐行收集，最后一次性拼接）
+    lines = ["flowchart TD\n"]
+    emit = lines.append
     
     # 添加样式类定义 - 与测试数据加载保持一致的颜色方案
-    mermaid_code += "    classDef coreCompany fill:#fff8e1,stroke:#ff9100,stroke-width:2px,color:#000000,font-weight:600,font-size:12px;\n"
-    mermaid_code += "    classDef subsidiary fill:#e3f2fd,stroke:#1976d2,stroke-width:1px,color:#000000,font-size:12px;\n"
-    mermaid_code += "    classDef topEntity fill:#ffffff,stroke:#1976d2,stroke-width:1px,color:#000000,font-size:12px;\n"
-    mermaid_code += "    classDef company fill:#ffffff,stroke:#1976d2,stroke-width:1px,color:#000000,font-size:12px;\n"
-    mermaid_code += "    classDef person fill:#e8f5e9,stroke:#4caf50,stroke-width:1px,color:#000000,font-size:12px;\n"
-    mermaid_code += "    classDef controller fill:#0d47a1,stroke:#0d47a1,stroke-width:2px,color:#ffffff,font-weight:600,font-size:12px;\n"
+    emit("    classDef coreCompany fill:#fff8e1,stroke:#ff9100,stroke-width:2px,color:#000000,font-weight:600,font-size:12px;\n")
+    emit("    classDef subsidiary fill:#e3f2fd,stroke:#1976d2,stroke-width:1px,color:#000000,font-size:12px;\n")
+    emit("    classDef topEntity fill:#ffffff,stroke:#1976d2,stroke-width:1px,color:#000000,font-size:12px;\n")
+    emit("    classDef company fill:#ffffff,stroke:#1976d2,stroke-width:1px,color:#000000,font-size:12px;\n")
+    emit("    classDef person fill:#e8f5e9,stroke:#4caf50,stroke-width:1px,color:#000000,font-size:12px;\n")
+    emit("    classDef controller fill:#0d47a1,stroke:#0d47a1,stroke-width:2px,color:#ffffff,font-weight:600,font-size:12px;\n")
+    
+    # 预先计算顶级实体/子公司名称集合，避免逐节点重建名称列表
+    top_entity_names = {e.get("name", "") for e in top_entities}
+    subsidiary_names = {s.get("name", "") for s in subsidiaries}
     
     # 跟踪已添加的实体和关系
     added_entities = set()
     added_relationships = set()
     
-    # 创建一个辅助函数来添加实体
-    def add_entity(entity_name, entity_type="company"):
-        nonlocal entity_id_counter
-        
-        # 如果实体已添加，直接返回
-        if entity_name in added_entities:
-            return
-            
-        # 如果实体不在映射表中，添加它
-        if entity_name not in entity_map:
-            entity_map[entity_name] = f"E{entity_id_counter}"
-            entity_id_counter += 1
-        
-        # 转义特殊字符以避免Mermaid语法错误
-        # 从all_entities中查找对应的entity对象
-        entity_obj = None
-        for e in all_entities:
-            if e.get("name") == entity_name:
-                entity_obj = e
-                break
+    # 节点声明行：标签格式化 + 转义（实体对象通过索引O(1)获取）
+    def node_line(entity_name):
+        entity_obj = graph.entity(entity_name)
         formatted = _format_top_entity_label(entity_name, entity_obj)
         escaped_name = _escape_label_with_linebreaks(formatted)
-        
-        # 添加实体节点
-        mermaid_code_addition = f"    {entity_map[entity_name]}[\"{escaped_name}\"]\n"
-        
-        # 检查all_entities中是否有该实体的类型信息
-        entity_type_from_all = None
-        for e in all_entities:
-            if e.get("name") == entity_name:
-                entity_type_from_all = e.get("type")
-                break
-        
-        # 添加样式类 - 调整优先级，实控人优先，然后是person类型
-        if entity_name == main_company or entity_name == core_company:
-            mermaid_code_addition += f"    class {entity_map[entity_name]} coreCompany;\n"
-        elif entity_name == controller:
-            # 实控人使用特殊的controller样式
-            mermaid_code_addition += f"    class {entity_map[entity_name]} controller;\n"
-        elif entity_name in [s.get("name", "") for s in subsidiaries]:
-            mermaid_code_addition += f"    class {entity_map[entity_name]} subsidiary;\n"
-        elif entity_type == "person" or entity_type_from_all == "person":
-            mermaid_code_addition += f"    class {entity_map[entity_name]} person;\n"
-        elif entity_name in [e.get("name", "") for e in top_entities]:
-            mermaid_code_addition += f"    class {entity_map[entity_name]} topEntity;\n"
-        else:
-            mermaid_code_addition += f"    class {entity_map[entity_name]} company;\n"
-        
-        # 标记实体为已添加
-        added_entities.add(entity_name)
-        
-        return mermaid_code_addition
+        return f"    {entity_map[entity_name]}[\"{escaped_name}\"]\n"
     
     # 处理主要数据
     try:
@@ -427,17 +390,8 @@ def generate_mermaid_from_data(data):
         if main_company:
             entity_map[main_company] = f"E{entity_id_counter}"
             entity_id_counter += 1
-            # 添加实体节点
-            # 从all_entities中查找对应的entity对象
-            entity_obj = None
-            for e in all_entities:
-                if e.get("name") == main_company:
-                    entity_obj = e
-                    break
-            formatted = _format_top_entity_label(main_company, entity_obj)
-            escaped_name = _escape_label_with_linebreaks(formatted)
-            mermaid_code += f"    {entity_map[main_company]}[\"{escaped_name}\"]\n"
-            mermaid_code += f"    class {entity_map[main_company]} coreCompany;\n"
+            emit(node_line(main_company))
+            emit(f"    class {entity_map[main_company]} coreCompany;\n")
             _safe_print(f"添加核心公司: {main_company} -> {entity_map[main_company]}")
             
             # 标记为已添加
@@ -448,17 +402,8 @@ def generate_mermaid_from_data(data):
         if core_company and core_company != main_company and core_company not in entity_map:
             entity_map[core_company] = f"E{entity_id_counter}"
             entity_id_counter += 1
-            # 添加实体节点
-            # 从all_entities中查找对应的entity对象
-            entity_obj = None
-            for e in all_entities:
-                if e.get("name") == core_company:
-                    entity_obj = e
-                    break
-            formatted = _format_top_entity_label(core_company, entity_obj)
-            escaped_name = _escape_label_with_linebreaks(formatted)
-            mermaid_code += f"    {entity_map[core_company]}[\"{escaped_name}\"]\n"
-            mermaid_code += f"    class {entity_map[core_company]} coreCompany;\n"
+            emit(node_line(core_company))
+            emit(f"    class {entity_map[core_company]} coreCompany;\n")
             _safe_print(f"提前添加core_company到图表: {core_company} -> {entity_map[core_company]} (coreCompany)")
         
             # 标记为已添加
@@ -476,18 +421,8 @@ def generate_mermaid_from_data(data):
                 entity_map[subsidiary_name] = f"E{entity_id_counter}"
                 entity_id_counter += 1
                 
-                # 添加实体节点（所有实体统一多行显示）
-                # 转义特殊字符以避免Mermaid语法错误
-                # 从all_entities中查找对应的entity对象
-                entity_obj = None
-                for e in all_entities:
-                    if e.get("name") == subsidiary_name:
-                        entity_obj = e
-                        break
-                formatted = _format_top_entity_label(subsidiary_name, entity_obj)
-                escaped_name = _escape_label_with_linebreaks(formatted)
-                mermaid_code += f"    {entity_map[subsidiary_name]}[\"{escaped_name}\"]\n"
-                mermaid_code += f"    class {entity_map[subsidiary_name]} subsidiary;\n"
+                emit(node_line(subsidiary_name))
+                emit(f"    class {entity_map[subsidiary_name]} subsidiary;\n")
                 _safe_print(f"添加子公司: {subsidiary_name} -> {entity_map[subsidiary_name]} (subsidiary)")
                 
                 # 标记为已添加
@@ -497,7 +432,7 @@ def generate_mermaid_from_data(data):
             if main_company and main_company in entity_map and percentage > 0:
                 relationship_key = f"{main_company}_{subsidiary_name}"
                 if relationship_key not in added_relationships:
-                    mermaid_code += f"    {entity_map[main_company]} -->|{percentage}%| {entity_map[subsidiary_name]}\n"
+                    emit(f"    {entity_map[main_company]} -->|{percentage}%| {entity_map[subsidiary_name]}\n")
                     added_relationships.add(relationship_key)
                     _safe_print(f"添加关系: {main_company} -> {subsidiary_name} ({percentage}%)")
         
@@ -514,35 +449,21 @@ def generate_mermaid_from_data(data):
                 entity_map[shareholder_name] = f"E{entity_id_counter}"
                 entity_id_counter += 1
                 
-                # 添加实体节点（顶层实体统一多行显示）
-                # 转义特殊字符以避免Mermaid语法错误
-                # 从all_entities中查找对应的entity对象
-                entity_obj = None
-                for e in all_entities:
-                    if e.get("name") == shareholder_name:
-                        entity_obj = e
-                        break
-                formatted = _format_top_entity_label(shareholder_name, entity_obj)
-                escaped_name = _escape_label_with_linebreaks(formatted)
-                mermaid_code += f"    {entity_map[shareholder_name]}[\"{escaped_name}\"]\n"
+                emit(node_line(shareholder_name))
                 
                 # 检查实体类型和是否为实控人
-                is_person = False
-                for e in all_entities:
-                    if e.get("name") == shareholder_name and e.get("type") == "person":
-                        is_person = True
-                        break
+                is_person = graph.is_person(shareholder_name)
                 
                 # 优先检查是否为实控人
                 _safe_print(f"检查实控人: shareholder_name='{shareholder_name}', controller='{controller}', 是否匹配: {shareholder_name == controller}")
                 if shareholder_name == controller:
-                    mermaid_code += f"    class {entity_map[shareholder_name]} controller;\n"
+                    emit(f"    class {entity_map[shareholder_name]} controller;\n")
                     _safe_print(f"添加实控人: {shareholder_name} -> {entity_map[shareholder_name]} (controller)")
                 elif is_person:
-                    mermaid_code += f"    class {entity_map[shareholder_name]} person;\n"
+                    emit(f"    class {entity_map[shareholder_name]} person;\n")
                     _safe_print(f"添加股东: {shareholder_name} -> {entity_map[shareholder_name]} (person)")
                 else:
-                    mermaid_code += f"    class {entity_map[shareholder_name]} topEntity;\n"
+                    emit(f"    class {entity_map[shareholder_name]} topEntity;\n")
                     _safe_print(f"添加股东: {shareholder_name} -> {entity_map[shareholder_name]} (topEntity)")
                 
                 # 标记为已添加
@@ -554,12 +475,7 @@ def generate_mermaid_from_data(data):
             is_merged_entity = False
             
             # 检查是否有显式关系
-            for equity_rel in entity_relationships:
-                from_entity = equity_rel.get("parent", equity_rel.get("from", ""))
-                to_entity = equity_rel.get("child", equity_rel.get("to", ""))
-                if from_entity == shareholder_name and to_entity == main_company:
-                    has_explicit_equity_relationship = True
-                    break
+            has_explicit_equity_relationship = graph.has_equity(shareholder_name, main_company)
             
             # 检查是否为合并实体（通过名称特征判断）
             merged_entity_keywords = ["其他股东", "其他投资者", "其他", "合并", "集团"]
@@ -571,18 +487,12 @@ def generate_mermaid_from_data(data):
             
             if main_company and main_company in entity_map and percentage > 0 and should_add_relationship:
                 # 检查是否会有控制关系，如果有则跳过股权关系
-                has_control_relationship = False
-                for control_rel in control_relationships:
-                    controller_name = control_rel.get("parent", control_rel.get("from", ""))
-                    controlled_entity = control_rel.get("child", control_rel.get("to", ""))
-                    if controller_name == shareholder_name and controlled_entity == main_company:
-                        has_control_relationship = True
-                        break
+                has_control_relationship = graph.has_control(shareholder_name, main_company)
                 
                 if not has_control_relationship:
                     relationship_key = f"{shareholder_name}_{main_company}"
                     if relationship_key not in added_relationships:
-                        mermaid_code += f"    {entity_map[shareholder_name]} -->|{percentage}%| {entity_map[main_company]}\n"
+                        emit(f"    {entity_map[shareholder_name]} -->|{percentage}%| {entity_map[main_company]}\n")
                         added_relationships.add(relationship_key)
                         if is_merged_entity:
                             _safe_print(f"添加合并实体关系: {shareholder_name} -> {main_company} ({percentage}%)")
@@ -605,17 +515,8 @@ def generate_mermaid_from_data(data):
                 entity_id_counter += 1
                 
                 # 添加控制人（视为顶层实体，多行格式化）
-                    # 转义特殊字符以避免Mermaid语法错误
-                # 从all_entities中查找对应的entity对象
-                entity_obj = None
-                for e in all_entities:
-                    if e.get("name") == controller:
-                        entity_obj = e
-                        break
-                formatted = _format_top_entity_label(controller, entity_obj)
-                escaped_name = _escape_label_with_linebreaks(formatted)
-                mermaid_code += f"    {entity_map[controller]}[\"{escaped_name}\"]\n"
-                mermaid_code += f"    class {entity_map[controller]} person;\n"
+                emit(node_line(controller))
+                emit(f"    class {entity_map[controller]} person;\n")
                 _safe_print(f"添加控制人: {controller} -> {entity_map[controller]} (person)")
                 
                 # 标记为已添加
@@ -624,18 +525,12 @@ def generate_mermaid_from_data(data):
             # 添加与核心公司的控制关系（如果核心公司存在）
             # 🔥 关键修复：只有在control_relationships中明确存在时才添加控制关系
             # 避免自动生成用户已删除的关系
-            has_explicit_control_relationship = False
-            for control_rel in control_relationships:
-                controller_name = control_rel.get("parent", control_rel.get("from", ""))
-                controlled_entity = control_rel.get("child", control_rel.get("to", ""))
-                if controller_name == controller and controlled_entity == main_company:
-                    has_explicit_control_relationship = True
-                    break
+            has_explicit_control_relationship = graph.has_control(controller, main_company)
             
             if main_company and main_company in entity_map and has_explicit_control_relationship:
                 relationship_key = f"{controller}_{main_company}_control"
                 if relationship_key not in added_relationships:
-                    mermaid_code += f"    {entity_map[controller]} -.-> {entity_map[main_company]}\n"
+                    emit(f"    {entity_map[controller]} -.-> {entity_map[main_company]}\n")
                     added_relationships.add(relationship_key)
                     _safe_print(f"添加控制关系: {controller} -.-> {main_company}")
             elif controller and main_company:
@@ -652,13 +547,7 @@ def generate_mermaid_from_data(data):
                 continue
             
             # 检查是否会有控制关系，如果有则跳过股权关系
-            has_control_relationship = False
-            for control_rel in control_relationships:
-                controller_name = control_rel.get("parent", control_rel.get("from", ""))
-                controlled_entity = control_rel.get("child", control_rel.get("to", ""))
-                if controller_name == parent_name and controlled_entity == child_name:
-                    has_control_relationship = True
-                    break
+            has_control_relationship = graph.has_control(parent_name, child_name)
             
             if has_control_relationship:
                 _safe_print(f"跳过股权关系 {parent_name} -> {child_name}，因为存在控制关系")
@@ -667,27 +556,14 @@ def generate_mermaid_from_data(data):
             # 确保两个实体都存在于映射表中
             if parent_name not in entity_map:
                 # 尝试从all_entities中获取实体类型
-                entity_type = "company"  # 默认为公司
-                for entity in all_entities:
-                    if entity.get("name") == parent_name:
-                        entity_type = entity.get("type", "company")
-                        break
+                entity_type = graph.entity_type(parent_name, "company")  # 默认为公司
                     
                     # 添加父实体
                 entity_map[parent_name] = f"E{entity_id_counter}"
                 entity_id_counter += 1
                 
                 # 添加实体节点（所有实体类型都做多行格式化）
-                        # 转义特殊字符以避免Mermaid语法错误
-                # 从all_entities中查找对应的entity对象
-                entity_obj = None
-                for e in all_entities:
-                    if e.get("name") == parent_name:
-                        entity_obj = e
-                        break
-                label = _format_top_entity_label(parent_name, entity_obj)  # 所有实体都应用多行格式化
-                escaped_name = _escape_label_with_linebreaks(label)
-                mermaid_code += f"    {entity_map[parent_name]}[\"{escaped_name}\"]\n"
+                emit(node_line(parent_name))
                         
                 # 检查是否为person类型
                 is_person = False
@@ -696,45 +572,28 @@ def generate_mermaid_from_data(data):
                     is_person = True
                 # 检查all_entities中的类型
                 else:
-                    for e in all_entities:
-                        if e.get("name") == parent_name and e.get("type") == "person":
-                            is_person = True
-                            break
+                    is_person = graph.is_person(parent_name)
                 
                 # 根据实体类型添加样式类
                 if is_person:
-                    mermaid_code += f"    class {entity_map[parent_name]} person;\n"
-                elif parent_name in [e.get("name", "") for e in top_entities]:
-                    mermaid_code += f"    class {entity_map[parent_name]} topEntity;\n"
+                    emit(f"    class {entity_map[parent_name]} person;\n")
+                elif parent_name in top_entity_names:
+                    emit(f"    class {entity_map[parent_name]} topEntity;\n")
                 else:
-                    mermaid_code += f"    class {entity_map[parent_name]} company;\n"
+                    emit(f"    class {entity_map[parent_name]} company;\n")
                         
                 # 标记为已添加
                 added_entities.add(parent_name)
             
             if child_name not in entity_map:
                 # 尝试从all_entities中获取实体类型
-                entity_type = "company"  # 默认为公司
-                for entity in all_entities:
-                    if entity.get("name") == child_name:
-                        entity_type = entity.get("type", "company")
-                        break
+                entity_type = graph.entity_type(child_name, "company")  # 默认为公司
                     
                 # 添加子实体
                 entity_map[child_name] = f"E{entity_id_counter}"
                 entity_id_counter += 1
                 
-                # 添加实体节点（所有实体类型都做多行格式化）
-                # 转义特殊字符以避免Mermaid语法错误
-                # 从all_entities中查找对应的entity对象
-                entity_obj = None
-                for e in all_entities:
-                    if e.get("name") == child_name:
-                        entity_obj = e
-                        break
-                label = _format_top_entity_label(child_name, entity_obj)  # 所有实体都应用多行格式化
-                escaped_name = _escape_label_with_linebreaks(label)
-                mermaid_code += f"    {entity_map[child_name]}[\"{escaped_name}\"]\n"
+                emit(node_line(child_name))
                         
                 # 检查是否为person类型
                 is_person = False
@@ -743,18 +602,15 @@ def generate_mermaid_from_data(data):
                     is_person = True
                 # 检查all_entities中的类型
                 else:
-                    for e in all_entities:
-                        if e.get("name") == child_name and e.get("type") == "person":
-                            is_person = True
-                            break
+                    is_person = graph.is_person(child_name)
                 
                 # 根据实体类型添加样式类
                 if is_person:
-                    mermaid_code += f"    class {entity_map[child_name]} person;\n"
-                elif child_name in [s.get("name", "") for s in subsidiaries]:
-                    mermaid_code += f"    class {entity_map[child_name]} subsidiary;\n"
+                    emit(f"    class {entity_map[child_name]} person;\n")
+                elif child_name in subsidiary_names:
+                    emit(f"    class {entity_map[child_name]} subsidiary;\n")
                 else:
-                    mermaid_code += f"    class {entity_map[child_name]} company;\n"
+                    emit(f"    class {entity_map[child_name]} company;\n")
                         
                 # 标记为已添加
                 added_entities.add(child_name)
@@ -762,7 +618,7 @@ def generate_mermaid_from_data(data):
             # 添加关系（只有持股比例大于0时才添加）
             relationship_key = f"{parent_name}_{child_name}"
             if relationship_key not in added_relationships and percentage > 0:
-                mermaid_code += f"    {entity_map[parent_name]} -->|{percentage}%| {entity_map[child_name]}\n"
+                emit(f"    {entity_map[parent_name]} -->|{percentage}%| {entity_map[child_name]}\n")
                 added_relationships.add(relationship_key)
                 _safe_print(f"添加关系: {parent_name} -> {child_name} ({percentage}%)")
         
@@ -781,23 +637,13 @@ def generate_mermaid_from_data(data):
                 entity_map[controller_name] = f"E{entity_id_counter}"
                 entity_id_counter += 1
                 
-                # 添加控制人（视为顶层实体，多行格式化）
-                # 转义特殊字符以避免Mermaid语法错误
-                # 从all_entities中查找对应的entity对象
-                entity_obj = None
-                for e in all_entities:
-                    if e.get("name") == controller_name:
-                        entity_obj = e
-                        break
-                formatted = _format_top_entity_label(controller_name, entity_obj)
-                escaped_name = _escape_label_with_linebreaks(formatted)
-                mermaid_code += f"    {entity_map[controller_name]}[\"{escaped_name}\"]\n"
+                emit(node_line(controller_name))
                 # 检查是否为实控人，如果是则使用controller样式
                 if controller_name == controller:
-                    mermaid_code += f"    class {entity_map[controller_name]} controller;\n"
+                    emit(f"    class {entity_map[controller_name]} controller;\n")
                     _safe_print(f"添加实控人: {controller_name} -> {entity_map[controller_name]} (controller)")
                 else:
-                    mermaid_code += f"    class {entity_map[controller_name]} person;\n"
+                    emit(f"    class {entity_map[controller_name]} person;\n")
                     _safe_print(f"添加控制人: {controller_name} -> {entity_map[controller_name]} (person)")
                 
                 # 标记为已添加
@@ -808,18 +654,8 @@ def generate_mermaid_from_data(data):
                 entity_map[controlled_entity] = f"E{entity_id_counter}"
                 entity_id_counter += 1
                 
-                # 添加被控制实体（所有实体统一多行显示）
-                # 转义特殊字符以避免Mermaid语法错误
-                # 从all_entities中查找对应的entity对象
-                entity_obj = None
-                for e in all_entities:
-                    if e.get("name") == controlled_entity:
-                        entity_obj = e
-                        break
-                formatted = _format_top_entity_label(controlled_entity, entity_obj)
-                escaped_name = _escape_label_with_linebreaks(formatted)
-                mermaid_code += f"    {entity_map[controlled_entity]}[\"{escaped_name}\"]\n"
-                mermaid_code += f"    class {entity_map[controlled_entity]} company;\n"
+                emit(node_line(controlled_entity))
+                emit(f"    class {entity_map[controlled_entity]} company;\n")
                 _safe_print(f"添加被控制实体: {controlled_entity} -> {entity_map[controlled_entity]} (company)")
                 
                 # 标记为已添加
@@ -833,9 +669,9 @@ def generate_mermaid_from_data(data):
                 if description:
                     # 🔥 关键修复：转义描述文本中的特殊字符，避免Mermaid语法错误
                     escaped_description = _escape_label_with_linebreaks(description)
-                    mermaid_code += f"    {entity_map[controller_name]} -.->|\"{escaped_description}\"| {entity_map[controlled_entity]}\n"
+                    emit(f"    {entity_map[controller_name]} -.->|\"{escaped_description}\"| {entity_map[controlled_entity]}\n")
                 else:
-                    mermaid_code += f"    {entity_map[controller_name]} -.-> {entity_map[controlled_entity]}\n"
+                    emit(f"    {entity_map[controller_name]} -.-> {entity_map[controlled_entity]}\n")
                 
                 added_relationships.add(control_relationship_key)
                 _safe_print(f"添加控制关系: {controller_name} -.-> {controlled_entity} ({description})")
@@ -844,9 +680,9 @@ def generate_mermaid_from_data(data):
         import traceback
         error_msg = f"生成Mermaid代码时出错: {str(e)}\n{traceback.format_exc()}"
         _safe_print(error_msg)
-        mermaid_code = f"flowchart TD\n    E1[\"Error: {str(e)}\"]"
+        return f"flowchart TD\n    E1[\"Error: {str(e)}\"]"
     
     # 🔒 返回纯Mermaid图表代码（streamlit_mermaid兼容）
     # 注意：安全配置需要在HTML环境中单独设置
-    return mermaid_code
+    return "".join(lines)
 
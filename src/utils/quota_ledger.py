@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译额度账本（SQLite）
+每月用量保存为一行计数，扣减/退还都是单条原子 UPDATE，不再整文件加载和重写：
+- 扣减时在同一条语句中校验上限，多个会话/进程并发扣减不会超额；
+- 支持为一批翻译预留额度，批次内本地记账，结束时一次性退还未用部分；
+- 首次打开时导入旧版 translation_usage.json。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DEFAULT_MONTH_LIMIT = 50000
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_months (
+    month       TEXT PRIMARY KEY,
+    used        INTEGER NOT NULL DEFAULT 0,
+    limit_chars INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quota_history (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts     TEXT NOT NULL,
+    month  TEXT NOT NULL,
+    actor  TEXT,
+    delta  INTEGER NOT NULL,
+    reason TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _utc_now() -> str:
+    return datetime.utcnow().isoformat() + 'Z'
+
+
+def current_month() -> str:
+    return datetime.utcnow().strftime('%Y-%m')
+
+
+class QuotaReservation:
+    """
+    一批翻译预留的额度
+    批次内通过 take/give_back 在内存中记账（线程安全），release 时把未用部分一次性退还账本
+    """
+
+    def __init__(self, ledger: "QuotaLedger", month: str, granted: int):
+        self._ledger = ledger
+        self.month = month
+        self.granted = int(granted)
+        self._available = int(granted)
+        self._released = False
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return self._available
+
+    def take(self, chars: int) -> bool:
+        """从预留额度中扣除；剩余不足时返回 False"""
+        chars = max(0, int(chars))
+        with self._lock:
+            if self._released or chars > self._available:
+                return False
+            self._available -= chars
+            return True
+
+    def give_back(self, chars: int) -> None:
+        """翻译失败时把扣除的额度还回预留（仍在本批次内可用）"""
+        with self._lock:
+            if not self._released:
+                self._available = min(self.granted, self._available + max(0, int(chars)))
+
+    def release(self) -> int:
+        """结束批次：退还未用额度，返回退还的字符数（重复调用无副作用）"""
+        with self._lock:
+            if self._released:
+                return 0
+            self._released = True
+            unused, self._available = self._available, 0
+        if unused:
+            self._ledger.refund(unused, month=self.month)
+        return unused
+
+    def __enter__(self) -> "QuotaReservation":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+class QuotaLedger:
+    """按月记录翻译字符用量的账本；每个线程使用独立连接"""
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None,
+                 default_limit: int = DEFAULT_MONTH_LIMIT):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self.default_limit = int(default_limit)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000.0,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._local.conn = conn
+        with self._lock:
+            initialized = self._initialized
+        if not initialized:
+            conn.executescript(_SCHEMA)
+            self._migrate_legacy_json(conn)
+            with self._lock:
+                self._initialized = True
+        return conn
+
+    def _migrate_legacy_json(self, conn: sqlite3.Connection) -> None:
+        """导入旧版 translation_usage.json（仅一次），导入后将原文件重命名为 .migrated"""
+        path = self.legacy_json_path
+        if not path or not os.path.exists(path):
+            return
+        if conn.execute("SELECT 1 FROM meta WHERE name = 'json_migrated'").fetchone():
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            legacy = {}
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE name = 'json_migrated'").fetchone():
+                conn.execute("ROLLBACK")
+                return
+            month = legacy.get('month') if isinstance(legacy, dict) else None
+            if month:
+                conn.execute(
+                    "INSERT OR REPLACE INTO quota_months (month, used, limit_chars) VALUES (?, ?, ?)",
+                    (month, int(legacy.get('used', 0) or 0), int(legacy.get('limit', self.default_limit) or 0)),
+                )
+                for item in legacy.get('history', []) or []:
+                    conn.execute(
+                        "INSERT INTO quota_history (ts, month, actor, delta, reason) VALUES (?, ?, ?, ?, ?)",
+                        (item.get('ts') or _utc_now(), month, item.get('actor'),
+                         int(item.get('delta', 0) or 0), item.get('reason')),
+                    )
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('json_migrated', ?)", (_utc_now(),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        try:
+            os.replace(path, path + '.migrated')
+        except OSError:
+            pass
+
+    def _ensure_month(self, conn: sqlite3.Connection, month: str) -> None:
+        conn.execute("INSERT OR IGNORE INTO quota_months (month, used, limit_chars) VALUES (?, 0, ?)",
+                     (month, self.default_limit))
+
+    # ---- 查询 ----
+
+    def usage(self, month: Optional[str] = None) -> Dict:
+        month = month or current_month()
+        conn = self._connect()
+        self._ensure_month(conn, month)
+        used, limit = conn.execute(
+            "SELECT used, limit_chars FROM quota_months WHERE month = ?", (month,)
+        ).fetchone()
+        return {'month': month, 'used': int(used), 'limit': int(limit), 'remaining': int(limit) - int(used)}
+
+    def history(self, month: Optional[str] = None) -> List[Dict]:
+        month = month or current_month()
+        rows = self._connect().execute(
+            "SELECT ts, actor, delta, reason FROM quota_history WHERE month = ? ORDER BY id", (month,)
+        ).fetchall()
+        return [{'ts': ts, 'actor': actor, 'delta': delta, 'reason': reason} for ts, actor, delta, reason in rows]
+
+    # ---- 扣减与退还 ----
+
+    def consume(self, chars: int) -> bool:
+        """原子扣减：剩余额度足够时扣除并返回 True"""
+        chars = max(0, int(chars))
+        month = current_month()
+        conn = self._connect()
+        self._ensure_month(conn, month)
+        cursor = conn.execute(
+            "UPDATE quota_months SET used = used + ? WHERE month = ? AND used + ? <= limit_chars",
+            (chars, month, chars),
+        )
+        return cursor.rowcount == 1
+
+    def refund(self, chars: int, month: Optional[str] = None) -> None:
+        chars = max(0, int(chars))
+        if not chars:
+            return
+        self._connect().execute(
+            "UPDATE quota_months SET used = MAX(0, used - ?) WHERE month = ?",
+            (chars, month or current_month()),
+        )
+
+    def reserve(self, chars: int, allow_partial: bool = False) -> Optional[QuotaReservation]:
+        """
+        为一批翻译预留额度
+
+        Args:
+            chars: 希望预留的字符数
+            allow_partial: 剩余不足时是否预留全部剩余额度
+
+        Returns:
+            QuotaReservation；额度不足（或 allow_partial 时剩余为 0）返回 None
+        """
+        chars = max(0, int(chars))
+        month = current_month()
+        if not allow_partial:
+            return QuotaReservation(self, month, chars) if self.consume(chars) else None
+
+        conn = self._connect()
+        self._ensure_month(conn, month)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            used, limit = conn.execute(
+                "SELECT used, limit_chars FROM quota_months WHERE month = ?", (month,)
+            ).fetchone()
+            granted = max(0, min(chars, int(limit) - int(used)))
+            if granted:
+                conn.execute("UPDATE quota_months SET used = used + ? WHERE month = ?", (granted, month))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if not granted and chars:
+            return None
+        return QuotaReservation(self, month, granted)
+
+    # ---- 管理 ----
+
+    def set_limit(self, new_limit: int, actor: str = 'admin', reason: str = '') -> Dict:
+        month = current_month()
+        new_limit = max(0, int(new_limit))
+        conn = self._connect()
+        self._ensure_month(conn, month)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            old = int(conn.execute("SELECT limit_chars FROM quota_months WHERE month = ?", (month,)).fetchone()[0])
+            conn.execute("UPDATE quota_months SET limit_chars = ? WHERE month = ?", (new_limit, month))
+            conn.execute(
+                "INSERT INTO quota_history (ts, month, actor, delta, reason) VALUES (?, ?, ?, ?, ?)",
+                (_utc_now(), month, actor, new_limit - old, reason or 'manual adjust'),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {'old': old, 'new': new_limit}
+
+
+_ledgers: Dict[str, QuotaLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_quota_ledger(db_path: str, legacy_json_path: Optional[str] = None) -> QuotaLedger:
+    """按数据库路径返回进程级共享的账本实例"""
+    with _ledgers_lock:
+        ledger = _ledgers.get(db_path)
+        if ledger is None:
+            ledger = QuotaLedger(db_path, legacy_json_path)
+            _ledgers[db_path] = ledger
+        return ledger
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片识别结果缓存（SQLite）
+按 (图片内容哈希, 模型, 提示词版本) 保存视觉模型的原始输出和解析后的股权 JSON：
+- 同一张图片再次分析（Streamlit 重跑、调整设置后重新分析）直接返回，不调用模型、不消耗 token；
+- 模型或提示词变化时键随之变化，旧结果不会被误用；
+- 总大小和条数超过上限时淘汰最久未使用的记录；
+- WAL 模式，每个线程使用独立连接。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+DEFAULT_DB_PATH = os.path.join(os.getcwd(), 'user_data', 'recognition_cache.sqlite3')
+# 缓存总大小上限（MB，可通过环境变量调整）与条数上限
+DEFAULT_MAX_BYTES = int(float(os.environ.get("RECOGNITION_CACHE_MAX_MB", "64") or 64) * 1024 * 1024)
+DEFAULT_MAX_ENTRIES = 2000
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recognitions (
+    key            TEXT PRIMARY KEY,
+    image_hash     TEXT NOT NULL,
+    model          TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    parsed         TEXT NOT NULL,
+    raw_response   TEXT NOT NULL,
+    size           INTEGER NOT NULL,
+    created        TEXT NOT NULL,
+    last_used      REAL NOT NULL,
+    hits           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_recognitions_last_used ON recognitions (last_used);
+"""
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """图片内容哈希（与文件名无关）"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def prompt_fingerprint(*parts: str) -> str:
+    """由提示词及调用参数生成的提示词版本号"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()[:16]
+
+
+def build_recognition_key(image_hash: str, model: str, prompt_version: str) -> str:
+    return hashlib.sha1(f"{image_hash}::{model}::{prompt_version}".encode('utf-8')).hexdigest()
+
+
+class RecognitionCache:
+    """图片识别结果的磁盘缓存，按最近使用时间淘汰"""
+
+    def __init__(self, db_path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_entries = max(1, int(max_entries))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000.0,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._local.conn = conn
+        with self._lock:
+            initialized = self._initialized
+        if not initialized:
+            conn.executescript(_SCHEMA)
+            with self._lock:
+                self._initialized = True
+        return conn
+
+    def get(self, image_hash: str, model: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """
+        读取识别结果
+
+        Returns:
+            {"parsed", "raw_response", "created", "hits"}；parsed 每次都是新解析的对象，可直接修改。
+            未命中返回 None
+        """
+        key = build_recognition_key(image_hash, model, prompt_version)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT parsed, raw_response, created, hits FROM recognitions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            parsed = json.loads(row[0])
+        except ValueError:
+            return None
+        conn.execute("UPDATE recognitions SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        return {'parsed': parsed, 'raw_response': row[1], 'created': row[2], 'hits': int(row[3]) + 1}
+
+    def put(self, image_hash: str, model: str, prompt_version: str, parsed: Any, raw_response: str) -> None:
+        """保存识别结果，并在超出上限时淘汰最久未使用的记录"""
+        key = build_recognition_key(image_hash, model, prompt_version)
+        parsed_text = json.dumps(parsed, ensure_ascii=False)
+        raw_response = raw_response or ""
+        size = len(parsed_text.encode('utf-8')) + len(raw_response.encode('utf-8'))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO recognitions "
+                "(key, image_hash, model, prompt_version, parsed, raw_response, size, created, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, image_hash, model, prompt_version, parsed_text, raw_response, size,
+                 datetime.utcnow().isoformat() + 'Z', time.time()),
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """删除最久未使用的记录直到满足大小和条数上限（调用方持有写事务）"""
+        total_bytes, total_entries = conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM recognitions"
+        ).fetchone()
+        if total_bytes <= self.max_bytes and total_entries <= self.max_entries:
+            return 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM recognitions ORDER BY last_used ASC"):
+            # 至少保留刚写入的一条
+            if total_entries <= 1 or (total_bytes <= self.max_bytes and total_entries <= self.max_entries):
+                break
+            victims.append((key,))
+            total_bytes -= size
+            total_entries -= 1
+        conn.executemany("DELETE FROM recognitions WHERE key = ?", victims)
+        return len(victims)
+
+    def stats(self) -> Dict[str, int]:
+        total_bytes, total_entries, hits = self._connect().execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*), COALESCE(SUM(hits), 0) FROM recognitions"
+        ).fetchone()
+        return {'entries': int(total_entries), 'bytes': int(total_bytes), 'hits': int(hits)}
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM recognitions")
+
+
+_caches: Dict[str, RecognitionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_recognition_cache(db_path: Optional[str] = None) -> RecognitionCache:
+    """按数据库路径返回进程级共享的缓存实例"""
+    db_path = db_path or DEFAULT_DB_PATH
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = RecognitionCache(db_path)
+            _caches[db_path] = cache
+        return cache
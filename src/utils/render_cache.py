@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表渲染缓存
+以渲染输入的规范化指纹为键，缓存 Mermaid 代码、vis.js 节点/边和 HTML 等渲染结果。
+缓存为进程级、有界 LRU，预览、下载和全屏路径共享同一份结果。
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.state_persistence import snapshot_fingerprint
+
+DEFAULT_MAX_ENTRIES = 64
+
+
+def render_fingerprint(kind: str, inputs: Any) -> Optional[str]:
+    """计算渲染输入的指纹；输入无法规范化序列化时返回 None（调用方应直接渲染）"""
+    return snapshot_fingerprint({"kind": kind, "inputs": inputs})
+
+
+class RenderCache:
+    """线程安全的有界 LRU 渲染缓存"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, kind: str, inputs: Any, producer: Callable[[], Any],
+                      copy_result: bool = False) -> Any:
+        """命中则返回缓存结果，否则调用 producer 渲染并写入缓存
+
+        Args:
+            kind: 渲染类型（如 "mermaid"、"visjs_data"、"visjs_html"），参与指纹计算
+            inputs: 决定渲染结果的全部输入，需可 JSON 序列化
+            producer: 无参渲染函数
+            copy_result: 结果为可变对象（列表/字典）时设为 True，返回深拷贝以免调用方修改缓存
+        """
+        key = render_fingerprint(kind, inputs)
+        if key is None:
+            return producer()
+        return self.lookup(key, producer, copy_result)
+
+    def lookup(self, key: str, producer: Callable[[], Any], copy_result: bool = False) -> Any:
+        """按已计算好的指纹查找，未命中时调用 producer 渲染并写入缓存"""
+        with self._lock:
+            found = key in self._entries
+            if found:
+                self._entries.move_to_end(key)
+                value = self._entries[key]
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not found:
+            value = producer()
+            self.put(key, value)
+
+        return copy.deepcopy(value) if copy_result else value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# 进程级共享实例：同一 Streamlit 服务进程内的所有会话共用
+render_cache = RenderCache()
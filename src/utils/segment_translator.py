@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中文公司名称分段翻译
+大多数公司名由"地区 + 字号/行业（主体） + 组织形式"组成，例如
+"山东宏济堂医药集团股份有限公司" = 山东 + 宏济堂医药 + 集团股份有限公司。
+地区和组织形式用本地词典翻译，只有主体部分需要调用翻译接口（并单独缓存），
+同一主体在不同地区/组织形式下复用，减少计费字符和请求耗时。
+"""
+
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+# 是否启用分段翻译（设置 TRANSLATION_SEGMENTS=0 关闭）
+SEGMENT_TRANSLATION_ENABLED = os.environ.get("TRANSLATION_SEGMENTS", "1") not in ("0", "false", "False")
+
+# 主体至少保留的字符数，过短时整体翻译更可靠
+MIN_STEM_CHARS = 2
+
+# 省级行政区及常见城市
+REGION_TRANSLATIONS: Dict[str, str] = {
+    "北京": "Beijing", "天津": "Tianjin", "上海": "Shanghai", "重庆": "Chongqing",
+    "河北": "Hebei", "山西": "Shanxi", "辽宁": "Liaoning", "吉林": "Jilin", "黑龙江": "Heilongjiang",
+    "江苏": "Jiangsu", "浙江": "Zhejiang", "安徽": "Anhui", "福建": "Fujian", "江西": "Jiangxi",
+    "山东": "Shandong", "河南": "Henan", "湖北": "Hubei", "湖南": "Hunan", "广东": "Guangdong",
+    "海南": "Hainan", "四川": "Sichuan", "贵州": "Guizhou", "云南": "Yunnan", "陕西": "Shaanxi",
+    "甘肃": "Gansu", "青海": "Qinghai", "台湾": "Taiwan", "内蒙古": "Inner Mongolia", "广西": "Guangxi",
+    "西藏": "Tibet", "宁夏": "Ningxia", "新疆": "Xinjiang", "香港": "Hong Kong", "澳门": "Macao",
+    "深圳": "Shenzhen", "广州": "Guangzhou", "杭州": "Hangzhou", "南京": "Nanjing", "苏州": "Suzhou",
+    "武汉": "Wuhan", "成都": "Chengdu", "西安": "Xi'an", "青岛": "Qingdao", "济南": "Jinan",
+    "厦门": "Xiamen", "宁波": "Ningbo", "大连": "Dalian", "沈阳": "Shenyang", "长沙": "Changsha",
+    "郑州": "Zhengzhou", "合肥": "Hefei", "福州": "Fuzhou", "无锡": "Wuxi", "佛山": "Foshan",
+    "东莞": "Dongguan", "烟台": "Yantai", "潍坊": "Weifang", "淄博": "Zibo", "珠海": "Zhuhai",
+    "昆明": "Kunming", "南昌": "Nanchang", "石家庄": "Shijiazhuang", "太原": "Taiyuan",
+    "哈尔滨": "Harbin", "长春": "Changchun", "贵阳": "Guiyang", "南宁": "Nanning", "海口": "Haikou",
+    "兰州": "Lanzhou", "乌鲁木齐": "Urumqi", "呼和浩特": "Hohhot", "温州": "Wenzhou",
+    "常州": "Changzhou", "泉州": "Quanzhou",
+}
+
+# 紧跟地区名的行政区划后缀（翻译时省略）
+REGION_ADMIN_SUFFIXES = (
+    "壮族自治区", "回族自治区", "维吾尔自治区", "特别行政区", "自治区", "省", "市",
+)
+
+# 组织形式（按长度从长到短匹配名称末尾；括号统一为全角）
+LEGAL_SUFFIX_TRANSLATIONS: Dict[str, str] = {
+    "集团股份有限公司": "Group Co., Ltd.",
+    "集团有限责任公司": "Group Co., Ltd.",
+    "集团有限公司": "Group Co., Ltd.",
+    "股份有限公司": "Co., Ltd.",
+    "有限责任公司": "Co., Ltd.",
+    "有限公司": "Co., Ltd.",
+    "合伙企业（有限合伙）": "Partnership (Limited Partnership)",
+    "合伙企业（普通合伙）": "Partnership (General Partnership)",
+    "（有限合伙）": "(Limited Partnership)",
+    "（普通合伙）": "(General Partnership)",
+}
+
+_SUFFIXES_BY_LENGTH = sorted(LEGAL_SUFFIX_TRANSLATIONS, key=len, reverse=True)
+_REGIONS_BY_LENGTH = sorted(REGION_TRANSLATIONS, key=len, reverse=True)
+# 主体译文末尾多出的组织形式（接口有时会为主体补上 "Co., Ltd."）
+_TRAILING_LEGAL_FORM = re.compile(
+    r"[\s,]*(co\.,?\s*ltd\.?|company\s+limited|limited|ltd\.?|corporation|company)\s*$",
+    re.IGNORECASE,
+)
+
+
+def _normalize_brackets(name: str) -> str:
+    return name.replace("(", "（").replace(")", "）")
+
+
+def segment_company_name(name: str) -> Optional[Tuple[str, str, str]]:
+    """
+    拆分公司名称
+
+    Returns:
+        (地区译文, 主体原文, 组织形式译文)；地区可能为空字符串。
+        名称不以已知组织形式结尾或主体过短时返回 None（应整体翻译）
+    """
+    if not name:
+        return None
+    text = _normalize_brackets(name.strip())
+
+    suffix_en = None
+    for suffix in _SUFFIXES_BY_LENGTH:
+        if text.endswith(suffix):
+            suffix_en = LEGAL_SUFFIX_TRANSLATIONS[suffix]
+            text = text[: -len(suffix)]
+            break
+    if suffix_en is None:
+        return None
+
+    region_en = ""
+    for region in _REGIONS_BY_LENGTH:
+        if text.startswith(region):
+            rest = text[len(region):]
+            for admin in REGION_ADMIN_SUFFIXES:
+                if rest.startswith(admin):
+                    rest = rest[len(admin):]
+                    break
+            if len(rest) >= MIN_STEM_CHARS:
+                region_en = REGION_TRANSLATIONS[region]
+                text = rest
+            break
+
+    stem = text.strip()
+    if len(stem) < MIN_STEM_CHARS:
+        return None
+    return region_en, stem, suffix_en
+
+
+def compose_company_name(region_en: str, stem_en: str, suffix_en: str) -> str:
+    """组合地区、主体和组织形式的译文，并按 format_english_company_name 统一格式"""
+    from src.utils.display_formatters import format_english_company_name
+
+    stem_en = _TRAILING_LEGAL_FORM.sub("", stem_en.strip()).strip(" ,")
+    if region_en and stem_en.lower().startswith(region_en.lower() + " "):
+        # 主体译文已带地区时不重复
+        region_en = ""
+    parts = [part for part in (region_en, stem_en, suffix_en) if part]
+    return format_english_company_name(" ".join(parts))
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+超大股权结构图的分块识别
+一次性识别 100+ 实体的大图时，视觉模型容易漏掉中间层级。分块模式：
+- 把图片切成相互重叠的若干块（重叠足够宽时，跨块的名称和连线至少在一块中完整出现）；
+- 各块并发调用模型识别；
+- 按名称合并各块的 all_entities / entity_relationships 等结果：
+  名称去除空白并统一括号后去重，被块边缘截断的名称归并到唯一的完整名称，
+  同一关系在各块中比例不一致时取多数，顶层实体中出现在股权关系下级位置的被剔除。
+"""
+
+import io
+import math
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from src.utils.segment_translator import LEGAL_SUFFIX_TRANSLATIONS
+
+# 每块的目标边长（像素，与预处理的长边上限一致，避免再次缩小）和相邻块的重叠比例：
+# 两个点在某一方向上的距离不超过重叠宽度时，必然同时完整出现在某一块中，
+# 因此重叠宽度应大于层级间距，跨块的股权连线才不会丢失
+DEFAULT_TILE_EDGE = int(os.environ.get("TILED_RECOGNITION_TILE_EDGE", "2048") or 2048)
+DEFAULT_OVERLAP = 0.4
+# 自动模式下长边超过该值才分块
+AUTO_TILE_MIN_EDGE = int(os.environ.get("TILED_RECOGNITION_MIN_EDGE", "3200") or 3200)
+MAX_TILES = 12
+DEFAULT_MAX_WORKERS = int(os.environ.get("TILED_RECOGNITION_WORKERS", "4") or 4)
+# 截断名称至少保留的字符数，过短时不做归并
+MIN_ALIAS_CHARS = 4
+
+_WHITESPACE = re.compile(r"\s+")
+_COMPLETE_NAME_ENDINGS = tuple(LEGAL_SUFFIX_TRANSLATIONS) + ("公司", "企业", "中心", "集团", "基金", "银行")
+
+
+class ImageTile:
+    """图片中的一块：行列位置、在原图中的区域 (left, top, right, bottom) 和编码后的字节"""
+
+    def __init__(self, index: int, row: int, col: int, rows: int, cols: int,
+                 box: Tuple[int, int, int, int], data: bytes):
+        self.index = index
+        self.row = row
+        self.col = col
+        self.rows = rows
+        self.cols = cols
+        self.box = box
+        self.data = data
+
+
+def _tiles_along(length: int, tile_edge: int, overlap: float) -> int:
+    """某一方向上需要的块数：n 块、相邻重叠 overlap 时每块长度 = length / (n - (n - 1) * overlap)"""
+    if length <= tile_edge:
+        return 1
+    return max(1, math.ceil((length / tile_edge - overlap) / (1 - overlap)))
+
+
+def tile_grid(width: int, height: int, tile_edge: int = DEFAULT_TILE_EDGE,
+              overlap: float = DEFAULT_OVERLAP, max_tiles: int = MAX_TILES) -> Tuple[int, int]:
+    """按目标块大小计算 (行数, 列数)，总块数超过上限时放大块尺寸"""
+    tile_edge = max(1, int(tile_edge))
+    while True:
+        rows = _tiles_along(height, tile_edge, overlap)
+        cols = _tiles_along(width, tile_edge, overlap)
+        if rows * cols <= max_tiles:
+            return rows, cols
+        tile_edge = int(tile_edge * 1.25) + 1
+
+
+def _tile_spans(length: int, count: int, overlap: float) -> List[Tuple[int, int]]:
+    """把长度均匀分成 count 个相互重叠的区间"""
+    if count <= 1:
+        return [(0, length)]
+    size = length / (count - (count - 1) * overlap)
+    stride = size * (1 - overlap)
+    return [(int(i * stride), min(length, int(round(i * stride + size)))) for i in range(count)]
+
+
+def plan_tiles(image_bytes: bytes, mode: str = "auto",
+               min_edge: int = AUTO_TILE_MIN_EDGE) -> Optional[Tuple[int, int]]:
+    """
+    决定是否分块（只读取图片头）
+
+    Args:
+        mode: "auto"（长边超过 min_edge 才分块）、"always" 或 "off"
+
+    Returns:
+        (行数, 列数)；不分块时返回 None
+    """
+    if mode == "off":
+        return None
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            width, height = img.size
+            if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                width, height = height, width
+    except Exception:
+        return None
+    if mode != "always" and max(width, height) < min_edge:
+        return None
+    grid = tile_grid(width, height)
+    if grid == (1, 1):
+        if mode != "always":
+            return None
+        # 始终分块时至少沿长边切成两块
+        grid = (2, 1) if height > width else (1, 2)
+    return grid
+
+
+def tiling_signature(grid: Tuple[int, int], overlap: float = DEFAULT_OVERLAP) -> str:
+    """分块方式（参与识别缓存的提示词版本）"""
+    return f"tiles={grid[0]}x{grid[1]};overlap={overlap}"
+
+
+def split_image(image_bytes: bytes, grid: Tuple[int, int],
+                overlap: float = DEFAULT_OVERLAP) -> List[ImageTile]:
+    """按 (行数, 列数) 把图片切成相邻重叠 overlap 比例的块；JPEG 原图的块仍编码为 JPEG"""
+    img = Image.open(io.BytesIO(image_bytes))
+    source_format = (img.format or "PNG").upper()
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "L", "RGBA", "P"):
+        img = img.convert("RGB")
+    width, height = img.size
+    rows, cols = grid
+
+    tiles: List[ImageTile] = []
+    for row, (top, bottom) in enumerate(_tile_spans(height, rows, overlap)):
+        for col, (left, right) in enumerate(_tile_spans(width, cols, overlap)):
+            box = (left, top, right, bottom)
+            crop = img.crop(box)
+            buffer = io.BytesIO()
+            if source_format == "JPEG" and crop.mode in ("RGB", "L"):
+                crop.save(buffer, format="JPEG", quality=95)
+            else:
+                crop.save(buffer, format="PNG")
+            tiles.append(ImageTile(len(tiles), row, col, rows, cols, box, buffer.getvalue()))
+    return tiles
+
+
+def tile_prompt(base_prompt: str, tile: ImageTile) -> str:
+    """在识别提示词后附加当前块的位置说明"""
+    return (
+        f"{base_prompt}\n\n"
+        f"注意：这张图片是一张大型股权结构图的局部（共 {tile.rows} 行 × {tile.cols} 列，"
+        f"当前为第 {tile.row + 1} 行第 {tile.col + 1} 列），与相邻局部有重叠。"
+        "只输出本局部中能看到的实体和关系；被图片边缘截断的名称按可见部分原样输出，不要猜测补全；"
+        "只有当一条连线的两端都在本局部中可见时才输出这条关系。"
+    )
+
+
+def recognize_tiles(tiles: List[ImageTile], recognize: Callable[[ImageTile], Any],
+                    max_workers: int = DEFAULT_MAX_WORKERS,
+                    on_progress: Optional[Callable[[int, int], None]] = None
+                    ) -> Tuple[List[Any], Dict[int, str]]:
+    """
+    并发识别各块
+
+    on_progress(已完成块数, 总块数) 在调用方线程中执行（可直接更新 Streamlit 进度条）
+
+    Returns:
+        (按块顺序排列的识别结果（失败的块为 None）, 块序号 -> 错误信息)
+    """
+    results: List[Any] = [None] * len(tiles)
+    errors: Dict[int, str] = {}
+    if not tiles:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(tiles))),
+                            thread_name_prefix="tile-recognition") as executor:
+        futures = {executor.submit(recognize, tile): tile.index for tile in tiles}
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as exc:
+                errors[index] = str(exc)
+            if on_progress is not None:
+                on_progress(done, len(tiles))
+    return results, errors
+
+
+def normalize_entity_name(name: Any) -> str:
+    """去除空白（含换行）并统一为全角括号，用于跨块比较名称"""
+    if not isinstance(name, str):
+        return ""
+    return _WHITESPACE.sub("", name).replace("(", "（").replace(")", "）")
+
+
+def _percent_key(value: Any) -> Any:
+    try:
+        return round(float(value), 4)
+    except (TypeError, ValueError):
+        return value
+
+
+def _list_percentage(entity: Dict[str, Any]) -> Any:
+    """shareholders / subsidiaries 中的持股比例（ratio 为小数，转换为百分比）"""
+    if entity.get("percentage") not in (None, ""):
+        return entity.get("percentage")
+    try:
+        return round(float(entity["ratio"]) * 100, 4)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _majority(values: List[Any]) -> Any:
+    """出现次数最多的值；次数相同时取最先出现的"""
+    values = [v for v in values if v not in (None, "")]
+    if not values:
+        return None
+    counts = Counter(_percent_key(v) for v in values)
+    best = max(counts.values())
+    for value in values:
+        if counts[_percent_key(value)] == best:
+            return value
+    return None
+
+
+class _NameResolver:
+    """收集各块中的名称，选出每个实体的显示名称并把截断名称归并到完整名称"""
+
+    def __init__(self):
+        self._forms: Dict[str, Counter] = {}
+        self._types: Dict[str, List[str]] = {}
+        self._aliases: Dict[str, str] = {}
+
+    def add(self, name: Any, entity_type: Optional[str] = None) -> None:
+        key = normalize_entity_name(name)
+        if not key:
+            return
+        self._forms.setdefault(key, Counter())[name.strip()] += 1
+        if entity_type:
+            self._types.setdefault(key, []).append(entity_type)
+
+    def _is_complete(self, key: str) -> bool:
+        if key.endswith(_COMPLETE_NAME_ENDINGS):
+            return True
+        return _majority(self._types.get(key, [])) == "person"
+
+    def resolve_aliases(self) -> None:
+        keys = sorted(self._forms, key=len)
+        for short in keys:
+            if len(short) < MIN_ALIAS_CHARS or self._is_complete(short):
+                continue
+            candidates = [k for k in keys if len(k) > len(short) and (k.startswith(short) or k.endswith(short))]
+            # 只有唯一候选时才归并，避免把截断名称并到错误的实体
+            if len(candidates) == 1:
+                self._aliases[short] = candidates[0]
+
+    def key(self, name: Any) -> str:
+        key = normalize_entity_name(name)
+        while key in self._aliases:
+            key = self._aliases[key]
+        return key
+
+    def display(self, key: str) -> str:
+        forms = self._forms.get(key)
+        if not forms:
+            return key
+        # 出现最多的写法；次数相同时取较长的（保留括号内的注册地、上市代码等）
+        return max(forms.items(), key=lambda item: (item[1], len(item[0])))[0]
+
+    def entity_type(self, key: str) -> Optional[str]:
+        types = list(self._types.get(key, []))
+        for alias, target in self._aliases.items():
+            if target == key:
+                types.extend(self._types.get(alias, []))
+        return _majority(types)
+
+    def keys(self) -> List[str]:
+        return [k for k in self._forms if k not in self._aliases]
+
+
+def merge_recognitions(partials: List[Optional[Dict]]) -> Dict:
+    """
+    合并各块的识别结果（与单次识别的 JSON 结构相同）
+
+    - 实体按规范化名称去重，显示名称取各块中最常见的写法；
+    - 各结果的 shareholders / subsidiaries 按该结果自己的核心公司转换为显式股权关系；
+      只有核心公司与合并后的核心公司一致的结果，才保留在合并后的 shareholders / subsidiaries 中；
+    - 股权关系按 (上级, 下级) 去重，比例不一致时取多数；控制关系按 (上级, 下级, 类型) 去重；
+    - 顶层实体中出现在合并后股权关系下级位置的被剔除；
+    - 核心公司、实际控制人取各块中出现最多的名称。
+    """
+    partials = [p for p in partials if isinstance(p, dict)]
+    resolver = _NameResolver()
+    for part in partials:
+        for entity in part.get("all_entities") or []:
+            if isinstance(entity, dict):
+                resolver.add(entity.get("name"), entity.get("type"))
+        for field in ("top_level_entities", "shareholders", "subsidiaries"):
+            for entity in part.get(field) or []:
+                if isinstance(entity, dict):
+                    resolver.add(entity.get("name"))
+        for field in ("entity_relationships", "control_relationships"):
+            for rel in part.get(field) or []:
+                if isinstance(rel, dict):
+                    resolver.add(rel.get("parent"))
+                    resolver.add(rel.get("child"))
+        for field in ("core_company", "main_company", "controller"):
+            resolver.add(part.get(field))
+    resolver.resolve_aliases()
+
+    # 各结果的 shareholders / subsidiaries 都相对于该结果自己的核心公司，
+    # 先按各自的核心公司转换为显式股权关系，避免挂到合并后的核心公司下
+    part_cores = [resolver.key(p.get("core_company") or p.get("main_company")) for p in partials]
+    core = _majority(part_cores)
+
+    relationships: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _add_relationship(rel: Dict[str, Any]) -> None:
+        parent, child = resolver.key(rel.get("parent")), resolver.key(rel.get("child"))
+        if not parent or not child or parent == child:
+            return
+        entry = relationships.setdefault((parent, child), {"record": dict(rel), "percentages": []})
+        entry["percentages"].append(rel.get("percentage"))
+
+    for part, part_core in zip(partials, part_cores):
+        for rel in part.get("entity_relationships") or []:
+            if isinstance(rel, dict):
+                _add_relationship(rel)
+        if not part_core:
+            continue
+        for field in ("shareholders", "subsidiaries"):
+            for entity in part.get(field) or []:
+                if not isinstance(entity, dict):
+                    continue
+                name = entity.get("name")
+                parent, child = (name, part_core) if field == "shareholders" else (part_core, name)
+                _add_relationship({"parent": parent, "child": child, "percentage": _list_percentage(entity)})
+
+    merged_relationships = []
+    for (parent, child), entry in relationships.items():
+        record = entry["record"]
+        record["parent"], record["child"] = resolver.display(parent), resolver.display(child)
+        percentage = _majority(entry["percentages"])
+        if percentage is not None:
+            record["percentage"] = percentage
+        merged_relationships.append(record)
+
+    controls: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for part in partials:
+        for rel in part.get("control_relationships") or []:
+            if not isinstance(rel, dict):
+                continue
+            parent, child = resolver.key(rel.get("parent")), resolver.key(rel.get("child"))
+            if not parent or not child or parent == child:
+                continue
+            key = (parent, child, str(rel.get("relationship_type") or ""))
+            existing = controls.get(key)
+            if existing is None or len(str(rel.get("description") or "")) > len(str(existing.get("description") or "")):
+                record = dict(rel)
+                record["parent"], record["child"] = resolver.display(parent), resolver.display(child)
+                controls[key] = record
+
+    def _merge_entity_list(field: str, exclude: Optional[set] = None,
+                           same_core_only: bool = False) -> List[Dict[str, Any]]:
+        entities: Dict[str, Dict[str, Any]] = {}
+        percentages: Dict[str, List[Any]] = {}
+        for part, part_core in zip(partials, part_cores):
+            if same_core_only and part_core != core:
+                continue
+            for entity in part.get(field) or []:
+                if not isinstance(entity, dict):
+                    continue
+                key = resolver.key(entity.get("name"))
+                if not key or (exclude and key in exclude):
+                    continue
+                if key not in entities:
+                    entities[key] = dict(entity, name=resolver.display(key))
+                percentages.setdefault(key, []).append(entity.get("percentage"))
+        for key, entity in entities.items():
+            percentage = _majority(percentages[key])
+            if percentage is not None:
+                entity["percentage"] = percentage
+        return list(entities.values())
+
+    children = {child for _, child in relationships}
+    all_entities = []
+    for key in resolver.keys():
+        entity = {"name": resolver.display(key)}
+        entity_type = resolver.entity_type(key)
+        if entity_type:
+            entity["type"] = entity_type
+        all_entities.append(entity)
+
+    controller = _majority([resolver.key(p.get("controller")) for p in partials])
+    return {
+        "core_company": resolver.display(core) if core else "",
+        "shareholders": _merge_entity_list("shareholders", exclude={core}, same_core_only=True),
+        "subsidiaries": _merge_entity_list("subsidiaries", exclude={core}, same_core_only=True),
+        "controller": resolver.display(controller) if controller else "",
+        "top_level_entities": _merge_entity_list("top_level_entities", exclude=children),
+        "entity_relationships": merged_relationships,
+        "control_relationships": list(controls.values()),
+        "all_entities": all_entities,
+    }
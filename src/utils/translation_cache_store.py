@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译缓存存储（SQLite + 进程内 LRU）
+以缓存键为主键保存译文，单条读写代替整文件加载/重写：
+- WAL 模式，多个进程/线程可同时读，写入互不阻塞读取；
+- 进程内有界 LRU 作为前置缓存，同一 Streamlit 服务进程的所有会话共享，
+  命中时不访问磁盘，并记住译文是否已经规范化（如英文公司名格式化）；
+- 新译文和命中次数由后台线程批量写回（write-behind），调用方不等待磁盘；
+- 每条译文记录来源（接口翻译、导入、快照、手动编辑），批量预置时按冲突策略决定是否覆盖；
+- 首次打开时自动导入旧版 translation_cache.json。
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 进程内 LRU 最多保存的译文条数
+DEFAULT_MEMORY_ENTRIES = 50000
+# 累计的命中次数达到该数量时唤醒后台线程写回
+HIT_FLUSH_THRESHOLD = 200
+# 后台线程的最长写回间隔（秒）
+HIT_FLUSH_INTERVAL = 5.0
+# 数据库被其它连接锁定时的等待时间（毫秒）
+BUSY_TIMEOUT_MS = 5000
+# 批量查询已有记录时每条 SQL 的键数量（低于 SQLite 变量个数上限）
+SEED_QUERY_CHUNK = 500
+
+# 译文来源，数值越大越可信：手动编辑 > Excel 导入 > 自动保存快照 > 接口翻译
+SOURCE_API = "api"
+SOURCE_SNAPSHOT = "snapshot"
+SOURCE_IMPORT = "import"
+SOURCE_MANUAL = "manual"
+SOURCE_PRIORITY = {SOURCE_API: 0, SOURCE_SNAPSHOT: 1, SOURCE_IMPORT: 2, SOURCE_MANUAL: 3}
+
+# 预置译文与已有译文不同时的处理方式
+CONFLICT_PRIORITY = "priority"    # 来源可信度不低于已有记录时覆盖（同级时新值覆盖旧值）
+CONFLICT_KEEP = "keep"            # 只补充缺失的记录
+CONFLICT_OVERWRITE = "overwrite"  # 总是覆盖
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key        TEXT PRIMARY KEY,
+    src        TEXT NOT NULL,
+    tgt        TEXT NOT NULL,
+    text_len   INTEGER NOT NULL DEFAULT 0,
+    translated TEXT NOT NULL,
+    ts         TEXT NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    source     TEXT NOT NULL DEFAULT 'api'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+_UPSERT_SQL = (
+    "INSERT INTO translations (key, src, tgt, text_len, translated, ts, hits, source) "
+    "VALUES (?, ?, ?, ?, ?, ?, 0, ?) "
+    "ON CONFLICT(key) DO UPDATE SET src = excluded.src, tgt = excluded.tgt, "
+    "text_len = excluded.text_len, translated = excluded.translated, ts = excluded.ts, "
+    "source = excluded.source"
+)
+
+
+def _priority_sql(column: str) -> str:
+    """SOURCE_PRIORITY 对应的 SQL 表达式（未知或缺失的来源按接口译文处理）"""
+    cases = " ".join(f"WHEN '{source}' THEN {priority}" for source, priority in SOURCE_PRIORITY.items())
+    return f"(CASE {column} {cases} ELSE 0 END)"
+
+
+# 后台写回：已有记录的来源更可信时保留（如 seed_many 直接写入的手动译文不被随后排队的接口译文覆盖）
+_WRITE_BEHIND_UPSERT_SQL = (
+    _UPSERT_SQL + f" WHERE {_priority_sql('excluded.source')} >= {_priority_sql('translations.source')}"
+)
+
+
+def _source_priority(source: Optional[str]) -> int:
+    return SOURCE_PRIORITY.get(source or SOURCE_API, 0)
+
+
+def _is_user_source(source: Optional[str]) -> bool:
+    """来自用户数据（快照、导入、手动编辑）的译文按原样保存，读取时不再规范化"""
+    return (source or SOURCE_API) != SOURCE_API
+
+
+def _utc_now() -> str:
+    return datetime.utcnow().isoformat() + 'Z'
+
+
+class _MemoryEntry:
+    """LRU 中的一条译文；normalized 表示译文已按调用方的规范化函数处理过"""
+
+    __slots__ = ("translated", "src", "tgt", "text_len", "normalized", "source")
+
+    def __init__(self, translated: str, src: str, tgt: str, text_len: int, normalized: bool = False,
+                 source: str = SOURCE_API):
+        self.translated = translated
+        self.src = src
+        self.tgt = tgt
+        self.text_len = text_len
+        self.normalized = normalized
+        self.source = source
+
+
+class _ThreadConnection:
+    """某个线程独占的连接；只由该线程的 threading.local 强引用，线程结束后随之关闭"""
+
+    __slots__ = ("conn", "_finalizer", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._finalizer = weakref.finalize(self, conn.close)
+
+    def close(self) -> None:
+        try:
+            self._finalizer()
+        except sqlite3.Error:
+            pass
+
+
+class TranslationCacheStore:
+    """SQLite 翻译缓存；进程内 LRU 前置，写入和命中次数由后台线程批量写回"""
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 hit_flush_threshold: int = HIT_FLUSH_THRESHOLD,
+                 hit_flush_interval: float = HIT_FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self.memory_entries = max(1, int(memory_entries))
+        self.hit_flush_threshold = max(1, int(hit_flush_threshold))
+        self.hit_flush_interval = float(hit_flush_interval)
+        self._local = threading.local()
+        # 只弱引用各线程的连接，线程结束（如每批翻译新建的线程池退出）后连接即被关闭
+        self._connections: "weakref.WeakSet[_ThreadConnection]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._pending_rows: Dict[str, Tuple[str, str, int, str, str]] = {}
+        self._pending_hits: Dict[str, int] = {}
+        self._pending_total = 0
+        self._initialized = False
+        self._writer: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = False
+        # 写回串行化，避免后台线程与 flush() 同时提交
+        self._flush_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_reads = 0
+
+    # ---- 连接与初始化 ----
+
+    def _connect(self) -> sqlite3.Connection:
+        holder = getattr(self._local, "conn", None)
+        if holder is not None:
+            return holder.conn
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 自动提交模式，写入语句显式使用事务
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000.0,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            # 某些网络文件系统不支持 WAL，退回默认日志模式
+            pass
+        conn.execute("PRAGMA synchronous=NORMAL")
+        holder = _ThreadConnection(conn)
+        self._local.conn = holder
+        with self._lock:
+            self._connections.add(holder)
+            initialized = self._initialized
+        if not initialized:
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn: sqlite3.Connection) -> None:
+        conn.executescript(_SCHEMA)
+        # 旧版数据库没有来源列，已有译文视为接口翻译
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(translations)")}
+        if "source" not in columns:
+            try:
+                conn.execute("ALTER TABLE translations ADD COLUMN source TEXT NOT NULL DEFAULT 'api'")
+            except sqlite3.OperationalError:
+                # 另一进程已添加
+                pass
+        self._migrate_legacy_json(conn)
+        with self._lock:
+            self._initialized = True
+
+    def _migrate_legacy_json(self, conn: sqlite3.Connection) -> int:
+        """导入旧版 JSON 缓存（仅一次），导入后将原文件重命名为 .migrated"""
+        path = self.legacy_json_path
+        if not path or not os.path.exists(path):
+            return 0
+        row = conn.execute("SELECT value FROM meta WHERE name = 'json_migrated'").fetchone()
+        if row:
+            return 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            legacy = {}
+
+        rows = []
+        for key, item in (legacy.items() if isinstance(legacy, dict) else []):
+            if not isinstance(item, dict) or not item.get('translated'):
+                continue
+            rows.append((
+                key,
+                item.get('src', ''),
+                item.get('tgt', ''),
+                int(item.get('text_len', 0) or 0),
+                item['translated'],
+                item.get('ts') or _utc_now(),
+                int(item.get('hits', 0) or 0),
+            ))
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 另一进程可能已完成迁移
+            if conn.execute("SELECT 1 FROM meta WHERE name = 'json_migrated'").fetchone():
+                conn.execute("ROLLBACK")
+                return 0
+            conn.executemany(
+                "INSERT OR IGNORE INTO translations (key, src, tgt, text_len, translated, ts, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('json_migrated', ?)",
+                         (f"{_utc_now()} rows={len(rows)}",))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        try:
+            os.replace(path, path + '.migrated')
+        except OSError:
+            pass
+        return len(rows)
+
+    # ---- 进程内 LRU ----
+
+    def _remember(self, key: str, entry: _MemoryEntry) -> None:
+        """写入 LRU（调用方持有 self._lock）"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[_MemoryEntry]:
+        """先查 LRU，未命中时从数据库读取并放入 LRU"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+            # 已被 LRU 淘汰但尚未落盘的译文
+            pending = self._pending_rows.get(key)
+            if pending is not None:
+                entry = _MemoryEntry(pending[3], pending[0], pending[1], pending[2],
+                                     normalized=_is_user_source(pending[4]), source=pending[4])
+                self._remember(key, entry)
+                self.memory_hits += 1
+                return entry
+        row = self._connect().execute(
+            "SELECT translated, src, tgt, text_len, source FROM translations WHERE key = ?", (key,)
+        ).fetchone()
+        with self._lock:
+            self.disk_reads += 1
+            # 读取期间可能已有其它线程写入更新的译文
+            entry = self._memory.get(key)
+            if entry is None and row is not None:
+                entry = _MemoryEntry(row[0], row[1], row[2], int(row[3] or 0),
+                                     normalized=_is_user_source(row[4]), source=row[4] or SOURCE_API)
+                self._remember(key, entry)
+        return entry
+
+    # ---- 读写 ----
+
+    def get(self, key: str, normalize: Optional[Callable[[str], str]] = None) -> Optional[str]:
+        """
+        读取译文；命中时累计命中次数（后台批量写回）
+
+        Args:
+            key: 缓存键
+            normalize: 可选的译文规范化函数。每条译文在进程内只规范化一次，
+                结果有变化时覆盖缓存
+        """
+        entry = self._load(key)
+        if entry is None:
+            return None
+        self._record_hit(key)
+        if normalize is None or entry.normalized:
+            return entry.translated
+        try:
+            value = normalize(entry.translated)
+        except Exception:
+            return entry.translated
+        if value and value != entry.translated:
+            self.set(key, entry.src, entry.tgt, entry.text_len, value, normalized=True, source=entry.source)
+        else:
+            entry.normalized = True
+        return value or entry.translated
+
+    def get_entry(self, key: str) -> Optional[Dict]:
+        """读取完整缓存记录（先写回待写数据，保证与数据库一致）"""
+        self.flush()
+        row = self._connect().execute(
+            "SELECT src, tgt, text_len, translated, ts, hits, source FROM translations WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'src': row[0], 'tgt': row[1], 'text_len': row[2],
+            'translated': row[3], 'ts': row[4], 'hits': row[5], 'source': row[6],
+        }
+
+    def set(self, key: str, src: str, tgt: str, text_len: int, translated: str,
+            normalized: bool = False, source: str = SOURCE_API) -> None:
+        """写入或更新译文（保留已有命中次数）；立即对本进程可见，由后台线程落盘"""
+        self.set_many([(key, src, tgt, text_len, translated)], normalized=normalized, source=source)
+
+    def set_many(self, rows: Iterable[Tuple[str, str, str, int, str]], normalized: bool = False,
+                 source: str = SOURCE_API) -> None:
+        """批量写入 (key, src, tgt, text_len, translated)"""
+        count = 0
+        with self._lock:
+            for key, src, tgt, text_len, translated in rows:
+                # 内存中已有更可信来源的译文时不覆盖
+                if key in self._memory:
+                    current_source = self._memory[key].source
+                elif key in self._pending_rows:
+                    current_source = self._pending_rows[key][4]
+                else:
+                    current_source = None
+                if current_source is not None and _source_priority(current_source) > _source_priority(source):
+                    continue
+                self._remember(key, _MemoryEntry(translated, src, tgt, int(text_len), normalized, source))
+                self._pending_rows[key] = (src, tgt, int(text_len), translated, source)
+                count += 1
+        if count:
+            self._schedule()
+
+    def seed_many(self, rows: Iterable[Tuple[str, str, str, int, str]], source: str,
+                  policy: str = CONFLICT_PRIORITY, normalized: bool = False) -> Dict[str, int]:
+        """
+        批量预置译文（来自导入、快照或手动编辑），在一个事务中按冲突策略写入
+
+        Args:
+            rows: (key, src, tgt, text_len, translated)
+            source: 译文来源（SOURCE_*）
+            policy: 与已有译文不同时的处理方式（CONFLICT_*）
+            normalized: 译文是否已规范化（手动编辑的名称按原样保留）
+
+        Returns:
+            {"inserted", "updated", "unchanged", "kept"} 各自的条数
+        """
+        rows = list({row[0]: row for row in rows if row[0] and row[4]}.values())
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "kept": 0}
+        if not rows:
+            return counts
+        priority = _source_priority(source)
+        # 先写回待写译文，冲突判断以数据库为准
+        self.flush()
+        with self._flush_lock:
+            conn = self._connect()
+            writes: List[Tuple[str, str, str, int, str]] = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                existing: Dict[str, Tuple[str, str]] = {}
+                keys = [row[0] for row in rows]
+                for start in range(0, len(keys), SEED_QUERY_CHUNK):
+                    chunk = keys[start:start + SEED_QUERY_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    for key, translated, old_source in conn.execute(
+                        f"SELECT key, translated, source FROM translations WHERE key IN ({placeholders})", chunk
+                    ):
+                        existing[key] = (translated, old_source)
+                for row in rows:
+                    current = existing.get(row[0])
+                    if current is None:
+                        counts["inserted"] += 1
+                        writes.append(row)
+                        continue
+                    old_translated, old_source = current
+                    outranks = priority >= _source_priority(old_source)
+                    if old_translated == row[4]:
+                        counts["unchanged"] += 1
+                        # 译文相同但来源更可信时只更新来源
+                        if priority > _source_priority(old_source):
+                            writes.append(row)
+                    elif policy == CONFLICT_OVERWRITE or (policy == CONFLICT_PRIORITY and outranks):
+                        counts["updated"] += 1
+                        writes.append(row)
+                    else:
+                        counts["kept"] += 1
+                now = _utc_now()
+                conn.executemany(_UPSERT_SQL, [(key, src, tgt, int(text_len), translated, now, source)
+                                               for key, src, tgt, text_len, translated in writes])
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                raise
+        with self._lock:
+            for key, src, tgt, text_len, translated in writes:
+                self._remember(key, _MemoryEntry(translated, src, tgt, int(text_len), normalized, source))
+        return counts
+
+    def get_meta(self, name: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str) -> None:
+        self._connect().execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    # ---- 后台写回 ----
+
+    def _record_hit(self, key: str) -> None:
+        with self._lock:
+            self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+            self._pending_total += 1
+            due = self._pending_total >= self.hit_flush_threshold
+        if due:
+            self._schedule()
+        else:
+            self._ensure_writer()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._stopping or (self._writer is not None and self._writer.is_alive()):
+                return
+            self._writer = threading.Thread(target=self._writer_loop, name="translation-cache-writer",
+                                            daemon=True)
+            self._writer.start()
+
+    def _schedule(self) -> None:
+        """唤醒后台线程尽快写回"""
+        self._ensure_writer()
+        self._wake.set()
+
+    def _writer_loop(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.hit_flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # 数据库暂时不可写（如被其它进程长时间锁定），下一轮重试
+                pass
+
+    def flush(self) -> int:
+        """将待写译文和累计命中次数在一个事务中写回数据库，返回写回的记录数"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending_rows = self._pending_rows, {}
+                hits, self._pending_hits = self._pending_hits, {}
+                self._pending_total = 0
+            if not rows and not hits:
+                return 0
+            now = _utc_now()
+            conn = self._connect()
+            kept: List[str] = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                if rows:
+                    conn.executemany(_WRITE_BEHIND_UPSERT_SQL,
+                                     [(key, src, tgt, text_len, translated, now, source)
+                                      for key, (src, tgt, text_len, translated, source) in rows.items()])
+                    kept = self._find_kept_rows(conn, rows)
+                if hits:
+                    conn.executemany("UPDATE translations SET hits = hits + ? WHERE key = ?",
+                                     [(count, key) for key, count in hits.items()])
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                # 写回失败时放回内存（不覆盖期间新写入的译文），下次再试
+                with self._lock:
+                    for key, row in rows.items():
+                        self._pending_rows.setdefault(key, row)
+                    for key, count in hits.items():
+                        self._pending_hits[key] = self._pending_hits.get(key, 0) + count
+                        self._pending_total += count
+                raise
+            if kept:
+                # 数据库保留了更可信的译文：丢弃内存中被拒绝的旧值，下次读取时从数据库加载
+                with self._lock:
+                    for key in kept:
+                        entry = self._memory.get(key)
+                        row = rows[key]
+                        if entry is not None and entry.translated == row[3] and entry.source == row[4]:
+                            del self._memory[key]
+            return len(rows) + len(hits)
+
+    @staticmethod
+    def _find_kept_rows(conn: sqlite3.Connection, rows: Dict[str, Tuple[str, str, int, str, str]]) -> List[str]:
+        """找出因已有记录来源更可信而未写入的待写译文"""
+        top = max(SOURCE_PRIORITY.values())
+        keys = [key for key, row in rows.items() if _source_priority(row[4]) < top]
+        kept = []
+        for start in range(0, len(keys), SEED_QUERY_CHUNK):
+            chunk = keys[start:start + SEED_QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for key, source in conn.execute(
+                f"SELECT key, source FROM translations WHERE key IN ({placeholders})", chunk
+            ):
+                if _source_priority(source) > _source_priority(rows[key][4]):
+                    kept.append(key)
+        return kept
+
+    def flush_hits(self) -> int:
+        """兼容旧接口：立即写回（含待写译文）"""
+        try:
+            return self.flush()
+        except sqlite3.Error:
+            return 0
+
+    # ---- 维护 ----
+
+    def stats(self) -> Dict:
+        self.flush_hits()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM translations"
+        ).fetchone()
+        sources = dict(conn.execute("SELECT source, COUNT(*) FROM translations GROUP BY source").fetchall())
+        with self._lock:
+            memory = len(self._memory)
+        return {
+            'entries': int(row[0]),
+            'hits': int(row[1]),
+            'sources': sources,
+            'memory_entries': memory,
+            'memory_hits': self.memory_hits,
+            'disk_reads': self.disk_reads,
+        }
+
+    def clear_memory(self) -> None:
+        """清空进程内 LRU（例如其它进程修改了缓存后）"""
+        self.flush_hits()
+        with self._lock:
+            self._memory.clear()
+
+    def close(self) -> None:
+        """停止后台线程，写回待写数据并关闭全部连接"""
+        self._stopping = True
+        self._wake.set()
+        writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join(timeout=5)
+        self.flush_hits()
+        with self._lock:
+            holders, self._connections = list(self._connections), weakref.WeakSet()
+        for holder in holders:
+            holder.close()
+        self._local = threading.local()
+        self._stopping = False
+        self._writer = None
+
+
+_stores: Dict[str, TranslationCacheStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_translation_cache_store(db_path: str, legacy_json_path: Optional[str] = None) -> TranslationCacheStore:
+    """按数据库路径返回进程级共享的存储实例，进程退出时写回命中次数"""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = TranslationCacheStore(db_path, legacy_json_path)
+            _stores[db_path] = store
+        return store
+
+
+@atexit.register
+def _close_all_stores() -> None:
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.close()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译缓存预置
+把已经有英文名的中文名称（Excel 导入的英文名列、自动保存快照、手动编辑）批量写入翻译缓存，
+并记录来源；同一名称在其它文件或工作区再次出现时直接命中缓存，不再调用接口计费。
+与已有译文冲突时按来源可信度处理（见 translation_cache_store.CONFLICT_*）。
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.translation_cache_store import (
+    CONFLICT_PRIORITY,
+    SOURCE_IMPORT,
+    SOURCE_MANUAL,
+    SOURCE_SNAPSHOT,
+    get_translation_cache_store,
+)
+from src.utils.translation_usage import CACHE_DB_PATH, CACHE_PATH, seed_cache
+
+# 保存实体英文名的列表字段
+ENTITY_LIST_FIELDS = ("top_level_entities", "subsidiaries", "all_entities")
+
+_CJK = re.compile(r"[\u3400-\u9fff]")
+_EMPTY_VALUES = {"nan", "none", "null"}
+
+
+def is_seedable_pair(name: object, english: object) -> bool:
+    """原文含中文、译文非空且不含中文时才可作为中译英缓存"""
+    if not isinstance(name, str) or not isinstance(english, str):
+        return False
+    name, english = name.strip(), english.strip()
+    if not name or not english or english.lower() in _EMPTY_VALUES:
+        return False
+    return bool(_CJK.search(name)) and not _CJK.search(english)
+
+
+def pairs_from_equity_data(data: Optional[Dict]) -> List[Tuple[str, str]]:
+    """从股权数据的实体列表中收集 (中文名, 英文名)"""
+    pairs: List[Tuple[str, str]] = []
+    if not isinstance(data, dict):
+        return pairs
+    for field in ENTITY_LIST_FIELDS:
+        for entity in data.get(field) or []:
+            if isinstance(entity, dict):
+                pairs.append((entity.get("name"), entity.get("english_name")))
+    return pairs
+
+
+def seed_translation_pairs(pairs: Iterable[Tuple[str, str]], source: str,
+                           policy: str = CONFLICT_PRIORITY) -> Dict[str, int]:
+    """
+    过滤并批量写入 (中文名, 英文名)；同一中文名出现多次时以最后一次为准
+
+    预置的英文名都来自用户的数据（导入文件、快照、手动编辑），按原样保存并标记为已规范化，
+    读取时不再经过英文名称格式化（否则 "HSBC Holdings Limited" 会被改写为 "Hsbc Holdings Limited"）
+    """
+    cleaned: Dict[str, str] = {}
+    for name, english in pairs:
+        if is_seedable_pair(name, english):
+            cleaned[name.strip()] = english.strip()
+    return seed_cache(cleaned.items(), 'zh', 'en', source=source, policy=policy, normalized=True)
+
+
+def seed_from_import(pairs: Iterable[Tuple[str, str]]) -> Dict[str, int]:
+    """Excel 导入后调用：预置导入文件中的英文名列"""
+    return seed_translation_pairs(pairs, SOURCE_IMPORT)
+
+
+def seed_manual_edit(name: str, english: str) -> Dict[str, int]:
+    """手动编辑英文名后调用：手动结果优先于其它来源"""
+    return seed_translation_pairs([(name, english)], SOURCE_MANUAL)
+
+
+def seed_from_snapshot(snapshot: Optional[Dict]) -> Dict[str, int]:
+    """自动保存或恢复快照时调用：预置快照中实体的英文名"""
+    data = snapshot.get("equity_data") if isinstance(snapshot, dict) else None
+    return seed_translation_pairs(pairs_from_equity_data(data), SOURCE_SNAPSHOT)
+
+
+def seed_from_autosaves(directory: Optional[Path] = None) -> Dict[str, int]:
+    """
+    扫描所有工作区的自动保存快照并预置缓存；已处理且未变化的文件（按修改时间和大小判断）跳过
+
+    Returns:
+        各项条数合计，另含 "files"（本次处理的快照文件数）
+    """
+    if directory is None:
+        from src.utils.state_persistence import AUTOSAVE_DIR
+        directory = AUTOSAVE_DIR
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "kept": 0, "files": 0}
+    directory = Path(directory)
+    if not directory.exists():
+        return totals
+
+    store = get_translation_cache_store(CACHE_DB_PATH, legacy_json_path=CACHE_PATH)
+    for path in sorted(directory.rglob("*.json")):
+        if path.name.lower() == "latest.json":
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        marker_name = f"snapshot_seeded:{path.relative_to(directory).as_posix()}"
+        marker = f"{stat.st_mtime_ns}:{stat.st_size}"
+        if store.get_meta(marker_name) == marker:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        counts = seed_from_snapshot(snapshot)
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+        totals["files"] += 1
+        store.set_meta(marker_name, marker)
+    return totals
+
+
+_background_started = False
+_background_lock = threading.Lock()
+
+
+def seed_autosaves_in_background(directory: Optional[Path] = None) -> bool:
+    """每个进程只执行一次：在后台线程中扫描自动保存快照预置缓存，返回本次是否启动"""
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return False
+        _background_started = True
+
+    def _run() -> None:
+        try:
+            seed_from_autosaves(directory)
+        except (sqlite3.Error, OSError):
+            # 缓存暂时不可写时跳过，下次启动再试
+            pass
+
+    threading.Thread(target=_run, name="translation-seed", daemon=True).start()
+    return True
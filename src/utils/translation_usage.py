@@ -2,19 +2,23 @@ import os
 import json
 import hashlib
 from datetime import datetime
-from typing import Optional, Tuple, Dict
+from typing import Callable, Iterable, Optional, Tuple, Dict
 
-import portalocker  # type: ignore[reportMissingImports]
+from src.utils.quota_ledger import QuotaLedger, QuotaReservation, get_quota_ledger
+from src.utils.translation_cache_store import (
+    CONFLICT_PRIORITY,
+    TranslationCacheStore,
+    get_translation_cache_store,
+)
 
 
 USER_DATA_DIR = os.path.join(os.getcwd(), 'user_data')
+# 旧版整文件 JSON 缓存，首次打开 SQLite 缓存时自动导入
 CACHE_PATH = os.path.join(USER_DATA_DIR, 'translation_cache.json')
+CACHE_DB_PATH = os.path.join(USER_DATA_DIR, 'translation_cache.sqlite3')
+# 旧版整文件 JSON 用量记录，首次打开额度账本时自动导入
 USAGE_PATH = os.path.join(USER_DATA_DIR, 'translation_usage.json')
-
-
-def _ensure_dirs() -> None:
-    if not os.path.exists(USER_DATA_DIR):
-        os.makedirs(USER_DATA_DIR, exist_ok=True)
+USAGE_DB_PATH = os.path.join(USER_DATA_DIR, 'translation_usage.sqlite3')
 
 
 def normalize_lang(code: str) -> str:
@@ -28,66 +32,58 @@ def build_cache_key(text: str, src: str, tgt: str) -> str:
     return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
 
 
-def _locked_load(path: str) -> dict:
-    _ensure_dirs()
-    if not os.path.exists(path):
-        return {}
-    try:
-        with portalocker.Lock(path, timeout=5, flags=portalocker.LOCK_SH) as fh:
-            try:
-                fh.seek(0)
-                return json.load(fh)
-            except json.JSONDecodeError:
-                return {}
-    except (LOCK_EXCEPTION, OSError):
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-
-
-def _locked_save(path: str, data: dict) -> None:
-    _ensure_dirs()
-    with portalocker.Lock(path, timeout=5, flags=portalocker.LOCK_EX, mode='a+') as fh:
-        fh.seek(0)
-        fh.truncate()
-        json.dump(data, fh, ensure_ascii=False, indent=2)
-        fh.flush()
-        try:
-            os.fsync(fh.fileno())
-        except OSError:
-            pass
-
-
-def get_cached(text: str, src: str, tgt: str) -> Optional[str]:
+def _cache_store() -> TranslationCacheStore:
+    return get_translation_cache_store(CACHE_DB_PATH, legacy_json_path=CACHE_PATH)
+
+
+def get_cached(text: str, src: str, tgt: str,
+               normalize: Optional[Callable[[str], str]] = None) -> Optional[str]:
+    """
+    查询翻译缓存：先查进程内 LRU，未命中再查 SQLite；命中次数由后台线程批量写回
+
+    normalize 为可选的译文规范化函数，每条译文在进程内只执行一次，结果有变化时回写缓存
+    """
     key = build_cache_key(text, src, tgt)
-    cache = _locked_load(CACHE_PATH)
-    item = cache.get(key)
-    if not item:
-        return None
-    # 更新命中次数但不强制写盘以减少IO；在写入时会覆盖
-    try:
-        item['hits'] = int(item.get('hits', 0)) + 1
-        cache[key] = item
-        _locked_save(CACHE_PATH, cache)
-    except Exception:
-        pass
-    return item.get('translated')
+    return _cache_store().get(key, normalize=normalize)
 
 
-def set_cached(text: str, src: str, tgt: str, translated: str) -> None:
+def set_cached(text: str, src: str, tgt: str, translated: str, normalized: bool = False) -> None:
+    """写入翻译缓存（立即对本进程可见，后台落盘）；normalized 表示译文已规范化"""
     key = build_cache_key(text, src, tgt)
-    cache = _locked_load(CACHE_PATH)
-    cache[key] = {
-        'src': normalize_lang(src),
-        'tgt': normalize_lang(tgt),
-        'text_len': len(text),
-        'translated': translated,
-        'ts': datetime.utcnow().isoformat() + 'Z',
-        'hits': int(cache.get(key, {}).get('hits', 0)),
-    }
-    _locked_save(CACHE_PATH, cache)
+    _cache_store().set(key, normalize_lang(src), normalize_lang(tgt), len(text), translated,
+                       normalized=normalized)
+
+
+def seed_cache(pairs: Iterable[Tuple[str, str]], src: str, tgt: str, source: str,
+               policy: str = CONFLICT_PRIORITY, normalized: bool = False) -> Dict[str, int]:
+    """
+    批量预置 (原文, 译文) 对，在一个事务中写入并记录来源
+
+    Args:
+        pairs: (原文, 译文) 列表
+        source: 译文来源（translation_cache_store.SOURCE_*）
+        policy: 与已有译文冲突时的处理方式（translation_cache_store.CONFLICT_*）
+        normalized: 译文是否已规范化
+
+    Returns:
+        {"inserted", "updated", "unchanged", "kept"} 各自的条数
+    """
+    src_lang, tgt_lang = normalize_lang(src), normalize_lang(tgt)
+    rows = [
+        (build_cache_key(text, src, tgt), src_lang, tgt_lang, len(text), translated)
+        for text, translated in pairs
+        if text and translated
+    ]
+    return _cache_store().seed_many(rows, source=source, policy=policy, normalized=normalized)
+
+
+def flush_cache_hits() -> int:
+    """立即写回待写译文和累计的命中次数（后台线程和进程退出时也会自动写回）"""
+    return _cache_store().flush_hits()
+
+
+def get_cache_stats() -> Dict:
+    return _cache_store().stats()
 
 
 def get_month_key(dt: Optional[datetime] = None) -> str:
@@ -95,57 +91,42 @@ def get_month_key(dt: Optional[datetime] = None) -> str:
     return d.strftime('%Y-%m')
 
 
-def ensure_month_record(limit_default: int = 50000) -> Dict:
-    usage = _locked_load(USAGE_PATH)
-    month = get_month_key()
-    if usage.get('month') != month:
-        usage = {
-            'month': month,
-            'used': 0,
-            'limit': int(limit_default),
-            'history': [],
-        }
-        _locked_save(USAGE_PATH, usage)
-    return usage
+def _quota_ledger() -> QuotaLedger:
+    return get_quota_ledger(USAGE_DB_PATH, legacy_json_path=USAGE_PATH)
 
 
 def get_monthly_usage() -> Dict:
-    usage = ensure_month_record()
-    return {'month': usage.get('month'), 'used': int(usage.get('used', 0)), 'limit': int(usage.get('limit', 0))}
+    usage = _quota_ledger().usage()
+    return {'month': usage['month'], 'used': usage['used'], 'limit': usage['limit']}
 
 
 def check_and_consume(chars: int) -> Tuple[bool, Dict]:
+    """原子扣减额度（单条 UPDATE，校验上限），返回 (是否成功, 用量信息)"""
     if chars < 0:
         chars = 0
-    usage = ensure_month_record()
-    remaining = int(usage['limit']) - int(usage['used'])
-    if remaining < chars:
-        return False, {'used': int(usage['used']), 'limit': int(usage['limit']), 'remaining': remaining}
-    usage['used'] = int(usage['used']) + int(chars)
-    _locked_save(USAGE_PATH, usage)
-    return True, {'used': int(usage['used']), 'limit': int(usage['limit']), 'remaining': int(usage['limit']) - int(usage['used'])}
+    ledger = _quota_ledger()
+    allowed = ledger.consume(chars)
+    usage = ledger.usage()
+    return allowed, {'used': usage['used'], 'limit': usage['limit'], 'remaining': usage['remaining']}
+
+
+def reserve_quota(chars: int, allow_partial: bool = False) -> Optional[QuotaReservation]:
+    """
+    为一批翻译预留额度；批次结束时调用 release()（或使用 with 语句）退还未用部分
+
+    额度不足时返回 None；allow_partial 为 True 时预留全部剩余额度
+    """
+    return _quota_ledger().reserve(chars, allow_partial=allow_partial)
 
 
 def refund(chars: int) -> None:
     if chars <= 0:
         return
-    usage = ensure_month_record()
-    usage['used'] = max(0, int(usage['used']) - int(chars))
-    _locked_save(USAGE_PATH, usage)
+    _quota_ledger().refund(chars)
 
 
 def set_month_limit(new_limit: int, actor: str = 'admin', reason: str = '') -> Dict:
-    usage = ensure_month_record()
-    old = int(usage['limit'])
-    usage['limit'] = max(0, int(new_limit))
-    usage.setdefault('history', []).append({
-        'ts': datetime.utcnow().isoformat() + 'Z',
-        'actor': actor,
-        'delta': int(usage['limit']) - old,
-        'reason': reason or 'manual adjust',
-    })
-    _locked_save(USAGE_PATH, usage)
-    return {'old': old, 'new': int(usage['limit'])}
+    return _quota_ledger().set_limit(new_limit, actor=actor, reason=reason)
 
 
 def get_admin_password() -> str:
@@ -167,5 +148,3 @@ def get_admin_password() -> str:
     # 默认密码
     return 'Noah2025@Ali'
 
-
-LOCK_EXCEPTION = getattr(portalocker, "LockException", Exception)
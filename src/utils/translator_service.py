@@ -1,46 +1,94 @@
-from typing import Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from src.utils.quota_ledger import QuotaReservation
 from src.utils.translation_usage import (
     get_cached,
     set_cached,
-    check_and_consume,
-    refund,
+    get_monthly_usage,
+    reserve_quota,
+)
+from src.utils.alicloud_translator import (
+    MAX_PACK_CHARS,
+    MAX_PACK_ITEM_CHARS,
+    MAX_PACK_ITEMS,
+    translate_batch_with_alicloud,
+    translate_with_alicloud,
+)
+from src.utils.segment_translator import (
+    SEGMENT_TRANSLATION_ENABLED,
+    compose_company_name,
+    segment_company_name,
 )
-from src.utils.alicloud_translator import translate_with_alicloud
 
 
 class QuotaExceededError(Exception):
     pass
 
 
+def _english_formatter() -> Optional[Callable[[str], str]]:
+    try:
+        from src.utils.display_formatters import format_english_company_name
+        return format_english_company_name
+    except Exception:
+        return None
+
+
+def target_formatter(tgt: str) -> Optional[Callable[[str], str]]:
+    """目标语言对应的译文规范化函数（英文为公司名称格式化，其它语言不处理）；读取缓存时需传入同一函数"""
+    return _english_formatter() if tgt == 'en' else None
+
+
 def _translate_single_chunk(text: str, src: str, tgt: str) -> Tuple[bool, str, str]:
     return translate_with_alicloud(text, src, tgt)
 
 
-def translate_text(text: str, src: str, tgt: str, scene: str = "general") -> str:
-    safe_text = text or ""
-    if not safe_text:
-        return safe_text
+def _quota_exceeded() -> QuotaExceededError:
+    usage = get_monthly_usage()
+    return QuotaExceededError(
+        f"monthly quota exceeded: used={usage.get('used')}, limit={usage.get('limit')}"
+    )
 
-    cached = get_cached(safe_text, src, tgt)
-    if cached is not None:
-        if tgt == 'en' and cached:
-            try:
-                from src.utils.display_formatters import format_english_company_name
-                formatted_cached = format_english_company_name(cached)
-                if formatted_cached != cached:
-                    set_cached(safe_text, src, tgt, formatted_cached)
-                return formatted_cached
-            except Exception:
-                return cached
-        return cached
 
+def _format_and_cache(text: str, src: str, tgt: str, translated: str,
+                      formatter: Optional[Callable[[str], str]]) -> str:
+    # 如果翻译为英文，应用公司名称格式化
+    normalized = False
+    if formatter is not None and translated:
+        try:
+            translated = formatter(translated)
+            normalized = True
+        except Exception:
+            # 如果格式化失败，继续使用原始翻译结果
+            pass
+    set_cached(text, src, tgt, translated, normalized=normalized)
+    return translated
+
+
+def _segments(text: str, src: str, tgt: str) -> Optional[Tuple[str, str, str]]:
+    """中译英的公司名称拆为 (地区译文, 主体原文, 组织形式译文)，不适用时返回 None"""
+    if not SEGMENT_TRANSLATION_ENABLED or src != 'zh' or tgt != 'en':
+        return None
+    return segment_company_name(text)
+
+
+def billable_text(text: str, src: str, tgt: str) -> str:
+    """实际提交给接口翻译（并计费）的文本：可分段的公司名称为其主体，否则为原文"""
+    segments = _segments(text, src, tgt)
+    return segments[1] if segments is not None else text
+
+
+def _compose_and_cache(text: str, src: str, tgt: str, segments: Tuple[str, str, str], stem_en: str) -> str:
+    region_en, _, suffix_en = segments
+    composed = compose_company_name(region_en, stem_en, suffix_en)
+    set_cached(text, src, tgt, composed, normalized=True)
+    return composed
+
+
+def _translate_uncached(safe_text: str, src: str, tgt: str, reservation: QuotaReservation) -> str:
+    """从预留额度中扣除后逐段调用接口翻译，失败时把额度还回预留"""
     char_count = len(safe_text)
-    allowed, info = check_and_consume(char_count)
-    if not allowed:
-        raise QuotaExceededError(
-            f"monthly quota exceeded: used={info.get('used')}, limit={info.get('limit')}"
-        )
+    if not reservation.take(char_count):
+        raise _quota_exceeded()
 
     max_len = 5000
     chunks = [safe_text[i : i + max_len] for i in range(0, len(safe_text), max_len)]
@@ -51,19 +99,163 @@ def translate_text(text: str, src: str, tgt: str, scene: str = "general") -> str
             if not ok or not translated:
                 raise RuntimeError(err or "translate failed")
             results.append(translated)
-        final_text = "".join(results)
-        
-        # 如果翻译为英文，应用公司名称格式化
-        if tgt == 'en' and final_text:
-            try:
-                from src.utils.display_formatters import format_english_company_name
-                final_text = format_english_company_name(final_text)
-            except Exception:
-                # 如果格式化失败，继续使用原始翻译结果
-                pass
-        
-        set_cached(safe_text, src, tgt, final_text)
-        return final_text
+        formatter = target_formatter(tgt)
+        return _format_and_cache(safe_text, src, tgt, "".join(results), formatter)
     except Exception:
-        refund(char_count)
+        reservation.give_back(char_count)
         raise
+
+
+def translate_text(text: str, src: str, tgt: str, scene: str = "general",
+                   reservation: Optional[QuotaReservation] = None) -> str:
+    """
+    翻译单条文本（先查缓存）
+
+    reservation 为批次预留的额度；不传时为本次调用单独预留，结束后退还未用部分
+    """
+    safe_text = text or ""
+    if not safe_text:
+        return safe_text
+
+    # 英文结果在缓存层只格式化一次，之后命中直接返回已格式化的名称
+    cached = get_cached(safe_text, src, tgt, normalize=target_formatter(tgt))
+    if cached is not None:
+        return cached
+
+    # 地区和组织形式查本地词典，只有主体调用接口（主体译文单独缓存，供同主体的其它名称复用）
+    segments = _segments(safe_text, src, tgt)
+    if segments is not None:
+        stem_en = translate_text(segments[1], src, tgt, scene=scene, reservation=reservation)
+        return _compose_and_cache(safe_text, src, tgt, segments, stem_en)
+
+    if reservation is not None:
+        return _translate_uncached(safe_text, src, tgt, reservation)
+    own = reserve_quota(len(safe_text))
+    if own is None:
+        raise _quota_exceeded()
+    with own:
+        return _translate_uncached(safe_text, src, tgt, own)
+
+
+def pack_texts(texts: Iterable[str], max_items: int = MAX_PACK_ITEMS,
+               max_chars: int = MAX_PACK_CHARS) -> List[List[str]]:
+    """按条数和总字符数上限把文本分组；超长文本单独成组（走单条翻译）"""
+    packs: List[List[str]] = []
+    current: List[str] = []
+    current_chars = 0
+    for text in texts:
+        if len(text) > MAX_PACK_ITEM_CHARS:
+            packs.append([text])
+            continue
+        if current and (len(current) >= max_items or current_chars + len(text) > max_chars):
+            packs.append(current)
+            current, current_chars = [], 0
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        packs.append(current)
+    return packs
+
+
+def translate_texts(texts: Iterable[str], src: str, tgt: str, retry_single: bool = True,
+                    reservation: Optional[QuotaReservation] = None) -> Dict[str, str]:
+    """
+    打包翻译多条文本：一次请求翻译一组名称，按条校验结果、扣减额度并写入缓存
+
+    - 已缓存的文本不发请求；中译英的公司名称只翻译主体，地区和组织形式查本地词典后组合；
+    - 额度从 reservation 中扣除；不传时按未缓存文本的总字符数预留一次（不足时预留全部剩余），
+      结束后退还未用部分；
+    - 整组失败或单条缺失时额度还回预留；retry_single 为 True 时缺失的条目随即改走单条翻译，
+      否则不包含在结果中由调用方重试；
+    - 额度不足时抛出 QuotaExceededError（已完成的组保留在缓存中）。
+
+    Returns:
+        Dict[str, str]: 原文 -> 译文（翻译失败的条目不包含在结果中）
+    """
+    formatter = target_formatter(tgt)
+    results: Dict[str, str] = {}
+    composed: Dict[str, Tuple[str, str, str]] = {}
+    misses: List[str] = []
+    requested = list(dict.fromkeys(t for t in texts if t))
+    for text in requested:
+        cached = get_cached(text, src, tgt, normalize=formatter)
+        if cached is not None:
+            results[text] = cached
+            continue
+        segments = _segments(text, src, tgt)
+        if segments is not None:
+            composed[text] = segments
+        else:
+            misses.append(text)
+
+    # 待组合名称的主体：已缓存的直接使用，其余与整名一起打包翻译
+    stems: Dict[str, str] = {}
+    for stem in dict.fromkeys(segments[1] for segments in composed.values()):
+        cached = get_cached(stem, src, tgt, normalize=formatter)
+        if cached is not None:
+            stems[stem] = cached
+        elif stem not in results and stem not in misses:
+            misses.append(stem)
+
+    def _compose_results() -> None:
+        for text, segments in composed.items():
+            stem_en = stems.get(segments[1]) or results.get(segments[1])
+            if stem_en:
+                results[text] = _compose_and_cache(text, src, tgt, segments, stem_en)
+
+    if not misses:
+        _compose_results()
+        return results
+
+    own: Optional[QuotaReservation] = None
+    if reservation is None:
+        own = reserve_quota(sum(len(text) for text in misses), allow_partial=True)
+        if own is None:
+            raise _quota_exceeded()
+        reservation = own
+
+    try:
+        for pack in pack_texts(misses):
+            if len(pack) == 1:
+                try:
+                    results[pack[0]] = _translate_uncached(pack[0], src, tgt, reservation)
+                except QuotaExceededError:
+                    raise
+                except Exception:
+                    pass
+                continue
+
+            char_count = sum(len(text) for text in pack)
+            if not reservation.take(char_count):
+                raise _quota_exceeded()
+            try:
+                ok, translations, err = translate_batch_with_alicloud(pack, src, tgt)
+            except Exception as exc:
+                ok, translations, err = False, None, str(exc)
+            if not ok:
+                reservation.give_back(char_count)
+                raise RuntimeError(err or "batch translate failed")
+
+            failed_items: List[str] = []
+            for text, translated in zip(pack, translations):
+                if translated:
+                    results[text] = _format_and_cache(text, src, tgt, translated, formatter)
+                else:
+                    failed_items.append(text)
+
+            if failed_items:
+                reservation.give_back(sum(len(text) for text in failed_items))
+            if retry_single:
+                for text in failed_items:
+                    try:
+                        results[text] = _translate_uncached(text, src, tgt, reservation)
+                    except QuotaExceededError:
+                        raise
+                    except Exception:
+                        pass
+        _compose_results()
+    finally:
+        if own is not None:
+            own.release()
+    # 仅为组合而翻译的主体不出现在结果中
+    return {text: results[text] for text in requested if text in results}
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+vis-network 库的加载方式
+导出的 HTML 可以内联随包分发的 vis-network、引用同目录共享文件、
+从 Streamlit 静态路径加载，或回退到 CDN（离线环境下不可用）。
+"""
+
+import hashlib
+import os
+import shutil
+from functools import lru_cache
+from typing import Optional
+
+VISJS_VERSION = "9.1.6"
+VISJS_FILE_NAME = "vis-network.min.js"
+VISJS_CDN_URL = f"https://unpkg.com/vis-network@{VISJS_VERSION}/dist/vis-network.min.js"
+
+# 随包分发的库文件位置（由 scripts/fetch_visjs_library.py 下载）
+VENDOR_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "visjs", "vendor"
+)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Streamlit 开启 server.enableStaticServing 后，<应用目录>/static 下的文件通过 /app/static/ 访问
+STREAMLIT_STATIC_DIR = os.path.join(PROJECT_ROOT, "static")
+STREAMLIT_STATIC_URL = f"/app/static/{VISJS_FILE_NAME}"
+
+# 加载方式
+LIBRARY_MODE_INLINE = "inline"    # 内联到 HTML，单文件离线可用
+LIBRARY_MODE_SIBLING = "sibling"  # 引用与 HTML 同目录的 vis-network.min.js，多个图表共享
+LIBRARY_MODE_STATIC = "static"    # 从 Streamlit 静态路径加载
+LIBRARY_MODE_CDN = "cdn"          # 从 unpkg 加载（原有方式）
+LIBRARY_MODES = (LIBRARY_MODE_INLINE, LIBRARY_MODE_SIBLING, LIBRARY_MODE_STATIC, LIBRARY_MODE_CDN)
+DEFAULT_LIBRARY_MODE = LIBRARY_MODE_INLINE
+
+
+def vendored_library_path() -> str:
+    return os.path.join(VENDOR_DIR, VISJS_FILE_NAME)
+
+
+def has_vendored_library() -> bool:
+    return os.path.isfile(vendored_library_path())
+
+
+@lru_cache(maxsize=1)
+def load_vendored_library() -> str:
+    """读取随包分发的 vis-network（每个进程只读取一次）"""
+    with open(vendored_library_path(), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def vendored_library_digest() -> str:
+    """随包库文件的 SHA-256（每个进程只计算一次）"""
+    return _file_digest(vendored_library_path())
+
+
+def resolve_library_mode(mode: Optional[str] = None) -> str:
+    """规范化加载方式；随包库文件缺失时回退到 CDN"""
+    mode = mode or DEFAULT_LIBRARY_MODE
+    if mode not in LIBRARY_MODES:
+        raise ValueError(f"未知的 vis-network 加载方式: {mode}")
+    if mode != LIBRARY_MODE_CDN and not has_vendored_library():
+        return LIBRARY_MODE_CDN
+    return mode
+
+
+def library_script_tag(mode: Optional[str] = None) -> str:
+    """返回加载 vis-network 的 <script> 标签"""
+    mode = resolve_library_mode(mode)
+    if mode == LIBRARY_MODE_INLINE:
+        # 防止库源码中的 "</script" 提前结束标签
+        source = load_vendored_library().replace("</script", "<\\/script")
+        return f'<script type="text/javascript">\n{source}\n    </script>'
+    if mode == LIBRARY_MODE_SIBLING:
+        src = VISJS_FILE_NAME
+    elif mode == LIBRARY_MODE_STATIC:
+        src = STREAMLIT_STATIC_URL
+    else:
+        src = VISJS_CDN_URL
+    return f'<script type="text/javascript" src="{src}"></script>'
+
+
+def _copy_if_changed(target_dir: str) -> Optional[str]:
+    """将随包库文件复制到目标目录（已存在且内容一致时跳过），返回目标路径"""
+    if not has_vendored_library():
+        return None
+    source = vendored_library_path()
+    target = os.path.join(target_dir, VISJS_FILE_NAME)
+    try:
+        if not (os.path.isfile(target) and _file_digest(target) == vendored_library_digest()):
+            os.makedirs(target_dir, exist_ok=True)
+            shutil.copyfile(source, target)
+    except OSError:
+        return None
+    return target
+
+
+def write_sibling_library(target_dir: str) -> Optional[str]:
+    """在 HTML 所在目录放置共享的 vis-network.min.js，供 sibling 方式引用"""
+    return _copy_if_changed(target_dir)
+
+
+def ensure_streamlit_static_library() -> bool:
+    """
+    确保 Streamlit 静态目录中有 vis-network.min.js
+
+    Returns:
+        bool: 静态服务已开启且库文件就绪时返回 True
+    """
+    try:
+        import streamlit as st
+        if not st.get_option("server.enableStaticServing"):
+            return False
+    except Exception:
+        return False
+    return _copy_if_changed(STREAMLIT_STATIC_DIR) is not None